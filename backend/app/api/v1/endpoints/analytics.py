@@ -9,13 +9,14 @@ from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import DateTime, Interval, cast, func, literal, select
 
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.video import Video
-from app.models.post import Post, PostStatus as PostStatusEnum
-from app.models.analytics import Analytics
+from app.models.post import Post
+from app.models.analytics import AnalyticsDailyRollup
+from app.services.analytics_rollups import METRICS
 from app.models.pattern import Pattern
 
 router = APIRouter()
@@ -168,17 +169,21 @@ async def get_dashboard_analytics(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Build base query
-    query = db.query(Analytics).join(Post).join(Video).filter(
-        Video.user_id == current_user.id,
-        Post.published_at >= datetime.combine(start_date, datetime.min.time()),
-        Post.published_at <= datetime.combine(end_date, datetime.max.time()),
+    # Totals and platform breakdown come from the daily rollups: one row per
+    # video/platform/day rather than one per post
+    rollups = db.query(
+        AnalyticsDailyRollup.platform,
+        *(func.coalesce(func.sum(getattr(AnalyticsDailyRollup, name)), 0).label(name) for name in METRICS),
+    ).filter(
+        AnalyticsDailyRollup.user_id == current_user.id,
+        AnalyticsDailyRollup.day >= start_date,
+        AnalyticsDailyRollup.day <= end_date,
     )
     
     if platform:
-        query = query.filter(Post.platform == platform)
+        rollups = rollups.filter(AnalyticsDailyRollup.platform == platform)
     
-    analytics_list = query.all()
+    by_platform = rollups.group_by(AnalyticsDailyRollup.platform).all()
     
     # Counts for dashboard stat cards
     video_count = db.query(Video).filter(Video.user_id == current_user.id).count()
@@ -196,51 +201,43 @@ async def get_dashboard_analytics(
     )
     
     # Aggregate totals
-    total_views = sum(a.views for a in analytics_list)
-    total_engagement = sum(a.likes + a.comments + a.shares for a in analytics_list)
+    total_views = sum(row.views for row in by_platform)
+    total_engagement = sum(row.likes + row.comments + row.shares for row in by_platform)
     avg_engagement = (total_engagement / total_views * 100) if total_views > 0 else 0.0
     
     # Group by platform
     platform_breakdown: Dict[str, PlatformMetrics] = {}
-    for analytics in analytics_list:
-        post = analytics.post
-        if post.platform not in platform_breakdown:
-            platform_breakdown[post.platform] = PlatformMetrics()
-        
-        metrics = platform_breakdown[post.platform]
-        platform_breakdown[post.platform] = PlatformMetrics(
-            views=metrics.views + analytics.views,
-            likes=metrics.likes + analytics.likes,
-            comments=metrics.comments + analytics.comments,
-            shares=metrics.shares + analytics.shares,
-            saves=metrics.saves + analytics.saves,
+    for row in by_platform:
+        engagement = row.likes + row.comments + row.shares
+        platform_breakdown[row.platform] = PlatformMetrics(
+            views=row.views,
+            likes=row.likes,
+            comments=row.comments,
+            shares=row.shares,
+            saves=row.saves,
+            engagement_rate=(engagement / row.views * 100) if row.views > 0 else 0.0,
         )
     
-    # Calculate engagement rates per platform
-    for platform_name, metrics in platform_breakdown.items():
-        if metrics.views > 0:
-            eng_rate = (metrics.likes + metrics.comments + metrics.shares) / metrics.views * 100
-            platform_breakdown[platform_name] = PlatformMetrics(
-                views=metrics.views,
-                likes=metrics.likes,
-                comments=metrics.comments,
-                shares=metrics.shares,
-                saves=metrics.saves,
-                engagement_rate=eng_rate,
-            )
-    
     # Get top performing videos
     top_videos = []
-    video_analytics = db.query(
-        Video.id,
-        Video.filename,
-        func.sum(Analytics.views).label('total_views'),
-        func.sum(Analytics.likes).label('total_likes'),
-    ).join(Post, Post.video_id == Video.id).join(Analytics).filter(
-        Video.user_id == current_user.id,
-    ).group_by(Video.id, Video.filename).order_by(
-        func.sum(Analytics.views).desc()
-    ).limit(5).all()
+    video_totals = (
+        db.query(
+            AnalyticsDailyRollup.video_id,
+            func.sum(AnalyticsDailyRollup.views).label('total_views'),
+            func.sum(AnalyticsDailyRollup.likes).label('total_likes'),
+        )
+        .filter(AnalyticsDailyRollup.user_id == current_user.id)
+        .group_by(AnalyticsDailyRollup.video_id)
+        .order_by(func.sum(AnalyticsDailyRollup.views).desc())
+        .limit(5)
+        .subquery()
+    )
+    video_analytics = (
+        db.query(Video.id, Video.filename, video_totals.c.total_views, video_totals.c.total_likes)
+        .join(video_totals, video_totals.c.video_id == Video.id)
+        .order_by(video_totals.c.total_views.desc())
+        .all()
+    )
     
     for v in video_analytics:
         top_videos.append({
@@ -264,16 +261,85 @@ async def get_dashboard_analytics(
     )
 
 
+TREND_GRANULARITIES = ("day", "week", "month")
+
+
+def _bucket_start(day: date, granularity: str) -> date:
+    """First day of the day/week (Monday, as date_trunc)/month bucket containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day + timedelta(days=7)
+    if granularity == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _trend_statement(user_id, start_date: date, end_date: date, granularity: str, platform: Optional[str]):
+    """
+    PostgreSQL: every bucket in the range (generate_series) left-joined to the
+    rollup totals grouped by date_trunc, so gaps come back as zero rows in one query.
+    """
+    bucket = func.date_trunc(granularity, cast(AnalyticsDailyRollup.day, DateTime))
+    totals = (
+        select(
+            bucket.label("bucket"),
+            func.sum(AnalyticsDailyRollup.views).label("views"),
+            func.sum(
+                AnalyticsDailyRollup.likes + AnalyticsDailyRollup.comments + AnalyticsDailyRollup.shares
+            ).label("engagement"),
+        )
+        .where(
+            AnalyticsDailyRollup.user_id == user_id,
+            AnalyticsDailyRollup.day >= start_date,
+            AnalyticsDailyRollup.day <= end_date,
+        )
+        .group_by(bucket)
+    )
+    if platform:
+        totals = totals.where(AnalyticsDailyRollup.platform == platform)
+    totals = totals.subquery("totals")
+    
+    buckets = (
+        func.generate_series(
+            func.date_trunc(granularity, literal(datetime.combine(start_date, datetime.min.time()))),
+            func.date_trunc(granularity, literal(datetime.combine(end_date, datetime.min.time()))),
+            cast(literal(f"1 {granularity}"), Interval),
+        )
+        .table_valued("bucket")
+        .render_derived(name="buckets")
+    )
+    return (
+        select(
+            buckets.c.bucket,
+            func.coalesce(totals.c.views, 0).label("views"),
+            func.coalesce(totals.c.engagement, 0).label("engagement"),
+        )
+        .select_from(buckets.outerjoin(totals, totals.c.bucket == buckets.c.bucket))
+        .order_by(buckets.c.bucket)
+    )
+
+
 @router.get("/trends", response_model=TrendResponse)
 async def get_analytics_trends(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     platform: Optional[str] = Query(None),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Get analytics trends over time.
+    Get analytics trends over time, one point per day, week or month.
+    
+    Points are dated by the start of their bucket (weeks start on Monday);
+    buckets without posts are included with zeros.
     """
     # Default to last 30 days
     if not end_date:
@@ -281,32 +347,41 @@ async def get_analytics_trends(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Build data points for each day
     data: List[TrendDataPoint] = []
-    current = start_date
-    
-    while current <= end_date:
-        # Query analytics for this day
+    if start_date <= end_date and db.bind.dialect.name == "postgresql":
+        rows = db.execute(_trend_statement(current_user.id, start_date, end_date, granularity, platform)).all()
+        data = [
+            TrendDataPoint(date=row.bucket.date(), views=row.views, engagement=row.engagement)
+            for row in rows
+        ]
+    elif start_date <= end_date:
+        # Other databases (tests): one query grouped by day, rolled up and gap-filled here
         query = db.query(
-            func.sum(Analytics.views).label('views'),
-            func.sum(Analytics.likes + Analytics.comments + Analytics.shares).label('engagement'),
-        ).join(Post).join(Video).filter(
-            Video.user_id == current_user.id,
-            func.date(Post.published_at) == current,
+            AnalyticsDailyRollup.day,
+            func.sum(AnalyticsDailyRollup.views).label("views"),
+            func.sum(
+                AnalyticsDailyRollup.likes + AnalyticsDailyRollup.comments + AnalyticsDailyRollup.shares
+            ).label("engagement"),
+        ).filter(
+            AnalyticsDailyRollup.user_id == current_user.id,
+            AnalyticsDailyRollup.day >= start_date,
+            AnalyticsDailyRollup.day <= end_date,
         )
-        
         if platform:
-            query = query.filter(Post.platform == platform)
-        
-        result = query.first()
+            query = query.filter(AnalyticsDailyRollup.platform == platform)
         
-        data.append(TrendDataPoint(
-            date=current,
-            views=result.views or 0 if result else 0,
-            engagement=result.engagement or 0 if result else 0,
-        ))
+        totals: Dict[date, List[int]] = {}
+        for row in query.group_by(AnalyticsDailyRollup.day).all():
+            key = _bucket_start(row.day, granularity)
+            point = totals.setdefault(key, [0, 0])
+            point[0] += row.views or 0
+            point[1] += row.engagement or 0
         
-        current += timedelta(days=1)
+        current = _bucket_start(start_date, granularity)
+        while current <= end_date:
+            views, engagement = totals.get(current, (0, 0))
+            data.append(TrendDataPoint(date=current, views=views, engagement=engagement))
+            current = _next_bucket(current, granularity)
     
     return TrendResponse(
         data=data,
@@ -325,24 +400,28 @@ async def get_top_performers(
     """
     Get top performing videos.
     """
-    query = db.query(
-        Post.id,
-        Video.id.label('video_id'),
-        Video.filename,
-        Post.platform,
-        Analytics.views,
-        Analytics.likes,
-        Analytics.engagement_rate,
-        Post.published_at,
-    ).join(Video, Post.video_id == Video.id).join(Analytics).filter(
-        Video.user_id == current_user.id,
-        Post.status == PostStatusEnum.PUBLISHED,
-    )
+    totals = db.query(
+        AnalyticsDailyRollup.video_id,
+        AnalyticsDailyRollup.platform,
+        *(func.sum(getattr(AnalyticsDailyRollup, name)).label(name) for name in METRICS),
+        func.max(AnalyticsDailyRollup.published_at).label("published_at"),
+    ).filter(AnalyticsDailyRollup.user_id == current_user.id)
     
     if platform:
-        query = query.filter(Post.platform == platform)
+        totals = totals.filter(AnalyticsDailyRollup.platform == platform)
     
-    results = query.order_by(Analytics.views.desc()).limit(limit).all()
+    totals = (
+        totals.group_by(AnalyticsDailyRollup.video_id, AnalyticsDailyRollup.platform)
+        .order_by(func.sum(AnalyticsDailyRollup.views).desc())
+        .limit(limit)
+        .subquery()
+    )
+    results = (
+        db.query(Video.filename, totals)
+        .join(totals, totals.c.video_id == Video.id)
+        .order_by(totals.c.views.desc())
+        .all()
+    )
     
     items = [
         TopVideoResponse(
@@ -351,7 +430,8 @@ async def get_top_performers(
             platform=r.platform,
             views=r.views or 0,
             likes=r.likes or 0,
-            engagement_rate=r.engagement_rate or 0.0,
+            # Same formula as Analytics.calculate_engagement_rate
+            engagement_rate=(r.likes + r.comments + r.shares + r.saves) / r.views * 100 if r.views else 0.0,
             published_at=r.published_at,
         )
         for r in results
@@ -8,12 +8,14 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from datetime import datetime
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.video import Video
-from app.models.pattern import Pattern
+from app.models.pattern import Pattern, VideoTemplate
+from app.services.template_index import get_template_index_registry, unpack_vector, FEATURE_VERSION
 
 router = APIRouter()
 
@@ -54,6 +56,36 @@ class PatternInsightsResponse(BaseModel):
     top_performing: List[PatternResponse]
 
 
+class SimilarTemplate(BaseModel):
+    """A template from the user's library ranked by similarity."""
+    template_id: str
+    video_id: str
+    similarity: float
+    pacing: Optional[str] = None
+    style_tags: List[str] = []
+    duration_seconds: float
+
+
+class SimilarTemplatesResponse(BaseModel):
+    """Nearest templates to a video's template."""
+    video_id: str
+    template_id: str
+    approximate: bool
+    items: List[SimilarTemplate]
+
+
+def _pattern_response(p: Pattern) -> PatternResponse:
+    return PatternResponse(
+        id=str(p.id),
+        video_id=str(p.video_id),
+        type=p.type,
+        score=p.score,
+        data=p.data,
+        description=p.description,
+        created_at=p.created_at,
+    )
+
+
 @router.get("", response_model=PatternListResponse)
 async def list_patterns(
     video_id: Optional[str] = Query(None),
@@ -84,18 +116,7 @@ async def list_patterns(
     patterns = query.order_by(Pattern.score.desc()).offset((page - 1) * limit).limit(limit).all()
     
     return PatternListResponse(
-        items=[
-            PatternResponse(
-                id=str(p.id),
-                video_id=str(p.video_id),
-                type=p.type,
-                score=p.score,
-                data=p.data,
-                description=p.description,
-                created_at=p.created_at,
-            )
-            for p in patterns
-        ],
+        items=[_pattern_response(p) for p in patterns],
         total=total,
     )
 
@@ -107,13 +128,29 @@ async def get_pattern_insights(
 ):
     """
     Get aggregated pattern insights for the user.
+    
+    Counts, averages and rankings are computed in the database; pattern data
+    is only loaded for the (at most 3 per type + 10) patterns returned.
     """
-    # Get all patterns for user
-    query = db.query(Pattern).join(Video).filter(Video.user_id == current_user.id)
+    user_patterns = (
+        db.query(Pattern.id, Pattern.type, Pattern.score)
+        .join(Video, Pattern.video_id == Video.id)
+        .filter(Video.user_id == current_user.id)
+        .subquery()
+    )
     
-    all_patterns = query.all()
+    type_stats = (
+        db.query(
+            user_patterns.c.type,
+            func.count(user_patterns.c.id),
+            func.avg(user_patterns.c.score),
+        )
+        .group_by(user_patterns.c.type)
+        .order_by(func.count(user_patterns.c.id).desc(), user_patterns.c.type)
+        .all()
+    )
     
-    if not all_patterns:
+    if not type_stats:
         return PatternInsightsResponse(
             total_patterns=0,
             average_score=0.0,
@@ -121,57 +158,118 @@ async def get_pattern_insights(
             top_performing=[],
         )
     
-    # Calculate overall stats
-    total_patterns = len(all_patterns)
-    average_score = sum(p.score for p in all_patterns) / total_patterns
-    
-    # Group by type
-    by_type_dict: Dict[str, List[Pattern]] = {}
-    for p in all_patterns:
-        if p.type not in by_type_dict:
-            by_type_dict[p.type] = []
-        by_type_dict[p.type].append(p)
-    
-    by_type = []
-    for pattern_type, patterns in by_type_dict.items():
-        avg_score = sum(p.score for p in patterns) / len(patterns)
-        top = sorted(patterns, key=lambda x: x.score, reverse=True)[:3]
-        by_type.append(PatternSummary(
-            type=pattern_type,
-            count=len(patterns),
-            average_score=avg_score,
-            top_patterns=[
-                PatternResponse(
-                    id=str(p.id),
-                    video_id=str(p.video_id),
-                    type=p.type,
-                    score=p.score,
-                    data=p.data,
-                    description=p.description,
-                    created_at=p.created_at,
-                )
-                for p in top
-            ],
-        ))
-    
-    # Top performing patterns overall
-    top_performing = sorted(all_patterns, key=lambda x: x.score, reverse=True)[:10]
+    # Overall stats follow from the per-type groups
+    total_patterns = sum(count for _type, count, _avg in type_stats)
+    average_score = sum(count * float(avg) for _type, count, avg in type_stats) / total_patterns
+    
+    # Top 3 per type and top 10 overall in one ranked query
+    ranking = [user_patterns.c.score.desc(), user_patterns.c.id]
+    ranked = db.query(
+        user_patterns.c.id,
+        user_patterns.c.type,
+        func.row_number().over(partition_by=user_patterns.c.type, order_by=ranking).label("type_rank"),
+        func.row_number().over(order_by=ranking).label("overall_rank"),
+    ).subquery()
+    ranks = (
+        db.query(ranked.c.id, ranked.c.type, ranked.c.type_rank, ranked.c.overall_rank)
+        .filter(or_(ranked.c.type_rank <= 3, ranked.c.overall_rank <= 10))
+        .all()
+    )
+    
+    patterns = {p.id: p for p in db.query(Pattern).filter(Pattern.id.in_([row.id for row in ranks])).all()}
+    top_by_type: Dict[str, List[Pattern]] = {}
+    for row in sorted(ranks, key=lambda r: r.type_rank):
+        if row.type_rank <= 3:
+            top_by_type.setdefault(row.type, []).append(patterns[row.id])
+    top_performing = [
+        patterns[row.id]
+        for row in sorted(ranks, key=lambda r: r.overall_rank)
+        if row.overall_rank <= 10
+    ]
     
     return PatternInsightsResponse(
         total_patterns=total_patterns,
         average_score=average_score,
-        by_type=by_type,
-        top_performing=[
-            PatternResponse(
-                id=str(p.id),
-                video_id=str(p.video_id),
-                type=p.type,
-                score=p.score,
-                data=p.data,
-                description=p.description,
-                created_at=p.created_at,
+        by_type=[
+            PatternSummary(
+                type=pattern_type,
+                count=count,
+                average_score=float(avg),
+                top_patterns=[_pattern_response(p) for p in top_by_type.get(pattern_type, [])],
+            )
+            for pattern_type, count, avg in type_stats
+        ],
+        top_performing=[_pattern_response(p) for p in top_performing],
+    )
+
+
+@router.get("/similar/{video_id}", response_model=SimilarTemplatesResponse)
+async def find_similar_templates(
+    video_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    approximate: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Find the user's templates most similar to a video's latest template.
+    """
+    template = (
+        db.query(VideoTemplate)
+        .join(Video, VideoTemplate.video_id == Video.id)
+        .filter(
+            VideoTemplate.video_id == UUID(video_id),
+            VideoTemplate.status == "completed",
+            Video.user_id == current_user.id,
+        )
+        .order_by(VideoTemplate.created_at.desc())
+        .first()
+    )
+    
+    if template is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found",
+        )
+    
+    index, videos = get_template_index_registry().get(db, current_user.id)
+    query = unpack_vector(template.feature_vector) if template.feature_version == FEATURE_VERSION else None
+    if query is None:
+        query = template.refresh_features()
+        db.commit()
+    
+    # Other templates of the same video are not useful references.
+    exclude = [template_id for template_id, owner in videos.items() if owner == template.video_id]
+    matches = index.search(query, k=limit, exclude=exclude, approximate=approximate)
+    
+    rows = {}
+    if matches:
+        rows = {
+            row.id: row
+            for row in db.query(
+                VideoTemplate.id,
+                VideoTemplate.video_id,
+                VideoTemplate.pacing,
+                VideoTemplate.style_tags,
+                VideoTemplate.duration_seconds,
+            ).filter(VideoTemplate.id.in_([template_id for template_id, _score in matches]))
+        }
+    
+    return SimilarTemplatesResponse(
+        video_id=video_id,
+        template_id=str(template.id),
+        approximate=approximate,
+        items=[
+            SimilarTemplate(
+                template_id=str(template_id),
+                video_id=str(rows[template_id].video_id),
+                similarity=score,
+                pacing=rows[template_id].pacing,
+                style_tags=rows[template_id].style_tags or [],
+                duration_seconds=rows[template_id].duration_seconds,
             )
-            for p in top_performing
+            for template_id, score in matches
+            if template_id in rows
         ],
     )
 
@@ -196,15 +294,7 @@ async def get_pattern(
             detail="Pattern not found",
         )
     
-    return PatternResponse(
-        id=str(pattern.id),
-        video_id=str(pattern.video_id),
-        type=pattern.type,
-        score=pattern.score,
-        data=pattern.data,
-        description=pattern.description,
-        created_at=pattern.created_at,
-    )
+    return _pattern_response(pattern)
 
 
 @router.get("/video/{video_id}", response_model=PatternListResponse)
@@ -231,17 +321,6 @@ async def get_video_patterns(
     patterns = db.query(Pattern).filter(Pattern.video_id == UUID(video_id)).order_by(Pattern.score.desc()).all()
     
     return PatternListResponse(
-        items=[
-            PatternResponse(
-                id=str(p.id),
-                video_id=str(p.video_id),
-                type=p.type,
-                score=p.score,
-                data=p.data,
-                description=p.description,
-                created_at=p.created_at,
-            )
-            for p in patterns
-        ],
+        items=[_pattern_response(p) for p in patterns],
         total=len(patterns),
     )
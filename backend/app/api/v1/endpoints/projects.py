@@ -399,13 +399,18 @@ def _build_asset_response(
     file_size: Optional[int] = None,
     created_at: Optional[datetime] = None,
     updated_at: Optional[datetime] = None,
+    resolved_urls: Optional[Dict[str, Optional[str]]] = None,
 ) -> ProjectAssetResponse:
+    if resolved_urls is not None:
+        url = resolved_urls.get(storage_path)
+    else:
+        url = storage.build_public_url(storage_path, request)
     return ProjectAssetResponse(
         id=asset_id,
         kind=kind,
         filename=filename,
         storage_path=storage_path,
-        url=storage.build_public_url(storage_path, request),
+        url=url,
         duration=duration,
         width=width,
         height=height,
@@ -700,8 +705,7 @@ async def list_project_assets(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid asset kind filter"
         )
 
-    items: List[ProjectAssetResponse] = []
-
+    videos: List[Video] = []
     if kind in {None, "video"}:
         videos = (
             db.query(Video)
@@ -709,47 +713,57 @@ async def list_project_assets(
             .order_by(Video.updated_at.desc())
             .all()
         )
-        for video in videos:
-            items.append(
-                _build_asset_response(
-                    kind="video",
-                    asset_id=str(video.id),
-                    filename=video.filename,
-                    storage_path=video.storage_path,
-                    request=request,
-                    duration=video.duration,
-                    width=video.width,
-                    height=video.height,
-                    file_size=video.file_size,
-                    metadata=dict(video.video_metadata or {}),
-                    created_at=video.created_at,
-                    updated_at=video.updated_at,
-                )
-            )
 
+    assets: List[UserAsset] = []
     if kind in {None, "image", "audio"}:
-        assets = (
-            db.query(UserAsset)
-            .filter(UserAsset.user_id == current_user.id)
-            .order_by(UserAsset.updated_at.desc())
-            .all()
+        assets = [
+            asset
+            for asset in (
+                db.query(UserAsset)
+                .filter(UserAsset.user_id == current_user.id)
+                .order_by(UserAsset.updated_at.desc())
+                .all()
+            )
+            if kind is None or ("audio" if asset.type == "audio" else "image") == kind
+        ]
+
+    # Resolve every URL in one batch (cached, at most one signing round-trip).
+    paths = [item.storage_path for item in [*videos, *assets] if item.storage_path]
+    resolved_urls = storage.build_public_urls(paths, request) if paths else {}
+
+    items: List[ProjectAssetResponse] = []
+    for video in videos:
+        items.append(
+            _build_asset_response(
+                kind="video",
+                asset_id=str(video.id),
+                filename=video.filename,
+                storage_path=video.storage_path,
+                request=request,
+                duration=video.duration,
+                width=video.width,
+                height=video.height,
+                file_size=video.file_size,
+                metadata=dict(video.video_metadata or {}),
+                created_at=video.created_at,
+                updated_at=video.updated_at,
+                resolved_urls=resolved_urls,
+            )
         )
-        for asset in assets:
-            normalized_kind = "audio" if asset.type == "audio" else "image"
-            if kind is not None and normalized_kind != kind:
-                continue
-            items.append(
-                _build_asset_response(
-                    kind=normalized_kind,
-                    asset_id=str(asset.id),
-                    filename=asset.filename,
-                    storage_path=asset.storage_path,
-                    request=request,
-                    metadata=dict(asset.asset_metadata or {}),
-                    created_at=asset.created_at,
-                    updated_at=asset.updated_at,
-                )
+    for asset in assets:
+        items.append(
+            _build_asset_response(
+                kind="audio" if asset.type == "audio" else "image",
+                asset_id=str(asset.id),
+                filename=asset.filename,
+                storage_path=asset.storage_path,
+                request=request,
+                metadata=dict(asset.asset_metadata or {}),
+                created_at=asset.created_at,
+                updated_at=asset.updated_at,
+                resolved_urls=resolved_urls,
             )
+        )
 
     items.sort(
         key=lambda item: item.updated_at or item.created_at or datetime.min,
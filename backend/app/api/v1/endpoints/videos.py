@@ -2,7 +2,7 @@
 Video management endpoints.
 """
 
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 import os
 import json
@@ -25,8 +25,13 @@ from app.core.security import decode_token, verify_supabase_token
 from app.core.config import settings
 from app.models.user import User
 from app.models.video import Video, VideoStatus
+from app.services.mezzanine import normalize_to_mezzanine
 from app.services.storage_service import get_storage_service
-from app.workers.video_tasks import analyze_video_patterns, edit_video as edit_video_task
+from app.workers.video_tasks import (
+    analyze_video_patterns,
+    edit_video as edit_video_task,
+    normalize_video_source,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -302,7 +307,11 @@ def _thumbnail_storage_path(video: Video) -> Optional[str]:
     return None
 
 
-def _thumbnail_url(video: Video, request: Request) -> Optional[str]:
+def _thumbnail_url(
+    video: Video,
+    request: Request,
+    resolved_urls: Optional[Dict[str, Optional[str]]] = None,
+) -> Optional[str]:
     thumb_path = _thumbnail_storage_path(video)
     if not thumb_path:
         return video.thumbnail_url
@@ -312,21 +321,45 @@ def _thumbnail_url(video: Video, request: Request) -> Optional[str]:
         base = str(request.base_url).rstrip("/")
         return f"{base}{settings.API_V1_STR}/videos/{video.id}/thumbnail"
 
-    signed = storage.build_public_url(thumb_path, request)
+    if resolved_urls is not None:
+        signed = resolved_urls.get(thumb_path)
+    else:
+        signed = storage.build_public_url(thumb_path, request)
     if signed:
         return signed
     return video.thumbnail_url
 
 
-def _video_url(video: Video, request: Request) -> Optional[str]:
+def _video_url(
+    video: Video,
+    request: Request,
+    resolved_urls: Optional[Dict[str, Optional[str]]] = None,
+) -> Optional[str]:
     if not video.storage_path:
         return None
     if (settings.STORAGE_BACKEND or "").lower() == "supabase":
         base = str(request.base_url).rstrip("/")
         return f"{base}{settings.API_V1_STR}/videos/{video.id}/stream"
+    if resolved_urls is not None:
+        return resolved_urls.get(video.storage_path)
     return storage.build_public_url(video.storage_path, request)
 
 
+def _resolve_listing_urls(videos: List[Video], request: Request) -> Dict[str, Optional[str]]:
+    """Batch-resolve the direct URLs `_video_url`/`_thumbnail_url` need for a page of videos."""
+    if (settings.STORAGE_BACKEND or "").lower() == "supabase":
+        # Listings link to the stream/thumbnail proxies, which sign lazily through the URL cache.
+        return {}
+    paths: List[str] = []
+    for video in videos:
+        if video.storage_path:
+            paths.append(video.storage_path)
+        thumb_path = _thumbnail_storage_path(video)
+        if thumb_path:
+            paths.append(thumb_path)
+    return storage.build_public_urls(paths, request) if paths else {}
+
+
 def _signed_url_ttl_seconds() -> Optional[int]:
     if (settings.STORAGE_BACKEND or "").lower() != "supabase":
         return None
@@ -427,6 +460,11 @@ def _queue_task(task_callable, *args, **kwargs):
         )
 
 
+def _storage_confirmed(video: Video) -> bool:
+    """True when we wrote or verified the object ourselves, so no storage lookup is needed."""
+    return bool((video.video_metadata or {}).get("storage_confirmed"))
+
+
 def _storage_exists_soft(path: str) -> Optional[bool]:
     try:
         return storage.exists(path)
@@ -477,6 +515,7 @@ async def list_videos(
     total = query.count()
     
     videos = query.order_by(Video.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    resolved_urls = _resolve_listing_urls(videos, request)
     
     return VideoListResponse(
         items=[
@@ -486,8 +525,8 @@ async def list_videos(
                 original_filename=v.original_filename,
                 storage_path=v.storage_path,
                 thumbnail_storage_path=(v.video_metadata or {}).get("thumbnail_storage_path"),
-                video_url=_video_url(v, request),
-                thumbnail_url=_thumbnail_url(v, request),
+                video_url=_video_url(v, request, resolved_urls),
+                thumbnail_url=_thumbnail_url(v, request, resolved_urls),
                 status=v.status.value,
                 duration=v.duration,
                 width=v.width,
@@ -624,8 +663,15 @@ async def upload_video(
     # Persist to local storage
     stored_file = storage.save_bytes(storage_path, content)
 
-    # Normalize for browser playback (faststart / optional transcode)
-    normalized_path = _normalize_video_for_playback(str(stored_file))
+    # Normalize into a CFR mezzanine when enabled (also browser-playable),
+    # otherwise only for browser playback (faststart / optional transcode).
+    mezzanine_profile = None
+    if settings.MEZZANINE_NORMALIZATION_ENABLED:
+        mezzanine_profile = normalize_to_mezzanine(str(stored_file))
+    if mezzanine_profile:
+        normalized_path = str(stored_file)
+    else:
+        normalized_path = _normalize_video_for_playback(str(stored_file))
 
     # Extract metadata from uploaded file
     metadata = _extract_video_metadata(normalized_path)
@@ -644,6 +690,12 @@ async def upload_video(
     except Exception:
         file_size = len(content)
     
+    video_metadata: dict = {}
+    if thumb_storage_path:
+        video_metadata["thumbnail_storage_path"] = thumb_storage_path
+    if mezzanine_profile:
+        video_metadata["mezzanine"] = mezzanine_profile
+
     # Create video record
     video = Video(
         id=video_id,
@@ -659,7 +711,7 @@ async def upload_video(
         fps=metadata.get("fps"),
         codec=metadata.get("codec"),
         bitrate=metadata.get("bitrate"),
-        video_metadata={"thumbnail_storage_path": thumb_storage_path} if thumb_storage_path else {},
+        video_metadata=video_metadata,
         status=VideoStatus.UPLOADED,
     )
     
@@ -712,13 +764,23 @@ async def register_video(
         fps=payload.fps,
         codec=payload.codec,
         bitrate=payload.bitrate,
-        video_metadata={"thumbnail_storage_path": thumb_path} if thumb_path else {},
+        video_metadata={
+            **({"thumbnail_storage_path": thumb_path} if thumb_path else {}),
+            **({"storage_confirmed": True} if exists else {}),
+        },
         status=VideoStatus.UPLOADED,
     )
     db.add(video)
     db.commit()
     db.refresh(video)
 
+    if settings.MEZZANINE_NORMALIZATION_ENABLED:
+        # Best-effort: registration must not fail if the worker queue is down.
+        try:
+            normalize_video_source.delay(str(video.id))
+        except Exception as exc:
+            logger.warning("Failed to queue mezzanine normalization for %s: %s", video.id, exc)
+
     return VideoUploadResponse(
         id=str(video.id),
         filename=video.filename,
@@ -793,23 +855,19 @@ async def get_video_media_urls(
                 items[index].thumbnail_url = video.thumbnail_url
 
     if jobs:
-        semaphore = asyncio.Semaphore(12)
-
-        async def resolve_one(kind: str, index: int, path: str):
-            async with semaphore:
-                try:
-                    resolved = await asyncio.to_thread(storage.build_public_url, path, request)
-                except Exception as exc:
-                    logger.warning("Failed to resolve %s media URL for %s: %s", kind, path, exc)
-                    resolved = None
-                return kind, index, resolved
-
-        results = await asyncio.gather(*(resolve_one(kind, idx, path) for kind, idx, path in jobs))
-        for kind, index, resolved in results:
+        # One batch resolve: cached URLs are free, the rest are signed in a single call.
+        try:
+            resolved = await asyncio.to_thread(
+                storage.build_public_urls, [path for _kind, _idx, path in jobs], request
+            )
+        except Exception as exc:
+            logger.warning("Failed to resolve media URLs for %d objects: %s", len(jobs), exc)
+            resolved = {}
+        for kind, index, path in jobs:
             if kind == "video":
-                items[index].video_url = resolved
+                items[index].video_url = resolved.get(path)
             else:
-                items[index].thumbnail_url = resolved
+                items[index].thumbnail_url = resolved.get(path)
 
     # Keep only videos user can access. Missing IDs are silently dropped to simplify client sync flows.
     items = [item for item in items if item.id in by_id]
@@ -950,7 +1008,7 @@ async def analyze_video(
     db.commit()
 
     if (settings.STORAGE_BACKEND or "").lower() == "supabase":
-        if not storage.exists(video.storage_path):
+        if not _storage_confirmed(video) and not storage.exists(video.storage_path):
             video.status = VideoStatus.FAILED
             video.error_message = "Video file not found in storage"
             db.commit()
@@ -1002,7 +1060,7 @@ async def edit_video(
     
     # Trigger editing task
     if (settings.STORAGE_BACKEND or "").lower() == "supabase":
-        if not storage.exists(video.storage_path):
+        if not _storage_confirmed(video) and not storage.exists(video.storage_path):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Video file missing from storage",
@@ -59,6 +59,29 @@ class Settings(BaseSettings):
     SUPABASE_STORAGE_PRIVATE: bool = True
     SUPABASE_STORAGE_SIGNED_URL_TTL: int = 3600
 
+    # Signed URL cache (in-process LRU + shared Redis tier), refreshed before expiry
+    SIGNED_URL_CACHE_ENABLED: bool = True
+    SIGNED_URL_CACHE_REDIS: bool = True
+    SIGNED_URL_CACHE_REFRESH_MARGIN: int = 300
+    SIGNED_URL_CACHE_MAX_ENTRIES: int = 10000
+    # Seconds to cache object existence checks (HEAD lookups); 0 disables
+    STORAGE_EXISTS_CACHE_TTL: int = 30
+
+    # Local on-disk cache for storage objects downloaded for processing (Supabase backend)
+    SOURCE_CACHE_ENABLED: bool = True
+    SOURCE_CACHE_DIR: str = "temp/source_cache"
+    SOURCE_CACHE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024  # 10 GB
+    SOURCE_CACHE_CHUNK_BYTES: int = 8 * 1024 * 1024  # 8 MB ranged reads
+
+    # Streaming multipart upload of render outputs via Supabase's S3-compatible endpoint
+    STREAM_UPLOAD_ENABLED: bool = False
+    STREAM_UPLOAD_PART_BYTES: int = 8 * 1024 * 1024
+    STREAM_UPLOAD_CONCURRENCY: int = 4
+    SUPABASE_S3_ENDPOINT: str = ""  # defaults to {SUPABASE_URL}/storage/v1/s3
+    SUPABASE_S3_REGION: str = "us-east-1"
+    SUPABASE_S3_ACCESS_KEY_ID: str = ""
+    SUPABASE_S3_SECRET_ACCESS_KEY: str = ""
+
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
@@ -70,16 +93,85 @@ class Settings(BaseSettings):
     
     # Gemini Model Configuration
     GEMINI_MODEL: str = "gemini-2.0-flash"  # Upgraded from gemini-1.5-pro
+    # Pattern analysis model client: gemini, record (gemini + save responses) or replay (offline)
+    ANALYSIS_MODEL_CLIENT: str = "gemini"
+    ANALYSIS_MODEL_RECORDING_PATH: str = ""  # JSON lines written by record, read by replay
+    ANALYSIS_REPLAY_LATENCY_MS: float = 0.0  # Median simulated call latency for replay
+    ANALYSIS_REPLAY_LATENCY_SIGMA: float = 0.0  # Log-normal spread of replay latency
+    ANALYSIS_REPLAY_LATENCY_PER_IMAGE_MS: float = 0.0
     GEMINI_VISION_MODEL: str = "gemini-2.0-flash"  # For video/image analysis
+    # Concurrent batch analysis under a fleet-wide token bucket (shared via Redis)
+    GEMINI_MAX_CONCURRENT_BATCHES: int = 4
+    SUMMARY_WINDOW_SECONDS: float = 10.0  # Timeline window summarized per model call
+    SUMMARY_REDUCE_FANIN: int = 20  # Max summaries combined per reduce call (bounds the final prompt)
+    # Frame batches are sized by frame count, payload bytes and expected output tokens,
+    # halved after truncated/unparseable output and grown while calls stay fast
+    ANALYSIS_BATCH_ADAPTIVE: bool = True
+    ANALYSIS_BATCH_INITIAL_FRAMES: int = 25
+    ANALYSIS_BATCH_MIN_FRAMES: int = 4
+    ANALYSIS_BATCH_MAX_FRAMES: int = 50
+    ANALYSIS_BATCH_MAX_BYTES: int = 8_000_000  # Encoded JPEG bytes per request (inline limit is 20MB)
+    ANALYSIS_BATCH_TARGET_LATENCY_SECONDS: float = 20.0
+    ANALYSIS_MAX_OUTPUT_TOKENS: int = 8192
+    ANALYSIS_OUTPUT_TOKENS_PER_FRAME: int = 250  # Starting estimate; refined from responses
+    ANALYSIS_PREFETCH_BATCHES: int = 2  # Frame batches decoded ahead of free model slots (0 = decode on demand)
+    GEMINI_RPM_LIMIT: int = 300  # 0 disables the requests-per-minute bucket
+    GEMINI_TPM_LIMIT: int = 1_000_000  # 0 disables the tokens-per-minute bucket
+    GEMINI_RATE_LIMIT_REDIS: bool = True
+    GEMINI_RATE_LIMIT_LOCAL_SHARE: float = 0.25  # Fraction of the quota a worker may use if Redis is down
+    GEMINI_MAX_RETRIES: int = 4
+    GEMINI_RETRY_BASE_SECONDS: float = 2.0
     
     # Video Analysis Settings
     FRAME_EXTRACTION_FPS: float = 5.0  # 5 fps = 0.2s intervals
     FRAME_EXTRACTION_INTERVAL_MS: int = 200  # 200ms between frames
     AUDIO_SAMPLE_RATE: int = 16000  # 16kHz for audio analysis
+    AUDIO_FEATURES_ENABLED: bool = True  # Compute volume/silence/tempo locally instead of asking the model
+    AUDIO_SILENCE_DB: float = -45.0  # Segments quieter than this (dBFS RMS) are silence
+    AUDIO_TEMPO_MIN_CONFIDENCE: float = 0.3  # Onset autocorrelation peak needed to report a BPM
     MAX_VIDEO_DURATION_SECONDS: int = 300  # 5 minutes max for analysis
     MAX_FRAMES_PER_ANALYSIS: int = 1500  # 5 minutes * 5fps = 1500 frames
+    ANALYSIS_FRAME_MAX_SIDE: int = 768  # Frames sent to the model are downscaled to this longest side
+    ANALYSIS_FRAME_JPEG_QUALITY: int = 80
+    # Shot-boundary adaptive sampling: dense around cuts, sparse in stable shots
+    ADAPTIVE_SAMPLING_ENABLED: bool = True
+    ANALYSIS_FRAME_BUDGET: int = 600  # Max frames sent to the model per video (0 = unlimited)
+    ADAPTIVE_SPARSE_INTERVAL_MS: int = 1000  # In-shot sampling interval
+    ADAPTIVE_DENSE_WINDOW_MS: int = 600  # Every grid frame this long after a cut is analyzed
+    SHOT_CUT_THRESHOLD: float = 0.12  # Mean luma change (0-1) between grid frames that counts as a cut
+    FRAME_DEDUP_ENABLED: bool = True  # Skip near-identical frames (dHash) before model analysis
+    FRAME_DEDUP_HAMMING_THRESHOLD: int = 4  # Max differing bits (of 64) to count as a duplicate
+    FRAME_DEDUP_MAX_RUN_MS: int = 2000  # Re-sample static runs at least this often
+    VISUAL_FEATURES_ENABLED: bool = True  # Measure brightness/colors/motion/cuts locally; the model only describes
+    VISUAL_DOMINANT_COLORS: int = 3  # k for per-frame dominant color clustering
+    # Staged analysis: extraction task -> chord of per-batch tasks -> finalize, with checkpoints
+    ANALYSIS_PIPELINE_STAGED: bool = True
+    ANALYSIS_CHECKPOINT_TTL_SECONDS: int = 86400
+    # Result cache: whole templates by file hash, frame batches by perceptual hashes
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_TTL_SECONDS: int = 2592000  # 30 days
+    ANALYSIS_CACHE_VERSION: int = 1  # Bump to invalidate every cached analysis
+    # Nightly pattern rescoring from post analytics (see services/pattern_scoring.py)
+    PATTERN_SCORE_HALF_LIFE_DAYS: float = 90.0  # Recency decay of a post's weight
+    PATTERN_SCORE_PRIOR_WEIGHT: float = 5.0  # Evidence (log-views weight) needed to move halfway from 50
+    PATTERN_SCORE_UPDATE_CHUNK: int = 5000  # Videos per bulk UPDATE statement
+    # Template similarity search (approximate mode: k-means lists probed per query)
+    TEMPLATE_INDEX_LISTS: int = 0  # 0 = sqrt(number of templates)
+    TEMPLATE_INDEX_NPROBE: int = 8
+    # Hourly analytics collection (see services/analytics_collector.py)
+    ANALYTICS_COLLECT_CONCURRENCY: int = 16  # Platform requests in flight
+    ANALYTICS_COLLECT_PAGE_SIZE: int = 2000  # Posts fetched and written per batch
+    ANALYTICS_COLLECT_TIMEOUT_SECONDS: float = 30.0
+    # Post metrics history (see services/metrics_history.py)
+    METRICS_HISTORY_HOURLY_DAYS: int = 14  # Older snapshots are downsampled to one per day
+    METRICS_HISTORY_PARTITION_MONTHS_AHEAD: int = 2  # Monthly partitions created ahead (PostgreSQL)
     TEMP_PROCESSING_DIR: str = "temp/processing"
 
+    # Mezzanine ingest: normalize sources to CFR/yuv420p/fixed GOP/AAC 44.1kHz stereo
+    MEZZANINE_NORMALIZATION_ENABLED: bool = False
+    MEZZANINE_FPS_LADDER: str = "24,25,30,50,60"
+    MEZZANINE_GOP_SECONDS: float = 1.0
+
     # OAuth - Instagram
     INSTAGRAM_CLIENT_ID: str = ""
     INSTAGRAM_CLIENT_SECRET: str = ""
@@ -0,0 +1,36 @@
+"""Store video template segments in a columnar binary blob
+
+Revision ID: 007_template_segments_blob
+Revises: 006_editor_jobs_v2
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "007_template_segments_blob"
+down_revision: Union[str, None] = "006_editor_jobs_v2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_columns = {column["name"] for column in inspector.get_columns("video_templates")}
+    if "segments_blob" not in existing_columns:
+        op.add_column("video_templates", sa.Column("segments_blob", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_columns = {column["name"] for column in inspector.get_columns("video_templates")}
+    if "segments_blob" in existing_columns:
+        op.drop_column("video_templates", "segments_blob")
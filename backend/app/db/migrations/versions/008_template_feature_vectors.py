@@ -0,0 +1,40 @@
+"""Add similarity feature vectors to video templates
+
+Revision ID: 008_template_feature_vectors
+Revises: 007_template_segments_blob
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "008_template_feature_vectors"
+down_revision: Union[str, None] = "007_template_segments_blob"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_columns = {column["name"] for column in inspector.get_columns("video_templates")}
+    if "feature_vector" not in existing_columns:
+        op.add_column("video_templates", sa.Column("feature_vector", sa.LargeBinary(), nullable=True))
+    if "feature_version" not in existing_columns:
+        op.add_column("video_templates", sa.Column("feature_version", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_columns = {column["name"] for column in inspector.get_columns("video_templates")}
+    if "feature_version" in existing_columns:
+        op.drop_column("video_templates", "feature_version")
+    if "feature_vector" in existing_columns:
+        op.drop_column("video_templates", "feature_vector")
@@ -0,0 +1,36 @@
+"""Add covering index for pattern insights aggregation
+
+Revision ID: 009_pattern_insights_index
+Revises: 008_template_feature_vectors
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "009_pattern_insights_index"
+down_revision: Union[str, None] = "008_template_feature_vectors"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_indexes = {index["name"] for index in inspector.get_indexes("patterns")}
+    if "ix_patterns_video_type_score" not in existing_indexes:
+        op.create_index("ix_patterns_video_type_score", "patterns", ["video_id", "type", "score"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing_indexes = {index["name"] for index in inspector.get_indexes("patterns")}
+    if "ix_patterns_video_type_score" in existing_indexes:
+        op.drop_index("ix_patterns_video_type_score", table_name="patterns")
@@ -0,0 +1,59 @@
+"""Add analytics daily rollups
+
+Revision ID: 010_analytics_daily_rollups
+Revises: 009_pattern_insights_index
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "010_analytics_daily_rollups"
+down_revision: Union[str, None] = "009_pattern_insights_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analytics_daily_rollups",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("video_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("platform", sa.String(50), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("posts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("likes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("comments", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("shares", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("saves", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_analytics_daily_rollups_user_day", "analytics_daily_rollups", ["user_id", "day"])
+
+    # Backfill from existing analytics
+    op.execute(
+        """
+        INSERT INTO analytics_daily_rollups
+            (user_id, video_id, platform, day, posts, views, likes, comments, shares, saves, published_at, updated_at)
+        SELECT v.user_id, p.video_id, p.platform, CAST(p.published_at AS DATE),
+               COUNT(*), SUM(a.views), SUM(a.likes), SUM(a.comments), SUM(a.shares), SUM(a.saves),
+               MAX(p.published_at), NOW()
+        FROM analytics a
+        JOIN posts p ON p.id = a.post_id
+        JOIN videos v ON v.id = p.video_id
+        WHERE p.published_at IS NOT NULL
+        GROUP BY v.user_id, p.video_id, p.platform, CAST(p.published_at AS DATE)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analytics_daily_rollups_user_day", table_name="analytics_daily_rollups")
+    op.drop_table("analytics_daily_rollups")
@@ -0,0 +1,102 @@
+"""Move metrics history from analytics JSONB into a partitioned time-series table
+
+Revision ID: 011_post_metrics_history
+Revises: 010_analytics_daily_rollups
+Create Date: 2026-10-19
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "011_post_metrics_history"
+down_revision: Union[str, None] = "010_analytics_daily_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created up front (current month and the next two); the
+# maintain_metrics_history task keeps creating them ahead from then on.
+MONTHS_AHEAD = 2
+
+
+def _month_start(day: date, offset: int) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "post_metrics_history",
+        sa.Column("post_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("collected_at", sa.DateTime(), primary_key=True),
+        sa.Column("resolution", sa.String(8), nullable=False, server_default="hour"),
+        sa.Column("views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("likes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("comments", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("shares", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("saves", sa.BigInteger(), nullable=False, server_default="0"),
+        postgresql_partition_by="RANGE (collected_at)",
+    )
+    op.create_index("ix_post_metrics_history_collected_at", "post_metrics_history", ["collected_at"])
+
+    op.execute("CREATE TABLE post_metrics_history_default PARTITION OF post_metrics_history DEFAULT")
+    today = date.today()
+    for offset in range(MONTHS_AHEAD + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        op.execute(
+            f"CREATE TABLE post_metrics_history_{start:%Y_%m} PARTITION OF post_metrics_history "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    # Backfill from the JSONB arrays (entries carrying a collected_at/timestamp)
+    op.execute(
+        """
+        INSERT INTO post_metrics_history (post_id, collected_at, resolution, views, likes, comments, shares, saves)
+        SELECT a.post_id,
+               date_trunc('hour', CAST(COALESCE(e->>'collected_at', e->>'timestamp') AS TIMESTAMP)),
+               'hour',
+               COALESCE(CAST(e->>'views' AS NUMERIC), 0),
+               COALESCE(CAST(e->>'likes' AS NUMERIC), 0),
+               COALESCE(CAST(e->>'comments' AS NUMERIC), 0),
+               COALESCE(CAST(e->>'shares' AS NUMERIC), 0),
+               COALESCE(CAST(e->>'saves' AS NUMERIC), 0)
+        FROM analytics a
+        CROSS JOIN LATERAL jsonb_array_elements(a.metrics_history) AS e
+        WHERE jsonb_typeof(a.metrics_history) = 'array'
+          AND jsonb_typeof(e) = 'object'
+          AND COALESCE(e->>'collected_at', e->>'timestamp') IS NOT NULL
+        ON CONFLICT (post_id, collected_at) DO NOTHING
+        """
+    )
+    op.drop_column("analytics", "metrics_history")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "analytics",
+        sa.Column("metrics_history", postgresql.JSONB(), nullable=True, server_default="[]"),
+    )
+    op.execute(
+        """
+        UPDATE analytics a SET metrics_history = h.points
+        FROM (
+            SELECT post_id,
+                   jsonb_agg(
+                       jsonb_build_object(
+                           'collected_at', collected_at, 'views', views, 'likes', likes,
+                           'comments', comments, 'shares', shares, 'saves', saves
+                       ) ORDER BY collected_at
+                   ) AS points
+            FROM post_metrics_history
+            GROUP BY post_id
+        ) h
+        WHERE h.post_id = a.post_id
+        """
+    )
+    op.drop_index("ix_post_metrics_history_collected_at", table_name="post_metrics_history")
+    op.drop_table("post_metrics_history")
@@ -11,7 +11,7 @@ from app.models.strategy import Strategy
 from app.models.script import Script
 from app.models.social_account import SocialAccount
 from app.models.post import Post
-from app.models.analytics import Analytics
+from app.models.analytics import Analytics, AnalyticsDailyRollup, PostMetricsPoint
 from app.models.user_asset import UserAsset
 from app.models.edit_template import EditTemplate
 from app.models.editor_job import EditorJob, EditorJobType, EditorJobStatus
@@ -29,6 +29,8 @@ __all__ = [
     "SocialAccount",
     "Post",
     "Analytics",
+    "AnalyticsDailyRollup",
+    "PostMetricsPoint",
     "UserAsset",
     "EditTemplate",
     "EditorJob",
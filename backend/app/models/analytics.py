@@ -2,7 +2,7 @@
 Analytics model for storing post performance metrics.
 """
 
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, String, Date, DateTime, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
@@ -31,8 +31,7 @@ class Analytics(Base, TimestampMixin):
     # Platform-specific metrics (flexible JSON)
     platform_metrics = Column(JSONB, nullable=True, default=dict)
     
-    # Historical data for trend analysis
-    metrics_history = Column(JSONB, nullable=True, default=list)
+    # Historical snapshots live in post_metrics_history (PostMetricsPoint)
     
     # Relationships
     post = relationship("Post", back_populates="analytics")
@@ -48,3 +47,67 @@ class Analytics(Base, TimestampMixin):
             total_engagements = self.likes + self.comments + self.shares + self.saves
             self.engagement_rate = (total_engagements / self.views) * 100
         return self.engagement_rate
+
+
+class AnalyticsDailyRollup(Base):
+    """
+    Post metrics summed per user, video, platform and publish day.
+    
+    Maintained incrementally from analytics deltas (services/analytics_rollups.py)
+    so dashboard, trend and top-performer queries never scan posts.
+    """
+    
+    __tablename__ = "analytics_daily_rollups"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    platform = Column(String(50), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC date of Post.published_at
+    
+    posts = Column(Integer, default=0, nullable=False)
+    views = Column(BigInteger, default=0, nullable=False)
+    likes = Column(BigInteger, default=0, nullable=False)
+    comments = Column(BigInteger, default=0, nullable=False)
+    shares = Column(BigInteger, default=0, nullable=False)
+    saves = Column(BigInteger, default=0, nullable=False)
+    
+    # Latest publish time among the posts in this row
+    published_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_analytics_daily_rollups_user_day", "user_id", "day"),
+    )
+    
+    def __repr__(self):
+        return f"<AnalyticsDailyRollup(user_id={self.user_id}, video_id={self.video_id}, platform={self.platform}, day={self.day})>"
+
+
+class PostMetricsPoint(Base):
+    """
+    One snapshot of a post's cumulative metrics.
+    
+    Collected hourly; snapshots older than METRICS_HISTORY_HOURLY_DAYS are
+    downsampled to the last one of each day (resolution "day"). On PostgreSQL
+    the table is range-partitioned by month on collected_at.
+    """
+    
+    __tablename__ = "post_metrics_history"
+    
+    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    collected_at = Column(DateTime, primary_key=True)
+    resolution = Column(String(8), default="hour", nullable=False)  # hour, day
+    
+    views = Column(BigInteger, default=0, nullable=False)
+    likes = Column(BigInteger, default=0, nullable=False)
+    comments = Column(BigInteger, default=0, nullable=False)
+    shares = Column(BigInteger, default=0, nullable=False)
+    saves = Column(BigInteger, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_post_metrics_history_collected_at", "collected_at"),
+        {"postgresql_partition_by": "RANGE (collected_at)"},
+    )
+    
+    def __repr__(self):
+        return f"<PostMetricsPoint(post_id={self.post_id}, collected_at={self.collected_at}, views={self.views})>"
@@ -2,9 +2,9 @@
 Pattern and Template models for storing analyzed video patterns and hybrid templates.
 """
 
-from sqlalchemy import Column, String, Float, ForeignKey, Text, Integer, Boolean, Index
+from sqlalchemy import Column, String, Float, ForeignKey, Text, Integer, Boolean, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import uuid
 
 from app.models.base import Base, TimestampMixin
@@ -31,6 +31,11 @@ class Pattern(Base, TimestampMixin):
     # Relationships
     video = relationship("Video", back_populates="patterns")
     
+    __table_args__ = (
+        # Covers per-user insights (patterns reached through the user's videos) without heap reads
+        Index('ix_patterns_video_type_score', 'video_id', 'type', 'score'),
+    )
+    
     def __repr__(self):
         return f"<Pattern(id={self.id}, type={self.type}, score={self.score})>"
 
@@ -64,9 +69,17 @@ class VideoTemplate(Base, TimestampMixin):
     error_message = Column(Text, nullable=True)
     
     # Full template data (JSONB for efficient querying)
-    # Contains: segments[], summary{}
+    # Contains: summary{} and metadata; segments[] only for rows written before segments_blob
     template_data = Column(JSONB, nullable=False, default=dict)
     
+    # Segments in the columnar binary format (see services/template_codec.py).
+    # Deferred: loaded from the database only when segments are accessed.
+    segments_blob = deferred(Column(LargeBinary, nullable=True))
+    
+    # Similarity search features (see services/template_index.py): float32 vector + layout version
+    feature_vector = Column(LargeBinary, nullable=True)
+    feature_version = Column(Integer, nullable=True)
+    
     # Denormalized summary fields for efficient filtering/sorting
     # These are extracted from template_data.summary for query performance
     pacing = Column(String(20), nullable=True, index=True)  # very-fast, fast, moderate, slow, very-slow
@@ -94,18 +107,40 @@ class VideoTemplate(Base, TimestampMixin):
         return f"<VideoTemplate(id={self.id}, video_id={self.video_id}, segments={self.total_segments})>"
     
     @classmethod
-    def from_hybrid_template(cls, template_dict: dict) -> "VideoTemplate":
-        """Create a VideoTemplate instance from a HybridTemplate dictionary."""
+    def from_hybrid_template(cls, template_dict: dict, columnar: bool = True) -> "VideoTemplate":
+        """
+        Create a VideoTemplate instance from a HybridTemplate dictionary.
+        With `columnar`, segments are stored in segments_blob instead of template_data.
+        """
         summary = template_dict.get("summary", {})
+        video_id = template_dict.get("video_id")
+        segments = template_dict.get("segments", [])
+        segments_blob = None
+        if columnar:
+            from app.services.template_codec import encode_segments
+            
+            segments_blob = encode_segments(segments)
+            template_dict = {key: value for key, value in template_dict.items() if key != "segments"}
+        
+        from app.services.template_index import FEATURE_VERSION, pack_vector, template_features
+        
+        features = template_features(
+            summary,
+            [(segment.get("visual") or {}).get("scene_type") for segment in segments],
+            template_dict.get("duration_seconds", 0),
+        )
         
         return cls(
-            video_id=template_dict.get("video_id"),
+            video_id=uuid.UUID(str(video_id)) if video_id else None,
             model_version=template_dict.get("model_version", "gemini-2.0-flash"),
             interval_ms=template_dict.get("interval_ms", 200),
             duration_seconds=template_dict.get("duration_seconds", 0),
-            total_segments=len(template_dict.get("segments", [])),
+            total_segments=len(segments),
             status="completed",
             template_data=template_dict,
+            segments_blob=segments_blob,
+            feature_vector=pack_vector(features),
+            feature_version=FEATURE_VERSION,
             # Denormalized summary fields
             pacing=summary.get("pacing"),
             total_cuts=summary.get("total_cuts"),
@@ -117,16 +152,44 @@ class VideoTemplate(Base, TimestampMixin):
             style_tags=summary.get("style_tags", []),
         )
     
+    def segment_columns(self):
+        """Lazily decoded columnar segments, or None for rows stored as JSON."""
+        if self.segments_blob is None:
+            return None
+        columns = self.__dict__.get("_segment_columns")
+        if columns is None:
+            from app.services.template_codec import SegmentColumns
+            
+            columns = SegmentColumns(self.segments_blob)
+            self.__dict__["_segment_columns"] = columns
+        return columns
+    
+    def refresh_features(self):
+        """Recompute feature_vector for the current FEATURE_VERSION; returns the vector."""
+        from app.services.template_index import FEATURE_VERSION, features_for_template, pack_vector
+        
+        vector = features_for_template(self)
+        self.feature_vector = pack_vector(vector)
+        self.feature_version = FEATURE_VERSION
+        return vector
+    
     def get_segments(self) -> list:
         """Get all segments from the template data."""
+        columns = self.segment_columns()
+        if columns is not None:
+            return columns.rows()
         return self.template_data.get("segments", [])
     
     def get_summary(self) -> dict:
-        """Get the summary from the template data."""
+        """Get the summary from the template data (never decodes segments)."""
         return self.template_data.get("summary", {})
     
     def get_segment_at(self, timestamp_ms: int) -> dict | None:
         """Get the segment at a specific timestamp."""
+        columns = self.segment_columns()
+        if columns is not None:
+            index = columns.index_at(timestamp_ms)
+            return columns.segment(index) if index is not None else None
         segments = self.get_segments()
         for segment in segments:
             if segment.get("timestamp_ms", 0) <= timestamp_ms < segment.get("timestamp_end_ms", 0):
@@ -135,6 +198,10 @@ class VideoTemplate(Base, TimestampMixin):
     
     def get_key_moments(self) -> list:
         """Get all key moments from the template."""
+        columns = self.segment_columns()
+        if columns is not None:
+            flags = columns.column("is_key_moment")
+            return columns.rows([i for i, flag in enumerate(flags) if flag])
         segments = self.get_segments()
         return [s for s in segments if s.get("is_key_moment", False)]
 
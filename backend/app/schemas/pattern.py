@@ -115,6 +115,7 @@ class VisualSegment(BaseModel):
     text_position: Optional[str] = Field(default=None, description="Position of text overlay (top, center, bottom)")
     text_style: Optional[str] = Field(default=None, description="Style of text (bold, outlined, animated, etc)")
     brightness: Optional[float] = Field(default=None, ge=0, le=1, description="Relative brightness 0-1")
+    motion: Optional[float] = Field(default=None, ge=0, le=1, description="Frame-to-frame motion magnitude 0-1")
     composition: Optional[str] = Field(default=None, description="Composition notes (rule of thirds, centered, etc)")
     visual_effects: List[str] = Field(default_factory=list, description="Any visual effects applied")
 
@@ -228,6 +229,9 @@ class HybridTemplate(BaseModel):
     model_version: str = Field(default="gemini-2.0-flash", description="AI model used for analysis")
     segments: List[HybridSegment] = Field(description="All segments of the video")
     summary: TemplateSummary = Field(description="Summary analysis of the full video")
+    analysis_stats: Optional[Dict[str, Any]] = Field(
+        default=None, description="Pipeline stats: frames analyzed, model calls and bytes saved"
+    )
     
     class Config:
         from_attributes = True
@@ -0,0 +1,170 @@
+"""
+Result cache for pattern analysis.
+
+Two levels, both in Redis:
+
+- whole templates, keyed by the SHA-256 of the video file + GEMINI_MODEL +
+  prompt version, so a retry, duplicate upload or reprocess of identical
+  media returns without decoding a frame or calling the model;
+- frame batch results, keyed by the batch's perceptual frame hashes + model +
+  prompt version, so re-encoded or re-trimmed copies still reuse any batch
+  whose frames look the same.
+
+Prompt versions are digests of the prompt text plus ANALYSIS_CACHE_VERSION,
+so editing a prompt invalidates its entries; bump the setting (or call
+`clear`) to drop everything explicitly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "analysis_cache"
+# After a Redis error, skip it for this long instead of paying a connect timeout per call.
+REDIS_RETRY_SECONDS = 30.0
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, streamed in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prompt_version(*prompts: str) -> str:
+    """Short digest of prompt texts and the manual ANALYSIS_CACHE_VERSION."""
+    digest = hashlib.sha256(str(settings.ANALYSIS_CACHE_VERSION).encode())
+    for prompt in prompts:
+        digest.update(b"\0" + prompt.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class AnalysisCache:
+    """Template and batch result cache; every operation degrades to a miss when Redis is down."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        ttl_seconds: Optional[int] = None,
+        model_name: Optional[str] = None,
+    ) -> None:
+        self._redis = redis_client
+        self.ttl = int(ttl_seconds or settings.ANALYSIS_CACHE_TTL_SECONDS)
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self._redis_down_until = 0.0
+        self._stats = {"template_hits": 0, "template_misses": 0, "batch_hits": 0, "batch_misses": 0}
+
+    def _client(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _failed(self, exc: Exception) -> None:
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"Analysis cache: Redis unavailable, skipping cache: {exc}")
+
+    def _get(self, key: str) -> Any:
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(key)
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+        except Exception as exc:
+            self._failed(exc)
+            return None
+
+    def _set(self, key: str, value: Any) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.setex(key, self.ttl, json.dumps(value, default=str))
+        except Exception as exc:
+            self._failed(exc)
+
+    # ---------- Templates ----------
+
+    def template_key(self, content_hash: str, version: str) -> str:
+        return f"{REDIS_PREFIX}:template:{self.model_name}:{version}:{content_hash}"
+
+    def get_template(self, content_hash: str, version: str) -> Optional[Dict[str, Any]]:
+        template = self._get(self.template_key(content_hash, version))
+        self._stats["template_hits" if template is not None else "template_misses"] += 1
+        return template
+
+    def put_template(self, content_hash: str, version: str, template: Dict[str, Any]) -> None:
+        self._set(self.template_key(content_hash, version), template)
+
+    # ---------- Batches ----------
+
+    def batch_key(self, frame_hashes: Iterable[int], version: str, measured_visuals: bool) -> str:
+        frames = ",".join(f"{int(h):016x}" for h in frame_hashes)
+        digest = hashlib.sha256(f"{int(measured_visuals)}|{frames}".encode()).hexdigest()
+        return f"{REDIS_PREFIX}:batch:{self.model_name}:{version}:{digest}"
+
+    def get_batch(
+        self, frame_hashes: List[int], version: str, measured_visuals: bool
+    ) -> Optional[List[Dict[str, Any]]]:
+        results = self._get(self.batch_key(frame_hashes, version, measured_visuals))
+        if not isinstance(results, list) or len(results) != len(frame_hashes):
+            results = None
+        self._stats["batch_hits" if results is not None else "batch_misses"] += 1
+        return results
+
+    def put_batch(
+        self, frame_hashes: List[int], version: str, measured_visuals: bool, results: List[Dict[str, Any]]
+    ) -> None:
+        # Timestamps belong to the video the batch came from; readers re-stamp them.
+        stored = [{k: v for k, v in result.items() if k != "timestamp_ms"} for result in results]
+        self._set(self.batch_key(frame_hashes, version, measured_visuals), stored)
+
+    # ---------- Maintenance ----------
+
+    def clear(self) -> int:
+        """Delete every cached template and batch result; returns the number of keys removed."""
+        client = self._client()
+        if client is None:
+            return 0
+        removed = 0
+        try:
+            keys: List[str] = []
+            for key in client.scan_iter(match=f"{REDIS_PREFIX}:*", count=500):
+                keys.append(key)
+                if len(keys) >= 500:
+                    removed += client.delete(*keys)
+                    keys = []
+            if keys:
+                removed += client.delete(*keys)
+        except Exception as exc:
+            self._failed(exc)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """The configured cache, or None when ANALYSIS_CACHE_ENABLED is off."""
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    return AnalysisCache()
@@ -0,0 +1,102 @@
+"""
+Checkpoints for the staged pattern-analysis pipeline.
+
+The extraction stage writes each batch of encoded frames to storage and the
+run context (audio features, frame reuse map, visual measurements) to Redis.
+Every batch task checkpoints its model output, so a retried or re-dispatched
+run only calls the model for batches that have no result yet.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+from app.services.frame_pipeline import AnalysisFrame, pack_frames, unpack_frames
+from app.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCheckpoint:
+    """Redis- and storage-backed state of one analysis run (video_id + run_id)."""
+
+    def __init__(
+        self,
+        video_id: str,
+        run_id: str,
+        redis_client: Any = None,
+        storage: Any = None,
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        self.video_id = video_id
+        self.run_id = run_id
+        self.prefix = f"analysis:{video_id}:{run_id}"
+        self.ttl = int(ttl_seconds or settings.ANALYSIS_CHECKPOINT_TTL_SECONDS)
+        self._redis = redis_client
+        self._storage = storage
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_storage_service()
+        return self._storage
+
+    def _frames_path(self, batch_num: int) -> str:
+        return f"analysis/{self.video_id}/{self.run_id}/batch_{batch_num:04d}.frames"
+
+    def save_context(self, context: Dict[str, Any]) -> None:
+        self.redis.setex(f"{self.prefix}:context", self.ttl, json.dumps(context))
+
+    def load_context(self) -> Optional[Dict[str, Any]]:
+        raw = self.redis.get(f"{self.prefix}:context")
+        return json.loads(raw) if raw else None
+
+    def save_frames(self, batch_num: int, frames: List[AnalysisFrame]) -> str:
+        path = self._frames_path(batch_num)
+        self.storage.save_bytes(path, pack_frames(frames), content_type="application/octet-stream")
+        return path
+
+    def load_frames(self, batch_num: int) -> List[AnalysisFrame]:
+        return unpack_frames(self.storage.read_bytes(self._frames_path(batch_num)))
+
+    def save_batch_result(self, batch_num: int, results: List[Dict[str, Any]], complete: bool = True) -> None:
+        """Checkpoint a batch's output; `complete=False` marks placeholder results."""
+        self.redis.hset(f"{self.prefix}:results", str(batch_num), json.dumps(results))
+        self.redis.expire(f"{self.prefix}:results", self.ttl)
+        if complete:
+            self.redis.srem(f"{self.prefix}:incomplete", str(batch_num))
+        else:
+            self.redis.sadd(f"{self.prefix}:incomplete", str(batch_num))
+            self.redis.expire(f"{self.prefix}:incomplete", self.ttl)
+
+    def load_batch_result(self, batch_num: int) -> Optional[List[Dict[str, Any]]]:
+        raw = self.redis.hget(f"{self.prefix}:results", str(batch_num))
+        return json.loads(raw) if raw else None
+
+    def load_results(self) -> Dict[int, List[Dict[str, Any]]]:
+        """All checkpointed batch results, keyed by batch number."""
+        raw = self.redis.hgetall(f"{self.prefix}:results") or {}
+        return {int(batch_num): json.loads(value) for batch_num, value in raw.items()}
+
+    def incomplete_batches(self) -> List[int]:
+        """Batches whose checkpointed results contain placeholders."""
+        return sorted(int(batch_num) for batch_num in (self.redis.smembers(f"{self.prefix}:incomplete") or ()))
+
+    def clear(self, total_batches: int) -> None:
+        """Drop frame blobs and Redis state once the template is built."""
+        for batch_num in range(1, total_batches + 1):
+            try:
+                self.storage.delete(self._frames_path(batch_num))
+            except Exception as exc:
+                logger.warning(f"Failed to delete checkpointed frames for {self.prefix} batch {batch_num}: {exc}")
+        self.redis.delete(f"{self.prefix}:context", f"{self.prefix}:results", f"{self.prefix}:incomplete")
@@ -0,0 +1,203 @@
+"""
+Incrementally maintained daily analytics rollups.
+
+Analytics rows hold each post's latest totals. Whenever they change, the
+difference (new minus old, plus one post for a first collection) is added to
+the post's AnalyticsDailyRollup row (user, video, platform, publish day) with
+one multi-row INSERT ... ON CONFLICT DO UPDATE per batch. Dashboard, trend
+and top-performer queries then aggregate at most one row per video, platform
+and day instead of every post.
+
+`record_metrics_batch` also appends each post's totals to the metrics
+history (services/metrics_history.py). `rebuild_rollups` recomputes rows
+from scratch; the daily task uses it to repair drift from deleted or
+re-dated posts.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.analytics import Analytics, AnalyticsDailyRollup
+from app.models.post import Post
+from app.models.video import Video
+from app.services.metrics_history import MetricsPoint, record_points
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("views", "likes", "comments", "shares", "saves")
+RollupKey = Tuple[Any, Any, str, date]
+# Rows per INSERT statement (12 parameters each; PostgreSQL allows 65535 per statement)
+UPSERT_CHUNK = 2000
+
+
+@dataclass
+class RollupDelta:
+    """Change to one rollup row."""
+
+    user_id: Any
+    video_id: Any
+    platform: str
+    published_at: datetime
+    posts: int = 0
+    metrics: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def key(self) -> RollupKey:
+        return (self.user_id, self.video_id, self.platform, self.published_at.date())
+
+
+def _insert(db: Session):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def apply_rollup_deltas(db: Session, deltas: Iterable[RollupDelta]) -> int:
+    """Add deltas to their rollup rows in one upsert; returns rows touched. Does not commit."""
+    merged: Dict[RollupKey, Dict[str, Any]] = {}
+    for delta in deltas:
+        row = merged.get(delta.key)
+        if row is None:
+            user_id, video_id, platform, day = delta.key
+            row = merged[delta.key] = {
+                "user_id": user_id,
+                "video_id": video_id,
+                "platform": platform,
+                "day": day,
+                "posts": 0,
+                "published_at": delta.published_at,
+                **{name: 0 for name in METRICS},
+            }
+        row["posts"] += delta.posts
+        row["published_at"] = max(row["published_at"], delta.published_at)
+        for name in METRICS:
+            row[name] += int(delta.metrics.get(name) or 0)
+    if not merged:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [{**row, "updated_at": now} for row in merged.values()]
+    table = AnalyticsDailyRollup.__table__
+    insert = _insert(db)
+    latest = func.greatest if db.bind.dialect.name == "postgresql" else func.max
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        statement = insert(table).values(rows[start : start + UPSERT_CHUNK])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.video_id, table.c.platform, table.c.day],
+            set_={
+                **{name: table.c[name] + statement.excluded[name] for name in ("posts", *METRICS)},
+                "published_at": latest(table.c.published_at, statement.excluded.published_at),
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        db.execute(statement)
+    return len(rows)
+
+
+def record_metrics_batch(
+    db: Session,
+    updates: Iterable[Tuple[Post, Dict[str, Any], Any]],
+    collected_at: Optional[datetime] = None,
+) -> List[Analytics]:
+    """
+    Store latest totals for many posts: analytics rows are updated in the
+    session, rollup deltas and history snapshots are each written with one
+    bulk upsert. `updates` yields (post, metrics, user_id); user_id may be
+    None and is then looked up. Does not commit.
+    """
+    collected_at = collected_at or datetime.utcnow()
+    updates = list(updates)
+    missing_owners = {post.video_id for post, _metrics, user_id in updates if user_id is None and post.published_at}
+    owners = dict(db.query(Video.id, Video.user_id).filter(Video.id.in_(missing_owners)).all()) if missing_owners else {}
+
+    stored: List[Analytics] = []
+    deltas: List[RollupDelta] = []
+    points: List[MetricsPoint] = []
+    for post, metrics, user_id in updates:
+        analytics = post.analytics
+        before = {name: 0 for name in METRICS}
+        is_new = analytics is None
+        if is_new:
+            analytics = Analytics(post_id=post.id, **before)
+            post.analytics = analytics
+            db.add(analytics)
+        else:
+            before = {name: getattr(analytics, name) or 0 for name in METRICS}
+        for name in METRICS:
+            setattr(analytics, name, int(metrics.get(name) or 0))
+        analytics.calculate_engagement_rate()
+        stored.append(analytics)
+        points.append(MetricsPoint(post.id, collected_at, {name: getattr(analytics, name) for name in METRICS}))
+
+        if post.published_at is not None:
+            deltas.append(
+                RollupDelta(
+                    user_id=user_id if user_id is not None else owners.get(post.video_id),
+                    video_id=post.video_id,
+                    platform=post.platform,
+                    published_at=post.published_at,
+                    posts=1 if is_new else 0,
+                    metrics={name: getattr(analytics, name) - before[name] for name in METRICS},
+                )
+            )
+
+    db.flush()  # new analytics rows before the bulk statements
+    apply_rollup_deltas(db, deltas)
+    record_points(db, points)
+    return stored
+
+
+def record_post_metrics(db: Session, post: Post, metrics: Dict[str, Any], user_id: Any = None) -> Analytics:
+    """
+    Store a post's latest totals, roll the change up and append a history
+    snapshot. Does not commit. `user_id` saves a lookup when the caller
+    already knows the video owner.
+    """
+    return record_metrics_batch(db, [(post, metrics, user_id)])[0]
+
+
+def rebuild_rollups(db: Session, user_ids: Optional[Iterable[Any]] = None) -> Dict[str, int]:
+    """Recompute rollups from analytics for all users (or `user_ids`) and commit."""
+    query = (
+        db.query(
+            Video.user_id,
+            Post.video_id,
+            Post.platform,
+            Post.published_at,
+            *(getattr(Analytics, name) for name in METRICS),
+        )
+        .join(Video, Post.video_id == Video.id)
+        .join(Analytics, Analytics.post_id == Post.id)
+        .filter(Post.published_at.isnot(None))
+    )
+    delete = db.query(AnalyticsDailyRollup)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        query = query.filter(Video.user_id.in_(user_ids))
+        delete = delete.filter(AnalyticsDailyRollup.user_id.in_(user_ids))
+
+    deltas: List[RollupDelta] = [
+        RollupDelta(
+            user_id=row[0],
+            video_id=row[1],
+            platform=row[2],
+            published_at=row[3],
+            posts=1,
+            metrics=dict(zip(METRICS, row[4:])),
+        )
+        for row in query.yield_per(5000)
+    ]
+    delete.delete(synchronize_session=False)
+    rows = apply_rollup_deltas(db, deltas)
+    db.commit()
+    logger.info(f"Rebuilt {rows} analytics rollup rows from {len(deltas)} posts")
+    return {"posts": len(deltas), "rollup_rows": rows}
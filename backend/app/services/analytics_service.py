@@ -4,6 +4,7 @@ Analytics Service - Tracks performance and updates pattern scores.
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+from uuid import UUID
 
 
 class AnalyticsService:
@@ -74,7 +75,7 @@ class AnalyticsService:
         
         return (engagements / views) * 100
 
-    async def update_pattern_scores(
+    def update_pattern_scores(
         self,
         video_id: str,
         performance_data: Dict[str, Any],
@@ -82,6 +83,9 @@ class AnalyticsService:
         """
         Update pattern scores based on video performance.
         
+        Blocking (opens its own database session): call it from a worker or a
+        threadpool, not from the event loop.
+        
         Args:
             video_id: ID of the video
             performance_data: Performance metrics
@@ -89,28 +93,25 @@ class AnalyticsService:
         Returns:
             List of updated pattern scores
         """
-        # TODO: Implement pattern score update algorithm
-        # 1. Get patterns associated with video
-        # 2. Calculate new scores based on performance
-        # 3. Update pattern scores in database
-        
-        updated_patterns = []
-        
-        engagement_rate = performance_data.get("engagement_rate", 0)
-        
-        # Score adjustment logic
-        if engagement_rate > 10:
-            score_adjustment = 15
-        elif engagement_rate > 5:
-            score_adjustment = 10
-        elif engagement_rate > 2:
-            score_adjustment = 5
-        elif engagement_rate > 1:
-            score_adjustment = 0
-        else:
-            score_adjustment = -5
-        
-        return updated_patterns
+        from app.db.session import SessionLocal
+        from app.models.pattern import Pattern
+        from app.models.video import Video
+        from app.services.pattern_scoring import rescore_patterns
+        
+        # Analytics rows are the source of truth; performance_data is kept for callers.
+        db = SessionLocal()
+        try:
+            video = db.query(Video).filter(Video.id == UUID(video_id)).first()
+            if video is None:
+                return []
+            rescore_patterns(db, user_ids=[video.user_id])
+            patterns = db.query(Pattern.id, Pattern.type, Pattern.score).filter(Pattern.video_id == video.id).all()
+            return [
+                {"pattern_id": str(pattern_id), "type": pattern_type, "score": score}
+                for pattern_id, pattern_type, score in patterns
+            ]
+        finally:
+            db.close()
 
     async def get_dashboard_data(
         self,
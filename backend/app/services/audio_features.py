@@ -0,0 +1,224 @@
+"""
+Deterministic audio features per analysis segment.
+
+The 16kHz mono WAV extracted for analysis is memory-mapped and processed in
+vectorized NumPy passes: RMS energy, silence, zero-crossing rate, spectral
+centroid and onset strength per FRAME_EXTRACTION_INTERVAL_MS segment, plus a
+global tempo estimate and beat grid from the onset envelope's autocorrelation.
+Spectra are computed in float32 over FFT_CHUNK_FRAMES frames at a time and
+reduced immediately, so memory does not grow with the audio length.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+ONSET_HOP = 512
+FFT_CHUNK_FRAMES = 1024  # Frames per rfft call
+MIN_BPM = 60.0
+MAX_BPM = 180.0
+
+
+def read_wav_pcm16(path: str) -> Tuple[np.ndarray, int]:
+    """Memory-map the samples of a mono 16-bit PCM WAV; returns (samples, sample_rate)."""
+    with open(path, "rb") as handle:
+        header = handle.read(12)
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError(f"Not a WAV file: {path}")
+        sample_rate = channels = bits = 0
+        while True:
+            chunk = handle.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"WAV file has no data chunk: {path}")
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = handle.read(size)
+                _tag, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                bits = struct.unpack("<H", fmt[14:16])[0]
+                continue
+            if chunk_id == b"data":
+                offset = handle.tell()
+                break
+            handle.seek(size + (size & 1), 1)
+    if channels != 1 or bits != 16:
+        raise ValueError(f"Expected mono 16-bit PCM, got {channels}ch/{bits}bit: {path}")
+    # ffmpeg writes a placeholder size when streaming; trust the file length instead.
+    count = max(0, (_file_size(path) - offset) // 2)
+    if count == 0:
+        return np.zeros(0, dtype=np.int16), sample_rate
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(count,)), sample_rate
+
+
+def _file_size(path: str) -> int:
+    with open(path, "rb") as handle:
+        handle.seek(0, 2)
+        return handle.tell()
+
+
+def _frames(signal: np.ndarray, size: int, hop: int) -> np.ndarray:
+    """Overlapping (n, size) view of a zero-padded signal."""
+    if signal.size < size:
+        signal = np.pad(signal, (0, size - signal.size))
+    count = 1 + (signal.size - size) // hop
+    return np.lib.stride_tricks.sliding_window_view(signal, size)[: count * hop : hop]
+
+
+def onset_envelope(signal: np.ndarray, hop: int = ONSET_HOP, chunk_frames: int = FFT_CHUNK_FRAMES) -> np.ndarray:
+    """Half-wave rectified spectral flux on log-magnitude spectra."""
+    frames = _frames(np.asarray(signal, dtype=np.float32), hop * 2, hop)
+    window = np.hanning(hop * 2).astype(np.float32)
+    flux = np.zeros(frames.shape[0], dtype=np.float32)
+    previous = None
+    for start in range(0, frames.shape[0], chunk_frames):
+        spectrum = np.log1p(np.abs(np.fft.rfft(frames[start : start + chunk_frames] * window, axis=1)))
+        # The previous chunk's last spectrum keeps the flux continuous across chunks.
+        rows = spectrum if previous is None else np.concatenate([previous, spectrum])
+        first = start + 1 if previous is None else start
+        flux[first : first + rows.shape[0] - 1] = np.maximum(np.diff(rows, axis=0), 0).sum(axis=1)
+        previous = spectrum[-1:]
+    return flux
+
+
+def estimate_tempo(envelope: np.ndarray, frame_rate: float) -> Tuple[Optional[float], float, Optional[float]]:
+    """
+    Tempo from the onset envelope's autocorrelation.
+    Returns (bpm, confidence 0-1, beat phase in seconds); bpm is None when unclear.
+    """
+    # Light smoothing keeps beat periods that fall between envelope frames from splitting their peak.
+    env = np.convolve(envelope, [0.25, 0.5, 0.25], mode="same")
+    env = env - env.mean()
+    if env.size < 4 or not np.any(env):
+        return None, 0.0, None
+    n = 1 << int(np.ceil(np.log2(env.size * 2)))
+    spectrum = np.fft.rfft(env, n)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), n)[: env.size]
+    if acf[0] <= 0:
+        return None, 0.0, None
+    min_lag = max(1, int(frame_rate * 60.0 / MAX_BPM))
+    max_lag = min(env.size - 1, int(frame_rate * 60.0 / MIN_BPM))
+    if max_lag <= min_lag:
+        return None, 0.0, None
+    lags = np.arange(min_lag, max_lag + 1)
+    # Log-normal prior around 120 BPM breaks ties between a tempo and its half.
+    prior = np.exp(-0.5 * np.log2(60.0 * frame_rate / lags / 120.0) ** 2)
+    lag = int(lags[np.argmax(acf[lags] * prior)])
+    confidence = float(max(0.0, acf[lag] / acf[0]))
+    # Parabolic interpolation for a sub-frame beat period.
+    period = float(lag)
+    if 0 < lag < acf.size - 1:
+        left, mid, right = acf[lag - 1], acf[lag], acf[lag + 1]
+        denominator = left - 2 * mid + right
+        if denominator < 0:
+            period += 0.5 * (left - right) / denominator
+    # Beat phase: offset whose comb of beats collects the most onset energy.
+    comb = np.arange(0, env.size, period)
+    offsets = np.arange(int(np.ceil(period)))
+    positions = np.rint(offsets[:, None] + comb[None, :]).astype(int)
+    phases = np.where(positions < env.size, envelope[np.minimum(positions, env.size - 1)], 0).sum(axis=1)
+    phase = (int(np.argmax(phases)) + 2) / frame_rate
+    return 60.0 * frame_rate / period, confidence, phase
+
+
+def segment_features(
+    samples: np.ndarray,
+    sample_rate: int,
+    segment_ms: int,
+    silence_db: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Per-segment feature arrays (one entry per `segment_ms` window) and the
+    global tempo estimate, computed without Python-level loops over samples.
+    """
+    silence_db = float(settings.AUDIO_SILENCE_DB if silence_db is None else silence_db)
+    signal = np.asarray(samples, dtype=np.float32) / 32768.0
+    seg_len = max(1, int(sample_rate * segment_ms / 1000))
+    count = int(np.ceil(signal.size / seg_len)) if signal.size else 0
+    if count == 0:
+        return {"count": 0}
+    padded = np.pad(signal, (0, count * seg_len - signal.size))
+    segs = padded.reshape(count, seg_len)
+
+    rms = np.sqrt(np.mean(segs**2, axis=1))
+    rms_db = 20.0 * np.log10(np.maximum(rms, 1e-9))
+    silent = rms_db < silence_db
+    # Loudness mapped from [silence_db, 0] dBFS to [0, 1].
+    volume = np.clip((rms_db - silence_db) / -silence_db, 0.0, 1.0)
+    zcr = np.mean(np.abs(np.diff(np.signbit(segs).astype(np.int8), axis=1)), axis=1)
+
+    window = np.hanning(seg_len).astype(np.float32)
+    freqs = np.fft.rfftfreq(seg_len, d=1.0 / sample_rate).astype(np.float32)
+    centroid = np.zeros(count, dtype=np.float32)
+    for start in range(0, count, FFT_CHUNK_FRAMES):
+        magnitudes = np.abs(np.fft.rfft(segs[start : start + FFT_CHUNK_FRAMES] * window, axis=1))
+        power = magnitudes.sum(axis=1)
+        centroid[start : start + magnitudes.shape[0]] = np.where(
+            power > 0, (magnitudes @ freqs) / np.maximum(power, 1e-12), 0.0
+        )
+
+    envelope = onset_envelope(signal)
+    env_rate = sample_rate / ONSET_HOP
+    # Envelope frame k first sees an onset in its window ending at (k + 2) * hop samples.
+    env_segment = np.minimum(((np.arange(envelope.size) + 2) * ONSET_HOP) // seg_len, count - 1)
+    onset = np.zeros(count, dtype=np.float32)
+    np.maximum.at(onset, env_segment, envelope)
+    onset = onset / onset.max() if onset.max() > 0 else onset
+
+    bpm, confidence, phase = estimate_tempo(envelope, env_rate)
+    beats = np.zeros(count, dtype=bool)
+    if bpm:
+        beat_times = np.arange(phase, signal.size / sample_rate, 60.0 / bpm)
+        beats[np.minimum((beat_times * 1000 // segment_ms).astype(int), count - 1)] = True
+
+    # Beat drop: a strong onset landing right after a quieter stretch.
+    # `prior` is the mean volume of up to 5 preceding segments.
+    cumulative = np.concatenate([[0.0], np.cumsum(volume)])
+    index = np.arange(count)
+    lookback = np.minimum(index, 5)
+    prior = np.where(
+        lookback > 0, (cumulative[index] - cumulative[index - lookback]) / np.maximum(lookback, 1), 1.0
+    )
+    beat_drop = (onset >= 0.8) & (volume - prior >= 0.25) & ~silent
+
+    return {
+        "count": count,
+        "rms": rms,
+        "volume": volume,
+        "silence": silent,
+        "zcr": zcr,
+        "centroid_hz": centroid,
+        "onset": onset,
+        "beat": beats,
+        "beat_drop": beat_drop,
+        "tempo_bpm": bpm,
+        "tempo_confidence": confidence,
+    }
+
+
+def analyze_wav(path: str, segment_ms: int) -> List[Dict[str, Any]]:
+    """Per-segment audio feature dicts for a WAV file, aligned to the analysis grid."""
+    samples, sample_rate = read_wav_pcm16(path)
+    features = segment_features(samples, sample_rate, segment_ms)
+    count = features["count"]
+    if not count:
+        return []
+    bpm = features["tempo_bpm"]
+    rhythmic = bool(bpm) and features["tempo_confidence"] >= settings.AUDIO_TEMPO_MIN_CONFIDENCE
+    return [
+        {
+            "rms": round(float(features["rms"][i]), 5),
+            "volume": round(float(features["volume"][i]), 4),
+            "silence": bool(features["silence"][i]),
+            "zcr": round(float(features["zcr"][i]), 4),
+            "centroid_hz": round(float(features["centroid_hz"][i]), 1),
+            "onset": round(float(features["onset"][i]), 4),
+            "beat": bool(features["beat"][i]),
+            "beat_drop": bool(features["beat_drop"][i]),
+            "tempo_bpm": int(round(bpm)) if rhythmic else None,
+        }
+        for i in range(count)
+    ]
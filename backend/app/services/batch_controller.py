@@ -0,0 +1,171 @@
+"""
+Adaptive sizing of frame batches sent to the model.
+
+A fixed 25-frame batch is too large for high-resolution frames (request
+payload) or verbose descriptions (output truncated at max_output_tokens), and
+too small when the model answers quickly. The controller closes each batch on
+whichever budget runs out first: frame count, encoded bytes or expected output
+tokens. After every call it adjusts the frame target from what happened:
+truncated or unparseable output halves it, slow calls shrink it, fast clean
+calls grow it, and the observed output tokens per frame feed the next
+estimate. Every call is recorded for the template's analysis_stats.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.frame_pipeline import AnalysisFrame
+
+logger = logging.getLogger(__name__)
+
+# Share of max_output_tokens a batch is planned to use, leaving room for estimate error.
+OUTPUT_HEADROOM = 0.8
+# Weight of the newest observation in the output-tokens-per-frame average.
+TOKENS_EMA_WEIGHT = 0.3
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class BatchMetrics:
+    """One model call for a batch (or a split/continued part of one)."""
+
+    batch_num: int
+    frames: int
+    bytes: int
+    latency_s: float
+    status: str  # ok, truncated, parse_error, api_error
+    frames_answered: int = 0
+    output_chars: int = 0
+
+
+class BatchController:
+    """Frame batch sizing driven by payload size, output budget and call latency."""
+
+    def __init__(
+        self,
+        initial_size: Optional[int] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_output_tokens: Optional[int] = None,
+        tokens_per_frame: Optional[float] = None,
+        target_latency_s: Optional[float] = None,
+        adaptive: bool = True,
+    ) -> None:
+        self.min_size = max(1, int(min_size or settings.ANALYSIS_BATCH_MIN_FRAMES))
+        self.max_size = max(self.min_size, int(max_size or settings.ANALYSIS_BATCH_MAX_FRAMES))
+        initial = int(initial_size or settings.ANALYSIS_BATCH_INITIAL_FRAMES)
+        self.size = min(self.max_size, max(self.min_size, initial))
+        self.max_bytes = int(max_bytes or settings.ANALYSIS_BATCH_MAX_BYTES)
+        self.max_output_tokens = int(max_output_tokens or settings.ANALYSIS_MAX_OUTPUT_TOKENS)
+        self.tokens_per_frame = float(tokens_per_frame or settings.ANALYSIS_OUTPUT_TOKENS_PER_FRAME)
+        self.target_latency_s = float(target_latency_s or settings.ANALYSIS_BATCH_TARGET_LATENCY_SECONDS)
+        self.adaptive = adaptive
+        self.metrics: List[BatchMetrics] = []
+        self.batches_formed = 0
+        self._guard = threading.Lock()
+
+    @classmethod
+    def fixed(cls, size: int) -> "BatchController":
+        """Batches of exactly `size` frames; metrics and failure splitting still apply."""
+        size = max(1, int(size))
+        return cls(initial_size=size, min_size=size, max_size=size, max_bytes=2**62, adaptive=False)
+
+    # ---------- Batch formation ----------
+
+    def frame_limit(self) -> int:
+        """Frames allowed in the next batch by the frame target and the output budget."""
+        with self._guard:
+            if not self.adaptive:
+                return self.size
+            by_output = int(self.max_output_tokens * OUTPUT_HEADROOM / max(self.tokens_per_frame, 1.0))
+            return max(1, min(self.size, by_output))
+
+    def batches(self, frames: Iterable[AnalysisFrame]) -> Iterator[List[AnalysisFrame]]:
+        """
+        Group a frame stream into batches, re-reading the limits for every batch
+        (safe to run on a prefetch thread). A single frame over the byte budget
+        still forms a batch on its own. `batches_formed` counts the batches yielded.
+        """
+        for batch in self._group(frames):
+            self.batches_formed += 1
+            yield batch
+
+    def _group(self, frames: Iterable[AnalysisFrame]) -> Iterator[List[AnalysisFrame]]:
+        batch: List[AnalysisFrame] = []
+        batch_bytes = 0
+        limit = self.frame_limit()
+        source = iter(frames)
+        try:
+            for frame in source:
+                size = len(frame.jpeg)
+                if batch and batch_bytes + size > self.max_bytes:
+                    yield batch
+                    batch, batch_bytes, limit = [], 0, self.frame_limit()
+                batch.append(frame)
+                batch_bytes += size
+                if len(batch) >= limit:
+                    yield batch
+                    batch, batch_bytes, limit = [], 0, self.frame_limit()
+            if batch:
+                yield batch
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    # ---------- Feedback ----------
+
+    def record(self, metrics: BatchMetrics) -> None:
+        """Store a call's metrics and adjust the frame target."""
+        with self._guard:
+            self.metrics.append(metrics)
+            if metrics.frames_answered and metrics.output_chars:
+                observed = metrics.output_chars / CHARS_PER_TOKEN / metrics.frames_answered
+                self.tokens_per_frame += TOKENS_EMA_WEIGHT * (observed - self.tokens_per_frame)
+            if not self.adaptive:
+                return
+            previous = self.size
+            if metrics.status in ("truncated", "parse_error"):
+                self.size = max(self.min_size, min(self.size, metrics.frames) // 2)
+            elif metrics.status == "ok" and metrics.frames >= self.size:
+                if metrics.latency_s > 2 * self.target_latency_s:
+                    self.size = max(self.min_size, int(self.size * 0.75))
+                elif metrics.latency_s < self.target_latency_s / 2:
+                    self.size = min(self.max_size, self.size + max(1, self.size // 4))
+            if self.size != previous:
+                logger.info(
+                    f"Batch size {previous} -> {self.size} after batch {metrics.batch_num} "
+                    f"({metrics.status}, {metrics.latency_s:.1f}s, {metrics.frames} frames)"
+                )
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate metrics for analysis_stats."""
+        with self._guard:
+            calls = list(self.metrics)
+            final_size = self.size
+            tokens_per_frame = self.tokens_per_frame
+        latencies = [m.latency_s for m in calls if m.status != "api_error"]
+        statuses: Dict[str, int] = {}
+        for m in calls:
+            statuses[m.status] = statuses.get(m.status, 0) + 1
+        return {
+            "batches": self.batches_formed,
+            "model_calls": len(calls),
+            "calls_by_status": statuses,
+            "frames_sent": sum(m.frames for m in calls),
+            "bytes_sent": sum(m.bytes for m in calls),
+            "mean_latency_s": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "max_latency_s": round(max(latencies), 2) if latencies else 0.0,
+            "final_batch_size": final_size,
+            "output_tokens_per_frame": round(tokens_per_frame, 1),
+        }
+
+    def calls(self) -> List[Dict[str, Any]]:
+        with self._guard:
+            return [asdict(m) for m in self.metrics]
@@ -0,0 +1,103 @@
+"""
+Perceptual-hash deduplication of sampled frames.
+
+Talking-head and static shots produce long runs of near-identical frames at
+5fps. Each frame gets a 64-bit dHash computed with NumPy on the decoded
+pixels; a frame within FRAME_DEDUP_HAMMING_THRESHOLD bits of the current run's
+representative is dropped before JPEG encoding and later inherits the
+representative's analysis.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _block_mean(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Area-average a 2-D image down to rows x cols."""
+    h, w = gray.shape
+    row_edges = np.linspace(0, h, rows + 1).astype(int)
+    col_edges = np.linspace(0, w, cols + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(gray, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+    counts = np.outer(np.diff(row_edges), np.diff(col_edges))
+    return sums / np.maximum(counts, 1)
+
+
+def dhash(pixels: np.ndarray) -> int:
+    """64-bit difference hash of an RGB (H, W, 3) or grayscale (H, W) frame."""
+    gray = pixels.astype(np.float32)
+    if gray.ndim == 3:
+        gray = gray @ _LUMA
+    small = _block_mean(gray, 8, 9)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class FrameDeduplicator:
+    """
+    Streaming run collapser. Call `is_duplicate` for each frame in order;
+    duplicates are mapped to the timestamp of their run's representative.
+    """
+
+    def __init__(self, threshold: Optional[int] = None, max_run_ms: Optional[int] = None) -> None:
+        self.threshold = int(settings.FRAME_DEDUP_HAMMING_THRESHOLD if threshold is None else threshold)
+        # Re-sample long static runs periodically so slow changes are not missed.
+        self.max_run_ms = int(settings.FRAME_DEDUP_MAX_RUN_MS if max_run_ms is None else max_run_ms)
+        self.duplicates: Dict[int, int] = {}
+        self.frames_seen = 0
+        self.frames_kept = 0
+        self.bytes_kept = 0
+        self._rep_hash: Optional[int] = None
+        self._rep_ts = 0
+        self.last_hash: Optional[int] = None
+
+    def is_duplicate(self, timestamp_ms: int, pixels: np.ndarray) -> bool:
+        self.frames_seen += 1
+        frame_hash = dhash(pixels)
+        self.last_hash = frame_hash
+        if (
+            self._rep_hash is not None
+            and timestamp_ms - self._rep_ts < self.max_run_ms
+            and hamming(frame_hash, self._rep_hash) <= self.threshold
+        ):
+            self.duplicates[timestamp_ms] = self._rep_ts
+            return True
+        self._rep_hash = frame_hash
+        self._rep_ts = timestamp_ms
+        self.frames_kept += 1
+        return False
+
+    def record_kept_bytes(self, size: int) -> None:
+        self.bytes_kept += int(size)
+
+    def stats(self, batch_size: int, batches: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Frames, model calls and upload bytes saved (dropped frames are estimated at the mean kept size).
+        With `batches`, the number of batches the kept frames actually formed, calls are counted from
+        the real boundaries and the frames without dedup are assumed batched at the same mean size.
+        """
+        dropped = self.frames_seen - self.frames_kept
+        avg_bytes = self.bytes_kept / self.frames_kept if self.frames_kept else 0
+        if batches and self.frames_kept:
+            calls_with = batches
+            calls_without = -(-self.frames_seen * batches // self.frames_kept)
+        else:
+            calls_without = -(-self.frames_seen // batch_size) if batch_size else 0
+            calls_with = -(-self.frames_kept // batch_size) if batch_size else 0
+        return {
+            "frames_sampled": self.frames_seen,
+            "frames_analyzed": self.frames_kept,
+            "frames_deduplicated": dropped,
+            "model_calls_saved": calls_without - calls_with,
+            "bytes_saved": int(dropped * avg_bytes),
+        }
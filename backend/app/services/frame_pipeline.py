@@ -0,0 +1,279 @@
+"""
+In-memory frame pipeline for pattern analysis.
+
+ffmpeg decodes, resamples and downscales the source in one pass and writes raw
+RGB frames to a pipe. Frames are JPEG-encoded in memory and handed out in
+batches, so nothing touches disk and memory stays bounded by the batch size.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import queue
+import struct
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.adaptive_sampling import SamplingPlan
+from app.services.frame_dedup import FrameDeduplicator, dhash
+from app.services.visual_features import VisualAnalyzer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+_DONE = object()
+
+
+class _ProducerError:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+@dataclass
+class AnalysisFrame:
+    """One sampled frame: timestamp, encoded JPEG, the decoded RGB pixels and its dHash."""
+
+    timestamp_ms: int
+    jpeg: bytes
+    width: int
+    height: int
+    pixels: Optional[np.ndarray] = None
+    phash: Optional[int] = None
+
+
+def probe_display_size(video_path: str) -> Tuple[int, int]:
+    """Frame size as ffmpeg will decode it (rotation metadata applied)."""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-select_streams",
+        "v:0",
+        "-show_streams",
+        video_path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        stream = (json.loads(result.stdout).get("streams") or [{}])[0]
+    except Exception:
+        return 0, 0
+    width, height = int(stream.get("width") or 0), int(stream.get("height") or 0)
+    rotation = 0
+    try:
+        rotation = int(float((stream.get("tags") or {}).get("rotate") or 0))
+    except ValueError:
+        pass
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            rotation = int(side_data["rotation"])
+    if abs(rotation) % 180 == 90:
+        width, height = height, width
+    return width, height
+
+
+def target_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """Scale so the longest side is at most max_side (never upscale); dims stay even."""
+    if width <= 0 or height <= 0:
+        return 0, 0
+    scale = min(1.0, float(max_side) / max(width, height)) if max_side > 0 else 1.0
+    w = max(2, int(round(width * scale / 2)) * 2)
+    h = max(2, int(round(height * scale / 2)) * 2)
+    return w, h
+
+
+def encode_jpeg(pixels: np.ndarray, quality: int) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=int(quality))
+    return buf.getvalue()
+
+
+def iter_frames(
+    video_path: str,
+    fps: float = 5.0,
+    max_frames: int = 1500,
+    max_side: Optional[int] = None,
+    quality: Optional[int] = None,
+    keep_pixels: bool = False,
+    dedup: Optional[FrameDeduplicator] = None,
+    plan: Optional[SamplingPlan] = None,
+    visual: Optional[VisualAnalyzer] = None,
+) -> Iterator[AnalysisFrame]:
+    """
+    Yield frames sampled at `fps` straight from an ffmpeg pipe.
+    With `visual`, every decoded frame is measured locally before any filtering.
+    With `plan`, only the grid frames it selects are encoded and yielded.
+    With `dedup`, near-duplicates of the current run's representative are skipped
+    before JPEG encoding and recorded on the deduplicator.
+    Closing the generator early stops ffmpeg.
+    """
+    max_side = int(max_side or settings.ANALYSIS_FRAME_MAX_SIDE)
+    quality = int(quality or settings.ANALYSIS_FRAME_JPEG_QUALITY)
+    width, height = target_size(*probe_display_size(video_path), max_side)
+    if not width:
+        logger.error(f"Could not determine frame size for {video_path}")
+        return
+
+    cmd = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-i",
+        video_path,
+        "-vf",
+        f"fps={fps},scale={width}:{height}:flags=area",
+        "-frames:v",
+        str(int(max_frames)),
+        "-pix_fmt",
+        "rgb24",
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+    frame_bytes = width * height * 3
+    interval_ms = int(1000 / fps)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    errors: List[bytes] = []
+    drain = threading.Thread(target=lambda: errors.append(proc.stderr.read()), daemon=True)
+    drain.start()
+
+    count = 0
+    try:
+        while count < max_frames:
+            raw = proc.stdout.read(frame_bytes)
+            if len(raw) < frame_bytes:
+                break
+            pixels = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+            timestamp_ms = count * interval_ms
+            count += 1
+            if visual is not None:
+                visual.observe(timestamp_ms, pixels)
+            if plan is not None and not plan.wants(timestamp_ms):
+                continue
+            if dedup is not None and dedup.is_duplicate(timestamp_ms, pixels):
+                continue
+            # The deduplicator already hashed this frame; the hash keys the batch result cache.
+            phash = dedup.last_hash if dedup is not None else dhash(pixels)
+            jpeg = encode_jpeg(pixels, quality)
+            if dedup is not None:
+                dedup.record_kept_bytes(len(jpeg))
+            yield AnalysisFrame(
+                timestamp_ms=timestamp_ms,
+                jpeg=jpeg,
+                width=width,
+                height=height,
+                pixels=pixels if keep_pixels else None,
+                phash=phash,
+            )
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+        drain.join(timeout=5)
+        if count == 0 and proc.returncode:
+            message = b"".join(errors).decode(errors="replace").strip()
+            logger.error(f"FFmpeg frame pipe failed for {video_path}: {message[-500:]}")
+
+    logger.info(f"Streamed {count} frames at {fps}fps ({width}x{height}, q={quality})")
+
+
+def iter_batches(frames: Iterable[AnalysisFrame], batch_size: int) -> Iterator[List[AnalysisFrame]]:
+    """Group a frame stream into lists of at most batch_size frames."""
+    batch: List[AnalysisFrame] = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prefetch(items: Iterable[T], depth: int) -> Iterator[T]:
+    """
+    Produce `items` on a background thread, at most `depth` ahead of the consumer.
+
+    Decoding keeps running while every model call is in flight, and memory is
+    bounded by the queue depth. Producer errors are re-raised to the consumer;
+    closing the returned generator early stops the producer (and closes the
+    source generator, which stops ffmpeg).
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, int(depth)))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        source = iter(items)
+        try:
+            for item in source:
+                if not put(item):
+                    break
+            put(_DONE)
+        except BaseException as exc:  # handed to the consumer
+            put(_ProducerError(exc))
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="frame-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+
+
+def pack_frames(frames: List[AnalysisFrame]) -> bytes:
+    """Serialize a batch (timestamps, sizes, hashes and JPEGs; pixels are dropped) into one blob."""
+    header = json.dumps(
+        [
+            {"timestamp_ms": f.timestamp_ms, "width": f.width, "height": f.height, "size": len(f.jpeg), "phash": f.phash}
+            for f in frames
+        ]
+    ).encode()
+    return b"".join([struct.pack(">I", len(header)), header, *(f.jpeg for f in frames)])
+
+
+def unpack_frames(blob: bytes) -> List[AnalysisFrame]:
+    """Inverse of pack_frames."""
+    (header_size,) = struct.unpack(">I", blob[:4])
+    offset = 4 + header_size
+    frames: List[AnalysisFrame] = []
+    for meta in json.loads(blob[4:offset]):
+        frames.append(
+            AnalysisFrame(
+                timestamp_ms=meta["timestamp_ms"],
+                jpeg=blob[offset : offset + meta["size"]],
+                width=meta["width"],
+                height=meta["height"],
+                phash=meta.get("phash"),
+            )
+        )
+        offset += meta["size"]
+    return frames
@@ -0,0 +1,193 @@
+"""
+Time-series store for post metric snapshots.
+
+Each collection appends one row per post to post_metrics_history (post_id,
+collected_at, cumulative totals) with multi-row INSERT ... ON CONFLICT DO
+UPDATE, so a re-run within the same hour overwrites that hour's point instead
+of duplicating it. On PostgreSQL the table is range-partitioned by month;
+`ensure_partitions` creates upcoming months ahead of time and anything outside
+them lands in the default partition.
+
+`downsample_history` keeps hourly resolution for the last
+METRICS_HISTORY_HOURLY_DAYS days; before that only the last snapshot of each
+day survives (marked resolution "day").
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.analytics import PostMetricsPoint
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("views", "likes", "comments", "shares", "saves")
+# Rows per INSERT statement (8 parameters each; PostgreSQL allows 65535 per statement)
+INSERT_CHUNK = 5000
+
+
+@dataclass
+class MetricsPoint:
+    """One post's totals at collection time."""
+
+    post_id: Any
+    collected_at: datetime
+    metrics: Dict[str, int] = field(default_factory=dict)
+
+
+def _insert(db: Session):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_points(db: Session, points: Iterable[MetricsPoint]) -> int:
+    """
+    Upsert snapshots (collected_at truncated to the hour) in multi-row
+    statements; returns rows written. Does not commit.
+    """
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for point in points:
+        collected_at = _hour(point.collected_at)
+        rows[(point.post_id, collected_at)] = {
+            "post_id": point.post_id,
+            "collected_at": collected_at,
+            "resolution": "hour",
+            **{name: int(point.metrics.get(name) or 0) for name in METRICS},
+        }
+    if not rows:
+        return 0
+
+    table = PostMetricsPoint.__table__
+    insert = _insert(db)
+    batch = list(rows.values())
+    for start in range(0, len(batch), INSERT_CHUNK):
+        statement = insert(table).values(batch[start : start + INSERT_CHUNK])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.post_id, table.c.collected_at],
+            set_={name: statement.excluded[name] for name in METRICS},
+        )
+        db.execute(statement)
+    return len(batch)
+
+
+def post_history(
+    db: Session,
+    post_id: Any,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[PostMetricsPoint]:
+    """A post's snapshots in time order, optionally within [start, end)."""
+    query = db.query(PostMetricsPoint).filter(PostMetricsPoint.post_id == post_id)
+    if start is not None:
+        query = query.filter(PostMetricsPoint.collected_at >= start)
+    if end is not None:
+        query = query.filter(PostMetricsPoint.collected_at < end)
+    return query.order_by(PostMetricsPoint.collected_at).all()
+
+
+def _day(db: Session, column):
+    if db.bind.dialect.name == "postgresql":
+        return func.date_trunc("day", column)
+    return func.date(column)
+
+
+def downsample_history(db: Session, now: Optional[datetime] = None, hourly_days: Optional[int] = None) -> Dict[str, int]:
+    """
+    Collapse hourly snapshots older than `hourly_days` (whole days only) to
+    the last snapshot of each day, then commit. Returns counts.
+    """
+    now = now or datetime.utcnow()
+    days = settings.METRICS_HISTORY_HOURLY_DAYS if hourly_days is None else hourly_days
+    cutoff = datetime.combine((now - timedelta(days=days)).date(), datetime.min.time())
+    table = PostMetricsPoint.__table__
+    hourly = (table.c.resolution == "hour") & (table.c.collected_at < cutoff)
+
+    ranked = (
+        db.query(
+            table.c.post_id,
+            table.c.collected_at,
+            func.row_number()
+            .over(
+                partition_by=(table.c.post_id, _day(db, table.c.collected_at)),
+                order_by=table.c.collected_at.desc(),
+            )
+            .label("position"),
+        )
+        .filter(hourly)
+        .subquery()
+    )
+    last_of_day = select(ranked.c.post_id, ranked.c.collected_at).where(ranked.c.position == 1)
+    kept = db.execute(
+        table.update()
+        .where(hourly, tuple_(table.c.post_id, table.c.collected_at).in_(last_of_day))
+        .values(resolution="day")
+    ).rowcount or 0
+    removed = db.execute(table.delete().where(hourly)).rowcount or 0
+    db.commit()
+
+    logger.info(f"Downsampled metrics history before {cutoff.date()}: kept {kept} daily points, removed {removed}")
+    return {"daily_points": kept, "hourly_points_removed": removed}
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, now: Optional[datetime] = None, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create monthly partitions from the current month through `months_ahead`
+    (PostgreSQL only; no-op elsewhere). Commits; returns partitions created.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return []
+    today = (now or datetime.utcnow()).date()
+    ahead = settings.METRICS_HISTORY_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    table = PostMetricsPoint.__tablename__
+    existing = set(
+        db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+    created = []
+    for offset in range(ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        name = f"{table}_{start:%Y_%m}"
+        if name in existing:
+            continue
+        # Fails if the default partition already holds rows for this month; those stay where they are.
+        try:
+            with db.begin_nested():
+                db.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    )
+                )
+            created.append(name)
+        except Exception as exc:
+            logger.warning(f"Could not create partition {name}: {exc}")
+    db.commit()
+    if created:
+        logger.info(f"Created metrics history partitions: {', '.join(created)}")
+    return created
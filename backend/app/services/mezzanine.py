@@ -0,0 +1,209 @@
+"""
+Mezzanine normalization for ingested source videos.
+
+Phone footage arrives with variable frame rates, odd pixel formats and mixed
+audio layouts. Normalizing each source once at ingest into a fixed profile
+(CFR, yuv420p, fixed GOP, AAC 44.1kHz stereo) lets the timeline renderer join
+segments with stream-copy concat instead of falling back to a full re-encode.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEZZANINE_PROFILE_VERSION = 1
+MEZZANINE_VIDEO_CODEC = "libx264"
+MEZZANINE_PIX_FMT = "yuv420p"
+MEZZANINE_AUDIO_CODEC = "aac"
+MEZZANINE_AUDIO_SAMPLE_RATE = 44100
+MEZZANINE_AUDIO_CHANNELS = 2
+MEZZANINE_AUDIO_BITRATE = "192k"
+MEZZANINE_VIDEO_TIMESCALE = 90000
+DEFAULT_FPS_LADDER = (24.0, 25.0, 30.0, 50.0, 60.0)
+
+
+def _parse_rate(value: Any) -> float:
+    if value is None:
+        return 0.0
+    text = str(value)
+    if "/" in text:
+        num, den = text.split("/", 1)
+        try:
+            return float(num) / float(den) if float(den) else 0.0
+        except ValueError:
+            return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def fps_ladder() -> List[float]:
+    """Allowed CFR output rates, parsed from MEZZANINE_FPS_LADDER."""
+    rates: List[float] = []
+    for part in (settings.MEZZANINE_FPS_LADDER or "").split(","):
+        rate = _parse_rate(part.strip())
+        if rate > 0:
+            rates.append(rate)
+    return sorted(rates) or list(DEFAULT_FPS_LADDER)
+
+
+def select_cfr_rate(source_fps: Optional[float], ladder: Optional[Sequence[float]] = None) -> float:
+    """Snap a (possibly variable) source rate to the nearest ladder rate."""
+    rates = list(ladder or fps_ladder())
+    fps = float(source_fps or 0)
+    if fps <= 0:
+        return 30.0 if 30.0 in rates else rates[len(rates) // 2]
+    return min(rates, key=lambda rate: (abs(rate - fps), -rate))
+
+
+def gop_frames(fps: float) -> int:
+    return max(1, int(round(float(fps) * float(settings.MEZZANINE_GOP_SECONDS or 1.0))))
+
+
+def build_profile(source_fps: Optional[float]) -> Dict[str, Any]:
+    """Describe the mezzanine a source with the given frame rate normalizes into."""
+    fps = select_cfr_rate(source_fps)
+    return {
+        "version": MEZZANINE_PROFILE_VERSION,
+        "fps": fps,
+        "pix_fmt": MEZZANINE_PIX_FMT,
+        "video_codec": "h264",
+        "gop_frames": gop_frames(fps),
+        "audio_codec": MEZZANINE_AUDIO_CODEC,
+        "audio_sample_rate": MEZZANINE_AUDIO_SAMPLE_RATE,
+        "audio_channels": MEZZANINE_AUDIO_CHANNELS,
+        "source_fps": float(source_fps or 0),
+    }
+
+
+def video_encode_args(fps: float) -> List[str]:
+    """Encoder arguments that pin pixel format, GOP and timescale."""
+    gop = str(gop_frames(fps))
+    return [
+        "-c:v",
+        MEZZANINE_VIDEO_CODEC,
+        "-preset",
+        "fast",
+        "-pix_fmt",
+        MEZZANINE_PIX_FMT,
+        "-g",
+        gop,
+        "-keyint_min",
+        gop,
+        "-sc_threshold",
+        "0",
+        "-video_track_timescale",
+        str(MEZZANINE_VIDEO_TIMESCALE),
+    ]
+
+
+def audio_encode_args() -> List[str]:
+    """Encoder arguments matching the silent track of blank timeline segments."""
+    return [
+        "-c:a",
+        MEZZANINE_AUDIO_CODEC,
+        "-ar",
+        str(MEZZANINE_AUDIO_SAMPLE_RATE),
+        "-ac",
+        str(MEZZANINE_AUDIO_CHANNELS),
+        "-b:a",
+        MEZZANINE_AUDIO_BITRATE,
+    ]
+
+
+def silent_audio_source(duration: Optional[float] = None) -> str:
+    src = f"anullsrc=channel_layout=stereo:sample_rate={MEZZANINE_AUDIO_SAMPLE_RATE}"
+    if duration is not None:
+        src += f":d={duration}"
+    return src
+
+
+def probe_source(path: str) -> Dict[str, Any]:
+    cmd = [
+        "ffprobe",
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        data = json.loads(result.stdout)
+    except Exception:
+        return {}
+    streams = data.get("streams", [])
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    # avg_frame_rate reflects real cadence for VFR phone footage; r_frame_rate is the timebase guess.
+    fps = _parse_rate(video_stream.get("avg_frame_rate")) or _parse_rate(video_stream.get("r_frame_rate"))
+    return {
+        "duration": _parse_rate((data.get("format") or {}).get("duration")),
+        "fps": fps,
+        "video_codec": video_stream.get("codec_name"),
+        "pix_fmt": video_stream.get("pix_fmt"),
+        "has_audio": bool(audio_stream),
+        "audio_codec": audio_stream.get("codec_name"),
+        "audio_sample_rate": int(audio_stream.get("sample_rate") or 0),
+        "audio_channels": int(audio_stream.get("channels") or 0),
+    }
+
+
+def build_command(input_path: str, output_path: str, profile: Dict[str, Any], has_audio: bool) -> List[str]:
+    fps = float(profile["fps"])
+    cmd = ["ffmpeg", "-y", "-i", input_path]
+    if not has_audio:
+        cmd += ["-f", "lavfi", "-i", silent_audio_source()]
+    cmd += ["-vf", f"fps={fps:g}", "-map", "0:v:0", "-map", "0:a:0" if has_audio else "1:a"]
+    cmd += video_encode_args(fps) + ["-crf", "18"]
+    cmd += audio_encode_args()
+    if not has_audio:
+        cmd += ["-shortest"]
+    cmd += ["-movflags", "+faststart", output_path]
+    return cmd
+
+
+def is_normalized(meta: Optional[Dict[str, Any]]) -> bool:
+    """True when video metadata records a current mezzanine profile."""
+    profile = (meta or {}).get("mezzanine")
+    return isinstance(profile, dict) and profile.get("version") == MEZZANINE_PROFILE_VERSION
+
+
+def normalize_to_mezzanine(input_path: str, output_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Transcode input into the mezzanine profile.
+    Replaces input in place when no output path is given.
+    Returns the applied profile, or None if normalization failed.
+    """
+    src = probe_source(input_path)
+    if not src:
+        logger.warning("Mezzanine probe failed for %s", input_path)
+        return None
+
+    profile = build_profile(src.get("fps"))
+    in_place = output_path is None
+    target = output_path or str(Path(input_path).with_suffix(".mezzanine.mp4"))
+    cmd = build_command(input_path, target, profile, bool(src.get("has_audio")))
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except Exception as exc:
+        logger.warning("Mezzanine normalization failed for %s: %s", input_path, exc)
+        Path(target).unlink(missing_ok=True)
+        return None
+
+    if in_place:
+        Path(target).replace(input_path)
+    profile["source_video_codec"] = src.get("video_codec")
+    profile["source_audio_codec"] = src.get("audio_codec")
+    return profile
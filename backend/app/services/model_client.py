@@ -0,0 +1,276 @@
+"""
+Model clients for pattern analysis.
+
+PatternService talks to any object with a Gemini-style
+`generate_content(content, generation_config=None)` returning a response with
+`.text` (and optionally a finish reason). Besides the Gemini client this
+module provides:
+
+- ReplayModelClient: answers from a recording, or synthesizes well-formed
+  JSON for frame batches and summaries, after a configurable latency, so the
+  whole pipeline can be run and benchmarked offline;
+- RecordingModelClient: wraps another client and records its responses for
+  later replay.
+
+Requests are matched by a fingerprint of their text parts and image bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_FRAME_STAMP = re.compile(r"^\[Frame at (\d+)ms\]$")
+_SCENES = ["talking-head", "close-up", "medium-shot", "product-shot", "wide-shot", "b-roll"]
+_MOTIONS = ["static", "handheld", "slow-zoom", "pan-left", "zoom-in"]
+
+
+class ModelClient(Protocol):
+    """What PatternService needs from a model."""
+
+    def generate_content(self, content: Any, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        ...
+
+
+@dataclass
+class ModelResponse:
+    """Minimal response for replayed and synthesized calls."""
+
+    text: str
+    finish_reason: str = "STOP"
+
+
+def finish_reason_of(response: Any) -> Optional[str]:
+    """Finish reason name of a ModelResponse or a Gemini response, if any."""
+    reason = getattr(response, "finish_reason", None)
+    if reason is None:
+        try:
+            reason = response.candidates[0].finish_reason
+        except (AttributeError, IndexError, TypeError):
+            return None
+    if reason == 2:  # Gemini's FinishReason.MAX_TOKENS as a bare int
+        return "MAX_TOKENS"
+    return str(getattr(reason, "name", reason))
+
+
+def fingerprint(content: Any) -> str:
+    """Stable digest of a request's text parts and image bytes."""
+    digest = hashlib.sha256()
+    for part in content if isinstance(content, list) else [content]:
+        if isinstance(part, str):
+            digest.update(b"t" + part.encode("utf-8"))
+        elif isinstance(part, dict):
+            digest.update(b"i" + str(part.get("mime_type", "")).encode())
+            digest.update(hashlib.sha256(bytes(part.get("data", b""))).digest())
+        else:
+            digest.update(b"o" + repr(part).encode())
+    return digest.hexdigest()
+
+
+class GeminiModelClient:
+    """google-generativeai model, configured lazily on first call."""
+
+    def __init__(self, api_key: str, model_name: Optional[str] = None) -> None:
+        self.api_key = api_key
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self._model = None
+        self._guard = threading.Lock()
+
+    @property
+    def model(self):
+        with self._guard:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_content(self, content: Any, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        return self.model.generate_content(content, generation_config=generation_config)
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal call latency around `median_ms`, plus a cost per attached image."""
+
+    median_ms: float = 0.0
+    sigma: float = 0.0
+    per_image_ms: float = 0.0
+
+    def sample(self, images: int, rng: random.Random) -> float:
+        """Seconds for one call."""
+        base = self.median_ms * math.exp(self.sigma * rng.gauss(0.0, 1.0)) if self.median_ms > 0 else 0.0
+        return max(0.0, base + self.per_image_ms * images) / 1000.0
+
+
+def _load_recording(path: Path) -> Dict[str, Dict[str, Any]]:
+    entries: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return entries
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                entries[entry["fingerprint"]] = entry
+    return entries
+
+
+class ReplayModelClient:
+    """
+    Offline model: recorded responses where the request fingerprint matches,
+    otherwise synthesized JSON shaped like the prompt asks. Calls are counted
+    and sleep for a latency drawn from `latency`.
+    """
+
+    def __init__(
+        self,
+        recording_path: Optional[str] = None,
+        latency: Optional[LatencyModel] = None,
+        synthesize: bool = True,
+        seed: int = 0,
+    ) -> None:
+        self.recording = _load_recording(Path(recording_path)) if recording_path else {}
+        self.latency = latency or LatencyModel()
+        self.synthesize = synthesize
+        self._rng = random.Random(seed)
+        self._guard = threading.Lock()
+        self.stats = {"calls": 0, "replayed": 0, "synthesized": 0, "images": 0, "bytes": 0, "sleep_s": 0.0}
+
+    def generate_content(self, content: Any, generation_config: Optional[Dict[str, Any]] = None) -> ModelResponse:
+        parts = content if isinstance(content, list) else [content]
+        images = [part for part in parts if isinstance(part, dict)]
+        key = fingerprint(parts)
+        with self._guard:
+            delay = self.latency.sample(len(images), self._rng)
+            self.stats["calls"] += 1
+            self.stats["images"] += len(images)
+            self.stats["bytes"] += sum(len(part.get("data", b"")) for part in images)
+            self.stats["sleep_s"] += delay
+        if delay:
+            time.sleep(delay)
+
+        entry = self.recording.get(key)
+        if entry is not None:
+            with self._guard:
+                self.stats["replayed"] += 1
+            return ModelResponse(entry["text"], entry.get("finish_reason") or "STOP")
+        if not self.synthesize:
+            raise KeyError(f"No recorded response for request {key[:12]}")
+        with self._guard:
+            self.stats["synthesized"] += 1
+        return ModelResponse(synthesize_response(parts, key))
+
+
+def synthesize_response(parts: List[Any], key: str = "") -> str:
+    """Well-formed JSON for a frame batch, window summary or final summary prompt."""
+    rng = random.Random(key)
+    stamps = [int(m.group(1)) for part in parts if isinstance(part, str) for m in [_FRAME_STAMP.match(part)] if m]
+    prompt = next((part for part in parts if isinstance(part, str)), "")
+    if stamps:
+        measured = "dominant_colors" not in prompt
+        scene = rng.choice(_SCENES)
+        frames = []
+        for index, timestamp_ms in enumerate(stamps):
+            if index and rng.random() < 0.15:
+                scene = rng.choice(_SCENES)
+            visual: Dict[str, Any] = {
+                "scene_type": scene,
+                "subject": f"subject in {scene}",
+                "camera_motion": rng.choice(_MOTIONS),
+                "text_overlay": "Watch this" if timestamp_ms < 2000 else None,
+                "text_position": "top" if timestamp_ms < 2000 else None,
+                "visual_effects": [],
+            }
+            if not measured:
+                visual.update(
+                    {
+                        "transition_in": "cut" if index and rng.random() < 0.1 else None,
+                        "dominant_colors": ["#%06x" % rng.randrange(1 << 24) for _ in range(2)],
+                        "brightness": round(rng.uniform(0.2, 0.9), 2),
+                    }
+                )
+            frames.append(
+                {
+                    "visual": visual,
+                    "audio_inference": {"likely_type": "speech", "speech_present": True, "music_present": True},
+                    "description": f"Synthetic {scene} frame at {timestamp_ms}ms with the subject speaking to camera.",
+                }
+            )
+        return json.dumps(frames)
+    if "hook_duration_ms" in prompt:
+        return json.dumps(
+            {
+                "hook_duration_ms": 2000,
+                "hook_description": "Direct address with on-screen text",
+                "style_tags": ["talking-head", "synthetic"],
+                "key_moments": [{"timestamp_ms": 0, "type": "hook", "description": "opening line"}],
+                "content_structure": "Synthetic structure: hook, explanation, call to action.",
+            }
+        )
+    if '"summary"' in prompt:
+        return json.dumps(
+            {
+                "summary": "Synthetic window: the presenter talks to camera with occasional product cutaways.",
+                "key_moments": [{"timestamp_ms": 0, "type": "transition", "description": "cutaway"}],
+                "style_tags": ["talking-head", "synthetic"],
+            }
+        )
+    return "{}"
+
+
+class RecordingModelClient:
+    """Pass-through client that appends every response to a JSON-lines recording."""
+
+    def __init__(self, inner: ModelClient, recording_path: str) -> None:
+        self.inner = inner
+        self.path = Path(recording_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._guard = threading.Lock()
+
+    def generate_content(self, content: Any, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        response = self.inner.generate_content(content, generation_config=generation_config)
+        entry = {
+            "fingerprint": fingerprint(content),
+            "text": response.text,
+            "finish_reason": finish_reason_of(response),
+        }
+        with self._guard, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry) + "\n")
+        return response
+
+
+def build_model_client(api_key: str) -> ModelClient:
+    """Client selected by ANALYSIS_MODEL_CLIENT: gemini, record or replay."""
+    mode = settings.ANALYSIS_MODEL_CLIENT.lower()
+    if mode == "replay":
+        return ReplayModelClient(
+            recording_path=settings.ANALYSIS_MODEL_RECORDING_PATH or None,
+            latency=LatencyModel(
+                median_ms=settings.ANALYSIS_REPLAY_LATENCY_MS,
+                sigma=settings.ANALYSIS_REPLAY_LATENCY_SIGMA,
+                per_image_ms=settings.ANALYSIS_REPLAY_LATENCY_PER_IMAGE_MS,
+            ),
+        )
+    client = GeminiModelClient(api_key)
+    if mode == "record":
+        if not settings.ANALYSIS_MODEL_RECORDING_PATH:
+            raise ValueError("ANALYSIS_MODEL_RECORDING_PATH is required when ANALYSIS_MODEL_CLIENT=record")
+        return RecordingModelClient(client, settings.ANALYSIS_MODEL_RECORDING_PATH)
+    if mode != "gemini":
+        logger.warning(f"Unknown ANALYSIS_MODEL_CLIENT {mode!r}; using gemini")
+    return client
@@ -0,0 +1,253 @@
+"""
+Batch pattern scoring from post analytics.
+
+Scores are recomputed for a whole library at once instead of one task per
+video: one query pulls every published post with its analytics, NumPy turns
+them into a performance score per video, and one UPDATE per chunk writes the
+score to all of that video's patterns.
+
+Per post, engagement rate and log views are standardized twice, against the
+same user's posts on that platform and against the platform as a whole, and
+averaged. A video's performance is the weighted mean over its posts, weighted
+by log views and an exponential recency decay; 100 * sigmoid(performance)
+puts the user's typical video at 50. Videos with little (or only old)
+evidence are pulled toward 50 by a prior weight.
+
+Rescoring one user's library (the per-video trigger) still standardizes
+against platform statistics from every user, so it writes the same scores
+the nightly run would; those statistics are aggregated in SQL (GROUP BY
+platform) rather than loading every post.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, bindparam, case, cast, column, func, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.models.analytics import Analytics
+from app.models.pattern import Pattern
+from app.models.post import Post, PostStatus
+from app.models.video import Video
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_WEIGHT = 0.6
+VIEWS_WEIGHT = 0.4
+# Standard deviations below this are treated as "no spread" (z = 0).
+MIN_STD = 1e-6
+
+PlatformStats = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _codes(labels: Sequence[Any]) -> np.ndarray:
+    _unique, codes = np.unique(np.asarray([str(label) for label in labels]), return_inverse=True)
+    return codes.reshape(-1)
+
+
+def _group_stats(x: np.ndarray, codes: np.ndarray, groups: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and standard deviation of x per group code."""
+    counts = np.bincount(codes, minlength=groups or 0).astype(np.float64)
+    safe = np.maximum(counts, 1.0)
+    means = np.bincount(codes, weights=x, minlength=groups or 0) / safe
+    variances = np.bincount(codes, weights=x * x, minlength=groups or 0) / safe - means * means
+    return means, np.sqrt(np.maximum(variances, 0.0))
+
+
+def _z(x: np.ndarray, codes: np.ndarray, means: np.ndarray, stds: np.ndarray) -> np.ndarray:
+    spread = stds[codes]
+    return np.where(spread > MIN_STD, (x - means[codes]) / np.maximum(spread, MIN_STD), 0.0)
+
+
+def _group_z(x: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Standard score of each value within its group."""
+    return _z(x, codes, *_group_stats(x, codes))
+
+
+def _features(views: np.ndarray, engagements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(engagement rate, log views) per post."""
+    views = np.asarray(views, dtype=np.float64)
+    rate = np.divide(np.asarray(engagements, dtype=np.float64), views, out=np.zeros_like(views), where=views > 0)
+    return rate, np.log1p(views)
+
+
+def platform_stats(platform_codes: np.ndarray, views: np.ndarray, engagements: np.ndarray) -> PlatformStats:
+    """Per-platform (rate mean, rate std, log-views mean, log-views std) from one row per post."""
+    rate, log_views = _features(views, engagements)
+    groups = int(platform_codes.max()) + 1 if len(platform_codes) else 0
+    return (*_group_stats(rate, platform_codes, groups), *_group_stats(log_views, platform_codes, groups))
+
+
+def _sql_platform_stats(posts: Query, views: Any, engagement: Any) -> Tuple[np.ndarray, PlatformStats]:
+    """
+    platform_stats computed by the database: one row of sums per platform.
+    Returns (sorted platform names, stats indexed like them).
+    """
+    rate = case((views > 0, cast(engagement, Float) / views), else_=0.0)
+    log_views = func.ln(1.0 + cast(views, Float))
+    rows = (
+        posts.with_entities(
+            Post.platform,
+            func.count(),
+            func.sum(rate),
+            func.sum(rate * rate),
+            func.sum(log_views),
+            func.sum(log_views * log_views),
+        )
+        .group_by(Post.platform)
+        .all()
+    )
+    rows = sorted(rows, key=lambda row: str(row[0]))
+    names = np.asarray([str(row[0]) for row in rows])
+    counts, rate_sum, rate_sq, views_sum, views_sq = (
+        np.asarray([float(row[i] or 0.0) for row in rows], dtype=np.float64) for i in range(1, 6)
+    )
+    safe = np.maximum(counts, 1.0)
+
+    def mean_std(total: np.ndarray, squares: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        means = total / safe
+        return means, np.sqrt(np.maximum(squares / safe - means * means, 0.0))
+
+    return names, (*mean_std(rate_sum, rate_sq), *mean_std(views_sum, views_sq))
+
+
+def compute_video_scores(
+    video_codes: np.ndarray,
+    user_platform_codes: np.ndarray,
+    platform_codes: np.ndarray,
+    age_days: np.ndarray,
+    views: np.ndarray,
+    engagements: np.ndarray,
+    half_life_days: Optional[float] = None,
+    prior_weight: Optional[float] = None,
+    platform_baseline: Optional[PlatformStats] = None,
+) -> np.ndarray:
+    """
+    Score (0-100) per video code from one row per post.
+
+    `engagements` is likes + comments + shares + saves; codes are dense
+    integers (0..n-1) identifying each post's video, user+platform and platform.
+    `platform_baseline` (see `platform_stats`) supplies platform-wide
+    statistics when the rows cover only some users; by default they are
+    computed from the rows themselves.
+    """
+    half_life = float(half_life_days or settings.PATTERN_SCORE_HALF_LIFE_DAYS)
+    prior = float(settings.PATTERN_SCORE_PRIOR_WEIGHT if prior_weight is None else prior_weight)
+    rate, log_views = _features(views, engagements)
+    if platform_baseline is None:
+        platform_baseline = platform_stats(platform_codes, views, engagements)
+    rate_mean, rate_std, views_mean, views_std = platform_baseline
+
+    z_rate = 0.5 * (_group_z(rate, user_platform_codes) + _z(rate, platform_codes, rate_mean, rate_std))
+    z_views = 0.5 * (
+        _group_z(log_views, user_platform_codes) + _z(log_views, platform_codes, views_mean, views_std)
+    )
+    performance = ENGAGEMENT_WEIGHT * z_rate + VIEWS_WEIGHT * z_views
+
+    weight = log_views * np.power(0.5, np.maximum(age_days, 0.0) / half_life)
+    videos = int(video_codes.max()) + 1 if len(video_codes) else 0
+    total_weight = np.bincount(video_codes, weights=weight, minlength=videos)
+    weighted = np.bincount(video_codes, weights=weight * performance, minlength=videos)
+    mean = np.divide(weighted, total_weight, out=np.zeros(videos), where=total_weight > 0)
+
+    raw = 100.0 / (1.0 + np.exp(-mean))
+    confidence = total_weight / (total_weight + prior) if prior > 0 else np.ones(videos)
+    return np.clip(50.0 + (raw - 50.0) * confidence, 0.0, 100.0)
+
+
+def _bulk_update(db: Session, video_ids: Sequence[Any], scores: np.ndarray, now: datetime) -> int:
+    """Set every pattern's score to its video's score; returns rows updated."""
+    table = Pattern.__table__
+    chunk = max(1, settings.PATTERN_SCORE_UPDATE_CHUNK)
+    rows = [(video_id, round(float(score), 2)) for video_id, score in zip(video_ids, scores)]
+    updated = 0
+    for start in range(0, len(rows), chunk):
+        part = rows[start : start + chunk]
+        if db.bind.dialect.name == "postgresql":
+            # UPDATE patterns SET score = v.score FROM (VALUES ...) AS v(video_id, score) WHERE ...
+            scored = values(column("video_id", UUID(as_uuid=True)), column("score", Float), name="v").data(part)
+            statement = (
+                table.update()
+                .where(table.c.video_id == scored.c.video_id)
+                .values(score=scored.c.score, updated_at=now)
+            )
+            updated += db.execute(statement).rowcount or 0
+        else:
+            statement = (
+                table.update()
+                .where(table.c.video_id == bindparam("scored_video_id"))
+                .values(score=bindparam("scored_score"), updated_at=now)
+            )
+            result = db.execute(statement, [{"scored_video_id": v, "scored_score": s} for v, s in part])
+            updated += result.rowcount or 0
+    return updated
+
+
+def rescore_patterns(db: Session, user_ids: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+    """
+    Recompute pattern scores from analytics for all users (or only the
+    videos of `user_ids`; platform-wide normalization still uses every
+    user's posts so both keep one scale). Commits; returns counts and timing.
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    engagement = Analytics.likes + Analytics.comments + Analytics.shares + Analytics.saves
+    published = (
+        db.query(Post)
+        .join(Video, Post.video_id == Video.id)
+        .join(Analytics, Analytics.post_id == Post.id)
+        .filter(Post.status == PostStatus.PUBLISHED)
+    )
+    query = published.with_entities(
+        Post.video_id, Video.user_id, Post.platform, Post.published_at, Analytics.views, engagement
+    )
+    if user_ids is not None:
+        query = query.filter(Video.user_id.in_(list(user_ids)))
+    rows = query.all()
+    if not rows:
+        return {"posts": 0, "videos_scored": 0, "patterns_updated": 0, "seconds": round(time.perf_counter() - started, 3)}
+
+    video_ids, owners, platforms, published_at, views, engagements = zip(*rows)
+    unique_videos, video_codes = np.unique(np.asarray([str(v) for v in video_ids]), return_inverse=True)
+    video_by_key = {str(v): v for v in video_ids}
+    age_days = np.array(
+        [(now - (stamp or now)).total_seconds() / 86400.0 for stamp in published_at], dtype=np.float64
+    )
+
+    if user_ids is None:
+        platform_codes, baseline = _codes(platforms), None
+    else:
+        # Platform statistics over every user's posts, aggregated by the database.
+        known, baseline = _sql_platform_stats(published, Analytics.views, engagement)
+        platform_codes = np.searchsorted(known, np.asarray([str(p) for p in platforms]))
+
+    scores = compute_video_scores(
+        video_codes.reshape(-1),
+        _codes([f"{owner}:{platform}" for owner, platform in zip(owners, platforms)]),
+        platform_codes,
+        age_days,
+        np.asarray(views, dtype=np.float64),
+        np.asarray(engagements, dtype=np.float64),
+        platform_baseline=baseline,
+    )
+    updated = _bulk_update(db, [video_by_key[key] for key in unique_videos.tolist()], scores, now)
+    db.commit()
+
+    result = {
+        "posts": len(rows),
+        "videos_scored": len(unique_videos),
+        "patterns_updated": updated,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(
+        f"Rescored {updated} patterns from {len(rows)} posts across {len(unique_videos)} videos "
+        f"in {result['seconds']}s"
+    )
+    return result
@@ -3,15 +3,25 @@ Pattern Analysis Service - Uses Gemini 2.0 Flash for video pattern extraction.
 Generates hybrid templates with structured JSON + natural language descriptions.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import json
-import base64
 import asyncio
-from pathlib import Path
+import random
+import time
+from concurrent.futures import Future
 from datetime import datetime
 import logging
 
 from app.core.config import settings
+from app.services.adaptive_sampling import SamplingPlan
+from app.services.analysis_cache import AnalysisCache, get_analysis_cache, prompt_version
+from app.services.batch_controller import BatchController, BatchMetrics
+from app.services.frame_dedup import FrameDeduplicator
+from app.services.frame_pipeline import AnalysisFrame, prefetch
+from app.services.model_client import ModelClient, build_model_client, finish_reason_of
+from app.services.rate_limiter import ModelRateLimiter, get_model_rate_limiter
+from app.services.template_stats import describe_segments, segment_statistics
+from app.services.visual_features import VisualAnalyzer
 from app.schemas.pattern import (
     HybridTemplate,
     HybridSegment,
@@ -28,43 +38,129 @@ from app.schemas.pattern import (
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 25
+SUMMARY_TEXT_LIMIT = 600  # Characters of each window summary carried into the next level
+# Settings that change which frames reach the model or what they contain;
+# part of the template cache version alongside the prompts.
+TEMPLATE_FRAME_SETTINGS = (
+    "FRAME_EXTRACTION_FPS",
+    "FRAME_EXTRACTION_INTERVAL_MS",
+    "MAX_FRAMES_PER_ANALYSIS",
+    "ANALYSIS_FRAME_MAX_SIDE",
+    "ANALYSIS_FRAME_JPEG_QUALITY",
+    "ADAPTIVE_SAMPLING_ENABLED",
+    "ANALYSIS_FRAME_BUDGET",
+    "ADAPTIVE_SPARSE_INTERVAL_MS",
+    "ADAPTIVE_DENSE_WINDOW_MS",
+    "SHOT_CUT_THRESHOLD",
+    "FRAME_DEDUP_ENABLED",
+    "FRAME_DEDUP_HAMMING_THRESHOLD",
+    "FRAME_DEDUP_MAX_RUN_MS",
+    "VISUAL_FEATURES_ENABLED",
+    "VISUAL_DOMINANT_COLORS",
+    "AUDIO_FEATURES_ENABLED",
+)
+
+
+def frame_reuse(
+    plan: Optional[SamplingPlan],
+    dedup: Optional[FrameDeduplicator],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batches: Optional[int] = None,
+) -> Tuple[Dict[int, int], Optional[Dict[str, Any]]]:
+    """
+    Grid timestamps that reuse another frame's analysis, plus sampling/dedup stats.
+    `batches` is the number of batches actually formed (see FrameDeduplicator.stats).
+    """
+    analysis_stats: Optional[Dict[str, Any]] = None
+    reused: Dict[int, int] = {}
+    if plan is not None:
+        reused.update(plan.fill_map())
+        analysis_stats = plan.stats()
+    if dedup is not None:
+        reused.update(dedup.duplicates)
+        analysis_stats = {**(analysis_stats or {}), **dedup.stats(batch_size, batches)}
+    return reused, analysis_stats
+
 
 class PatternService:
     """Service for analyzing video patterns using Gemini 2.0 Flash."""
 
-    def __init__(self, gemini_api_key: str):
-        """Initialize the pattern service with Gemini API key."""
+    def __init__(
+        self,
+        gemini_api_key: str,
+        model: Any = None,
+        rate_limiter: Optional[ModelRateLimiter] = None,
+        cache: Optional[AnalysisCache] = None,
+    ):
+        """
+        Initialize the pattern service with Gemini API key.
+        `model` may be any ModelClient (see model_client.py), e.g. a replay
+        client or a local fake in tests; it defaults to the client selected by
+        ANALYSIS_MODEL_CLIENT.
+        `cache` defaults to the configured analysis result cache.
+        """
         self.api_key = gemini_api_key
-        self._client = None
-        self._model = None
-
-    @property
-    def client(self):
-        """Lazy load Gemini client."""
-        if self._client is None:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            self._client = genai
-        return self._client
+        self._model = model
+        self._rate_limiter = rate_limiter
+        self._cache = cache
+        self._cache_resolved = cache is not None
 
     @property
-    def model(self):
-        """Get the Gemini 2.0 Flash model."""
+    def model(self) -> ModelClient:
+        """Model client (Gemini unless ANALYSIS_MODEL_CLIENT selects record/replay)."""
         if self._model is None:
-            self._model = self.client.GenerativeModel(settings.GEMINI_MODEL)
+            self._model = build_model_client(self.api_key)
         return self._model
 
-    def _load_image_as_base64(self, image_path: str) -> Optional[str]:
-        """Load an image file and return as base64 string."""
-        try:
-            with open(image_path, "rb") as f:
-                return base64.b64encode(f.read()).decode("utf-8")
-        except Exception as e:
-            logger.error(f"Failed to load image {image_path}: {e}")
-            return None
+    @property
+    def rate_limiter(self) -> ModelRateLimiter:
+        """Fleet-wide RPM/TPM limiter for the configured model."""
+        if self._rate_limiter is None:
+            self._rate_limiter = get_model_rate_limiter(settings.GEMINI_MODEL)
+        return self._rate_limiter
+
+    @property
+    def analysis_cache(self) -> Optional[AnalysisCache]:
+        """Result cache for batches and templates (None when disabled)."""
+        if not self._cache_resolved:
+            self._cache = get_analysis_cache()
+            self._cache_resolved = True
+        return self._cache
 
-    def _build_segment_analysis_prompt(self, segment_index: int, total_segments: int) -> str:
-        """Build prompt for analyzing a batch of frames."""
+    def batch_prompt_version(self, measured_visuals: bool = False) -> str:
+        """Cache version of batch results: changes whenever the frame prompt does."""
+        return prompt_version(self._build_segment_analysis_prompt(0, 1, measured_visuals=measured_visuals))
+
+    def template_prompt_version(self) -> str:
+        """
+        Cache version of whole templates: covers the frame and summary prompts
+        and the settings that decide which frames are sent and how they look.
+        """
+        frame_settings = ";".join(f"{name}={getattr(settings, name)}" for name in TEMPLATE_FRAME_SETTINGS)
+        return prompt_version(
+            frame_settings,
+            self._build_segment_analysis_prompt(0, 1),
+            self._build_segment_analysis_prompt(0, 1, measured_visuals=True),
+            self._build_window_summary_prompt(0, 0, []),
+            self._build_summary_prompt(),
+        )
+
+    def _build_segment_analysis_prompt(
+        self,
+        segment_index: int,
+        total_segments: int,
+        measured_visuals: bool = False,
+    ) -> str:
+        """
+        Build prompt for analyzing a batch of frames.
+        With `measured_visuals`, transitions, colors and brightness are measured
+        locally (see visual_features.py) and left out of the requested output.
+        """
+        measured_fields = "" if measured_visuals else """
+        "transition_in": "one of: cut, fade-in, fade-out, cross-dissolve, wipe, slide, zoom-transition, whip-pan, flash, glitch, morph, none OR null",
+        "dominant_colors": ["#hex1", "#hex2"],
+        "brightness": 0.0-1.0,"""
         return f"""Analyze these video frames (segment {segment_index + 1} of {total_segments}) and provide detailed analysis.
 
 For EACH frame, provide a JSON object with this EXACT structure:
@@ -72,19 +168,15 @@ For EACH frame, provide a JSON object with this EXACT structure:
     "visual": {{
         "scene_type": "one of: close-up, medium-shot, wide-shot, extreme-close-up, over-shoulder, pov, aerial, cutaway, insert, b-roll, talking-head, product-shot, text-only, transition, other",
         "subject": "main subject description",
-        "camera_motion": "one of: static, pan-left, pan-right, tilt-up, tilt-down, zoom-in, zoom-out, dolly-in, dolly-out, tracking, handheld, crane, shake, slow-zoom",
-        "transition_in": "one of: cut, fade-in, fade-out, cross-dissolve, wipe, slide, zoom-transition, whip-pan, flash, glitch, morph, none OR null",
-        "dominant_colors": ["#hex1", "#hex2"],
+        "camera_motion": "one of: static, pan-left, pan-right, tilt-up, tilt-down, zoom-in, zoom-out, dolly-in, dolly-out, tracking, handheld, crane, shake, slow-zoom",{measured_fields}
         "text_overlay": "visible text or null",
         "text_position": "top/center/bottom or null",
-        "brightness": 0.0-1.0,
         "visual_effects": ["effect1", "effect2"]
     }},
     "audio_inference": {{
         "likely_type": "speech/music/sound-effect/ambient/silence/voiceover/mixed",
         "speech_present": true/false,
-        "music_present": true/false,
-        "estimated_energy": 0.0-1.0
+        "music_present": true/false
     }},
     "description": "Detailed natural language description of what's happening in this frame. Be specific about actions, expressions, movements, and context."
 }}
@@ -97,21 +189,14 @@ Return a JSON array with one object per frame. Focus on:
 5. Overall visual style and energy"""
 
     def _build_summary_prompt(self) -> str:
-        """Build prompt for generating video summary."""
-        return """Based on all the segment analyses provided, generate a comprehensive summary of the video.
+        """Build prompt for the final video summary (statistics are computed locally)."""
+        return """Based on the video analysis provided, generate a comprehensive summary of the video.
 
 Return a JSON object with this EXACT structure:
 {
-    "total_cuts": <number of scene changes>,
-    "average_shot_duration_ms": <average shot length>,
     "hook_duration_ms": <how long until the hook captures attention>,
     "hook_description": "description of the hook technique used",
-    "pacing": "one of: very-fast, fast, moderate, slow, very-slow",
     "style_tags": ["tag1", "tag2", "tag3"],
-    "dominant_colors": ["#hex1", "#hex2", "#hex3", "#hex4", "#hex5"],
-    "music_coverage_percent": 0-100,
-    "speech_coverage_percent": 0-100,
-    "text_overlay_count": <number>,
     "key_moments": [
         {"timestamp_ms": 0, "type": "hook", "description": "..."},
         {"timestamp_ms": 3000, "type": "transition", "description": "..."}
@@ -127,133 +212,477 @@ Analyze patterns like:
 - Transition styles
 - Overall engagement strategy"""
 
+    def _build_window_summary_prompt(self, start_ms: int, end_ms: int, lines: List[str]) -> str:
+        """Build prompt summarizing one time window (segment log or lower-level summaries)."""
+        log = "\n".join(lines)
+        return f"""Summarize this part of a video ({start_ms / 1000:.1f}s to {end_ms / 1000:.1f}s) from its analysis log.
+
+Log:
+{log}
+
+Return a JSON object with this EXACT structure:
+{{
+    "summary": "2-4 sentences on what happens and how it is shot and edited",
+    "key_moments": [{{"timestamp_ms": 0, "type": "hook/reveal/transition/cta/climax", "description": "..."}}],
+    "style_tags": ["tag1", "tag2"]
+}}"""
+
+    @staticmethod
+    def _is_throttle_error(exc: Exception) -> bool:
+        """Quota/overload errors worth retrying (google.api_core 429/503 and friends)."""
+        name = type(exc).__name__
+        if name in {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded"}:
+            return True
+        code = getattr(exc, "code", None)
+        if code in (429, 503):
+            return True
+        text = str(exc).lower()
+        return "429" in text or "quota" in text or "rate limit" in text
+
+    @staticmethod
+    def _estimate_tokens(content_parts: List[Any], max_output_tokens: int) -> int:
+        """Rough TPM cost: ~4 chars per text token, 258 tokens per image, plus the output budget."""
+        tokens = max_output_tokens
+        for part in content_parts:
+            if isinstance(part, str):
+                tokens += len(part) // 4
+            else:
+                tokens += 258
+        return tokens
+
+    async def _generate_with_backoff(
+        self,
+        content: Any,
+        generation_config: Dict[str, Any],
+        label: str,
+    ):
+        """
+        Call the model under the shared rate limiter, retrying throttled calls
+        with exponential backoff and jitter.
+        """
+        parts = content if isinstance(content, list) else [content]
+        estimated = self._estimate_tokens(parts, int(generation_config.get("max_output_tokens", 0)))
+        max_retries = max(0, int(settings.GEMINI_MAX_RETRIES))
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire(estimated)
+            try:
+                return await asyncio.to_thread(
+                    self.model.generate_content,
+                    content,
+                    generation_config=generation_config,
+                )
+            except Exception as e:
+                if attempt >= max_retries or not self._is_throttle_error(e):
+                    raise
+                delay = float(settings.GEMINI_RETRY_BASE_SECONDS) * (2 ** attempt)
+                delay *= 0.5 + random.random()
+                attempt += 1
+                logger.warning(f"Model throttled on {label} (attempt {attempt}/{max_retries}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _placeholder_results(batch: List[AnalysisFrame], reason: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "timestamp_ms": frame.timestamp_ms,
+                "visual": {
+                    "scene_type": "other",
+                    "subject": "analysis failed",
+                    "camera_motion": "static",
+                },
+                "audio_inference": {
+                    "likely_type": "mixed",
+                    "speech_present": False,
+                    "music_present": False,
+                },
+                "description": reason,
+            }
+            for frame in batch
+        ]
+
+    @staticmethod
+    def _hit_output_limit(response: Any) -> bool:
+        """Whether the model stopped at max_output_tokens (finish reason MAX_TOKENS)."""
+        return finish_reason_of(response) == "MAX_TOKENS"
+
+    @staticmethod
+    def _parse_frame_results(response_text: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Parse a JSON array of per-frame objects. Returns (objects, complete); for
+        a truncated or malformed array the complete objects before the damage
+        are salvaged so only the remaining frames need another call.
+        """
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
+        try:
+            parsed = json.loads(response_text)
+            if isinstance(parsed, list):
+                return [item for item in parsed if isinstance(item, dict)], True
+            return [], False
+        except json.JSONDecodeError:
+            pass
+
+        decoder = json.JSONDecoder()
+        text = response_text.strip()
+        position = text.find("[") + 1
+        if position == 0:
+            return [], False
+        salvaged: List[Dict[str, Any]] = []
+        while True:
+            while position < len(text) and text[position] in " \t\r\n,":
+                position += 1
+            try:
+                item, position = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                return salvaged, False
+            if isinstance(item, dict):
+                salvaged.append(item)
+
+    async def _request_frames(
+        self,
+        batch: List[AnalysisFrame],
+        batch_num: int,
+        batch_idx: int,
+        total_frames: int,
+        measured_visuals: bool,
+        controller: BatchController,
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        One model call for `batch`. Returns the results for the leading frames that
+        were answered (possibly fewer than sent) and the call status; API errors raise.
+        """
+        # Prepare images for this batch
+        content_parts: List[Any] = []
+        
+        # Add prompt
+        prompt = self._build_segment_analysis_prompt(
+            batch_idx, max(total_frames, batch_idx + len(batch)), measured_visuals=measured_visuals
+        )
+        content_parts.append(prompt)
+        
+        # Add images (already JPEG-encoded in memory by the frame pipeline)
+        for frame in batch:
+            content_parts.append({
+                "mime_type": "image/jpeg",
+                "data": frame.jpeg,
+            })
+            content_parts.append(f"[Frame at {frame.timestamp_ms}ms]")
+        
+        payload_bytes = sum(len(frame.jpeg) for frame in batch)
+        started = time.monotonic()
+        try:
+            response = await self._generate_with_backoff(
+                content_parts,
+                {
+                    "temperature": 0.2,
+                    "top_p": 0.8,
+                    "max_output_tokens": controller.max_output_tokens,
+                },
+                label=f"batch {batch_num}",
+            )
+            response_text = response.text
+        except Exception:
+            controller.record(
+                BatchMetrics(batch_num, len(batch), payload_bytes, time.monotonic() - started, "api_error")
+            )
+            raise
+        latency = time.monotonic() - started
+        
+        batch_results, complete = self._parse_frame_results(response_text)
+        batch_results = batch_results[: len(batch)]
+        if len(batch_results) == len(batch):
+            # Every frame answered; trailing prose after the array does not matter.
+            status = "ok"
+        elif self._hit_output_limit(response) or not complete:
+            status = "truncated" if self._hit_output_limit(response) else "parse_error"
+        else:
+            # Well-formed but short: the model skipped frames, treat like truncation.
+            status = "truncated"
+        controller.record(
+            BatchMetrics(
+                batch_num,
+                len(batch),
+                payload_bytes,
+                latency,
+                status,
+                frames_answered=len(batch_results),
+                output_chars=len(response_text),
+            )
+        )
+        
+        # Add timestamps to results
+        for result, frame in zip(batch_results, batch):
+            result["timestamp_ms"] = frame.timestamp_ms
+        return batch_results, status
+
+    async def _analyze_frames(
+        self,
+        batch: List[AnalysisFrame],
+        batch_num: int,
+        batch_idx: int,
+        total_frames: int,
+        measured_visuals: bool,
+        strict: bool,
+        controller: BatchController,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Analyze frames, recovering from truncated or unparseable output instead
+        of discarding the call: answered frames are kept and the rest re-requested,
+        and a batch that yields nothing is split in half. Returns (results, complete);
+        placeholders (not complete) remain only for API errors and single frames
+        the model cannot answer, and `strict` raises instead.
+        """
+        if not batch:
+            return [], True
+        try:
+            results, status = await self._request_frames(
+                batch, batch_num, batch_idx, total_frames, measured_visuals, controller
+            )
+        except Exception as e:
+            logger.error(f"Gemini API call failed for batch {batch_num}: {e}")
+            if strict:
+                raise
+            return self._placeholder_results(batch, "API call failed - placeholder"), False
+        
+        if status == "ok":
+            return results, True
+        
+        remaining = batch[len(results):]
+        logger.warning(
+            f"Batch {batch_num} returned {len(results)}/{len(batch)} frames ({status}); "
+            f"re-requesting {len(remaining)}"
+        )
+        if results and remaining:
+            rest, complete = await self._analyze_frames(
+                remaining, batch_num, batch_idx + len(results), total_frames, measured_visuals, strict, controller
+            )
+            return results + rest, complete
+        if len(batch) > 1:
+            half = len(batch) // 2
+            first, first_complete = await self._analyze_frames(
+                batch[:half], batch_num, batch_idx, total_frames, measured_visuals, strict, controller
+            )
+            second, second_complete = await self._analyze_frames(
+                batch[half:], batch_num, batch_idx + half, total_frames, measured_visuals, strict, controller
+            )
+            return first + second, first_complete and second_complete
+        
+        logger.error(f"Failed to parse frame analysis for batch {batch_num} at {batch[0].timestamp_ms}ms")
+        if strict:
+            raise ValueError(f"Unparseable model output for frame at {batch[0].timestamp_ms}ms")
+        return self._placeholder_results(batch, "Frame analysis failed - placeholder"), False
+
+    async def _analyze_batch(
+        self,
+        batch: List[AnalysisFrame],
+        batch_num: int,
+        batch_idx: int,
+        total_frames: int,
+        total_batches: int,
+        measured_visuals: bool = False,
+        strict: bool = False,
+        controller: Optional[BatchController] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Analyze one batch of frames; failures yield placeholder results unless `strict`.
+        Batches whose frame hashes match a cached batch are answered from the cache.
+        Returns (results, complete); complete is False when placeholders were used.
+        """
+        frame_hashes = [frame.phash for frame in batch]
+        cache = self.analysis_cache if all(h is not None for h in frame_hashes) else None
+        if cache is not None:
+            version = self.batch_prompt_version(measured_visuals)
+            cached = cache.get_batch(frame_hashes, version, measured_visuals)
+            if cached is not None:
+                logger.info(f"Batch {batch_num}/{total_batches or '?'} served from analysis cache")
+                return [{**result, "timestamp_ms": frame.timestamp_ms} for result, frame in zip(cached, batch)], True
+
+        logger.info(f"Analyzing batch {batch_num}/{total_batches or '?'} ({len(batch)} frames)")
+        batch_results, complete = await self._analyze_frames(
+            batch,
+            batch_num,
+            batch_idx,
+            total_frames,
+            measured_visuals,
+            strict,
+            controller or BatchController.fixed(len(batch)),
+        )
+        if cache is not None and complete:
+            cache.put_batch(frame_hashes, version, measured_visuals, batch_results)
+        return batch_results, complete
+
+    async def analyze_batch(
+        self,
+        batch: List[AnalysisFrame],
+        batch_num: int,
+        total_frames: int,
+        total_batches: int,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        measured_visuals: bool = False,
+        strict: bool = False,
+        batch_idx: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Analyze a single batch (1-based `batch_num`) on its own, as the staged
+        pipeline does. `batch_idx` is the index of its first frame (defaults to
+        fixed-size batches of `batch_size`). With `strict`, API and parse errors
+        raise so the caller can retry instead of keeping placeholders.
+        Returns (results, complete); complete is False when placeholders were kept.
+        """
+        return await self._analyze_batch(
+            batch,
+            batch_num,
+            (batch_num - 1) * batch_size if batch_idx is None else batch_idx,
+            total_frames,
+            total_batches,
+            measured_visuals=measured_visuals,
+            strict=strict,
+        )
+
     async def analyze_frames_batch(
         self,
-        frames: List[Tuple[str, int]],
-        batch_size: int = 25,
+        frames: Iterable[AnalysisFrame],
+        batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+        total_frames: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        measured_visuals: bool = False,
+        prefetch_batches: Optional[int] = None,
+        controller: Optional[BatchController] = None,
     ) -> List[Dict[str, Any]]:
         """
         Analyze frames in batches using Gemini 2.0 Flash.
         
+        Batches are dispatched concurrently (at most `max_concurrency` in flight)
+        under the shared rate limiter, and results are reassembled in timestamp
+        order. A lazy frame stream is decoded on a producer thread up to
+        `prefetch_batches` ahead, so decoding overlaps model calls; at most
+        max_concurrency + prefetch_batches batches are held in memory.
+        
         Args:
-            frames: List of (frame_path, timestamp_ms) tuples
-            batch_size: Number of frames per API call
+            frames: Frames (list or lazy stream) with in-memory JPEG data
+            batch_size: Frames per API call; None sizes batches adaptively (see BatchController)
+            total_frames: Expected frame count, for prompts/logging when frames is a stream
+            max_concurrency: In-flight batch limit (defaults to GEMINI_MAX_CONCURRENT_BATCHES)
+            measured_visuals: Omit locally measured visual fields from the prompt
+            prefetch_batches: Read-ahead depth (defaults to ANALYSIS_PREFETCH_BATCHES, 0 disables)
+            controller: Batch controller to use (and read metrics from afterwards)
             
         Returns:
             List of analysis results for each frame
         """
-        all_results = []
-        total_batches = (len(frames) + batch_size - 1) // batch_size
+        results, _complete = await self._analyze_stream(
+            frames,
+            batch_size=batch_size,
+            total_frames=total_frames,
+            max_concurrency=max_concurrency,
+            measured_visuals=measured_visuals,
+            prefetch_batches=prefetch_batches,
+            controller=controller,
+        )
+        return results
+
+    async def _analyze_stream(
+        self,
+        frames: Iterable[AnalysisFrame],
+        batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+        total_frames: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        measured_visuals: bool = False,
+        prefetch_batches: Optional[int] = None,
+        controller: Optional[BatchController] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """analyze_frames_batch, also reporting whether every batch completed without placeholders."""
+        if controller is None:
+            controller = BatchController.fixed(batch_size) if batch_size else BatchController()
+        if total_frames is None and isinstance(frames, list):
+            total_frames = len(frames)
+        total_frames = total_frames or 0
+        total_batches = -(-total_frames // controller.size)
+        limit = max(1, int(max_concurrency or settings.GEMINI_MAX_CONCURRENT_BATCHES))
+        slots = asyncio.Semaphore(limit)
+        depth = settings.ANALYSIS_PREFETCH_BATCHES if prefetch_batches is None else prefetch_batches
+        started = time.monotonic()
+        first_result: List[float] = []
         
-        for batch_idx in range(0, len(frames), batch_size):
-            batch = frames[batch_idx:batch_idx + batch_size]
-            batch_num = batch_idx // batch_size + 1
-            
-            logger.info(f"Analyzing batch {batch_num}/{total_batches} ({len(batch)} frames)")
-            
-            # Prepare images for this batch
-            content_parts = []
-            
-            # Add prompt
-            prompt = self._build_segment_analysis_prompt(batch_idx, len(frames))
-            content_parts.append(prompt)
-            
-            # Add images
-            for frame_path, timestamp_ms in batch:
-                try:
-                    # Load image
-                    img_data = self._load_image_as_base64(frame_path)
-                    if img_data:
-                        content_parts.append({
-                            "mime_type": "image/jpeg",
-                            "data": img_data
-                        })
-                        content_parts.append(f"[Frame at {timestamp_ms}ms]")
-                except Exception as e:
-                    logger.error(f"Failed to load frame {frame_path}: {e}")
-            
-            # Call Gemini API
+        async def run(
+            batch: List[AnalysisFrame], batch_num: int, batch_idx: int
+        ) -> Tuple[List[Dict[str, Any]], bool]:
             try:
-                response = await asyncio.to_thread(
-                    self.model.generate_content,
-                    content_parts,
-                    generation_config={
-                        "temperature": 0.2,
-                        "top_p": 0.8,
-                        "max_output_tokens": 8192,
-                    }
+                outcome = await self._analyze_batch(
+                    batch,
+                    batch_num,
+                    batch_idx,
+                    total_frames,
+                    total_batches,
+                    measured_visuals=measured_visuals,
+                    controller=controller,
                 )
-                
-                # Parse response
-                response_text = response.text
-                
-                # Try to extract JSON from response
-                try:
-                    # Handle potential markdown code blocks
-                    if "```json" in response_text:
-                        response_text = response_text.split("```json")[1].split("```")[0]
-                    elif "```" in response_text:
-                        response_text = response_text.split("```")[1].split("```")[0]
-                    
-                    batch_results = json.loads(response_text)
-                    
-                    # Add timestamps to results
-                    for i, result in enumerate(batch_results):
-                        if batch_idx + i < len(frames):
-                            result["timestamp_ms"] = frames[batch_idx + i][1]
-                    
-                    all_results.extend(batch_results)
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON from batch {batch_num}: {e}")
-                    # Create placeholder results for failed batch
-                    for frame_path, timestamp_ms in batch:
-                        all_results.append({
-                            "timestamp_ms": timestamp_ms,
-                            "visual": {
-                                "scene_type": "other",
-                                "subject": "analysis failed",
-                                "camera_motion": "static",
-                            },
-                            "audio_inference": {
-                                "likely_type": "mixed",
-                                "speech_present": False,
-                                "music_present": False,
-                                "estimated_energy": 0.5,
-                            },
-                            "description": "Frame analysis failed - placeholder",
-                        })
-                        
-            except Exception as e:
-                logger.error(f"Gemini API call failed for batch {batch_num}: {e}")
-                # Create placeholder results
-                for frame_path, timestamp_ms in batch:
-                    all_results.append({
-                        "timestamp_ms": timestamp_ms,
-                        "visual": {
-                            "scene_type": "other",
-                            "subject": "analysis failed",
-                            "camera_motion": "static",
-                        },
-                        "audio_inference": {
-                            "likely_type": "mixed",
-                            "speech_present": False,
-                            "music_present": False,
-                            "estimated_energy": 0.5,
-                        },
-                        "description": "API call failed - placeholder",
-                    })
-        
-        return all_results
+                if not first_result:
+                    first_result.append(time.monotonic() - started)
+                    logger.info(f"First batch result after {first_result[0]:.2f}s")
+                return outcome
+            finally:
+                slots.release()
+        
+        # Pull the next batch once a slot is free; with prefetch the producer thread
+        # has usually decoded it already. Batch limits are re-read as results come in.
+        batches = controller.batches(frames)
+        if depth > 0 and not isinstance(frames, list):
+            batches = prefetch(batches, depth)
+        tasks = []
+        batch_num = 0
+        batch_idx = 0
+        try:
+            while True:
+                await slots.acquire()
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    slots.release()
+                    break
+                batch_num += 1
+                tasks.append(asyncio.create_task(run(batch, batch_num, batch_idx)))
+                batch_idx += len(batch)
+        finally:
+            batches.close()
+        
+        outcomes = await asyncio.gather(*tasks)
+        all_results = [result for batch_results, _complete in outcomes for result in batch_results]
+        all_results.sort(key=lambda result: result.get("timestamp_ms", 0))
+        return all_results, all(complete for _results, complete in outcomes)
 
     def _convert_to_hybrid_segment(
         self,
         analysis: Dict[str, Any],
         interval_ms: int = 200,
+        timestamp_ms: Optional[int] = None,
+        audio_features: Optional[Dict[str, Any]] = None,
+        visual_features: Optional[Dict[str, Any]] = None,
     ) -> HybridSegment:
-        """Convert raw analysis to HybridSegment schema."""
-        timestamp_ms = analysis.get("timestamp_ms", 0)
+        """
+        Convert raw analysis to HybridSegment schema.
+        Passing `timestamp_ms` reuses the analysis for a deduplicated frame at that
+        time; such copies continue the representative's shot, so carry no transition.
+        `audio_features` are the locally measured features of this segment's own
+        audio window (see audio_features.analyze_wav); they override the model's
+        guesses for volume, silence and tempo. `visual_features` likewise replace
+        brightness, dominant colors and transitions with measured values.
+        """
+        is_copy = timestamp_ms is not None and timestamp_ms != analysis.get("timestamp_ms", 0)
+        if timestamp_ms is None:
+            timestamp_ms = analysis.get("timestamp_ms", 0)
         visual_data = analysis.get("visual", {})
+        if visual_features:
+            visual_data = {
+                **visual_data,
+                "transition_in": visual_features.get("transition_in"),
+                "dominant_colors": visual_features.get("dominant_colors", []),
+                "brightness": visual_features.get("brightness"),
+            }
+        elif is_copy:
+            visual_data = {**visual_data, "transition_in": None}
         audio_data = analysis.get("audio_inference", {})
         
         # Map scene type
@@ -327,18 +756,38 @@ Analyze patterns like:
             text_position=visual_data.get("text_position"),
             text_style=visual_data.get("text_style"),
             brightness=visual_data.get("brightness"),
+            motion=visual_features.get("motion") if visual_features else None,
             composition=visual_data.get("composition"),
             visual_effects=visual_data.get("visual_effects", []),
         )
         
-        # Build audio segment (inferred from visual analysis)
-        audio = AudioSegment(
-            type=audio_type_map.get(audio_data.get("likely_type", "").lower(), AudioType.MIXED),
-            volume_level=audio_data.get("estimated_energy", 0.5),
-            music_present=audio_data.get("music_present", False),
-            speech_present=audio_data.get("speech_present", False),
-            transition=AudioTransition.NONE,
-        )
+        # Build audio segment: type and content inferred by the model, levels measured locally
+        audio_type = audio_type_map.get(audio_data.get("likely_type", "").lower(), AudioType.MIXED)
+        music_present = bool(audio_data.get("music_present", False))
+        speech_present = bool(audio_data.get("speech_present", False))
+        if audio_features:
+            silent = bool(audio_features.get("silence"))
+            if silent:
+                audio_type, music_present, speech_present = AudioType.SILENCE, False, False
+            audio = AudioSegment(
+                type=audio_type,
+                volume_level=audio_features.get("volume", 0.0),
+                music_present=music_present,
+                music_energy=audio_features.get("volume") if music_present else None,
+                music_bpm=audio_features.get("tempo_bpm") if music_present else None,
+                speech_present=speech_present,
+                transition=AudioTransition.NONE,
+                beat_drop=bool(audio_features.get("beat_drop")),
+                silence=silent,
+            )
+        else:
+            audio = AudioSegment(
+                type=audio_type,
+                volume_level=audio_data.get("estimated_energy", 0.5),
+                music_present=music_present,
+                speech_present=speech_present,
+                transition=AudioTransition.NONE,
+            )
         
         # Detect key moments
         is_key_moment = False
@@ -361,129 +810,295 @@ Analyze patterns like:
             key_moment_type=key_moment_type,
         )
 
+    @staticmethod
+    def _parse_json_response(response_text: str) -> Any:
+        """Parse JSON from a model response, tolerating markdown code fences."""
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
+        return json.loads(response_text)
+
+    async def _summarize_window(
+        self,
+        start_ms: int,
+        end_ms: int,
+        lines: List[str],
+        slots: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        """Summarize one window; on failure the window keeps a truncated log excerpt."""
+        window: Dict[str, Any] = {
+            "start_ms": start_ms, "end_ms": end_ms, "key_moments": [], "style_tags": [], "complete": True
+        }
+        async with slots:
+            try:
+                response = await self._generate_with_backoff(
+                    self._build_window_summary_prompt(start_ms, end_ms, lines),
+                    {"temperature": 0.3, "top_p": 0.8, "max_output_tokens": 1024},
+                    label=f"summary window {start_ms}ms",
+                )
+                data = self._parse_json_response(response.text)
+                window["summary"] = str(data.get("summary", ""))[:SUMMARY_TEXT_LIMIT]
+                window["key_moments"] = [m for m in data.get("key_moments", []) if isinstance(m, dict)][:3]
+                window["style_tags"] = [str(t) for t in data.get("style_tags", [])][:5]
+                return window
+            except Exception as e:
+                logger.warning(f"Window summary {start_ms}-{end_ms}ms failed: {e}")
+        window["summary"] = " / ".join(lines[:3])[:SUMMARY_TEXT_LIMIT]
+        window["complete"] = False
+        return window
+
+    async def summarize_windows(self, segments: List[HybridSegment]) -> List[Dict[str, Any]]:
+        """
+        Map-reduce over the timeline: fixed-length windows are summarized in
+        parallel, then groups of SUMMARY_REDUCE_FANIN summaries are summarized
+        again until at most that many remain. Every prompt stays bounded by the
+        window length or the fan-in, however long the video is.
+        """
+        window_ms = max(1, int(settings.SUMMARY_WINDOW_SECONDS * 1000))
+        fanin = max(2, int(settings.SUMMARY_REDUCE_FANIN))
+        slots = asyncio.Semaphore(max(1, int(settings.GEMINI_MAX_CONCURRENT_BATCHES)))
+
+        windows: Dict[int, List[HybridSegment]] = {}
+        for segment in segments:
+            windows.setdefault(segment.timestamp_ms // window_ms, []).append(segment)
+        level = await asyncio.gather(*[
+            self._summarize_window(
+                index * window_ms,
+                window[-1].timestamp_end_ms,
+                describe_segments(window),
+                slots,
+            )
+            for index, window in sorted(windows.items())
+        ])
+
+        while len(level) > fanin:
+            groups = [level[i:i + fanin] for i in range(0, len(level), fanin)]
+            reduced = await asyncio.gather(*[
+                self._summarize_window(
+                    group[0]["start_ms"],
+                    group[-1]["end_ms"],
+                    [f"{w['start_ms'] / 1000:.1f}-{w['end_ms'] / 1000:.1f}s: {w['summary']}" for w in group],
+                    slots,
+                )
+                for group in groups
+            ])
+            # Key moments and tags are carried up from the children rather than re-invented.
+            for parent, group in zip(reduced, groups):
+                parent["key_moments"] = [m for w in group for m in w["key_moments"]][: 3 * fanin]
+                parent["style_tags"] = list(dict.fromkeys(t for w in group for t in w["style_tags"]))[:10]
+                parent["complete"] = parent["complete"] and all(w["complete"] for w in group)
+            level = list(reduced)
+        return list(level)
+
     async def generate_summary(
         self,
         segments: List[HybridSegment],
         video_info: Dict[str, Any],
     ) -> TemplateSummary:
-        """Generate summary analysis from all segments."""
-        
-        # Prepare summary of segments for the API
-        segment_summaries = []
-        for i, seg in enumerate(segments[:50]):  # First 50 segments for context
-            segment_summaries.append({
-                "timestamp_ms": seg.timestamp_ms,
-                "scene_type": seg.visual.scene_type.value,
-                "subject": seg.visual.subject,
-                "has_text": bool(seg.visual.text_overlay),
-                "description": seg.description[:200],
-            })
-        
-        prompt = f"""Analyze this video based on the segment data provided:
+        """
+        Generate summary analysis from all segments.
+
+        Cuts, shot length, pacing, coverage, text overlays and palette are computed
+        locally over every segment. The model writes the narrative fields: from the
+        segment log directly for short videos, otherwise from window summaries
+        (see summarize_windows).
+        """
+        summary, _complete = await self._summarize(segments, video_info)
+        return summary
+
+    async def _summarize(
+        self,
+        segments: List[HybridSegment],
+        video_info: Dict[str, Any],
+    ) -> Tuple[TemplateSummary, bool]:
+        """generate_summary, also reporting whether every summary call succeeded."""
+        total_duration_ms = int(video_info.get("duration", 0) * 1000)
+        stats = segment_statistics(segments, total_duration_ms)
+        shot_starts = stats.pop("shot_starts_ms")
+        default_hook_ms = min(3000, shot_starts[1]) if len(shot_starts) > 1 else 3000
+
+        window_ms = int(settings.SUMMARY_WINDOW_SECONDS * 1000)
+        single_window = not segments or segments[-1].timestamp_ms < window_ms
+        windows: List[Dict[str, Any]] = []
+        if single_window:
+            analysis = "Segment log (time | shot | subject | details | description):\n" + "\n".join(
+                describe_segments(segments)
+            )
+        else:
+            windows = await self.summarize_windows(segments)
+            moments = [m for w in windows for m in w["key_moments"]]
+            analysis = "Timeline summaries:\n" + "\n".join(
+                f"{w['start_ms'] / 1000:.1f}-{w['end_ms'] / 1000:.1f}s: {w['summary']}" for w in windows
+            ) + f"\n\nCandidate key moments:\n{json.dumps(moments)}"
+
+        local_stats = {key: (value.value if isinstance(value, PacingType) else value) for key, value in stats.items()}
+        prompt = f"""Analyze this video based on the analysis data provided:
 
 Video Info:
 - Duration: {video_info.get('duration', 0)} seconds
 - Resolution: {video_info.get('width', 0)}x{video_info.get('height', 0)}
 - Total segments analyzed: {len(segments)}
+- Measured statistics: {json.dumps(local_stats)}
 
-Sample segments:
-{json.dumps(segment_summaries, indent=2)}
+{analysis}
 
 {self._build_summary_prompt()}"""
 
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            response = await self._generate_with_backoff(
                 prompt,
-                generation_config={
+                {
                     "temperature": 0.3,
                     "top_p": 0.8,
                     "max_output_tokens": 4096,
-                }
+                },
+                label="summary",
             )
+            summary_data = self._parse_json_response(response.text)
             
-            response_text = response.text
-            
-            # Extract JSON
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            summary_data = json.loads(response_text)
-            
-            # Map pacing
-            pacing_map = {
-                "very-fast": PacingType.VERY_FAST,
-                "fast": PacingType.FAST,
-                "moderate": PacingType.MODERATE,
-                "slow": PacingType.SLOW,
-                "very-slow": PacingType.VERY_SLOW,
-            }
-            
-            return TemplateSummary(
-                total_duration_ms=int(video_info.get("duration", 0) * 1000),
+            summary = TemplateSummary(
+                total_duration_ms=total_duration_ms,
                 total_segments=len(segments),
-                total_cuts=summary_data.get("total_cuts", 0),
-                average_shot_duration_ms=summary_data.get("average_shot_duration_ms", 2000),
-                hook_duration_ms=summary_data.get("hook_duration_ms", 3000),
+                hook_duration_ms=summary_data.get("hook_duration_ms", default_hook_ms),
                 hook_description=summary_data.get("hook_description", "No hook detected"),
-                pacing=pacing_map.get(summary_data.get("pacing", "").lower(), PacingType.MODERATE),
                 style_tags=summary_data.get("style_tags", []),
-                dominant_colors=summary_data.get("dominant_colors", []),
-                music_coverage_percent=summary_data.get("music_coverage_percent", 0),
-                speech_coverage_percent=summary_data.get("speech_coverage_percent", 0),
-                text_overlay_count=summary_data.get("text_overlay_count", 0),
                 key_moments=summary_data.get("key_moments", []),
                 content_structure=summary_data.get("content_structure", "Structure not analyzed"),
+                **stats,
             )
+            return summary, all(w["complete"] for w in windows)
             
         except Exception as e:
             logger.error(f"Failed to generate summary: {e}")
             
-            # Calculate basic stats from segments
-            cuts = sum(1 for s in segments if s.visual.transition_in and s.visual.transition_in != TransitionType.NONE)
-            text_count = sum(1 for s in segments if s.visual.text_overlay)
-            music_segments = sum(1 for s in segments if s.audio.music_present)
-            speech_segments = sum(1 for s in segments if s.audio.speech_present)
-            
             return TemplateSummary(
-                total_duration_ms=int(video_info.get("duration", 0) * 1000),
+                total_duration_ms=total_duration_ms,
                 total_segments=len(segments),
-                total_cuts=cuts,
-                average_shot_duration_ms=2000,
-                hook_duration_ms=3000,
+                hook_duration_ms=default_hook_ms,
                 hook_description="Analysis failed - default hook",
-                pacing=PacingType.MODERATE,
-                style_tags=["unanalyzed"],
-                dominant_colors=[],
-                music_coverage_percent=(music_segments / len(segments) * 100) if segments else 0,
-                speech_coverage_percent=(speech_segments / len(segments) * 100) if segments else 0,
-                text_overlay_count=text_count,
-                key_moments=[],
-                content_structure="Summary generation failed - structure unknown",
+                style_tags=list(dict.fromkeys(t for w in windows for t in w["style_tags"]))[:5] or ["unanalyzed"],
+                key_moments=[m for w in windows for m in w["key_moments"]],
+                content_structure=(
+                    " ".join(w["summary"] for w in windows)[:2000]
+                    or "Summary generation failed - structure unknown"
+                ),
+                **stats,
+            ), False
+
+    async def assemble_template(
+        self,
+        video_id: str,
+        raw_analyses: List[Dict[str, Any]],
+        audio_segments: List[Dict[str, Any]],
+        video_info: Dict[str, Any],
+        reused: Optional[Dict[int, int]] = None,
+        analysis_stats: Optional[Dict[str, Any]] = None,
+        visual_features: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Turn per-frame model output into a HybridTemplate (segments + summary).
+
+        Args:
+            video_id: ID of the video
+            raw_analyses: Per-frame model results, each with timestamp_ms
+            audio_segments: Audio segments, with local features when measured
+            video_info: Video metadata
+            reused: Grid timestamp -> analyzed timestamp for frames not sent to the model
+            analysis_stats: Sampling/dedup statistics to attach to the template
+            visual_features: Locally measured visual features by timestamp
+
+        Returns:
+            (HybridTemplate as dictionary, whether every summary call succeeded)
+        """
+        reused = reused or {}
+        visual_by_ms = visual_features or {}
+        # Convert to hybrid segments; each takes the audio features of its own window
+        interval_ms = settings.FRAME_EXTRACTION_INTERVAL_MS
+        audio_by_ms = {
+            segment["start_ms"]: segment for segment in audio_segments if "volume" in segment
+        }
+        segments = [
+            self._convert_to_hybrid_segment(
+                analysis,
+                interval_ms,
+                audio_features=audio_by_ms.get(analysis.get("timestamp_ms", 0)),
+                visual_features=visual_by_ms.get(analysis.get("timestamp_ms", 0)),
             )
+            for analysis in raw_analyses
+        ]
+
+        # Fill grid steps that were not analyzed (adaptive sampling gaps, deduplicated
+        # frames) from the analyzed frame they map to.
+        if reused:
+            by_timestamp = {analysis.get("timestamp_ms", 0): analysis for analysis in raw_analyses}
+            for timestamp_ms, source_ms in reused.items():
+                # Gap-filled grid steps may point at a frame that was itself deduplicated.
+                representative = by_timestamp.get(reused.get(source_ms, source_ms))
+                if representative is not None:
+                    segments.append(
+                        self._convert_to_hybrid_segment(
+                            representative,
+                            interval_ms,
+                            timestamp_ms=timestamp_ms,
+                            audio_features=audio_by_ms.get(timestamp_ms),
+                            visual_features=visual_by_ms.get(timestamp_ms),
+                        )
+                    )
+            segments.sort(key=lambda segment: segment.timestamp_ms)
+        if analysis_stats:
+            logger.info(f"Frame reuse for video {video_id}: {analysis_stats}")
+
+        # Generate summary
+        logger.info(f"Generating summary for video {video_id}")
+        summary, summary_complete = await self._summarize(segments, video_info)
+
+        # Build template
+        template = HybridTemplate(
+            video_id=video_id,
+            duration_seconds=video_info.get("duration", 0),
+            interval_ms=interval_ms,
+            created_at=datetime.utcnow(),
+            model_version=settings.GEMINI_MODEL,
+            segments=segments,
+            summary=summary,
+            analysis_stats=analysis_stats,
+        )
+
+        logger.info(f"Generated hybrid template with {len(segments)} segments for video {video_id}")
+        return template.model_dump(), summary_complete
 
     def analyze_video_with_template(
         self,
         video_id: str,
-        frames: List[Tuple[str, int]],
+        frames: Iterable[AnalysisFrame],
         audio_path: str,
         audio_segments: List[Dict[str, Any]],
         video_info: Dict[str, Any],
-    ) -> Dict[str, Any]:
+        dedup: Optional[FrameDeduplicator] = None,
+        plan: Optional[SamplingPlan] = None,
+        visual: Optional[VisualAnalyzer] = None,
+        audio_future: Optional[Future] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
         """
         Main entry point: Analyze video and generate hybrid template.
         
         Args:
             video_id: ID of the video
-            frames: List of (frame_path, timestamp_ms) tuples
+            frames: Frame stream from the in-memory frame pipeline
             audio_path: Path to extracted audio file
             audio_segments: List of audio segment metadata
             video_info: Video metadata
+            dedup: Deduplicator the frame stream was filtered with, if any
+            plan: Adaptive sampling plan the frame stream was filtered with, if any
+            visual: Local visual analyzer observing the frame stream, if any
+            audio_future: Background extraction resolving to (audio_path, audio_segments);
+                awaited only after frame analysis and used instead of the audio arguments
             
         Returns:
-            HybridTemplate as dictionary
+            (HybridTemplate as dictionary, complete): complete is False when any
+            frame kept a placeholder or a summary call failed; such templates
+            must not be cached
         """
         import asyncio
         
@@ -493,37 +1108,39 @@ Sample segments:
         
         try:
             # Analyze frames
-            logger.info(f"Analyzing {len(frames)} frames for video {video_id}")
-            raw_analyses = loop.run_until_complete(
-                self.analyze_frames_batch(frames, batch_size=25)
+            expected_frames = len(plan.samples) if plan is not None else min(
+                int(video_info.get("duration", 0) * settings.FRAME_EXTRACTION_FPS),
+                settings.MAX_FRAMES_PER_ANALYSIS,
             )
-            
-            # Convert to hybrid segments
-            interval_ms = settings.FRAME_EXTRACTION_INTERVAL_MS
-            segments = [
-                self._convert_to_hybrid_segment(analysis, interval_ms)
-                for analysis in raw_analyses
-            ]
-            
-            # Generate summary
-            logger.info(f"Generating summary for video {video_id}")
-            summary = loop.run_until_complete(
-                self.generate_summary(segments, video_info)
+            logger.info(f"Analyzing ~{expected_frames} frames for video {video_id}")
+            batch_size = DEFAULT_BATCH_SIZE
+            controller = BatchController() if settings.ANALYSIS_BATCH_ADAPTIVE else BatchController.fixed(batch_size)
+            raw_analyses, frames_complete = loop.run_until_complete(
+                self._analyze_stream(
+                    frames,
+                    total_frames=expected_frames,
+                    measured_visuals=visual is not None,
+                    controller=controller,
+                )
             )
             
-            # Build template
-            template = HybridTemplate(
-                video_id=video_id,
-                duration_seconds=video_info.get("duration", 0),
-                interval_ms=interval_ms,
-                created_at=datetime.utcnow(),
-                model_version=settings.GEMINI_MODEL,
-                segments=segments,
-                summary=summary,
+            if audio_future is not None:
+                audio_path, audio_segments = audio_future.result()
+            reused, analysis_stats = frame_reuse(plan, dedup, batch_size, controller.batches_formed)
+            analysis_stats = {**(analysis_stats or {}), "batching": controller.summary()}
+            template, summary_complete = loop.run_until_complete(
+                self.assemble_template(
+                    video_id,
+                    raw_analyses,
+                    audio_segments,
+                    video_info,
+                    reused=reused,
+                    analysis_stats=analysis_stats,
+                    # Measured once the frame stream is exhausted, so cuts see the whole video
+                    visual_features=visual.features() if visual is not None else None,
+                )
             )
-            
-            logger.info(f"Generated hybrid template with {len(segments)} segments for video {video_id}")
-            return template.model_dump()
+            return template, frames_complete and summary_complete
             
         finally:
             loop.close()
@@ -0,0 +1,155 @@
+"""
+Token-bucket rate limiting for model API calls.
+
+Buckets live in Redis so every Celery worker draws from the same request and
+token budgets and the fleet as a whole stays under the provider's RPM/TPM
+quotas. If Redis is unreachable, each process falls back to a local bucket
+holding its share of the budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Refill, then take `cost` tokens if available; otherwise report how long to wait.
+# Uses Redis server time so worker clock skew cannot mint extra tokens.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), capacity)
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class LocalTokenBucket:
+    """In-process token bucket with the same semantics as the Redis script."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = max(float(per_minute), 1e-6) / 60.0
+        self.capacity = float(capacity or per_minute)
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, cost: float) -> float:
+        """Take tokens if available; return seconds to wait otherwise (0 = granted)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            cost = min(float(cost), self.capacity)
+            if self._tokens >= cost:
+                self._tokens -= cost
+                return 0.0
+            return (cost - self._tokens) / self.rate
+
+
+class RedisTokenBucket:
+    """Token bucket shared by all processes through one Redis hash."""
+
+    def __init__(self, key: str, per_minute: float, capacity: Optional[float] = None, redis_client: Any = None):
+        self.key = key
+        self.rate = max(float(per_minute), 1e-6) / 60.0
+        self.capacity = float(capacity or per_minute)
+        self._redis = redis_client
+        self._script = None
+
+    def take(self, cost: float) -> float:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        if self._script is None:
+            self._script = self._redis.register_script(_TAKE_SCRIPT)
+        return float(self._script(keys=[self.key], args=[self.rate, self.capacity, float(cost)]))
+
+
+class ModelRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one model.
+    `acquire` waits until both buckets grant the call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: int,
+        tpm: int,
+        use_redis: bool = True,
+        redis_client: Any = None,
+        local_share: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.enabled = rpm > 0 or tpm > 0
+        self._use_redis = use_redis
+        self._redis_down_until = 0.0
+        self._buckets = []
+        for kind, limit in (("rpm", rpm), ("tpm", tpm)):
+            if limit <= 0:
+                continue
+            shared = RedisTokenBucket(f"ratelimit:model:{name}:{kind}", limit, redis_client=redis_client)
+            local = LocalTokenBucket(max(1.0, limit * local_share))
+            self._buckets.append((kind, shared, local))
+
+    def _take(self, kind: str, shared: RedisTokenBucket, local: LocalTokenBucket, cost: float) -> float:
+        if self._use_redis and time.monotonic() >= self._redis_down_until:
+            try:
+                return shared.take(cost)
+            except Exception as exc:
+                self._redis_down_until = time.monotonic() + 30.0
+                logger.warning(f"Rate limiter {self.name}/{kind}: Redis unavailable, using local bucket: {exc}")
+        return local.take(cost)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Block until one request costing `tokens` fits; returns seconds spent waiting."""
+        waited = 0.0
+        for kind, shared, local in self._buckets:
+            cost = 1 if kind == "rpm" else max(1, int(tokens))
+            while True:
+                wait = await asyncio.to_thread(self._take, kind, shared, local, cost)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 10.0))
+                waited += min(wait, 10.0)
+        return waited
+
+
+_limiters: dict = {}
+_limiters_lock = threading.Lock()
+
+
+def get_model_rate_limiter(model_name: str) -> ModelRateLimiter:
+    """Process-wide limiter for a model, configured from GEMINI_RPM_LIMIT/GEMINI_TPM_LIMIT."""
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limiter = ModelRateLimiter(
+                model_name,
+                rpm=settings.GEMINI_RPM_LIMIT,
+                tpm=settings.GEMINI_TPM_LIMIT,
+                use_redis=settings.GEMINI_RATE_LIMIT_REDIS,
+                local_share=settings.GEMINI_RATE_LIMIT_LOCAL_SHARE,
+            )
+            _limiters[model_name] = limiter
+    return limiter
@@ -0,0 +1,174 @@
+"""
+Two-level cache for signed storage URLs.
+
+Signing is a round-trip to Supabase per object, and list/media endpoints ask
+for the same thumbnails and sources over and over. URLs are kept in-process
+and in Redis (shared across API workers) until shortly before they expire,
+so most requests are served without contacting storage at all.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "signed_url"
+# After a Redis error, skip it for this long instead of paying a connect timeout per request.
+REDIS_RETRY_SECONDS = 30.0
+
+
+class SignedUrlCache:
+    """Path -> signed URL cache with in-process LRU and optional Redis tier."""
+
+    def __init__(
+        self,
+        namespace: str,
+        refresh_margin: float = 300.0,
+        max_entries: int = 10000,
+        redis_client: Any = None,
+        use_redis: bool = True,
+    ) -> None:
+        self.namespace = namespace
+        self.refresh_margin = max(0.0, float(refresh_margin))
+        self.max_entries = max(1, int(max_entries))
+        self._redis = redis_client
+        self._use_redis = bool(use_redis)
+        self._redis_down_until = 0.0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._guard = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    # ---------- Redis tier ----------
+
+    def _redis_key(self, path: str) -> str:
+        return f"{REDIS_PREFIX}:{self.namespace}:{path}"
+
+    def _redis_client(self):
+        if not self._use_redis or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning("Signed URL cache: Redis unavailable, using local tier only: %s", exc)
+
+    # ---------- Lookup ----------
+
+    def get_many(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Return cached URLs that remain valid beyond the refresh margin."""
+        now = time.time()
+        found: Dict[str, str] = {}
+        pending = []
+        with self._guard:
+            for path in dict.fromkeys(paths):
+                entry = self._entries.get(path)
+                if entry and entry[1] - self.refresh_margin > now:
+                    self._entries.move_to_end(path)
+                    found[path] = entry[0]
+                else:
+                    if entry:
+                        self._entries.pop(path, None)
+                    pending.append(path)
+            self._stats["local_hits"] += len(found)
+
+        promoted: Dict[str, Tuple[str, float]] = {}
+        client = self._redis_client() if pending else None
+        if client is not None:
+            try:
+                raw_values = client.mget([self._redis_key(path) for path in pending])
+            except Exception as exc:
+                self._redis_failed(exc)
+                raw_values = [None] * len(pending)
+            for path, raw in zip(pending, raw_values):
+                if not raw:
+                    continue
+                try:
+                    data = json.loads(raw)
+                    url, expires_at = data["url"], float(data["expires_at"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if expires_at - self.refresh_margin > now:
+                    promoted[path] = (url, expires_at)
+            if promoted:
+                self._store_local(promoted)
+                found.update({path: url for path, (url, _exp) in promoted.items()})
+
+        with self._guard:
+            self._stats["redis_hits"] += len(promoted)
+            self._stats["misses"] += len(pending) - len(promoted)
+        return found
+
+    # ---------- Updates ----------
+
+    def _store_local(self, entries: Dict[str, Tuple[str, float]]) -> None:
+        with self._guard:
+            for path, entry in entries.items():
+                self._entries[path] = entry
+                self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_many(self, urls: Dict[str, str], expires_in: int) -> None:
+        """Remember freshly signed URLs valid for `expires_in` seconds."""
+        if not urls:
+            return
+        expires_at = time.time() + int(expires_in)
+        self._store_local({path: (url, expires_at) for path, url in urls.items()})
+
+        ttl = int(int(expires_in) - self.refresh_margin)
+        client = self._redis_client() if ttl > 0 else None
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for path, url in urls.items():
+                pipe.setex(self._redis_key(path), ttl, json.dumps({"url": url, "expires_at": expires_at}))
+            pipe.execute()
+        except Exception as exc:
+            self._redis_failed(exc)
+
+    def invalidate(self, path: str) -> None:
+        with self._guard:
+            self._entries.pop(path, None)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(self._redis_key(path))
+        except Exception as exc:
+            self._redis_failed(exc)
+
+    # ---------- Metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            data: Dict[str, Any] = dict(self._stats)
+            data["entries"] = len(self._entries)
+        lookups = data["local_hits"] + data["redis_hits"] + data["misses"]
+        data["hit_rate"] = (data["local_hits"] + data["redis_hits"]) / lookups if lookups else 0.0
+        return data
+
+
+def build_signed_url_cache(namespace: str, signed_ttl: int) -> Optional[SignedUrlCache]:
+    """Create the cache for one bucket, or None when disabled."""
+    if not settings.SIGNED_URL_CACHE_ENABLED:
+        return None
+    # Cap the refresh margin at a tenth of the TTL so short-lived URLs are still cached.
+    margin = min(float(settings.SIGNED_URL_CACHE_REFRESH_MARGIN), max(1.0, signed_ttl / 10.0))
+    return SignedUrlCache(
+        namespace,
+        refresh_margin=margin,
+        max_entries=settings.SIGNED_URL_CACHE_MAX_ENTRIES,
+        use_redis=settings.SIGNED_URL_CACHE_REDIS,
+    )
@@ -4,12 +4,67 @@ Social Media API Clients - Platform-specific API integrations.
 
 from typing import Dict, Any, Optional, List
 from abc import ABC, abstractmethod
+import asyncio
+import logging
+
 import httpx
 
+logger = logging.getLogger(__name__)
+
+# Attempts per request when the platform throttles (429) or fails (5xx)
+MAX_ATTEMPTS = 3
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+def _metrics(views: Any = 0, likes: Any = 0, comments: Any = 0, shares: Any = 0, saves: Any = 0) -> Dict[str, Any]:
+    """Normalized metrics dictionary (platforms report counts as strings or ints)."""
+    counts = {
+        "views": int(views or 0),
+        "likes": int(likes or 0),
+        "comments": int(comments or 0),
+        "shares": int(shares or 0),
+        "saves": int(saves or 0),
+    }
+    engagement = counts["likes"] + counts["comments"] + counts["shares"] + counts["saves"]
+    counts["engagement_rate"] = engagement / counts["views"] * 100 if counts["views"] else 0.0
+    return counts
+
 
 class SocialMediaClient(ABC):
     """Abstract base class for social media API clients."""
 
+    # Most post IDs one metrics request accepts (1 = no multi-ID endpoint)
+    max_batch_size: int = 1
+
+    def __init__(self, http: Optional[httpx.AsyncClient] = None, base_url: str = ""):
+        """
+        Args:
+            http: Shared pooled client; a short-lived one is opened per request if omitted
+            base_url: Platform API root
+        """
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """Send a request, retrying throttled (429) and 5xx responses; returns the JSON body."""
+        url = f"{self.base_url}{path}"
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if self.http is not None:
+                response = await self.http.request(method, url, **kwargs)
+            else:
+                async with httpx.AsyncClient(timeout=30.0) as http:
+                    response = await http.request(method, url, **kwargs)
+            if attempt < MAX_ATTEMPTS and (response.status_code == 429 or response.status_code >= 500):
+                try:
+                    delay = float(response.headers.get("retry-after", 2 ** attempt))
+                except ValueError:
+                    delay = float(2 ** attempt)
+                logger.warning(f"{method} {path} returned {response.status_code}; retrying in {delay:.0f}s")
+                await asyncio.sleep(min(max(delay, 0.0), MAX_RETRY_AFTER_SECONDS))
+                continue
+            response.raise_for_status()
+            return response.json()
+
     @abstractmethod
     async def publish_video(
         self,
@@ -28,14 +83,30 @@ class SocialMediaClient(ABC):
         """Get metrics for a published post."""
         pass
 
+    async def get_metrics_batch(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get metrics for up to `max_batch_size` posts, keyed by post ID.
+        
+        Platforms with a multi-ID endpoint override this; the default fetches
+        each post concurrently. Posts the platform does not return are omitted.
+        """
+        results = await asyncio.gather(*(self.get_metrics(post_id) for post_id in post_ids))
+        return dict(zip(post_ids, results))
+
 
 class InstagramClient(SocialMediaClient):
     """Instagram Graph API client."""
 
-    def __init__(self, access_token: str, user_id: str):
+    def __init__(
+        self,
+        access_token: str,
+        user_id: str,
+        http: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(http=http, base_url=base_url or "https://graph.instagram.com/v18.0")
         self.access_token = access_token
         self.user_id = user_id
-        self.base_url = "https://graph.instagram.com/v18.0"
 
     async def publish_video(
         self,
@@ -60,24 +131,40 @@ class InstagramClient(SocialMediaClient):
         return {"post_id": "", "status": "pending"}
 
     async def get_metrics(self, post_id: str) -> Dict[str, Any]:
-        """Get insights for an Instagram post."""
-        # TODO: Implement metrics fetching
-        return {
-            "views": 0,
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "engagement_rate": 0.0,
+        """Get insights for an Instagram post (the insights edge takes one media ID)."""
+        body = await self._request(
+            "GET",
+            f"/{post_id}/insights",
+            params={"metric": "views,likes,comments,shares,saved", "access_token": self.access_token},
+        )
+        values = {
+            item.get("name"): (item.get("values") or [{}])[0].get("value", 0)
+            for item in body.get("data", [])
         }
+        return _metrics(
+            views=values.get("views"),
+            likes=values.get("likes"),
+            comments=values.get("comments"),
+            shares=values.get("shares"),
+            saves=values.get("saved"),
+        )
 
 
 class TikTokClient(SocialMediaClient):
     """TikTok Marketing API client."""
 
-    def __init__(self, access_token: str, open_id: str):
+    max_batch_size = 20  # video/query accepts up to 20 video IDs
+
+    def __init__(
+        self,
+        access_token: str,
+        open_id: str,
+        http: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(http=http, base_url=base_url or "https://open.tiktokapis.com/v2")
         self.access_token = access_token
         self.open_id = open_id
-        self.base_url = "https://open.tiktokapis.com/v2"
 
     async def publish_video(
         self,
@@ -100,22 +187,41 @@ class TikTokClient(SocialMediaClient):
 
     async def get_metrics(self, post_id: str) -> Dict[str, Any]:
         """Get analytics for a TikTok video."""
-        # TODO: Implement metrics fetching
+        return (await self.get_metrics_batch([post_id])).get(post_id, _metrics())
+
+    async def get_metrics_batch(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get analytics for up to 20 TikTok videos in one query."""
+        body = await self._request(
+            "POST",
+            "/video/query/",
+            params={"fields": "id,view_count,like_count,comment_count,share_count"},
+            headers={"Authorization": f"Bearer {self.access_token}"},
+            json={"filters": {"video_ids": list(post_ids)}},
+        )
         return {
-            "views": 0,
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "engagement_rate": 0.0,
+            str(video["id"]): _metrics(
+                views=video.get("view_count"),
+                likes=video.get("like_count"),
+                comments=video.get("comment_count"),
+                shares=video.get("share_count"),
+            )
+            for video in (body.get("data") or {}).get("videos", [])
         }
 
 
 class YouTubeClient(SocialMediaClient):
     """YouTube Data API v3 client."""
 
-    def __init__(self, access_token: str):
+    max_batch_size = 50  # videos.list accepts up to 50 IDs
+
+    def __init__(
+        self,
+        access_token: str,
+        http: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(http=http, base_url=base_url or "https://www.googleapis.com/youtube/v3")
         self.access_token = access_token
-        self.base_url = "https://www.googleapis.com/youtube/v3"
 
     async def publish_video(
         self,
@@ -144,23 +250,43 @@ class YouTubeClient(SocialMediaClient):
 
     async def get_metrics(self, video_id: str) -> Dict[str, Any]:
         """Get analytics for a YouTube video."""
-        # TODO: Implement metrics fetching
-        return {
-            "views": 0,
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "engagement_rate": 0.0,
-        }
+        return (await self.get_metrics_batch([video_id])).get(video_id, _metrics())
+
+    async def get_metrics_batch(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get statistics for up to 50 YouTube videos in one videos.list call."""
+        body = await self._request(
+            "GET",
+            "/videos",
+            params={"part": "statistics", "id": ",".join(post_ids), "maxResults": len(post_ids)},
+            headers={"Authorization": f"Bearer {self.access_token}"},
+        )
+        results = {}
+        for item in body.get("items", []):
+            stats = item.get("statistics") or {}
+            results[str(item["id"])] = _metrics(
+                views=stats.get("viewCount"),
+                likes=stats.get("likeCount"),
+                comments=stats.get("commentCount"),
+                saves=stats.get("favoriteCount"),
+            )
+        return results
 
 
 class FacebookClient(SocialMediaClient):
     """Facebook Graph API client."""
 
-    def __init__(self, access_token: str, page_id: str):
+    max_batch_size = 50  # Graph API ?ids= lookups accept up to 50 IDs
+
+    def __init__(
+        self,
+        access_token: str,
+        page_id: str,
+        http: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(http=http, base_url=base_url or "https://graph.facebook.com/v18.0")
         self.access_token = access_token
         self.page_id = page_id
-        self.base_url = "https://graph.facebook.com/v18.0"
 
     async def publish_video(
         self,
@@ -183,13 +309,28 @@ class FacebookClient(SocialMediaClient):
 
     async def get_metrics(self, post_id: str) -> Dict[str, Any]:
         """Get insights for a Facebook post."""
-        # TODO: Implement metrics fetching
+        return (await self.get_metrics_batch([post_id])).get(post_id, _metrics())
+
+    async def get_metrics_batch(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get counts for up to 50 Facebook posts in one multi-ID lookup."""
+        body = await self._request(
+            "GET",
+            "/",
+            params={
+                "ids": ",".join(post_ids),
+                "fields": "views,likes.summary(true).limit(0),comments.summary(true).limit(0),shares",
+                "access_token": self.access_token,
+            },
+        )
         return {
-            "views": 0,
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "engagement_rate": 0.0,
+            str(post_id): _metrics(
+                views=node.get("views"),
+                likes=((node.get("likes") or {}).get("summary") or {}).get("total_count"),
+                comments=((node.get("comments") or {}).get("summary") or {}).get("total_count"),
+                shares=(node.get("shares") or {}).get("count"),
+            )
+            for post_id, node in body.items()
+            if isinstance(node, dict)
         }
 
 
@@ -200,6 +341,8 @@ class SocialMediaClientFactory:
     def create_client(
         platform: str,
         access_token: str,
+        http: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
         **kwargs,
     ) -> SocialMediaClient:
         """
@@ -208,6 +351,8 @@ class SocialMediaClientFactory:
         Args:
             platform: Target platform
             access_token: OAuth access token
+            http: Shared pooled HTTP client (recommended for bulk work)
+            base_url: Override the platform API root
             **kwargs: Platform-specific parameters
             
         Returns:
@@ -217,18 +362,24 @@ class SocialMediaClientFactory:
             return InstagramClient(
                 access_token=access_token,
                 user_id=kwargs.get("user_id", ""),
+                http=http,
+                base_url=base_url,
             )
         elif platform == "tiktok":
             return TikTokClient(
                 access_token=access_token,
                 open_id=kwargs.get("open_id", ""),
+                http=http,
+                base_url=base_url,
             )
         elif platform == "youtube":
-            return YouTubeClient(access_token=access_token)
+            return YouTubeClient(access_token=access_token, http=http, base_url=base_url)
         elif platform == "facebook":
             return FacebookClient(
                 access_token=access_token,
                 page_id=kwargs.get("page_id", ""),
+                http=http,
+                base_url=base_url,
             )
         else:
             raise ValueError(f"Unsupported platform: {platform}")
@@ -0,0 +1,210 @@
+"""
+Shared on-disk cache for storage objects resolved for local processing.
+
+Entries are keyed by storage path plus object etag/size, so a re-uploaded
+object gets a fresh entry while unchanged sources are downloaded once and
+reused across clips, exports and analysis retries. Eviction is LRU by file
+mtime (touched on every hit) under a byte budget; the directory itself is the
+index, so several worker processes can share one cache root.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+
+
+class SourceCache:
+    """Content-addressed LRU file cache with in-process request coalescing."""
+
+    def __init__(
+        self,
+        root_dir: str,
+        max_bytes: int,
+        pin_seconds: float = 600.0,
+    ) -> None:
+        self.root = Path(root_dir).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+        # Recently served entries may still be open in ffmpeg; don't evict them.
+        self.pin_seconds = float(pin_seconds)
+        self._guard = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "bytes_downloaded": 0,
+            "bytes_evicted": 0,
+        }
+
+    # ---------- Keys ----------
+
+    @staticmethod
+    def make_key(storage_path: str, etag: Optional[str], size: Optional[int]) -> str:
+        raw = f"{storage_path}\n{etag or ''}\n{int(size or 0)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str, name: str = "") -> Path:
+        suffix = Path(name).suffix.lower()[:10]
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    # ---------- Lookup ----------
+
+    def _incr(self, name: str, amount: int = 1) -> None:
+        with self._guard:
+            self._stats[name] += amount
+
+    def _acquire_key(self, key: str) -> threading.Lock:
+        with self._guard:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._key_locks[key] = lock
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+        return lock
+
+    def _release_key(self, key: str) -> None:
+        with self._guard:
+            remaining = self._waiters.get(key, 1) - 1
+            if remaining <= 0:
+                self._waiters.pop(key, None)
+                self._key_locks.pop(key, None)
+            else:
+                self._waiters[key] = remaining
+
+    def _touch(self, path: Path) -> bool:
+        try:
+            os.utime(path, None)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fetch(
+        self,
+        storage_path: str,
+        etag: Optional[str],
+        size: Optional[int],
+        fill: Callable[[Path], None],
+    ) -> Path:
+        """
+        Return the cached file for an object, filling it with `fill(dest)` on miss.
+        Concurrent callers for the same key wait for a single fill.
+        """
+        key = self.make_key(storage_path, etag, size)
+        path = self.entry_path(key, storage_path)
+        if self._touch(path):
+            self._incr("hits")
+            return path
+
+        lock = self._acquire_key(key)
+        try:
+            contended = not lock.acquire(blocking=False)
+            if contended:
+                lock.acquire()
+            try:
+                if self._touch(path):
+                    self._incr("coalesced" if contended else "hits")
+                    return path
+
+                self._incr("misses")
+                if size:
+                    self.evict(reserve_bytes=int(size))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                part = path.with_name(f"{path.name}.{uuid4().hex}{PART_SUFFIX}")
+                try:
+                    fill(part)
+                    written = part.stat().st_size
+                    if size and written != int(size):
+                        raise RuntimeError(
+                            f"Downloaded size mismatch for {storage_path}: {written} != {size}"
+                        )
+                    os.replace(part, path)
+                finally:
+                    part.unlink(missing_ok=True)
+                self._incr("bytes_downloaded", written)
+                return path
+            finally:
+                lock.release()
+        finally:
+            self._release_key(key)
+
+    # ---------- Eviction ----------
+
+    def _entries(self):
+        for bucket in self.root.iterdir():
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket):
+                if entry.is_file() and not entry.name.endswith(PART_SUFFIX):
+                    st = entry.stat()
+                    yield Path(entry.path), st.st_size, st.st_mtime
+
+    def evict(self, reserve_bytes: int = 0) -> int:
+        """Evict least recently used entries until usage + reserve fits the budget."""
+        if not self.max_bytes:
+            return 0
+        entries = sorted(self._entries(), key=lambda item: item[2])
+        used = sum(size for _path, size, _mtime in entries)
+        budget = max(0, self.max_bytes - int(reserve_bytes))
+        cutoff = time.time() - self.pin_seconds
+        freed = 0
+        for path, size, mtime in entries:
+            if used <= budget:
+                break
+            if mtime > cutoff:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            used -= size
+            freed += size
+            self._incr("evictions")
+        if freed:
+            self._incr("bytes_evicted", freed)
+            logger.info("Source cache evicted %d bytes (usage %d/%d)", freed, used, self.max_bytes)
+        return freed
+
+    # ---------- Metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            data: Dict[str, Any] = dict(self._stats)
+        lookups = data["hits"] + data["misses"] + data["coalesced"]
+        data["hit_rate"] = (data["hits"] + data["coalesced"]) / lookups if lookups else 0.0
+        data["max_bytes"] = self.max_bytes
+        return data
+
+
+_source_cache: Optional[SourceCache] = None
+_source_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> Optional[SourceCache]:
+    """Get the process-wide source cache, or None when disabled."""
+    global _source_cache
+
+    if not settings.SOURCE_CACHE_ENABLED:
+        return None
+    with _source_cache_lock:
+        if _source_cache is None:
+            _source_cache = SourceCache(
+                settings.SOURCE_CACHE_DIR,
+                settings.SOURCE_CACHE_MAX_BYTES,
+            )
+    return _source_cache
@@ -11,14 +11,22 @@ import logging
 import os
 import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
 from uuid import uuid4
 
+import httpx
 from fastapi import Request
 from supabase import create_client
 
 from app.core.config import settings
+from app.services.signed_url_cache import build_signed_url_cache
+from app.services.source_cache import get_source_cache
+from app.services.stream_upload import MultipartStreamUpload
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +74,9 @@ class LocalStorageService:
         shutil.copy2(local_path, dst)
         return dst
 
+    def read_bytes(self, storage_path: str) -> bytes:
+        return self.absolute_path(storage_path).read_bytes()
+
     def delete(self, storage_path: str) -> None:
         try:
             path = self.absolute_path(storage_path)
@@ -80,6 +91,9 @@ class LocalStorageService:
         except ValueError:
             return False
 
+    def exists_many(self, storage_paths: Iterable[str]) -> Dict[str, bool]:
+        return {path: self.exists(path) for path in dict.fromkeys(storage_paths)}
+
     def resolve_for_processing(self, storage_path: str) -> str:
         """
         Resolve DB storage path to a local filesystem path.
@@ -98,6 +112,11 @@ class LocalStorageService:
         """No-op for local storage (already written to storage path)."""
         _ = storage_path, local_path, content_type
 
+    def open_stream_upload(self, storage_path: str, content_type: Optional[str] = None) -> None:
+        """Local outputs are written in place; there is nothing to stream."""
+        _ = storage_path, content_type
+        return None
+
     def build_public_url(self, storage_path: str, request: Optional[Request] = None) -> Optional[str]:
         rel = self._normalize_relative(storage_path)
         base = (settings.STORAGE_PUBLIC_BASE_URL or "").rstrip("/")
@@ -108,6 +127,11 @@ class LocalStorageService:
                 base = "http://localhost:8000"
         return f"{base}/storage/{rel}"
 
+    def build_public_urls(
+        self, storage_paths: Iterable[str], request: Optional[Request] = None
+    ) -> Dict[str, Optional[str]]:
+        return {path: self.build_public_url(path, request) for path in dict.fromkeys(storage_paths)}
+
 
 class SupabaseStorageService:
     """
@@ -122,8 +146,17 @@ class SupabaseStorageService:
             raise RuntimeError("Supabase storage requires SUPABASE_URL and SUPABASE_KEY")
         self.bucket = bucket or settings.SUPABASE_STORAGE_BUCKET
         self.client = create_client(supabase_url, supabase_key)
+        self.supabase_url = supabase_url.rstrip("/")
+        self._api_key = supabase_key
+        self._http_client: Optional[httpx.Client] = None
+        self._s3_client = None
+        self.source_cache = get_source_cache()
         self.private = bool(settings.SUPABASE_STORAGE_PRIVATE)
         self.signed_ttl = int(settings.SUPABASE_STORAGE_SIGNED_URL_TTL or 3600)
+        self.url_cache = build_signed_url_cache(self.bucket, self.signed_ttl) if self.private else None
+        self.exists_ttl = float(settings.STORAGE_EXISTS_CACHE_TTL or 0)
+        self._exists_cache: Dict[str, Tuple[bool, float]] = {}
+        self._exists_lock = threading.Lock()
         self.temp_dir = Path(settings.TEMP_PROCESSING_DIR or tempfile.gettempdir()).resolve()
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
@@ -143,12 +176,81 @@ class SupabaseStorageService:
     def _bucket_client(self):
         return self.client.storage.from_(self.bucket)
 
+    def _http(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                headers={"Authorization": f"Bearer {self._api_key}", "apikey": self._api_key},
+                timeout=httpx.Timeout(connect=10.0, read=120.0, write=120.0, pool=30.0),
+            )
+        return self._http_client
+
+    def _object_url(self, rel: str) -> str:
+        return f"{self.supabase_url}/storage/v1/object/{quote(self.bucket)}/{quote(rel)}"
+
+    def head_object(self, storage_path: str) -> Optional[Dict[str, Any]]:
+        """Fetch object size/etag without downloading it. Returns None if missing."""
+        rel = self._normalize_relative(storage_path)
+        resp = self._http().head(self._object_url(rel))
+        # Storage API reports missing objects as 400 or 404 on HEAD.
+        if resp.status_code in (400, 404):
+            return None
+        resp.raise_for_status()
+        length = resp.headers.get("content-length")
+        return {
+            "size": int(length) if length and length.isdigit() else None,
+            "etag": (resp.headers.get("etag") or "").strip('"') or None,
+            "content_type": resp.headers.get("content-type"),
+            "last_modified": resp.headers.get("last-modified"),
+        }
+
+    def download_to(self, storage_path: str, dest: Path, size: Optional[int] = None) -> None:
+        """
+        Stream an object to dest using ranged GETs, so memory stays bounded
+        by the chunk size and an interrupted transfer resumes where it stopped.
+        """
+        rel = self._normalize_relative(storage_path)
+        url = self._object_url(rel)
+        chunk = max(1024 * 1024, int(settings.SOURCE_CACHE_CHUNK_BYTES or 0))
+        offset = 0
+        retries = 0
+        with open(dest, "wb") as handle:
+            while size is None or offset < size:
+                end = offset + chunk - 1 if size is None else min(offset + chunk, size) - 1
+                handle.seek(offset)
+                handle.truncate()
+                try:
+                    with self._http().stream("GET", url, headers={"Range": f"bytes={offset}-{end}"}) as resp:
+                        if resp.status_code == 416:
+                            break
+                        resp.raise_for_status()
+                        if resp.status_code == 200 and offset:
+                            # Range ignored by the server; take the full body instead.
+                            handle.seek(0)
+                            handle.truncate()
+                            offset = 0
+                        received = 0
+                        for data in resp.iter_bytes(256 * 1024):
+                            handle.write(data)
+                            received += len(data)
+                        full_body = resp.status_code == 200
+                except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+                    retries += 1
+                    if retries > 3:
+                        raise RuntimeError(f"Failed to download storage object {rel}: {exc}") from exc
+                    logger.warning("Retrying ranged download of %s at byte %d: %s", rel, offset, exc)
+                    continue
+                retries = 0
+                offset += received
+                if full_body or received == 0:
+                    break
+
     def save_bytes(self, storage_path: str, content: bytes, content_type: Optional[str] = None) -> Path:
         rel = self._normalize_relative(storage_path)
         options = {"content-type": content_type or "application/octet-stream", "upsert": True}
         res = self._bucket_client().upload(rel, content, file_options=options)
         if isinstance(res, dict) and res.get("error"):
             raise RuntimeError(str(res["error"]))
+        self._remember_exists(rel, True)
         return Path(rel)
 
     def save_file(self, storage_path: str, local_path: str, content_type: Optional[str] = None) -> Path:
@@ -158,6 +260,7 @@ class SupabaseStorageService:
             res = self._bucket_client().upload(rel, handle, file_options=options)
         if isinstance(res, dict) and res.get("error"):
             raise RuntimeError(str(res["error"]))
+        self._remember_exists(rel, True)
         return Path(rel)
 
     def delete(self, storage_path: str) -> None:
@@ -168,17 +271,34 @@ class SupabaseStorageService:
         res = self._bucket_client().remove([rel])
         if isinstance(res, dict) and res.get("error"):
             raise RuntimeError(str(res["error"]))
+        self._remember_exists(rel, False)
+        if self.url_cache is not None:
+            self.url_cache.invalidate(rel)
 
-    def exists(self, storage_path: str) -> bool:
-        try:
-            rel = self._normalize_relative(storage_path)
-        except ValueError:
-            return False
+    # ---------- Existence checks ----------
+
+    def _remember_exists(self, rel: str, exists: bool) -> None:
+        if self.exists_ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._exists_lock:
+            if len(self._exists_cache) > 10000:
+                self._exists_cache = {k: v for k, v in self._exists_cache.items() if v[1] > now}
+            self._exists_cache[rel] = (exists, now + self.exists_ttl)
+
+    def _cached_exists(self, rel: str) -> Optional[bool]:
+        with self._exists_lock:
+            entry = self._exists_cache.get(rel)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def _exists_by_listing(self, rel: str) -> bool:
         parent = str(Path(rel).parent).replace("\\", "/")
         if parent == ".":
             parent = ""
         name = Path(rel).name
-        res = self._bucket_client().list(parent)
+        res = self._bucket_client().list(parent, {"search": name})
         if isinstance(res, dict):
             data = res.get("data") if "data" in res else res.get("result")
             if isinstance(data, list):
@@ -191,26 +311,85 @@ class SupabaseStorageService:
             return any(entry.get("name") == name for entry in res)
         return False
 
+    def _check_exists(self, rel: str) -> bool:
+        cached = self._cached_exists(rel)
+        if cached is not None:
+            return cached
+        try:
+            exists = self.head_object(rel) is not None
+        except httpx.HTTPError as exc:
+            # HEAD can be refused by bucket policies; a prefix-filtered listing still works.
+            logger.warning("HEAD existence check failed for %s, falling back to listing: %s", rel, exc)
+            exists = self._exists_by_listing(rel)
+        self._remember_exists(rel, exists)
+        return exists
+
+    def exists(self, storage_path: str) -> bool:
+        """Check one object with a metadata-only HEAD (cached for STORAGE_EXISTS_CACHE_TTL)."""
+        try:
+            rel = self._normalize_relative(storage_path)
+        except ValueError:
+            return False
+        return self._check_exists(rel)
+
+    def exists_many(self, storage_paths: Iterable[str]) -> Dict[str, bool]:
+        """Check several objects concurrently, keyed by the given storage paths."""
+        rels: Dict[str, str] = {}
+        results: Dict[str, bool] = {}
+        for path in dict.fromkeys(storage_paths):
+            try:
+                rels[path] = self._normalize_relative(path)
+            except ValueError:
+                results[path] = False
+        unique = list(dict.fromkeys(rels.values()))
+        if len(unique) <= 1:
+            found = {rel: self._check_exists(rel) for rel in unique}
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(unique))) as pool:
+                found = dict(zip(unique, pool.map(self._check_exists, unique)))
+        for path, rel in rels.items():
+            results[path] = found[rel]
+        return results
+
+    def read_bytes(self, storage_path: str) -> bytes:
+        """Download a (small) object into memory."""
+        rel = self._normalize_relative(storage_path)
+        res = self._bucket_client().download(rel)
+        data = res.get("data") if isinstance(res, dict) else res
+        if isinstance(res, dict) and res.get("error"):
+            raise RuntimeError(str(res["error"]))
+        if data is None:
+            raise RuntimeError("Failed to download storage object")
+        return data
+
     def resolve_for_processing(self, storage_path: str) -> str:
         """
-        Download Supabase object to temp and return local path.
+        Resolve Supabase object to a local path.
+        Served from the shared source cache when enabled; callers must treat
+        the returned file as read-only.
         """
         raw = Path(storage_path)
         if raw.is_absolute() and raw.exists():
             return str(raw)
         rel = self._normalize_relative(storage_path)
+        if self.source_cache is not None:
+            try:
+                meta = self.head_object(rel)
+            except Exception as exc:
+                logger.warning("Storage HEAD failed for %s, downloading uncached: %s", rel, exc)
+                meta = None
+            if meta is not None and meta.get("etag"):
+                size = meta.get("size")
+                cached = self.source_cache.fetch(
+                    rel,
+                    meta["etag"],
+                    size,
+                    lambda dest: self.download_to(rel, dest, size),
+                )
+                return str(cached)
+
         tmp_path = self.temp_dir / f"{uuid4()}_{Path(rel).name}"
-        res = self._bucket_client().download(rel)
-        data = None
-        if isinstance(res, dict):
-            if res.get("error"):
-                raise RuntimeError(str(res["error"]))
-            data = res.get("data")
-        else:
-            data = res
-        if data is None:
-            raise RuntimeError("Failed to download storage object")
-        tmp_path.write_bytes(data)
+        tmp_path.write_bytes(self.read_bytes(rel))
         return str(tmp_path)
 
     def get_write_path(self, storage_path: str) -> str:
@@ -218,6 +397,53 @@ class SupabaseStorageService:
         rel = self._normalize_relative(storage_path)
         return str(self.temp_dir / f"{uuid4()}_{Path(rel).name}")
 
+    def _s3(self):
+        if self._s3_client is None:
+            import boto3
+            from botocore.config import Config
+
+            endpoint = (settings.SUPABASE_S3_ENDPOINT or "").strip() or f"{self.supabase_url}/storage/v1/s3"
+            self._s3_client = boto3.client(
+                "s3",
+                endpoint_url=endpoint,
+                region_name=settings.SUPABASE_S3_REGION,
+                aws_access_key_id=settings.SUPABASE_S3_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.SUPABASE_S3_SECRET_ACCESS_KEY,
+                config=Config(
+                    s3={"addressing_style": "path"},
+                    max_pool_connections=max(10, int(settings.STREAM_UPLOAD_CONCURRENCY) * 2),
+                ),
+            )
+        return self._s3_client
+
+    def open_stream_upload(
+        self, storage_path: str, content_type: Optional[str] = None
+    ) -> Optional[MultipartStreamUpload]:
+        """
+        Multipart upload handle for streaming a render output while it is encoded.
+        Returns None when streaming is disabled or S3 credentials are missing,
+        in which case callers fall back to finalize_write.
+        """
+        if not settings.STREAM_UPLOAD_ENABLED:
+            return None
+        if not settings.SUPABASE_S3_ACCESS_KEY_ID or not settings.SUPABASE_S3_SECRET_ACCESS_KEY:
+            logger.warning("STREAM_UPLOAD_ENABLED is set but Supabase S3 credentials are missing")
+            return None
+        rel = self._normalize_relative(storage_path)
+        try:
+            client = self._s3()
+        except ImportError:
+            logger.warning("boto3 is not installed; falling back to single-request uploads")
+            return None
+        return MultipartStreamUpload(
+            client,
+            self.bucket,
+            rel,
+            content_type=content_type,
+            part_size=settings.STREAM_UPLOAD_PART_BYTES,
+            concurrency=settings.STREAM_UPLOAD_CONCURRENCY,
+        )
+
     def finalize_write(self, storage_path: str, local_path: str, content_type: Optional[str] = None) -> None:
         self.save_file(storage_path, local_path, content_type=content_type)
         try:
@@ -225,26 +451,74 @@ class SupabaseStorageService:
         except OSError:
             pass
 
-    def build_public_url(self, storage_path: str, request: Optional[Request] = None) -> Optional[str]:
-        rel = self._normalize_relative(storage_path)
-        if self.private:
-            try:
-                res = self._bucket_client().create_signed_url(rel, self.signed_ttl)
-            except Exception as exc:
-                logger.warning("Failed to create signed URL for %s: %s", rel, exc)
-                return None
-            if isinstance(res, dict):
+    @staticmethod
+    def _signed_url_from(res: Any) -> Optional[str]:
+        if isinstance(res, dict):
+            for key in ("signedURL", "signedUrl", "signed_url"):
+                if key in res and res[key]:
+                    return res[key]
+            data = res.get("data")
+            if isinstance(data, dict):
                 for key in ("signedURL", "signedUrl", "signed_url"):
-                    if key in res and res[key]:
-                        return res[key]
-                data = res.get("data")
-                if isinstance(data, dict):
-                    for key in ("signedURL", "signedUrl", "signed_url"):
-                        if key in data and data[key]:
-                            return data[key]
-            logger.warning("Signed URL response missing url for %s", rel)
-            return None
+                    if key in data and data[key]:
+                        return data[key]
+        return None
+
+    def _sign_many(self, rels: List[str]) -> Dict[str, Optional[str]]:
+        """Sign several objects with one bulk API call."""
+        try:
+            res = self._bucket_client().create_signed_urls(rels, self.signed_ttl)
+        except Exception as exc:
+            logger.warning("Failed to create signed URLs for %d objects: %s", len(rels), exc)
+            return {}
+        if isinstance(res, dict):
+            res = res.get("data") or []
+        signed: Dict[str, Optional[str]] = {}
+        for item in res or []:
+            if not isinstance(item, dict) or not item.get("path"):
+                continue
+            url = None if item.get("error") else self._signed_url_from(item)
+            signed[item["path"]] = url
+        return signed
+
+    def build_public_urls(
+        self, storage_paths: Iterable[str], request: Optional[Request] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Resolve URLs for many objects, keyed by the given storage paths.
+        Private buckets are served from the signed URL cache; misses are signed
+        together in a single storage round-trip.
+        """
+        rels: Dict[str, str] = {}
+        urls: Dict[str, Optional[str]] = {}
+        for path in dict.fromkeys(storage_paths):
+            try:
+                rels[path] = self._normalize_relative(path)
+            except ValueError:
+                urls[path] = None
+        if not self.private:
+            for path, rel in rels.items():
+                urls[path] = self._public_url(rel)
+            return urls
+
+        cached = self.url_cache.get_many(rels.values()) if self.url_cache is not None else {}
+        misses = [rel for rel in dict.fromkeys(rels.values()) if rel not in cached]
+        signed = self._sign_many(misses) if misses else {}
+        fresh = {rel: url for rel, url in signed.items() if url}
+        if fresh and self.url_cache is not None:
+            self.url_cache.put_many(fresh, self.signed_ttl)
+        for path, rel in rels.items():
+            url = cached.get(rel) or fresh.get(rel)
+            if not url:
+                logger.warning("Signed URL response missing url for %s", rel)
+            urls[path] = url
+        return urls
+
+    def build_public_url(self, storage_path: str, request: Optional[Request] = None) -> Optional[str]:
+        self._normalize_relative(storage_path)
+        return self.build_public_urls([storage_path], request).get(storage_path)
 
+    def _public_url(self, rel: str) -> Optional[str]:
         try:
             res = self._bucket_client().get_public_url(rel)
         except Exception as exc:
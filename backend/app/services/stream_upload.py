@@ -0,0 +1,180 @@
+"""
+Streaming multipart uploads of render outputs to S3-compatible storage.
+
+The final render pass writes fragmented MP4 to a pipe; bytes are teed to a
+local file (for ffprobe/size) and cut into parts that upload in parallel
+while ffmpeg is still encoding, so the object is complete seconds after the
+encoder exits instead of after a second full-file transfer.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects non-final parts smaller than 5 MiB.
+MIN_PART_BYTES = 5 * 1024 * 1024
+FRAGMENTED_MOVFLAGS = "+frag_keyframe+empty_moov+default_base_moof"
+
+
+class MultipartStreamUpload:
+    """Upload a byte stream to one object as parallel S3 multipart parts."""
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        content_type: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type or "application/octet-stream"
+        self.part_size = max(MIN_PART_BYTES, int(part_size))
+        self.concurrency = max(1, int(concurrency))
+        self.max_attempts = max(1, int(max_attempts))
+        self.completed = False
+        self.upload_id: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Bounds buffered parts in memory to roughly 2x concurrency.
+        self._slots = threading.BoundedSemaphore(self.concurrency * 2)
+        self._buffer = bytearray()
+        self._futures: List[Future] = []
+        self._next_part = 1
+        self._tee = None
+        self._started_at = 0.0
+        self.stats: Dict[str, Any] = {}
+
+    # ---------- Lifecycle ----------
+
+    def begin(self, local_path: Optional[str] = None) -> None:
+        """Start a fresh multipart upload, aborting any attempt still in progress."""
+        if self.upload_id is not None:
+            self.abort()
+        res = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            ContentType=self.content_type,
+        )
+        self.upload_id = res["UploadId"]
+        self.completed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="part-upload")
+        self._slots = threading.BoundedSemaphore(self.concurrency * 2)
+        self._buffer = bytearray()
+        self._futures = []
+        self._next_part = 1
+        self._tee = open(local_path, "wb") if local_path else None
+        self._started_at = time.monotonic()
+        self.stats = {"bytes": 0, "parts": 0, "retries": 0}
+
+    def write(self, data: bytes) -> None:
+        if self.upload_id is None:
+            raise RuntimeError("Upload not started")
+        if not data:
+            return
+        if self._tee is not None:
+            self._tee.write(data)
+        self._buffer.extend(data)
+        self.stats["bytes"] += len(data)
+        while len(self._buffer) >= self.part_size:
+            body = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit(body)
+
+    def complete(self) -> None:
+        """Flush the tail part, wait for all parts and finalize the object."""
+        if self.upload_id is None:
+            raise RuntimeError("Upload not started")
+        if self._buffer or self._next_part == 1:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        try:
+            parts = [future.result() for future in self._futures]
+        except Exception:
+            self.abort()
+            raise
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+        )
+        self._close()
+        self.upload_id = None
+        self.completed = True
+        self.stats["parts"] = len(parts)
+        self.stats["seconds"] = round(time.monotonic() - self._started_at, 3)
+        logger.info(
+            "Streamed %s to %s in %d parts (%.1fs)",
+            self.stats["bytes"],
+            self.key,
+            len(parts),
+            self.stats["seconds"],
+        )
+
+    def abort(self) -> None:
+        """Abandon the current attempt; safe to call when nothing is in progress."""
+        upload_id = self.upload_id
+        self.upload_id = None
+        for future in self._futures:
+            future.cancel()
+        self._close()
+        if upload_id is None:
+            return
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=upload_id)
+        except Exception as exc:
+            logger.warning("Failed to abort multipart upload for %s: %s", self.key, exc)
+
+    # ---------- Internal helpers ----------
+
+    def _close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._tee is not None:
+            self._tee.close()
+            self._tee = None
+
+    def _submit(self, body: bytes) -> None:
+        part_number = self._next_part
+        self._next_part += 1
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._upload_part, self.upload_id, part_number, body)
+        except Exception:
+            self._slots.release()
+            raise
+        self._futures.append(future)
+
+    def _upload_part(self, upload_id: str, part_number: int, body: bytes) -> Dict[str, Any]:
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    res = self.client.upload_part(
+                        Bucket=self.bucket,
+                        Key=self.key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=body,
+                    )
+                    return {"PartNumber": part_number, "ETag": res["ETag"]}
+                except Exception as exc:
+                    if attempt >= self.max_attempts:
+                        raise
+                    self.stats["retries"] += 1
+                    logger.warning("Retrying part %d of %s: %s", part_number, self.key, exc)
+                    time.sleep(0.5 * attempt)
+        finally:
+            self._slots.release()
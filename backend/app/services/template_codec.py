@@ -0,0 +1,327 @@
+"""
+Columnar binary encoding of hybrid template segments.
+
+A 5-minute template holds 1,500 segment objects that repeat the same keys and
+a handful of enum values. Stored column-wise instead:
+
+- every string (enums, subjects, colors, descriptions, ...) goes into one
+  string table and segments store small integer indices (uint8/uint16/uint32,
+  whichever fits), so repeated values cost a byte or two;
+- numbers are typed arrays (int32, float32 with NaN for null), booleans are
+  uint8 with 255 for null;
+- lists of strings (colors, effects) are per-segment counts plus flattened
+  indices;
+- any key outside SEGMENT_SCHEMA is kept per segment as JSON, so round trips
+  are lossless when the schema grows.
+
+The blob is zlib-compressed. `SegmentColumns` decodes lazily: timestamps and
+single columns are NumPy arrays, and segment dicts are only built for the
+rows that are asked for.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"TPLC"
+FORMAT_VERSION = 1
+NULL_BOOL = 255
+
+# (dotted path, kind); kinds: int, float, bool, str, str_list
+SEGMENT_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("timestamp_ms", "int"),
+    ("timestamp_end_ms", "int"),
+    ("visual.scene_type", "str"),
+    ("visual.subject", "str"),
+    ("visual.camera_motion", "str"),
+    ("visual.transition_in", "str"),
+    ("visual.transition_out", "str"),
+    ("visual.dominant_colors", "str_list"),
+    ("visual.text_overlay", "str"),
+    ("visual.text_position", "str"),
+    ("visual.text_style", "str"),
+    ("visual.brightness", "float"),
+    ("visual.motion", "float"),
+    ("visual.composition", "str"),
+    ("visual.visual_effects", "str_list"),
+    ("audio.type", "str"),
+    ("audio.volume_level", "float"),
+    ("audio.music_present", "bool"),
+    ("audio.music_genre", "str"),
+    ("audio.music_energy", "float"),
+    ("audio.music_bpm", "int"),
+    ("audio.sound_effect", "str"),
+    ("audio.speech_present", "bool"),
+    ("audio.speech_tone", "str"),
+    ("audio.speech_pace", "str"),
+    ("audio.transition", "str"),
+    ("audio.beat_drop", "bool"),
+    ("audio.silence", "bool"),
+    ("description", "str"),
+    ("is_key_moment", "bool"),
+    ("key_moment_type", "str"),
+)
+_SCHEMA_PATHS = {path for path, _kind in SEGMENT_SCHEMA}
+_GROUPS = ("visual", "audio")
+INT_NULL = np.iinfo(np.int32).min
+
+
+_MISSING = object()
+
+
+def _column_values(segments: Sequence[Dict[str, Any]], path: str) -> List[Any]:
+    """Values at `path` for every segment; _MISSING where the key is absent."""
+    group, _, key = path.rpartition(".")
+    if not group:
+        return [segment.get(key, _MISSING) for segment in segments]
+    empty: Dict[str, Any] = {}
+    return [(segment.get(group) or empty).get(key, _MISSING) for segment in segments]
+
+
+def _extras(segment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Keys not covered by SEGMENT_SCHEMA."""
+    extra: Dict[str, Any] = {}
+    for key, value in segment.items():
+        if key in _GROUPS and isinstance(value, dict):
+            nested = {k: v for k, v in value.items() if f"{key}.{k}" not in _SCHEMA_PATHS}
+            if nested:
+                extra[key] = nested
+        elif key not in _SCHEMA_PATHS:
+            extra[key] = value
+    return extra or None
+
+
+def _index_dtype(size: int) -> np.dtype:
+    # Index 0 is reserved for null / missing.
+    if size < 2**8:
+        return np.dtype("<u1")
+    if size < 2**16:
+        return np.dtype("<u2")
+    return np.dtype("<u4")
+
+
+def _absent_mask(values: List[Any]) -> Optional[List[int]]:
+    missing = [i for i, value in enumerate(values) if value is _MISSING]
+    return missing or None
+
+
+def encode_segments(segments: Sequence[Dict[str, Any]], level: int = 6) -> bytes:
+    """Encode segment dicts (HybridSegment.model_dump() shape) into a compressed blob."""
+    strings: Dict[str, int] = {}
+
+    def intern(value: Any) -> int:
+        if value is None:
+            return 0
+        text = value if isinstance(value, str) else json.dumps(value)
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings) + 1
+        return index
+
+    # Strings are interned first so index arrays can use the narrowest dtype.
+    columns: List[Tuple[Dict[str, Any], List[Any]]] = []
+    for path, kind in SEGMENT_SCHEMA:
+        values = _column_values(segments, path)
+        absent = _absent_mask(values)
+        if absent:
+            values = [None if value is _MISSING else value for value in values]
+        meta = {"path": path, "kind": kind, "absent": absent}
+        if kind == "str":
+            parts: List[Any] = [[intern(v) for v in values]]
+        elif kind == "str_list":
+            lists = [v if isinstance(v, list) else [] for v in values]
+            parts = [[len(v) for v in lists], [intern(item) for v in lists for item in v]]
+        else:
+            parts = [values]
+        columns.append((meta, parts))
+
+    index_dtype = _index_dtype(len(strings) + 1)
+    payloads: List[bytes] = []
+    header_columns: List[Dict[str, Any]] = []
+    for meta, parts in columns:
+        kind = meta["kind"]
+        if kind == "int":
+            arrays = [np.array([INT_NULL if v is None else int(v) for v in parts[0]], dtype="<i4")]
+        elif kind == "float":
+            arrays = [np.array([np.nan if v is None else float(v) for v in parts[0]], dtype="<f4")]
+        elif kind == "bool":
+            arrays = [np.array([NULL_BOOL if v is None else int(bool(v)) for v in parts[0]], dtype="<u1")]
+        elif kind == "str":
+            arrays = [np.array(parts[0], dtype=index_dtype)]
+        else:
+            arrays = [np.array(parts[0], dtype="<u2"), np.array(parts[1], dtype=index_dtype)]
+        meta["arrays"] = [{"dtype": array.dtype.str, "size": int(array.size)} for array in arrays]
+        header_columns.append(meta)
+        payloads.extend(array.tobytes() for array in arrays)
+
+    extras = [_extras(segment) for segment in segments]
+    header = {
+        "version": FORMAT_VERSION,
+        "count": len(segments),
+        "strings": list(strings),
+        "columns": header_columns,
+        "extras": extras if any(e is not None for e in extras) else None,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body = struct.pack("<I", len(header_bytes)) + header_bytes + b"".join(payloads)
+    return MAGIC + struct.pack("<B", FORMAT_VERSION) + zlib.compress(body, level)
+
+
+def is_encoded(blob: Any) -> bool:
+    return isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:4]) == MAGIC
+
+
+class SegmentColumns:
+    """Lazily decoded view over an encoded segment blob."""
+
+    def __init__(self, blob: bytes) -> None:
+        if not is_encoded(blob):
+            raise ValueError("Not an encoded segment blob")
+        version = blob[4]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment blob version {version}")
+        body = zlib.decompress(bytes(blob[5:]))
+        (header_size,) = struct.unpack_from("<I", body, 0)
+        header = json.loads(body[4 : 4 + header_size])
+        self._body = body
+        self.count: int = header["count"]
+        self._strings: List[Optional[str]] = [None, *header["strings"]]
+        self._extras: Optional[List[Optional[Dict[str, Any]]]] = header["extras"]
+        self._columns: Dict[str, Dict[str, Any]] = {}
+        offset = 4 + header_size
+        for meta in header["columns"]:
+            spans = []
+            for spec in meta["arrays"]:
+                dtype = np.dtype(spec["dtype"])
+                spans.append((dtype, spec["size"], offset))
+                offset += dtype.itemsize * spec["size"]
+            self._columns[meta["path"]] = {**meta, "spans": spans}
+        self._cache: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _arrays(self, path: str) -> List[np.ndarray]:
+        meta = self._columns[path]
+        return [np.frombuffer(self._body, dtype=dtype, count=size, offset=offset) for dtype, size, offset in meta["spans"]]
+
+    def raw(self, path: str) -> np.ndarray:
+        """Undecoded column: numbers, bool codes (255 = null) or string indices (0 = null)."""
+        return self._arrays(path)[0]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.raw("timestamp_ms")
+
+    def column(self, path: str) -> List[Any]:
+        """One field for every segment, as Python values."""
+        if path in self._cache:
+            return self._cache[path]
+        meta = self._columns[path]
+        kind = meta["kind"]
+        arrays = self._arrays(path)
+        if kind == "int":
+            values = [None if v == INT_NULL else v for v in arrays[0].tolist()]
+        elif kind == "float":
+            values = [None if v != v else round(v, 6) for v in arrays[0].tolist()]
+        elif kind == "bool":
+            values = [None if v == NULL_BOOL else bool(v) for v in arrays[0].tolist()]
+        elif kind == "str":
+            table = self._strings
+            values = [table[i] for i in arrays[0].tolist()]
+        else:
+            table = self._strings
+            counts, flat = arrays
+            items = [table[i] for i in flat.tolist()]
+            values = []
+            position = 0
+            for n in counts.tolist():
+                values.append(items[position : position + n])
+                position += n
+        self._cache[path] = values
+        return values
+
+    def _values(self, path: str, indices: List[int]) -> List[Any]:
+        """Column values for `indices`; small selections skip decoding the whole column."""
+        if path in self._cache or len(indices) * 8 >= self.count:
+            values = self.column(path)
+            return values if len(indices) == self.count else [values[i] for i in indices]
+        kind = self._columns[path]["kind"]
+        arrays = self._arrays(path)
+        table = self._strings
+        if kind == "str_list":
+            counts, flat = arrays
+            ends = np.cumsum(counts, dtype=np.int64)
+            return [[table[j] for j in flat[ends[i] - counts[i] : ends[i]].tolist()] for i in indices]
+        picked = arrays[0][indices].tolist()
+        if kind == "int":
+            return [None if v == INT_NULL else v for v in picked]
+        if kind == "float":
+            return [None if v != v else round(v, 6) for v in picked]
+        if kind == "bool":
+            return [None if v == NULL_BOOL else bool(v) for v in picked]
+        return [table[i] for i in picked]
+
+    def segment(self, index: int) -> Dict[str, Any]:
+        """Build one segment dict."""
+        return self.rows([index])[0]
+
+    def rows(self, indices: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Segment dicts for `indices` (all segments by default), in the original key layout."""
+        indices = list(range(self.count) if indices is None else indices)
+        keys: Dict[str, List[str]] = {"": []}
+        values: Dict[str, List[List[Any]]] = {"": []}
+        for path in self._columns:
+            group, _, key = path.rpartition(".")
+            if group not in keys:
+                # Nested objects sit at the position of their first field.
+                keys[group], values[group] = [], []
+                keys[""].append(group)
+                values[""].append(values[group])
+            keys[group].append(key)
+            values[group].append(self._values(path, indices))
+        for group in _GROUPS:
+            if group in keys:
+                position = keys[""].index(group)
+                values[""][position] = [dict(zip(keys[group], row)) for row in zip(*values[group])]
+        out = [dict(zip(keys[""], row)) for row in zip(*values[""])] if values[""] else [{} for _ in indices]
+
+        # Keys absent from the source segment are dropped again (rare: schema drift).
+        wanted = {index: position for position, index in enumerate(indices)}
+        for path, meta in self._columns.items():
+            for index in meta["absent"] or ():
+                position = wanted.get(index)
+                if position is None:
+                    continue
+                group, _, key = path.rpartition(".")
+                (out[position].get(group, {}) if group else out[position]).pop(key, None)
+        if self._extras is not None:
+            for row, index in zip(out, indices):
+                extra = self._extras[index]
+                for key, value in (extra or {}).items():
+                    if key in _GROUPS and isinstance(value, dict):
+                        row.setdefault(key, {}).update(value)
+                    else:
+                        row[key] = value
+        return out
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rows())
+
+    def index_at(self, timestamp_ms: int) -> Optional[int]:
+        """Index of the segment covering `timestamp_ms`, found by binary search."""
+        starts = self.timestamps
+        index = int(np.searchsorted(starts, timestamp_ms, side="right")) - 1
+        if index < 0:
+            return None
+        end = self._values("timestamp_end_ms", [index])[0]
+        return index if end is not None and timestamp_ms < end else None
+
+
+def decode_segments(blob: bytes) -> List[Dict[str, Any]]:
+    return SegmentColumns(blob).rows()
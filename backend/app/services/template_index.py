@@ -0,0 +1,308 @@
+"""
+Template feature vectors and nearest-neighbour search over a user's library.
+
+Every VideoTemplate gets a fixed-length float32 vector (stored on the row):
+
+- scene-type distribution over the segments;
+- pacing, one-hot;
+- cut rate, average shot and hook length, music/speech coverage and text
+  overlay rate, scaled to 0-1;
+- style tags hashed into a fixed bag.
+
+Blocks are normalized and weighted, then the whole vector is L2-normalized so
+a dot product is the cosine similarity. `TemplateIndex` answers queries with
+one matrix-vector product (exact), or by probing the closest k-means lists
+first (approximate, for very large libraries). Per-user indexes are cached in
+process and rebuilt when the user's template count or last update changes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.models.pattern import VideoTemplate
+from app.models.video import Video
+from app.schemas.pattern import PacingType, SceneType
+
+logger = logging.getLogger(__name__)
+
+# Bump when the vector layout or weights change; stale rows are recomputed.
+FEATURE_VERSION = 1
+SCENE_TYPES = [scene.value for scene in SceneType]
+PACINGS = [pacing.value for pacing in PacingType]
+STYLE_BUCKETS = 32
+NUMERIC_FEATURES = 6
+FEATURE_DIM = len(SCENE_TYPES) + len(PACINGS) + NUMERIC_FEATURES + STYLE_BUCKETS
+
+SCENE_WEIGHT = 1.0
+PACING_WEIGHT = 0.6
+NUMERIC_WEIGHT = 0.8
+STYLE_WEIGHT = 0.6
+
+_SCENE_INDEX = {value: i for i, value in enumerate(SCENE_TYPES)}
+_PACING_INDEX = {value: i for i, value in enumerate(PACINGS)}
+
+
+def _unit(block: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(block))
+    return block / norm if norm > 0 else block
+
+
+def _clip(value: Any, scale: float) -> float:
+    try:
+        return min(max(float(value or 0.0) / scale, 0.0), 1.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def template_features(summary: Dict[str, Any], scene_types: Iterable[Optional[str]], duration_seconds: float) -> np.ndarray:
+    """Feature vector from a template summary and its per-segment scene types."""
+    scenes = np.zeros(len(SCENE_TYPES), dtype=np.float32)
+    other = _SCENE_INDEX[SceneType.OTHER.value]
+    for scene in scene_types:
+        scenes[_SCENE_INDEX.get(scene, other)] += 1
+
+    pacing = np.zeros(len(PACINGS), dtype=np.float32)
+    if summary.get("pacing") in _PACING_INDEX:
+        pacing[_PACING_INDEX[summary["pacing"]]] = 1.0
+
+    minutes = max(float(duration_seconds or 0.0), 1.0) / 60.0
+    numeric = np.array(
+        [
+            _clip((summary.get("total_cuts") or 0) / minutes, 60.0),
+            _clip(summary.get("average_shot_duration_ms"), 10000.0),
+            _clip(summary.get("hook_duration_ms"), 10000.0),
+            _clip(summary.get("music_coverage_percent"), 100.0),
+            _clip(summary.get("speech_coverage_percent"), 100.0),
+            _clip((summary.get("text_overlay_count") or 0) / minutes, 30.0),
+        ],
+        dtype=np.float32,
+    )
+
+    styles = np.zeros(STYLE_BUCKETS, dtype=np.float32)
+    for tag in summary.get("style_tags") or []:
+        styles[zlib.crc32(str(tag).strip().lower().encode("utf-8")) % STYLE_BUCKETS] += 1
+
+    vector = np.concatenate(
+        [
+            SCENE_WEIGHT * _unit(scenes),
+            PACING_WEIGHT * pacing,
+            NUMERIC_WEIGHT * numeric / np.sqrt(NUMERIC_FEATURES),
+            STYLE_WEIGHT * _unit(styles),
+        ]
+    )
+    return _unit(vector).astype(np.float32)
+
+
+def features_for_template(template: Any) -> np.ndarray:
+    """Feature vector of a VideoTemplate row (columnar or JSON segments)."""
+    columns = template.segment_columns()
+    if columns is not None:
+        scene_types: Iterable[Optional[str]] = columns.column("visual.scene_type")
+    else:
+        scene_types = [(s.get("visual") or {}).get("scene_type") for s in template.get_segments()]
+    return template_features(template.get_summary(), scene_types, template.duration_seconds or 0.0)
+
+
+def pack_vector(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def unpack_vector(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if not blob or len(blob) != FEATURE_DIM * 4:
+        return None
+    return np.frombuffer(blob, dtype="<f4")
+
+
+class TemplateIndex:
+    """Cosine nearest-neighbour search over unit feature vectors."""
+
+    def __init__(self, keys: Sequence[Any], vectors: np.ndarray) -> None:
+        self.keys = list(keys)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(self.keys), FEATURE_DIM)
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._guard = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # ---------- Approximate mode ----------
+
+    def build_lists(self, lists: Optional[int] = None, iterations: int = 8, seed: int = 0) -> None:
+        """Spherical k-means over the vectors; each vector goes to its closest centroid's list."""
+        count = len(self.keys)
+        lists = int(lists or settings.TEMPLATE_INDEX_LISTS or max(1, round(np.sqrt(count))))
+        lists = max(1, min(lists, count))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(count, size=min(count, lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid.
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        assign = np.argmax(self.vectors @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(lists + 1))
+        self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(lists)]
+        self._centroids = centroids
+
+    def _candidates(self, query: np.ndarray, nprobe: int, k: int, excluded: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Positions in the `nprobe` lists closest to the query, minus `excluded`
+        (a mask over positions). Further lists are probed, closest first, until
+        at least `k` candidates remain or every list has been probed.
+        """
+        with self._guard:
+            if self._centroids is None:
+                self.build_lists()
+        chosen: List[np.ndarray] = []
+        found = 0
+        for probed, i in enumerate(np.argsort(self._centroids @ query)[::-1]):
+            if probed >= nprobe and found >= k:
+                break
+            members = self._lists[i]
+            if excluded is not None:
+                members = members[~excluded[members]]
+            chosen.append(members)
+            found += len(members)
+        return np.concatenate(chosen)
+
+    # ---------- Search ----------
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude: Iterable[Any] = (),
+        approximate: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[Any, float]]:
+        """Up to `k` (key, cosine similarity) pairs, best first, skipping keys in `exclude`."""
+        if not self.keys or k <= 0:
+            return []
+        query = _unit(np.asarray(query, dtype=np.float32).reshape(FEATURE_DIM))
+        skipped = [self._positions[key] for key in exclude if key in self._positions]
+        if approximate:
+            excluded = None
+            if skipped:
+                excluded = np.zeros(len(self.keys), dtype=bool)
+                excluded[skipped] = True
+            probes = max(1, int(nprobe or settings.TEMPLATE_INDEX_NPROBE))
+            positions = self._candidates(query, probes, k, excluded)
+            scores = self.vectors[positions] @ query
+        else:
+            positions = None
+            scores = self.vectors @ query
+            if skipped:
+                scores[skipped] = -np.inf
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top.tolist():
+            if scores[i] == -np.inf:
+                break
+            position = i if positions is None else int(positions[i])
+            results.append((self.keys[position], round(float(scores[i]), 4)))
+        return results
+
+
+class TemplateIndexRegistry:
+    """Per-user TemplateIndex cache, invalidated by the user's template count and last update."""
+
+    def __init__(self, max_users: int = 256) -> None:
+        self.max_users = max(1, int(max_users))
+        self._entries: "OrderedDict[str, Tuple[Tuple[Any, ...], TemplateIndex, Dict[Any, Any]]]" = OrderedDict()
+        self._guard = threading.Lock()
+
+    def _scope(self, db, user_id):
+        return (
+            db.query(VideoTemplate)
+            .join(Video, VideoTemplate.video_id == Video.id)
+            .filter(Video.user_id == user_id, VideoTemplate.status == "completed")
+        )
+
+    def _signature(self, db, user_id) -> Tuple[Any, ...]:
+        return tuple(
+            self._scope(db, user_id)
+            .with_entities(func.count(VideoTemplate.id), func.max(VideoTemplate.updated_at))
+            .one()
+        )
+
+    def get(self, db, user_id) -> Tuple[TemplateIndex, Dict[Any, Any]]:
+        """The user's index and its template id -> video id map."""
+        signature = self._signature(db, user_id)
+        key = str(user_id)
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        index, videos, refreshed = self._build(db, user_id)
+        if refreshed:
+            # Backfilled vectors bumped updated_at; re-read so the next request hits the cache.
+            signature = self._signature(db, user_id)
+        with self._guard:
+            self._entries[key] = (signature, index, videos)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return index, videos
+
+    def _build(self, db, user_id) -> Tuple[TemplateIndex, Dict[Any, Any], bool]:
+        rows = (
+            self._scope(db, user_id)
+            .with_entities(
+                VideoTemplate.id, VideoTemplate.video_id, VideoTemplate.feature_vector, VideoTemplate.feature_version
+            )
+            .all()
+        )
+        keys, videos, vectors, stale = [], {}, [], []
+        for template_id, video_id, blob, version in rows:
+            vector = unpack_vector(blob) if version == FEATURE_VERSION else None
+            if vector is None:
+                stale.append(template_id)
+                continue
+            keys.append(template_id)
+            videos[template_id] = video_id
+            vectors.append(vector)
+
+        if stale:
+            for template in db.query(VideoTemplate).filter(VideoTemplate.id.in_(stale)).all():
+                vector = template.refresh_features()
+                keys.append(template.id)
+                videos[template.id] = template.video_id
+                vectors.append(vector)
+            db.commit()
+            logger.info(f"Computed feature vectors for {len(stale)} templates of user {user_id}")
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        return TemplateIndex(keys, matrix), videos, bool(stale)
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+
+_registry = TemplateIndexRegistry()
+
+
+def get_template_index_registry() -> TemplateIndexRegistry:
+    return _registry
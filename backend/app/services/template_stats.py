@@ -0,0 +1,133 @@
+"""
+Whole-video template statistics computed locally.
+
+Cuts, shot durations, pacing, coverage percentages, text overlay counts and
+palette come straight from the segments with NumPy, over every segment of the
+video, instead of being estimated by the model from a sample.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.schemas.pattern import HybridSegment, PacingType, TransitionType
+
+# Average shot length (ms) upper bounds for each pacing bucket.
+PACING_THRESHOLDS = (
+    (800, PacingType.VERY_FAST),
+    (1500, PacingType.FAST),
+    (3000, PacingType.MODERATE),
+    (6000, PacingType.SLOW),
+)
+
+
+def pacing_for(average_shot_ms: float) -> PacingType:
+    for upper, pacing in PACING_THRESHOLDS:
+        if average_shot_ms < upper:
+            return pacing
+    return PacingType.VERY_SLOW
+
+
+def palette(segments: Sequence[HybridSegment], count: int = 5) -> List[str]:
+    """
+    Most common colors across all segments. Colors are bucketed to 5 bits per
+    channel; each frame's first color weighs most. Buckets report their mean color.
+    """
+    colors: List[str] = []
+    weights: List[float] = []
+    for segment in segments:
+        for rank, color in enumerate(segment.visual.dominant_colors[:3]):
+            if isinstance(color, str) and len(color) == 7 and color.startswith("#"):
+                colors.append(color)
+                weights.append(3.0 - rank)
+    if not colors:
+        return []
+    try:
+        rgb = np.array([[int(c[i : i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=np.int64)
+    except ValueError:
+        return []
+    weight = np.asarray(weights)
+    buckets = (rgb[:, 0] >> 3) << 10 | (rgb[:, 1] >> 3) << 5 | (rgb[:, 2] >> 3)
+    _keys, inverse = np.unique(buckets, return_inverse=True)
+    totals = np.bincount(inverse, weights=weight)
+    means = np.stack([np.bincount(inverse, weights=rgb[:, i] * weight) for i in range(3)], axis=1)
+    means = np.rint(means / totals[:, None]).astype(int)
+    top = np.argsort(-totals, kind="stable")[:count]
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in means[top]]
+
+
+def segment_statistics(segments: Sequence[HybridSegment], total_duration_ms: int = 0) -> Dict[str, Any]:
+    """Aggregate statistics for TemplateSummary over every segment."""
+    if not segments:
+        return {
+            "total_cuts": 0,
+            "average_shot_duration_ms": int(total_duration_ms),
+            "pacing": pacing_for(total_duration_ms or 10_000),
+            "music_coverage_percent": 0.0,
+            "speech_coverage_percent": 0.0,
+            "text_overlay_count": 0,
+            "dominant_colors": [],
+            "shot_starts_ms": [0],
+        }
+    starts = np.array([s.timestamp_ms for s in segments], dtype=np.int64)
+    ends = np.array([s.timestamp_end_ms for s in segments], dtype=np.int64)
+    end_ms = max(int(total_duration_ms), int(ends.max()))
+    transition = np.array(
+        [s.visual.transition_in not in (None, TransitionType.NONE) for s in segments], dtype=bool
+    )
+    transition[0] = False
+    boundaries = np.concatenate([[0], starts[transition], [end_ms]])
+    shots = np.diff(boundaries)
+    shots = shots[shots > 0]
+    average_shot = float(shots.mean()) if shots.size else float(end_ms)
+
+    music = np.array([s.audio.music_present for s in segments], dtype=bool)
+    speech = np.array([s.audio.speech_present for s in segments], dtype=bool)
+    text = np.array([(s.visual.text_overlay or "").strip().lower() for s in segments], dtype=object)
+    # A text overlay counts once per run, however many segments it stays on screen.
+    text_runs = (text != "") & np.concatenate([[True], text[1:] != text[:-1]])
+
+    return {
+        "total_cuts": int(transition.sum()),
+        "average_shot_duration_ms": int(round(average_shot)),
+        "pacing": pacing_for(average_shot),
+        "music_coverage_percent": round(float(music.mean()) * 100, 1),
+        "speech_coverage_percent": round(float(speech.mean()) * 100, 1),
+        "text_overlay_count": int(text_runs.sum()),
+        "dominant_colors": palette(segments),
+        "shot_starts_ms": boundaries[:-1].tolist(),
+    }
+
+
+def describe_segments(segments: Sequence[HybridSegment], max_chars: int = 160) -> List[str]:
+    """
+    Compact prompt lines for a run of segments; consecutive segments with the
+    same shot, subject, text and description collapse into one time range.
+    """
+    runs: List[List[Any]] = []
+    for segment in segments:
+        key = (
+            segment.visual.scene_type.value,
+            segment.visual.subject,
+            segment.visual.text_overlay or "",
+            segment.description[:max_chars],
+        )
+        cut = segment.visual.transition_in not in (None, TransitionType.NONE)
+        if runs and not cut and runs[-1][2] == key:
+            runs[-1][1] = segment.timestamp_ms
+        else:
+            runs.append([segment.timestamp_ms, segment.timestamp_ms, key, cut])
+
+    lines: List[str] = []
+    for start, end, (scene, subject, text, description), cut in runs:
+        span = f"{start / 1000:.1f}s" if end == start else f"{start / 1000:.1f}-{end / 1000:.1f}s"
+        parts = [span, scene, subject]
+        if cut:
+            parts.append("after cut")
+        if text:
+            parts.append(f'text "{text}"')
+        parts.append(description)
+        lines.append(" | ".join(parts))
+    return lines
@@ -10,11 +10,15 @@ import os
 import shutil
 import subprocess
 import tempfile
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from PIL import Image, ImageColor, ImageDraw
 
+from app.services import mezzanine
+from app.services.stream_upload import FRAGMENTED_MOVFLAGS
+
 
 def _as_float(value: Any, default: float = 0.0) -> float:
     try:
@@ -192,8 +196,13 @@ class TimelineRenderer:
         self.temp_root = Path(temp_root or tempfile.gettempdir()).resolve()
         self.temp_root.mkdir(parents=True, exist_ok=True)
         self.last_debug_trace: Dict[str, Any] = {}
+        self._stream_target: Optional[str] = None
+        self._output_stream = None
 
     def _run(self, cmd: List[str]) -> None:
+        if self._stream_target and cmd and os.path.abspath(cmd[-1]) == self._stream_target:
+            self._run_streaming(cmd)
+            return
         try:
             subprocess.run(cmd, check=True, capture_output=True, text=True)
         except FileNotFoundError as exc:
@@ -204,6 +213,65 @@ class TimelineRenderer:
                 stderr = stderr[:500] + "..."
             raise RuntimeError(stderr or "Video processing command failed") from exc
 
+    def _run_streaming(self, cmd: List[str]) -> None:
+        """
+        Run the final pass with fragmented MP4 on stdout so parts upload while
+        ffmpeg is still encoding; the stream is also teed to the output path.
+        """
+        output_path = cmd[-1]
+        args = list(cmd[:-1])
+        if "-movflags" in args:
+            args[args.index("-movflags") + 1] = FRAGMENTED_MOVFLAGS
+        else:
+            args += ["-movflags", FRAGMENTED_MOVFLAGS]
+        args += ["-f", "mp4", "pipe:1"]
+
+        upload = self._output_stream
+        upload.begin(output_path)
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError as exc:
+            upload.abort()
+            raise RuntimeError("FFmpeg/FFprobe is not installed in runtime image") from exc
+
+        stderr_chunks: List[bytes] = []
+        drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+        drain.start()
+        try:
+            for chunk in iter(lambda: proc.stdout.read(1024 * 1024), b""):
+                upload.write(chunk)
+        except Exception:
+            proc.kill()
+            proc.wait()
+            upload.abort()
+            raise
+        returncode = proc.wait()
+        drain.join()
+        if returncode != 0:
+            upload.abort()
+            stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace").strip()
+            if len(stderr) > 500:
+                stderr = stderr[:500] + "..."
+            raise RuntimeError(stderr or "Video processing command failed")
+        upload.complete()
+
+    def _package_output(self, input_path: str, output_path: str) -> None:
+        """Remux an already-encoded result into the output path without re-encoding."""
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            input_path,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-movflags",
+            "+faststart",
+            output_path,
+        ]
+        self._run(cmd)
+
     def _scale_filter(self, fit_mode: str, width: int, height: int) -> str:
         if not width or not height:
             return ""
@@ -233,20 +301,14 @@ class TimelineRenderer:
             "-f",
             "lavfi",
             "-i",
-            f"anullsrc=channel_layout=stereo:sample_rate=44100:d={duration}",
+            mezzanine.silent_audio_source(duration),
             "-shortest",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "fast",
-            "-pix_fmt",
-            "yuv420p",
         ]
+        cmd += mezzanine.video_encode_args(_as_float(fps, 30.0))
         if bitrate:
             cmd += ["-b:v", str(bitrate)]
+        cmd += mezzanine.audio_encode_args()
         cmd += [
-            "-c:a",
-            "aac",
             "-movflags",
             "+faststart",
             output_path,
@@ -291,7 +353,7 @@ class TimelineRenderer:
                 "-f",
                 "lavfi",
                 "-i",
-                f"anullsrc=channel_layout=stereo:sample_rate=44100:d={output_duration}",
+                mezzanine.silent_audio_source(output_duration),
             ]
 
         vf: List[str] = []
@@ -379,19 +441,12 @@ class TimelineRenderer:
         else:
             cmd += ["-map", "0:v", "-map", "1:a"]
 
-        cmd += [
-            "-c:v",
-            "libx264",
-            "-preset",
-            "fast",
-            "-pix_fmt",
-            "yuv420p",
-        ]
+        # Pin GOP/timescale/audio layout so segments stay stream-copy compatible for concat.
+        cmd += mezzanine.video_encode_args(_as_float(settings.get("fps"), 30.0))
         if settings.get("bitrate"):
             cmd += ["-b:v", str(settings.get("bitrate"))]
+        cmd += mezzanine.audio_encode_args()
         cmd += [
-            "-c:a",
-            "aac",
             "-movflags",
             "+faststart",
             output_path,
@@ -467,20 +522,14 @@ class TimelineRenderer:
                 "[v]",
                 "-map",
                 "[a]",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "fast",
-                "-pix_fmt",
-                "yuv420p",
             ]
+            base_cmd += mezzanine.video_encode_args(_as_float(fps, 30.0))
             if fps:
                 base_cmd += ["-r", str(fps)]
             if bitrate:
                 base_cmd += ["-b:v", str(bitrate)]
+            base_cmd += mezzanine.audio_encode_args()
             base_cmd += [
-                "-c:a",
-                "aac",
                 "-movflags",
                 "+faststart",
                 output_path,
@@ -856,6 +905,8 @@ class TimelineRenderer:
             "copy",
             "-c:a",
             "aac",
+            "-movflags",
+            "+faststart",
             output_path,
         ]
         self._run(cmd)
@@ -867,6 +918,29 @@ class TimelineRenderer:
         asset_map: Dict[str, Any],
         output_path: str,
         output_settings: Dict[str, Any],
+        output_stream=None,
+    ) -> None:
+        """
+        Render project state to output_path.
+
+        When output_stream (a MultipartStreamUpload) is given, the final pass
+        writes fragmented MP4 that is uploaded while it is being encoded.
+        """
+        self._output_stream = output_stream
+        self._stream_target = os.path.abspath(output_path) if output_stream is not None else None
+        try:
+            self._render(state, video_map, asset_map, output_path, output_settings)
+        finally:
+            self._stream_target = None
+            self._output_stream = None
+
+    def _render(
+        self,
+        state: Dict[str, Any],
+        video_map: Dict[str, Any],
+        asset_map: Dict[str, Any],
+        output_path: str,
+        output_settings: Dict[str, Any],
     ) -> None:
         tracks = state.get("tracks") or []
         clips = [clip for track in tracks for clip in (track.get("clips") or [])]
@@ -1184,7 +1258,44 @@ class TimelineRenderer:
             return (base + _clip_layer(clip), _as_float(clip.get("startTime"), 0.0))
 
         overlay_sorted = sorted(overlay_items, key=_overlay_sort_key)
-        for clip in overlay_sorted:
+        audio_sorted = sorted(audio_clips, key=lambda c: _as_float(c.get("startTime"), 0.0))
+
+        def _overlay_runnable(clip: Dict[str, Any]) -> bool:
+            kind = clip.get("type")
+            if kind == "video":
+                return bool(video_map.get(str(clip.get("sourceId"))))
+            if kind == "image":
+                return bool(asset_map.get(str(clip.get("sourceId"))))
+            return kind in {"text", "shape"}
+
+        def _audio_runnable(clip: Dict[str, Any]) -> bool:
+            source_id = str(clip.get("sourceId"))
+            # Skip audio that references source videos (base audio already included).
+            if source_id in video_map or not asset_map.get(source_id):
+                return False
+            return _as_float((clip.get("effects") or {}).get("volume"), 1.0) > 0
+
+        overlay_passes = [clip for clip in overlay_sorted if _overlay_runnable(clip)]
+        audio_passes = [clip for clip in audio_sorted if _audio_runnable(clip)]
+
+        # The last pass writes output_path directly (streamed when output_stream is set),
+        # which saves a final copy of the rendered file.
+        passes_left = len(overlay_passes) + len(audio_passes)
+        passes_left += sum(
+            1
+            for clip in overlay_passes
+            if clip.get("type") == "video" and _as_float((clip.get("effects") or {}).get("volume"), 1.0) > 0
+        )
+
+        def _pass_output(temp_name: str) -> str:
+            nonlocal passes_left
+            passes_left -= 1
+            if passes_left == 0:
+                return output_path
+            return str(temp_dir / temp_name)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        for clip in overlay_passes:
             start = _as_float(clip.get("startTime"), 0.0)
             end = start + max(0.05, _as_float(clip.get("duration"), 0.0))
             position = clip.get("position") or {}
@@ -1229,7 +1340,7 @@ class TimelineRenderer:
             y_expr = _build_interp_expr(pos_frames_y, float(y))
             opacity_expr = _build_interp_expr(opacity_frames, opacity)
 
-            out_path = str(temp_dir / f"overlay_{overlay_index}.mp4")
+            out_path = _pass_output(f"overlay_{overlay_index}.mp4")
             overlay_index += 1
 
             if clip.get("type") == "video":
@@ -1261,7 +1372,7 @@ class TimelineRenderer:
                 volume = _as_float(effects.get("volume"), 1.0)
                 if volume > 0:
                     try:
-                        audio_out = str(temp_dir / f"audio_mix_overlay_{overlay_index}.mp4")
+                        audio_out = _pass_output(f"audio_mix_overlay_{overlay_index}.mp4")
                         self._mix_audio(
                             video_path=current_path,
                             audio_path=seg_path,
@@ -1331,16 +1442,9 @@ class TimelineRenderer:
             current_path = out_path
 
         # Apply audio overlays.
-        audio_sorted = sorted(audio_clips, key=lambda c: _as_float(c.get("startTime"), 0.0))
         audio_index = 0
-        for clip in audio_sorted:
-            source_id = str(clip.get("sourceId"))
-            # Skip audio that references source videos (base audio already included).
-            if source_id in video_map:
-                continue
-            asset = asset_map.get(source_id)
-            if not asset:
-                continue
+        for clip in audio_passes:
+            asset = asset_map[str(clip.get("sourceId"))]
             audio_path = self.storage.resolve_for_processing(asset.storage_path)
             start = _as_float(clip.get("startTime"), 0.0)
             duration = max(0.05, _as_float(clip.get("duration"), 0.0))
@@ -1350,9 +1454,6 @@ class TimelineRenderer:
             fade_in = _as_float(effects.get("audioFadeIn"), _as_float(effects.get("fadeIn"), 0.0))
             fade_out = _as_float(effects.get("audioFadeOut"), _as_float(effects.get("fadeOut"), 0.0))
 
-            if volume <= 0:
-                continue
-
             trimmed_audio = str(temp_dir / f"audio_{audio_index}.m4a")
             audio_index += 1
             self._trim_audio(
@@ -1365,7 +1466,7 @@ class TimelineRenderer:
                 trimmed_audio,
             )
 
-            out_path = str(temp_dir / f"audio_mix_{audio_index}.mp4")
+            out_path = _pass_output(f"audio_mix_{audio_index}.mp4")
             self._mix_audio(
                 video_path=current_path,
                 audio_path=trimmed_audio,
@@ -1375,9 +1476,11 @@ class TimelineRenderer:
             )
             current_path = out_path
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         if os.path.abspath(current_path) != os.path.abspath(output_path):
-            shutil.copy2(current_path, output_path)
+            if self._output_stream is not None:
+                self._package_output(current_path, output_path)
+            else:
+                shutil.copy2(current_path, output_path)
 
         if debug_enabled:
             debug_trace["final_output_path"] = output_path
@@ -0,0 +1,118 @@
+"""
+Deterministic visual features per analysis frame.
+
+Brightness, dominant colors, motion magnitude and hard cuts are measured with
+NumPy on the frames the pipeline already decodes, so the model is only asked
+for semantic fields. Every decoded grid frame is observed (including frames
+the sampling plan or deduplicator skip), on a small strided thumbnail.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.adaptive_sampling import detect_cuts
+
+THUMB_WIDTH = 64
+BLACK_LEVEL = 0.06
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def thumbnail(pixels: np.ndarray, width: int = THUMB_WIDTH) -> np.ndarray:
+    """Strided float32 RGB thumbnail roughly `width` pixels wide."""
+    step = max(1, pixels.shape[1] // width)
+    return pixels[::step, ::step].astype(np.float32)
+
+
+def dominant_colors(pixels: np.ndarray, k: int = 3, iterations: int = 8) -> List[str]:
+    """
+    Hex colors of the k largest clusters from a vectorized k-means over RGB
+    pixels, largest first. Centroids start at luma quantiles so results are
+    deterministic.
+    """
+    points = pixels.reshape(-1, 3).astype(np.float32)
+    if points.shape[0] == 0:
+        return []
+    k = max(1, min(k, points.shape[0]))
+    order = np.argsort(points @ _LUMA)
+    centroids = points[order[np.linspace(0, points.shape[0] - 1, k).astype(int)]]
+    labels = np.zeros(points.shape[0], dtype=np.int64)
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        moved = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+        if np.allclose(moved, centroids, atol=0.5):
+            break
+        centroids = moved
+    counts = np.bincount(labels, minlength=k)
+    colors = []
+    for index in np.argsort(-counts, kind="stable"):
+        if counts[index] == 0:
+            continue
+        r, g, b = np.clip(np.rint(centroids[index]), 0, 255).astype(int)
+        color = f"#{r:02x}{g:02x}{b:02x}"
+        if color not in colors:
+            colors.append(color)
+    return colors
+
+
+class VisualAnalyzer:
+    """
+    Streaming per-frame measurements. Call `observe` for every decoded grid
+    frame in order, then `features()` once the stream is exhausted; cuts are
+    classified with the whole video's motion profile.
+    """
+
+    def __init__(self, color_count: Optional[int] = None, cut_threshold: Optional[float] = None) -> None:
+        self.color_count = int(settings.VISUAL_DOMINANT_COLORS if color_count is None else color_count)
+        self.cut_threshold = cut_threshold
+        self._timestamps: List[int] = []
+        self._brightness: List[float] = []
+        self._motion: List[float] = []
+        self._colors: List[List[str]] = []
+        self._previous: Optional[np.ndarray] = None
+
+    def observe(self, timestamp_ms: int, pixels: np.ndarray) -> None:
+        small = thumbnail(pixels)
+        gray = small @ _LUMA
+        if self._previous is not None and self._previous.shape == gray.shape:
+            self._motion.append(float(np.abs(gray - self._previous).mean()) / 255.0)
+        else:
+            self._motion.append(0.0)
+        self._previous = gray
+        self._timestamps.append(int(timestamp_ms))
+        self._brightness.append(float(gray.mean()) / 255.0)
+        self._colors.append(dominant_colors(small, self.color_count))
+
+    def features(self) -> Dict[int, Dict[str, Any]]:
+        """Timestamp -> {brightness, dominant_colors, motion, transition_in}."""
+        if not self._timestamps:
+            return {}
+        motion = np.asarray(self._motion, dtype=np.float32)
+        brightness = np.asarray(self._brightness, dtype=np.float32)
+        is_cut = np.zeros(motion.size, dtype=bool)
+        is_cut[detect_cuts(motion, self.cut_threshold)] = True
+        dark = brightness < BLACK_LEVEL
+        was_dark = np.concatenate([[False], dark[:-1]])
+        # Going to or coming from black reads as a fade; other hard changes are cuts.
+        transitions = np.full(motion.size, None, dtype=object)
+        transitions[is_cut] = "cut"
+        transitions[was_dark & ~dark] = "fade-in"
+        transitions[dark & ~was_dark] = "fade-out"
+        transitions[0] = None
+        return {
+            timestamp: {
+                "brightness": round(float(brightness[i]), 4),
+                "dominant_colors": self._colors[i],
+                "motion": round(float(min(1.0, motion[i])), 4),
+                "transition_in": transitions[i],
+            }
+            for i, timestamp in enumerate(self._timestamps)
+        }
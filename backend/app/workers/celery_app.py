@@ -46,6 +46,18 @@ celery_app.conf.update(
             "task": "app.workers.publish_tasks.refresh_expiring_tokens",
             "schedule": 86400.0,  # Every day
         },
+        "rescore-patterns-daily": {
+            "task": "app.workers.publish_tasks.rescore_all_patterns",
+            "schedule": 86400.0,  # Every day
+        },
+        "rebuild-analytics-rollups-daily": {
+            "task": "app.workers.publish_tasks.rebuild_analytics_rollups",
+            "schedule": 86400.0,  # Every day
+        },
+        "maintain-metrics-history-daily": {
+            "task": "app.workers.publish_tasks.maintain_metrics_history",
+            "schedule": 86400.0,  # Every day
+        },
         "check-scheduled-posts": {
             "task": "app.workers.publish_tasks.process_scheduled_posts",
             "schedule": 60.0,  # Every minute
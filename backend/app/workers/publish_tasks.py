@@ -4,6 +4,7 @@ Celery tasks for publishing and analytics.
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from uuid import UUID
 import logging
 
 from app.workers.celery_app import celery_app
@@ -98,24 +99,28 @@ def collect_post_analytics(
     Returns:
         Collected analytics
     """
+    from app.db.session import SessionLocal
+    from app.models.analytics import Analytics
+    from app.services.analytics_collector import collect_published_analytics
+    
+    db = SessionLocal()
     try:
         logger.info(f"Collecting analytics for post {post_id} on {platform}")
         
-        # TODO: Implement analytics collection
-        # 1. Get social account credentials
-        # 2. Fetch metrics from platform API
-        # 3. Update analytics record
-        # 4. Trigger pattern score update if needed
+        stats = collect_published_analytics(db, post_ids=[post_id])
+        if stats["failed"]:
+            raise RuntimeError(f"Platform returned no metrics for {platform} post {platform_post_id}")
+        analytics = db.query(Analytics).filter(Analytics.post_id == post_id).first()
         
         result = {
             "post_id": post_id,
             "platform": platform,
-            "status": "completed",
+            "status": "completed" if stats["collected"] else "skipped",
             "metrics": {
-                "views": 0,
-                "likes": 0,
-                "comments": 0,
-                "shares": 0,
+                "views": analytics.views if analytics else 0,
+                "likes": analytics.likes if analytics else 0,
+                "comments": analytics.comments if analytics else 0,
+                "shares": analytics.shares if analytics else 0,
             },
         }
         
@@ -125,6 +130,86 @@ def collect_post_analytics(
     except Exception as exc:
         logger.error(f"Analytics collection failed for post {post_id}: {exc}")
         raise self.retry(exc=exc)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def rescore_all_patterns() -> Dict[str, Any]:
+    """
+    Recompute every pattern score from analytics in one batch (scheduled task).
+    
+    Returns:
+        Rescoring result with post, video and pattern counts
+    """
+    from app.db.session import SessionLocal
+    from app.services.pattern_scoring import rescore_patterns
+    
+    db = SessionLocal()
+    try:
+        stats = rescore_patterns(db)
+    finally:
+        db.close()
+    
+    return {
+        "status": "completed",
+        **stats,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@celery_app.task
+def rebuild_analytics_rollups() -> Dict[str, Any]:
+    """
+    Recompute analytics daily rollups from scratch (scheduled task).
+    
+    Rollups are maintained incrementally on collection; this repairs drift
+    from deleted or re-dated posts.
+    
+    Returns:
+        Rebuild result with post and rollup row counts
+    """
+    from app.db.session import SessionLocal
+    from app.services.analytics_rollups import rebuild_rollups
+    
+    db = SessionLocal()
+    try:
+        stats = rebuild_rollups(db)
+    finally:
+        db.close()
+    
+    return {
+        "status": "completed",
+        **stats,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@celery_app.task
+def maintain_metrics_history() -> Dict[str, Any]:
+    """
+    Create upcoming metrics history partitions and downsample old hourly
+    snapshots to daily ones (scheduled task).
+    
+    Returns:
+        Partitions created and downsampling counts
+    """
+    from app.db.session import SessionLocal
+    from app.services.metrics_history import downsample_history, ensure_partitions
+    
+    db = SessionLocal()
+    try:
+        partitions = ensure_partitions(db)
+        stats = downsample_history(db)
+    finally:
+        db.close()
+    
+    return {
+        "status": "completed",
+        "partitions_created": partitions,
+        **stats,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
 
 
 @celery_app.task
@@ -132,18 +217,27 @@ def collect_analytics() -> Dict[str, Any]:
     """
     Collect analytics for all published posts (scheduled task).
     
+    Posts are fetched in batches per account over a shared connection pool
+    (see services/analytics_collector.py) rather than one task per post.
+    
     Returns:
         Collection result
     """
+    from app.db.session import SessionLocal
+    from app.services.analytics_collector import collect_published_analytics
+    
     logger.info("Starting scheduled analytics collection")
     
-    # TODO: Implement bulk analytics collection
-    # 1. Query all published posts
-    # 2. For each post, trigger collect_post_analytics task
+    db = SessionLocal()
+    try:
+        stats = collect_published_analytics(db)
+    finally:
+        db.close()
     
     return {
         "status": "completed",
-        "posts_processed": 0,
+        "posts_processed": stats["posts"],
+        **stats,
         "timestamp": datetime.utcnow().isoformat(),
     }
 
@@ -186,23 +280,33 @@ def update_pattern_scores(
     Returns:
         Update result
     """
+    from app.db.session import SessionLocal
+    from app.models.video import Video
+    from app.services.pattern_scoring import rescore_patterns
+    
+    db = SessionLocal()
     try:
         logger.info(f"Updating pattern scores for video {video_id}")
         
-        # TODO: Implement pattern score update
-        # 1. Get patterns associated with video
-        # 2. Calculate new scores based on performance
-        # 3. Update pattern records
+        # Scores are relative to the owner's other posts, so the whole library
+        # of that user is rescored; performance_data is already in analytics.
+        video = db.query(Video).filter(Video.id == UUID(video_id)).first()
+        if video is None:
+            return {"video_id": video_id, "status": "skipped", "patterns_updated": 0}
         
+        stats = rescore_patterns(db, user_ids=[video.user_id])
         result = {
             "video_id": video_id,
             "status": "completed",
-            "patterns_updated": 0,
+            "patterns_updated": stats["patterns_updated"],
         }
         
         logger.info(f"Updated pattern scores for video {video_id}")
         return result
         
     except Exception as exc:
+        db.rollback()
         logger.error(f"Pattern score update failed for video {video_id}: {exc}")
         raise self.retry(exc=exc)
+    finally:
+        db.close()
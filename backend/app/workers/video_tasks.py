@@ -12,6 +12,7 @@ import tempfile
 import os
 import json
 import shutil
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
 from pathlib import Path
 from uuid import UUID, uuid4
 
@@ -235,6 +236,18 @@ def extract_audio_segments(
         current_ms = end_ms
         segment_idx += 1
 
+    # Measured volume/silence/tempo per segment (one vectorized pass over the WAV)
+    if settings.AUDIO_FEATURES_ENABLED and segments:
+        from app.services.audio_features import analyze_wav
+
+        try:
+            features = analyze_wav(audio_path, segment_duration_ms)
+        except Exception as e:
+            logger.warning(f"Audio feature extraction failed, using model estimates: {e}")
+            features = []
+        for segment, segment_features in zip(segments, features):
+            segment.update(segment_features)
+
     logger.info(
         f"Analyzed audio into {len(segments)} segments of {segment_duration_ms}ms"
     )
@@ -342,6 +355,163 @@ def extract_audio_task(
         raise self.retry(exc=exc)
 
 
+def _prepare_analysis_inputs(video_id: str, video_path: str, video_temp_dir: Path) -> Dict[str, Any]:
+    """
+    Probe the video, start audio extraction and set up frame sampling.
+    Returns video_info, the lazy frame stream, the sampling helpers and a future
+    for (audio_path, audio_segments): audio is extracted on a background thread
+    while shot detection, frame decoding and model calls proceed.
+    """
+    # Step 1: Get video info
+    video_info = get_video_info(video_path)
+    logger.info(
+        f"Video info: duration={video_info.get('duration')}s, {video_info.get('width')}x{video_info.get('height')}"
+    )
+
+    # Step 2: Extract audio segments alongside everything below
+    audio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-extract")
+    audio_future = audio_executor.submit(
+        extract_audio_segments,
+        video_path,
+        str(video_temp_dir / "audio"),
+        segment_duration_ms=settings.FRAME_EXTRACTION_INTERVAL_MS,
+        sample_rate=settings.AUDIO_SAMPLE_RATE,
+    )
+    audio_executor.shutdown(wait=False)
+
+    # Step 3: Stream frames at 5fps from an ffmpeg pipe (downscaled JPEGs in memory, no disk I/O)
+    from app.services.adaptive_sampling import build_sampling_plan
+    from app.services.frame_dedup import FrameDeduplicator
+    from app.services.frame_pipeline import iter_frames
+    from app.services.visual_features import VisualAnalyzer
+
+    # Adaptive sampling spends ANALYSIS_FRAME_BUDGET around shot boundaries across the
+    # whole video; without it, fixed-interval sampling stops at MAX_FRAMES_PER_ANALYSIS.
+    plan = build_sampling_plan(video_path) if settings.ADAPTIVE_SAMPLING_ENABLED else None
+    # Near-identical frames are dropped here and inherit their run representative's analysis
+    dedup = FrameDeduplicator() if settings.FRAME_DEDUP_ENABLED else None
+    # Brightness, colors, motion and cuts are measured on every decoded frame
+    visual = VisualAnalyzer() if settings.VISUAL_FEATURES_ENABLED else None
+    frames = iter_frames(
+        video_path,
+        fps=settings.FRAME_EXTRACTION_FPS,
+        max_frames=plan.grid_count if plan is not None else settings.MAX_FRAMES_PER_ANALYSIS,
+        dedup=dedup,
+        plan=plan,
+        visual=visual,
+    )
+
+    expected_frames = len(plan.samples) if plan is not None else min(
+        int(video_info.get("duration", 0) * settings.FRAME_EXTRACTION_FPS),
+        settings.MAX_FRAMES_PER_ANALYSIS,
+    )
+    return {
+        "video_info": video_info,
+        "frames": frames,
+        "expected_frames": expected_frames,
+        "plan": plan,
+        "dedup": dedup,
+        "visual": visual,
+        "audio_future": audio_future,
+    }
+
+
+def _template_cache_entry(video_path: str) -> Tuple[Any, Optional[str], Optional[str]]:
+    """
+    (cache, content hash, prompt version) for the whole-template cache, or
+    (None, None, None) when the cache is disabled.
+    """
+    from app.services.analysis_cache import file_digest, get_analysis_cache
+    from app.services.pattern_service import PatternService
+
+    cache = get_analysis_cache()
+    if cache is None:
+        return None, None, None
+    try:
+        content_hash = file_digest(video_path)
+    except OSError as e:
+        logger.warning(f"Could not hash {video_path} for the analysis cache: {e}")
+        return None, None, None
+    return cache, content_hash, PatternService(settings.GEMINI_API_KEY).template_prompt_version()
+
+
+def _cached_template(video_id: str, cache, content_hash: Optional[str], version: Optional[str]) -> Optional[Dict[str, Any]]:
+    """A cached template for identical media, re-labelled for this video."""
+    if cache is None or content_hash is None:
+        return None
+    template = cache.get_template(content_hash, version)
+    if template is None:
+        return None
+    logger.info(f"Analysis cache hit for video {video_id} (content {content_hash[:12]})")
+    return {**template, "video_id": video_id}
+
+
+def _extract_for_analysis(
+    video_id: str,
+    video_path: str,
+    checkpoint,
+    content_hash: Optional[str] = None,
+    cache_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Extraction stage of the staged pipeline: checkpoint every frame batch to
+    storage and the run context to Redis, then drop local temp files.
+    `content_hash`/`cache_version` let the finalize task cache the template.
+    """
+    from app.services.batch_controller import BatchController
+    from app.services.pattern_service import DEFAULT_BATCH_SIZE, frame_reuse
+
+    video_temp_dir = ensure_temp_dir() / video_id
+    video_temp_dir.mkdir(parents=True, exist_ok=True)
+    inputs: Dict[str, Any] = {}
+    try:
+        inputs = _prepare_analysis_inputs(video_id, video_path, video_temp_dir)
+        # Batches are closed by frame count, payload bytes and expected output tokens;
+        # latency feedback is not available before the batch tasks run.
+        controller = (
+            BatchController() if settings.ANALYSIS_BATCH_ADAPTIVE else BatchController.fixed(DEFAULT_BATCH_SIZE)
+        )
+        total_batches = 0
+        total_frames = 0
+        batch_starts: List[int] = []
+        for batch in controller.batches(inputs["frames"]):
+            total_batches += 1
+            batch_starts.append(total_frames)
+            total_frames += len(batch)
+            checkpoint.save_frames(total_batches, batch)
+
+        _audio_path, audio_segments = inputs["audio_future"].result()
+        reused, analysis_stats = frame_reuse(inputs["plan"], inputs["dedup"], DEFAULT_BATCH_SIZE, total_batches)
+        visual = inputs["visual"]
+        context = {
+            "video_info": inputs["video_info"],
+            "audio_segments": audio_segments,
+            "reused": {str(ts): source for ts, source in reused.items()},
+            "analysis_stats": analysis_stats,
+            "visual_features": (
+                {str(ts): features for ts, features in visual.features().items()} if visual is not None else None
+            ),
+            "batch_size": DEFAULT_BATCH_SIZE,
+            "total_frames": total_frames,
+            "total_batches": total_batches,
+            "batch_starts": batch_starts,
+            "measured_visuals": visual is not None,
+            "content_hash": content_hash,
+            "cache_version": cache_version,
+        }
+        checkpoint.save_context(context)
+        logger.info(f"Checkpointed {total_frames} frames in {total_batches} batches for video {video_id}")
+        return context
+    finally:
+        if inputs.get("audio_future") is not None:
+            # The audio thread writes into the temp dir; let it finish first.
+            futures_wait([inputs["audio_future"]])
+        try:
+            shutil.rmtree(video_temp_dir)
+        except Exception as e:
+            logger.warning(f"Failed to cleanup temp dir: {e}")
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
 def analyze_video_patterns(
     self,
@@ -351,6 +521,11 @@ def analyze_video_patterns(
     """
     Full video analysis pipeline: extract frames + audio, then analyze with Gemini 2.0.
 
+    With ANALYSIS_PIPELINE_STAGED this task only runs extraction and then replaces
+    itself with a chord: one analyze_pattern_batch task per frame batch (spread over
+    the worker pool) followed by finalize_pattern_analysis. The task id still
+    resolves to the final result. Otherwise everything runs in this task.
+
     Args:
         video_id: ID of the video to analyze
         video_path: Path to the video file
@@ -358,50 +533,68 @@ def analyze_video_patterns(
     Returns:
         Analysis results dictionary with hybrid template
     """
+    from celery.exceptions import Ignore
+
     try:
         logger.info(f"Starting pattern analysis for video {video_id}")
         video_path = resolve_storage_path(video_path)
 
+        # Identical media (retry, duplicate upload, reprocess) is answered from the cache
+        cache, content_hash, cache_version = _template_cache_entry(video_path)
+        cached = _cached_template(video_id, cache, content_hash, cache_version)
+        if cached is not None:
+            return {
+                "video_id": video_id,
+                "status": "completed",
+                "template": cached,
+            }
+
+        if settings.ANALYSIS_PIPELINE_STAGED:
+            from celery import chord
+            from app.services.analysis_checkpoint import AnalysisCheckpoint
+
+            # Retries of this task keep their id, so completed extraction is reused.
+            run_id = self.request.id or str(uuid4())
+            checkpoint = AnalysisCheckpoint(video_id, run_id)
+            context = checkpoint.load_context()
+            if context is None:
+                context = _extract_for_analysis(video_id, video_path, checkpoint, content_hash, cache_version)
+            else:
+                logger.info(f"Resuming analysis run {run_id} for video {video_id} from checkpoint")
+
+            if not context["total_batches"]:
+                return self.replace(finalize_pattern_analysis.s([], video_id, run_id))
+            header = [
+                analyze_pattern_batch.s(video_id, run_id, batch_num)
+                for batch_num in range(1, context["total_batches"] + 1)
+            ]
+            return self.replace(chord(header, finalize_pattern_analysis.s(video_id, run_id)))
+
         # Create temp directory for this video
         temp_dir = ensure_temp_dir()
         video_temp_dir = temp_dir / video_id
         video_temp_dir.mkdir(parents=True, exist_ok=True)
 
-        # Step 1: Get video info
-        video_info = get_video_info(video_path)
-        logger.info(
-            f"Video info: duration={video_info.get('duration')}s, {video_info.get('width')}x{video_info.get('height')}"
-        )
+        inputs = _prepare_analysis_inputs(video_id, video_path, video_temp_dir)
 
-        # Step 2: Extract frames at 5fps
-        frames_dir = video_temp_dir / "frames"
-        frames = extract_frames_at_interval(
-            video_path,
-            str(frames_dir),
-            fps=settings.FRAME_EXTRACTION_FPS,
-            max_frames=settings.MAX_FRAMES_PER_ANALYSIS,
-        )
-
-        # Step 3: Extract audio segments
-        audio_dir = video_temp_dir / "audio"
-        audio_path, audio_segments = extract_audio_segments(
-            video_path,
-            str(audio_dir),
-            segment_duration_ms=settings.FRAME_EXTRACTION_INTERVAL_MS,
-            sample_rate=settings.AUDIO_SAMPLE_RATE,
-        )
-
-        # Step 4: Analyze with pattern service (will be implemented in pattern_service.py)
+        # Step 4: Analyze with pattern service
         from app.services.pattern_service import PatternService
 
         pattern_service = PatternService(settings.GEMINI_API_KEY)
-        template = pattern_service.analyze_video_with_template(
+        template, complete = pattern_service.analyze_video_with_template(
             video_id=video_id,
-            frames=frames,
-            audio_path=audio_path,
-            audio_segments=audio_segments,
-            video_info=video_info,
+            frames=inputs["frames"],
+            audio_path="",
+            audio_segments=[],
+            video_info=inputs["video_info"],
+            audio_future=inputs["audio_future"],
+            dedup=inputs["dedup"],
+            plan=inputs["plan"],
+            visual=inputs["visual"],
         )
+        # Degraded templates (placeholders, failed summary) are not cached, so a retry re-analyzes
+        if cache is not None and complete:
+            cache.put_template(content_hash, cache_version, template)
 
         # Step 5: Cleanup temp files
         try:
@@ -418,11 +611,143 @@ def analyze_video_patterns(
         logger.info(f"Completed pattern analysis for video {video_id}")
         return result
 
+    except Ignore:
+        # Raised by self.replace() once the chord is dispatched.
+        raise
     except Exception as exc:
         logger.error(f"Pattern analysis failed for video {video_id}: {exc}")
         raise self.retry(exc=exc)
 
 
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
+def analyze_pattern_batch(
+    self,
+    video_id: str,
+    run_id: str,
+    batch_num: int,
+) -> Dict[str, Any]:
+    """
+    Analyze one checkpointed frame batch and checkpoint its results.
+
+    A batch that already has results is skipped, so re-running a chord only
+    calls the model for missing batches. Failures retry this batch alone; on
+    the final attempt placeholders are stored so the video still completes.
+
+    Args:
+        video_id: ID of the video
+        run_id: Analysis run the batch belongs to
+        batch_num: 1-based batch number
+
+    Returns:
+        Small reference to the checkpointed batch result
+    """
+    from app.services.analysis_checkpoint import AnalysisCheckpoint
+    from app.services.pattern_service import PatternService
+
+    checkpoint = AnalysisCheckpoint(video_id, run_id)
+    try:
+        cached = checkpoint.load_batch_result(batch_num)
+        if cached is not None:
+            logger.info(f"Batch {batch_num} of run {run_id} already analyzed; skipping")
+            return {"batch_num": batch_num, "frames": len(cached), "cached": True}
+
+        context = checkpoint.load_context()
+        if context is None:
+            raise RuntimeError(f"Analysis context for run {run_id} is missing or expired")
+        frames = checkpoint.load_frames(batch_num)
+
+        final_attempt = self.request.retries >= self.max_retries
+        results, complete = asyncio.run(
+            PatternService(settings.GEMINI_API_KEY).analyze_batch(
+                frames,
+                batch_num,
+                context["total_frames"],
+                context["total_batches"],
+                batch_size=context["batch_size"],
+                measured_visuals=context["measured_visuals"],
+                strict=not final_attempt,
+                batch_idx=context["batch_starts"][batch_num - 1] if context.get("batch_starts") else None,
+            )
+        )
+        checkpoint.save_batch_result(batch_num, results, complete=complete)
+        return {"batch_num": batch_num, "frames": len(results), "cached": False}
+
+    except Exception as exc:
+        logger.error(f"Pattern batch {batch_num} failed for video {video_id}: {exc}")
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def finalize_pattern_analysis(
+    self,
+    batch_refs: List[Dict[str, Any]],
+    video_id: str,
+    run_id: str,
+) -> Dict[str, Any]:
+    """
+    Chord callback: assemble checkpointed batch results into the hybrid template,
+    generate the summary and clear the run's checkpoints.
+
+    Args:
+        batch_refs: Return values of the analyze_pattern_batch tasks
+        video_id: ID of the video
+        run_id: Analysis run to finalize
+
+    Returns:
+        Analysis results dictionary with hybrid template
+    """
+    from app.services.analysis_checkpoint import AnalysisCheckpoint
+    from app.services.pattern_service import PatternService
+
+    checkpoint = AnalysisCheckpoint(video_id, run_id)
+    try:
+        context = checkpoint.load_context()
+        if context is None:
+            raise RuntimeError(f"Analysis context for run {run_id} is missing or expired")
+        results = checkpoint.load_results()
+        missing = [n for n in range(1, context["total_batches"] + 1) if n not in results]
+        if missing:
+            logger.warning(f"Run {run_id} is missing results for batches {missing}; their frames are skipped")
+        raw_analyses = [analysis for batch_num in sorted(results) for analysis in results[batch_num]]
+        raw_analyses.sort(key=lambda analysis: analysis.get("timestamp_ms", 0))
+
+        visual_features = context.get("visual_features")
+        template, summary_complete = asyncio.run(
+            PatternService(settings.GEMINI_API_KEY).assemble_template(
+                video_id,
+                raw_analyses,
+                context["audio_segments"],
+                context["video_info"],
+                reused={int(ts): source for ts, source in context["reused"].items()},
+                analysis_stats=context.get("analysis_stats"),
+                visual_features=(
+                    {int(ts): features for ts, features in visual_features.items()}
+                    if visual_features is not None
+                    else None
+                ),
+            )
+        )
+        complete = summary_complete and not missing and not checkpoint.incomplete_batches()
+        checkpoint.clear(context["total_batches"])
+        if context.get("content_hash") and complete:
+            from app.services.analysis_cache import get_analysis_cache
+
+            cache = get_analysis_cache()
+            if cache is not None:
+                cache.put_template(context["content_hash"], context["cache_version"], template)
+
+        logger.info(f"Completed pattern analysis for video {video_id} ({len(batch_refs)} batches)")
+        return {
+            "video_id": video_id,
+            "status": "completed",
+            "template": template,
+        }
+
+    except Exception as exc:
+        logger.error(f"Finalizing pattern analysis failed for video {video_id}: {exc}")
+        raise self.retry(exc=exc)
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
 def generate_thumbnail(
     self,
@@ -644,6 +969,58 @@ def extract_video_metadata(
         raise self.retry(exc=exc)
 
 
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=60)
+def normalize_video_source(self, video_id: str) -> Dict[str, Any]:
+    """
+    Normalize an ingested source into the mezzanine profile (CFR, yuv420p,
+    fixed GOP, AAC 44.1kHz stereo) and record the profile on the video row.
+
+    Args:
+        video_id: ID of the video
+
+    Returns:
+        Normalization result with the applied profile
+    """
+    from app.db.session import SessionLocal
+    from app.models.video import Video
+    from app.services.mezzanine import is_normalized, normalize_to_mezzanine
+
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter(Video.id == UUID(video_id)).first()
+        if video is None or not video.storage_path:
+            return {"video_id": video_id, "status": "skipped", "reason": "not_found"}
+        if is_normalized(video.video_metadata):
+            return {"video_id": video_id, "status": "skipped", "reason": "already_normalized"}
+
+        local_path = resolve_storage_path(video.storage_path)
+        write_path = storage.get_write_path(video.storage_path)
+        # Remote sources resolve to read-only cache entries; never rewrite those in place.
+        same_file = os.path.abspath(write_path) == os.path.abspath(local_path)
+        profile = normalize_to_mezzanine(local_path, None if same_file else write_path)
+        if profile is None:
+            return {"video_id": video_id, "status": "failed"}
+
+        file_size = os.path.getsize(write_path)
+        storage.finalize_write(video.storage_path, write_path, content_type="video/mp4")
+
+        video.video_metadata = {**(video.video_metadata or {}), "mezzanine": profile, "storage_confirmed": True}
+        video.fps = profile["fps"]
+        video.codec = profile["video_codec"]
+        video.file_size = file_size
+        db.commit()
+
+        logger.info(f"Normalized video {video_id} to {profile['fps']}fps mezzanine")
+        return {"video_id": video_id, "status": "completed", "mezzanine": profile}
+
+    except Exception as exc:
+        db.rollback()
+        logger.error(f"Mezzanine normalization failed for video {video_id}: {exc}")
+        raise self.retry(exc=exc)
+    finally:
+        db.close()
+
+
 def cleanup_video_temp_files(video_id: str) -> bool:
     """
     Clean up temporary files for a video.
@@ -781,8 +1158,22 @@ def render_project_export_job(self, job_id: str) -> Dict[str, Any]:
         out_abs = str(storage.get_write_path(out_storage_path))
         os.makedirs(os.path.dirname(out_abs), exist_ok=True)
 
+        # Supabase exports upload in parts while the final pass encodes (when configured).
+        output_stream = storage.open_stream_upload(out_storage_path, content_type="video/mp4")
         renderer = TimelineRenderer(storage)
-        renderer.render(state, video_map, asset_map, out_abs, output_settings)
+        try:
+            renderer.render(
+                state,
+                video_map,
+                asset_map,
+                out_abs,
+                output_settings,
+                output_stream=output_stream,
+            )
+        except Exception:
+            if output_stream is not None:
+                output_stream.abort()
+            raise
         job.progress = 0.8
         db.commit()
 
@@ -790,7 +1181,13 @@ def render_project_export_job(self, job_id: str) -> Dict[str, Any]:
         info = asyncio.run(svc.get_video_info(out_abs))
         file_size = os.path.getsize(out_abs)
 
-        storage.finalize_write(out_storage_path, out_abs, content_type="video/mp4")
+        if output_stream is not None and output_stream.completed:
+            try:
+                os.remove(out_abs)
+            except OSError:
+                pass
+        else:
+            storage.finalize_write(out_storage_path, out_abs, content_type="video/mp4")
         out_url = storage.build_public_url(out_storage_path, None)
 
         video = Video(
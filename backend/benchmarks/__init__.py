@@ -0,0 +1,3 @@
+"""
+Offline benchmarks (run from backend/: python -m benchmarks.<name> --help).
+"""
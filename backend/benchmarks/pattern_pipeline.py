@@ -0,0 +1,211 @@
+"""
+Offline benchmark of the pattern-analysis pipeline.
+
+Generates synthetic videos with ffmpeg lavfi sources (a shot change every
+few seconds, beeping audio), then runs the same steps as the in-process
+analyze_video_patterns task: probe + sampling plan, frame decode + model
+analysis, audio extraction, segment assembly + summary. The model is a
+ReplayModelClient (recorded or synthesized responses with simulated latency),
+so runs need no API key and are repeatable.
+
+Reports per-stage wall time, frames decoded and sent per second, model calls,
+bytes sent and peak Python heap / process RSS.
+
+    cd backend
+    python -m benchmarks.pattern_pipeline --lengths 15,60,300 --latency-ms 1500 --latency-sigma 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.batch_controller import BatchController
+from app.services.model_client import LatencyModel, ReplayModelClient
+from app.services.pattern_service import DEFAULT_BATCH_SIZE, PatternService, frame_reuse
+from app.services.rate_limiter import ModelRateLimiter
+
+SHOT_SECONDS = 4
+SOURCES = ["testsrc2", "smptehdbars", "rgbtestsrc", "testsrc"]
+
+
+def make_video(path: Path, seconds: float, width: int = 1080, height: int = 1920, fps: int = 30) -> Path:
+    """Render a synthetic H.264/AAC video with a hard cut every SHOT_SECONDS."""
+    shots = max(1, math.ceil(seconds / SHOT_SECONDS))
+    graph = []
+    for index in range(shots):
+        duration = min(SHOT_SECONDS, seconds - index * SHOT_SECONDS)
+        source = SOURCES[index % len(SOURCES)]
+        graph.append(f"{source}=size={width}x{height}:rate={fps}:duration={duration}[v{index}]")
+    graph.append("".join(f"[v{i}]" for i in range(shots)) + f"concat=n={shots}:v=1:a=0[v]")
+    graph.append(f"sine=frequency=440:beep_factor=4:sample_rate=44100:duration={seconds}[a]")
+    cmd = [
+        "ffmpeg", "-v", "error", "-y",
+        "-filter_complex", ";".join(graph),
+        "-map", "[v]", "-map", "[a]",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest",
+        str(path),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return path
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux (bytes on macOS); the benchmark targets Linux workers.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_pipeline(video_path: Path, model: ReplayModelClient, work_dir: Path) -> Dict[str, Any]:
+    """Run extract -> analyze -> summarize on one video; return timings and counters."""
+    from app.workers import video_tasks
+
+    service = PatternService("benchmark", model=model, rate_limiter=ModelRateLimiter("benchmark", rpm=0, tpm=0))
+    calls_before = model.stats["calls"]
+    bytes_before = model.stats["bytes"]
+    timings: Dict[str, float] = {}
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+
+    mark = time.perf_counter()
+    inputs = video_tasks._prepare_analysis_inputs("benchmark", str(video_path), work_dir)
+    timings["prepare_s"] = time.perf_counter() - mark
+
+    controller = BatchController() if settings.ANALYSIS_BATCH_ADAPTIVE else BatchController.fixed(DEFAULT_BATCH_SIZE)
+    mark = time.perf_counter()
+    raw_analyses = asyncio.run(
+        service.analyze_frames_batch(
+            inputs["frames"],
+            total_frames=inputs["expected_frames"],
+            measured_visuals=inputs["visual"] is not None,
+            controller=controller,
+        )
+    )
+    timings["decode_analyze_s"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    _audio_path, audio_segments = inputs["audio_future"].result()
+    timings["audio_wait_s"] = time.perf_counter() - mark
+
+    reused, analysis_stats = frame_reuse(
+        inputs["plan"], inputs["dedup"], DEFAULT_BATCH_SIZE, controller.batches_formed
+    )
+    visual = inputs["visual"]
+    mark = time.perf_counter()
+    template, _complete = asyncio.run(
+        service.assemble_template(
+            "benchmark",
+            raw_analyses,
+            audio_segments,
+            inputs["video_info"],
+            reused=reused,
+            analysis_stats=analysis_stats,
+            visual_features=visual.features() if visual is not None else None,
+        )
+    )
+    timings["assemble_summary_s"] = time.perf_counter() - mark
+    total = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+
+    duration = float(inputs["video_info"].get("duration", 0))
+    decoded = len(template["segments"])
+    sent = len(raw_analyses)
+    return {
+        "video_seconds": round(duration, 1),
+        **{name: round(value, 3) for name, value in timings.items()},
+        "total_s": round(total, 3),
+        "realtime_factor": round(duration / total, 2) if total else 0.0,
+        "segments": decoded,
+        "frames_sent": sent,
+        "segments_per_s": round(decoded / total, 1) if total else 0.0,
+        "frames_sent_per_s": round(sent / timings["decode_analyze_s"], 1) if timings["decode_analyze_s"] else 0.0,
+        "model_calls": model.stats["calls"] - calls_before,
+        "bytes_sent": model.stats["bytes"] - bytes_before,
+        "peak_heap_mb": round(peak / 2**20, 1),
+        "max_rss_mb": round(_rss_mb(), 1),
+        "batching": controller.summary(),
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = [
+        "video_seconds", "prepare_s", "decode_analyze_s", "audio_wait_s", "assemble_summary_s", "total_s",
+        "realtime_factor", "frames_sent", "frames_sent_per_s", "model_calls", "bytes_sent", "peak_heap_mb",
+        "max_rss_mb",
+    ]
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="15,60,180", help="Comma-separated video lengths in seconds")
+    parser.add_argument("--video", action="append", default=[], help="Benchmark an existing file (repeatable)")
+    parser.add_argument("--size", default="1080x1920", help="Synthetic video size WxH")
+    parser.add_argument("--latency-ms", type=float, default=settings.ANALYSIS_REPLAY_LATENCY_MS)
+    parser.add_argument("--latency-sigma", type=float, default=settings.ANALYSIS_REPLAY_LATENCY_SIGMA)
+    parser.add_argument("--latency-per-image-ms", type=float, default=settings.ANALYSIS_REPLAY_LATENCY_PER_IMAGE_MS)
+    parser.add_argument("--recording", default=settings.ANALYSIS_MODEL_RECORDING_PATH or None)
+    parser.add_argument("--concurrency", type=int, default=settings.GEMINI_MAX_CONCURRENT_BATCHES)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per video (the first warms caches)")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep generated videos and temp files")
+    args = parser.parse_args(argv)
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        print("ffmpeg and ffprobe are required", file=sys.stderr)
+        return 2
+    logging.basicConfig(level=logging.WARNING)
+    # Measure the work itself: no result cache, no shared Redis state.
+    settings.ANALYSIS_CACHE_ENABLED = False
+    settings.GEMINI_MAX_CONCURRENT_BATCHES = max(1, args.concurrency)
+    width, height = (int(value) for value in args.size.lower().split("x"))
+
+    model = ReplayModelClient(
+        recording_path=args.recording,
+        latency=LatencyModel(args.latency_ms, args.latency_sigma, args.latency_per_image_ms),
+    )
+    root = Path(tempfile.mkdtemp(prefix="pattern-bench-"))
+    tracemalloc.start()
+    rows: List[Dict[str, Any]] = []
+    try:
+        videos = [Path(path) for path in args.video]
+        for seconds in (float(value) for value in args.lengths.split(",") if value.strip()):
+            path = root / f"synthetic_{int(seconds)}s.mp4"
+            mark = time.perf_counter()
+            videos.append(make_video(path, seconds, width, height))
+            print(f"Generated {path.name} in {time.perf_counter() - mark:.1f}s", file=sys.stderr)
+        for video in videos:
+            for run in range(max(1, args.repeat)):
+                work_dir = root / f"work_{video.stem}_{run}"
+                work_dir.mkdir(parents=True, exist_ok=True)
+                row = {"video": video.name, "run": run + 1, **run_pipeline(video, model, work_dir)}
+                rows.append(row)
+    finally:
+        tracemalloc.stop()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    _print_table(rows)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({"model": model.stats, "runs": rows}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Template similarity search benchmark.
+
+Builds a library of clustered feature vectors (templates fall into styles,
+like a real library) and reports, best of --repeat, the per-query latency of
+the exact and approximate TemplateIndex modes, the one-off k-means build and
+the approximate mode's recall@k against exact search.
+
+    cd backend
+    python -m benchmarks.template_index --templates 10000,100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.template_index import FEATURE_DIM, TemplateIndex
+
+from benchmarks.template_storage import best_of
+
+
+def library(count: int, styles: int = 200, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.abs(rng.normal(size=(styles, FEATURE_DIM))).astype(np.float32)
+    vectors = centers[rng.integers(0, styles, count)] + 0.15 * rng.normal(size=(count, FEATURE_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(count: int, k: int, queries: int, repeat: int, nprobe: int) -> Dict[str, Any]:
+    vectors = library(count)
+    index = TemplateIndex(list(range(count)), vectors)
+    picks = np.random.default_rng(1).choice(count, size=queries, replace=False)
+
+    build_ms = best_of(1, index.build_lists)
+    exact_ms = best_of(repeat, lambda: [index.search(vectors[i], k=k) for i in picks]) / queries
+
+    def approximate(i: int) -> List[Any]:
+        return index.search(vectors[i], k=k, approximate=True, nprobe=nprobe)
+
+    approx_ms = best_of(repeat, lambda: [approximate(i) for i in picks]) / queries
+    recall = np.mean(
+        [len({key for key, _ in index.search(vectors[i], k=k)} & {key for key, _ in approximate(i)}) / k for i in picks]
+    )
+    return {
+        "templates": count,
+        "exact_query_ms": round(exact_ms, 3),
+        "approximate_query_ms": round(approx_ms, 3),
+        "approximate_build_ms": round(build_ms, 1),
+        "recall_at_k": round(float(recall), 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--templates", default="1000,10000,100000", help="Comma-separated library sizes")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for count in (int(value) for value in args.templates.split(",") if value.strip()):
+        print(json.dumps(run(count, args.k, min(args.queries, count), max(1, args.repeat), args.nprobe)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Template storage benchmark: JSON template_data vs columnar segments_blob.
+
+Builds a realistic HybridTemplate (varied subjects, descriptions, colors and
+measured floats) and times, best of --repeat runs:
+
+- serialize: json.dumps of the whole template vs template_data without
+  segments + encode_segments;
+- full load: json.loads + HybridTemplate validation vs decoding every segment
+  from the blob + validation;
+- summary-only load: what summary endpoints pay in each format;
+- segment lookup: get_segment_at on a decoded JSON template vs a binary
+  search over the blob's timestamp column.
+
+    cd backend
+    python -m benchmarks.template_storage --segments 1500,6000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.schemas.pattern import HybridTemplate
+from app.services.template_codec import SegmentColumns, encode_segments
+
+SCENES = ["talking-head", "close-up", "medium-shot", "product-shot", "wide-shot", "b-roll", "text-only"]
+MOTIONS = ["static", "handheld", "slow-zoom", "pan-left", "zoom-in", "tracking"]
+AUDIO = ["speech", "music", "mixed", "voiceover", "silence"]
+
+
+def build_template(count: int, seed: int = 7) -> Dict[str, Any]:
+    """A template of `count` 200ms segments that changes shot every ~2s like real footage."""
+    rng = random.Random(seed)
+    segments: List[Dict[str, Any]] = []
+    scene = rng.choice(SCENES)
+    palette = ["#%06x" % rng.randrange(1 << 24) for _ in range(3)]
+    for index in range(count):
+        cut = index and rng.random() < 0.1
+        if cut:
+            scene = rng.choice(SCENES)
+            palette = ["#%06x" % rng.randrange(1 << 24) for _ in range(3)]
+        speech = rng.random() < 0.7
+        segments.append(
+            {
+                "timestamp_ms": index * 200,
+                "timestamp_end_ms": index * 200 + 200,
+                "visual": {
+                    "scene_type": scene,
+                    "subject": f"presenter holding product {index // 40}",
+                    "camera_motion": rng.choice(MOTIONS),
+                    "transition_in": "cut" if cut else None,
+                    "transition_out": None,
+                    "dominant_colors": palette,
+                    "text_overlay": f"Tip #{index // 75}" if index % 75 < 15 else None,
+                    "text_position": "top" if index % 75 < 15 else None,
+                    "text_style": "bold" if index % 75 < 15 else None,
+                    "brightness": round(rng.uniform(0.2, 0.9), 4),
+                    "motion": round(rng.uniform(0, 0.3), 4),
+                    "composition": "centered",
+                    "visual_effects": ["zoom-punch"] if cut else [],
+                },
+                "audio": {
+                    "type": "speech" if speech else rng.choice(AUDIO),
+                    "volume_level": round(rng.uniform(0.3, 0.9), 4),
+                    "music_present": True,
+                    "music_genre": "lofi",
+                    "music_energy": round(rng.uniform(0.2, 0.8), 4),
+                    "music_bpm": 96,
+                    "sound_effect": None,
+                    "speech_present": speech,
+                    "speech_tone": "excited" if speech else None,
+                    "speech_pace": "fast" if speech else None,
+                    "transition": "none",
+                    "beat_drop": rng.random() < 0.02,
+                    "silence": False,
+                },
+                "description": (
+                    f"The presenter in a {scene} explains step {index // 25} of the routine, "
+                    f"gesturing toward the product while the camera {rng.choice(MOTIONS)}s slightly."
+                ),
+                "is_key_moment": cut,
+                "key_moment_type": "transition" if cut else None,
+            }
+        )
+    template = HybridTemplate.model_validate(
+        {
+            "video_id": "00000000-0000-0000-0000-000000000000",
+            "duration_seconds": count * 0.2,
+            "segments": segments,
+            "summary": {
+                "total_duration_ms": count * 200,
+                "total_segments": count,
+                "total_cuts": sum(1 for s in segments if s["visual"]["transition_in"]),
+                "average_shot_duration_ms": 2000,
+                "hook_duration_ms": 2400,
+                "hook_description": "Direct question to camera",
+                "pacing": "moderate",
+                "style_tags": ["talking-head", "tutorial"],
+                "dominant_colors": palette,
+                "music_coverage_percent": 100.0,
+                "speech_coverage_percent": 70.0,
+                "text_overlay_count": count // 75,
+                "key_moments": [],
+                "content_structure": "Hook, five tips, call to action.",
+            },
+        }
+    )
+    return template.model_dump(mode="json")
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    """Fastest of `repeat` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000.0
+
+
+def run(count: int, repeat: int) -> Dict[str, Any]:
+    template = build_template(count)
+    json_text = json.dumps(template)
+    meta = {key: value for key, value in template.items() if key != "segments"}
+    meta_text = json.dumps(meta)
+    blob = encode_segments(template["segments"])
+    middle_ms = count * 100 + 50
+
+    def json_lookup() -> Optional[Dict[str, Any]]:
+        for segment in json.loads(json_text)["segments"]:
+            if segment["timestamp_ms"] <= middle_ms < segment["timestamp_end_ms"]:
+                return segment
+        return None
+
+    def blob_lookup() -> Optional[Dict[str, Any]]:
+        columns = SegmentColumns(blob)
+        index = columns.index_at(middle_ms)
+        return columns.segment(index) if index is not None else None
+
+    return {
+        "segments": count,
+        "json_bytes": len(json_text.encode()),
+        "columnar_bytes": len(blob) + len(meta_text.encode()),
+        "json_serialize_ms": round(best_of(repeat, lambda: json.dumps(template)), 2),
+        "columnar_serialize_ms": round(
+            best_of(repeat, lambda: (json.dumps(meta), encode_segments(template["segments"]))), 2
+        ),
+        "json_load_ms": round(
+            best_of(repeat, lambda: HybridTemplate.model_validate(json.loads(json_text))), 2
+        ),
+        "columnar_load_ms": round(
+            best_of(
+                repeat,
+                lambda: HybridTemplate.model_validate(
+                    {**json.loads(meta_text), "segments": SegmentColumns(blob).rows()}
+                ),
+            ),
+            2,
+        ),
+        "json_summary_ms": round(best_of(repeat, lambda: json.loads(json_text)["summary"]), 3),
+        "columnar_summary_ms": round(best_of(repeat, lambda: json.loads(meta_text)["summary"]), 3),
+        "json_segment_at_ms": round(best_of(repeat, json_lookup), 3),
+        "columnar_segment_at_ms": round(best_of(repeat, blob_lookup), 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", default="300,1500,6000", help="Comma-separated segment counts")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    rows = [run(int(count), max(1, args.repeat)) for count in args.segments.split(",") if count.strip()]
+    for row in rows:
+        print(json.dumps(row))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(rows, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,6 +34,14 @@ def _compile_jsonb_sqlite(_type, _compiler, **_kwargs):
     return "JSON"
 
 
+@pytest.fixture(autouse=True)
+def _no_analysis_cache(monkeypatch):
+    """Keep analysis tests off Redis; cache tests inject their own AnalysisCache."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ANALYSIS_CACHE_ENABLED", False)
+
+
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test."""
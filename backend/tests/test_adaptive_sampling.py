@@ -0,0 +1,58 @@
+"""
+Shot-boundary adaptive sampling tests on synthetic change scores.
+"""
+
+import numpy as np
+
+from app.services.adaptive_sampling import SamplingPlan, detect_cuts, plan_samples
+
+
+def _scores(count=100, cuts=(30, 70), pan=None):
+    scores = np.full(count, 0.01, dtype=np.float32)
+    scores[0] = 0.0
+    for cut in cuts:
+        scores[cut] = 0.5
+    if pan:
+        scores[pan[0]:pan[1]] = 0.08
+    return scores
+
+
+def test_detect_cuts_ignores_sustained_motion():
+    scores = _scores(pan=(40, 60))
+    scores[50] = 0.13  # Busy pan frame: above threshold but not against its neighbourhood.
+
+    assert detect_cuts(scores, threshold=0.12).tolist() == [30, 70]
+
+
+def test_plan_is_dense_around_cuts_and_sparse_inside_shots():
+    plan = plan_samples(
+        _scores(), interval_ms=200, budget=0, sparse_interval_ms=1000, dense_window_ms=600, cut_threshold=0.12
+    )
+
+    assert plan.shot_starts == [0, 30, 70]
+    for cut in (30, 70):
+        assert {cut - 1, cut, cut + 1, cut + 2, cut + 3} <= set(plan.samples)
+    # Stable stretch between 35 and 65 is only sampled every 5 grid frames (1s).
+    assert [s for s in plan.samples if 35 <= s < 65] == [35, 40, 45, 50, 55, 60]
+
+
+def test_budget_thins_evenly_instead_of_truncating():
+    plan = plan_samples(_scores(count=1000, cuts=range(50, 1000, 50)), interval_ms=200, budget=30)
+
+    assert len(plan.samples) <= 30
+    assert set(range(0, 1000, 50)) <= set(plan.samples)
+    assert max(plan.samples) > 900
+
+
+def test_fill_map_uses_nearest_sample_within_shot():
+    plan = SamplingPlan(interval_ms=200, grid_count=10, samples=[0, 4, 5, 9], shot_starts=[0, 5])
+
+    mapping = plan.fill_map()
+
+    assert mapping[200] == 0
+    assert mapping[600] == 800
+    # Grid step 3 is nearer frame 4 than 0 and stays in the first shot.
+    assert mapping[1400] == 1000
+    assert mapping[1600] == 1800
+    assert set(mapping) == {200, 400, 600, 1200, 1400, 1600}
+    assert plan.wants(800) and not plan.wants(1200)
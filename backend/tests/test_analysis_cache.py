@@ -0,0 +1,117 @@
+"""
+Analysis result cache tests (Redis replaced by an in-memory fake).
+"""
+
+import asyncio
+import json
+
+from app.core.config import settings
+from app.services.analysis_cache import AnalysisCache, file_digest
+from app.services.frame_pipeline import AnalysisFrame
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def scan_iter(self, match=None, count=None):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.values) if key.startswith(prefix)]
+
+    def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, parts, generation_config=None):
+        self.calls += 1
+        stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+
+        class Response:
+            text = json.dumps([{"visual": {"subject": "call %d" % self.calls}, "description": s} for s in stamps])
+
+        return Response()
+
+
+def _service(model, cache):
+    return PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0), cache=cache)
+
+
+def _frames(start_ms, hashes):
+    return [
+        AnalysisFrame(timestamp_ms=start_ms + i * 200, jpeg=b"x", width=2, height=2, phash=h)
+        for i, h in enumerate(hashes)
+    ]
+
+
+def test_batch_results_are_reused_by_frame_hash_and_restamped():
+    cache = AnalysisCache(redis_client=FakeRedis(), model_name="test-model")
+    model = CountingModel()
+    service = _service(model, cache)
+
+    first = asyncio.run(service.analyze_frames_batch(_frames(0, [1, 2, 3]), batch_size=3))
+    again = asyncio.run(service.analyze_frames_batch(_frames(10_000, [1, 2, 3]), batch_size=3))
+
+    assert model.calls == 1
+    assert [r["visual"] for r in again] == [r["visual"] for r in first]
+    assert [r["timestamp_ms"] for r in again] == [10_000, 10_200, 10_400]
+
+    asyncio.run(service.analyze_frames_batch(_frames(0, [1, 2, 4]), batch_size=3))
+    asyncio.run(service.analyze_frames_batch(_frames(0, [1, 2, 3]), batch_size=3, measured_visuals=True))
+    assert model.calls == 3
+    assert cache.stats()["batch_hits"] == 1
+
+
+def test_prompt_or_version_change_invalidates(monkeypatch):
+    service = _service(CountingModel(), None)
+    version = service.template_prompt_version()
+    assert service.batch_prompt_version(False) != service.batch_prompt_version(True)
+
+    monkeypatch.setattr(settings, "ANALYSIS_CACHE_VERSION", settings.ANALYSIS_CACHE_VERSION + 1)
+    assert service.template_prompt_version() != version
+
+    monkeypatch.setattr(service, "_build_summary_prompt", lambda: "Summarize differently.")
+    monkeypatch.setattr(settings, "ANALYSIS_CACHE_VERSION", settings.ANALYSIS_CACHE_VERSION - 1)
+    assert service.template_prompt_version() != version
+
+
+def test_frame_settings_change_template_version(monkeypatch):
+    service = _service(CountingModel(), None)
+    version = service.template_prompt_version()
+
+    for name, value in (
+        ("ADAPTIVE_SAMPLING_ENABLED", not settings.ADAPTIVE_SAMPLING_ENABLED),
+        ("FRAME_DEDUP_ENABLED", not settings.FRAME_DEDUP_ENABLED),
+        ("VISUAL_FEATURES_ENABLED", not settings.VISUAL_FEATURES_ENABLED),
+        ("ANALYSIS_FRAME_MAX_SIDE", settings.ANALYSIS_FRAME_MAX_SIDE // 2),
+        ("ANALYSIS_FRAME_JPEG_QUALITY", settings.ANALYSIS_FRAME_JPEG_QUALITY - 10),
+    ):
+        with monkeypatch.context() as patch:
+            patch.setattr(settings, name, value)
+            assert service.template_prompt_version() != version, name
+    assert service.template_prompt_version() == version
+
+
+def test_templates_keyed_by_content_model_and_version(tmp_path):
+    redis = FakeRedis()
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"same bytes")
+    content_hash = file_digest(str(video))
+    cache = AnalysisCache(redis_client=redis, model_name="model-a")
+    cache.put_template(content_hash, "v1", {"video_id": "one", "segments": []})
+
+    assert cache.get_template(content_hash, "v1") == {"video_id": "one", "segments": []}
+    assert cache.get_template(content_hash, "v2") is None
+    assert AnalysisCache(redis_client=redis, model_name="model-b").get_template(content_hash, "v1") is None
+    assert cache.clear() == 1 and redis.values == {}
@@ -0,0 +1,229 @@
+"""
+Staged pattern-analysis pipeline tests (Celery tasks run eagerly, Redis and
+the model replaced by in-memory fakes).
+"""
+
+import json
+from concurrent.futures import Future
+
+import pytest
+from celery.backends.cache import CacheBackend
+
+import app.services.analysis_cache as analysis_cache
+import app.services.analysis_checkpoint as analysis_checkpoint
+import app.services.pattern_service as pattern_service
+import app.workers.video_tasks as video_tasks
+from app.core.config import settings
+from app.services.analysis_checkpoint import AnalysisCheckpoint
+from app.services.frame_pipeline import AnalysisFrame, pack_frames, unpack_frames
+from app.services.rate_limiter import ModelRateLimiter
+from app.services.storage_service import LocalStorageService
+from app.workers.celery_app import celery_app
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.sets = {}
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    def expire(self, key, ttl):
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+            self.sets.pop(key, None)
+
+
+class FakeModel:
+    """
+    Echoes one result per frame; fails the first call for any batch listed in
+    `fail_once`, and the summary call while `fail_summary` is set.
+    """
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.fail_summary = False
+        self.batches = []
+
+    def generate_content(self, parts, generation_config=None):
+        stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+        if not stamps:
+            if self.fail_summary:
+                raise RuntimeError("summary unavailable")
+
+            class Summary:
+                text = json.dumps(
+                    {"hook_description": "Opens on a question", "content_structure": "Hook, body, payoff"}
+                )
+
+            return Summary()
+        first = int(stamps[0].split()[2].rstrip("ms]"))
+        self.batches.append(first)
+        if first in self.fail_once:
+            self.fail_once.discard(first)
+            raise RuntimeError("backend error")
+
+        class Response:
+            text = json.dumps([{"visual": {"subject": stamp}, "description": stamp} for stamp in stamps])
+
+        return Response()
+
+
+@pytest.fixture
+def staged(monkeypatch, tmp_path):
+    redis = FakeRedis()
+    storage = LocalStorageService(str(tmp_path / "storage"))
+    model = FakeModel()
+    real_service = pattern_service.PatternService
+    monkeypatch.setattr(analysis_checkpoint, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(analysis_checkpoint, "get_storage_service", lambda: storage)
+    monkeypatch.setattr(
+        pattern_service,
+        "PatternService",
+        lambda key: real_service(key, model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0)),
+    )
+    monkeypatch.setattr(settings, "ANALYSIS_PIPELINE_STAGED", True)
+    monkeypatch.setattr(settings, "TEMP_PROCESSING_DIR", str(tmp_path / "temp"))
+    monkeypatch.setattr(video_tasks, "resolve_storage_path", lambda path: path)
+    # Chords register with the result backend even when applied eagerly.
+    monkeypatch.setattr(celery_app._local, "backend", CacheBackend(app=celery_app, url="memory://"), raising=False)
+
+    frame_count = 60
+
+    audio = Future()
+    audio.set_result(("", []))
+
+    def fake_inputs(video_id, video_path, video_temp_dir):
+        frames = (AnalysisFrame(timestamp_ms=i * 200, jpeg=b"jpeg%d" % i, width=2, height=2) for i in range(frame_count))
+        return {
+            "video_info": {"duration": frame_count * 0.2},
+            "frames": frames,
+            "expected_frames": frame_count,
+            "plan": None,
+            "dedup": None,
+            "visual": None,
+            "audio_future": audio,
+        }
+
+    monkeypatch.setattr(video_tasks, "_prepare_analysis_inputs", fake_inputs)
+    return redis, storage, model
+
+
+def test_pack_frames_round_trip():
+    frames = [AnalysisFrame(timestamp_ms=i * 200, jpeg=bytes([i]) * (i + 1), width=4, height=2) for i in range(3)]
+
+    restored = unpack_frames(pack_frames(frames))
+
+    assert [(f.timestamp_ms, f.jpeg, f.width, f.height) for f in restored] == [
+        (f.timestamp_ms, f.jpeg, f.width, f.height) for f in frames
+    ]
+
+
+def test_failed_batch_retries_alone_and_checkpoints_resume(staged):
+    redis, storage, model = staged
+    checkpoint = AnalysisCheckpoint("vid", "run-1")
+    context = video_tasks._extract_for_analysis("vid", "video.mp4", checkpoint)
+    assert (context["total_batches"], context["total_frames"]) == (3, 60)
+
+    model.fail_once = {5000}  # batch 2 starts at 5000ms
+    for batch_num in (1, 2, 3):
+        video_tasks.analyze_pattern_batch.apply(args=["vid", "run-1", batch_num]).get()
+
+    assert model.batches == [0, 5000, 5000, 10000]
+
+    # Re-running a checkpointed batch does not call the model again.
+    ref = video_tasks.analyze_pattern_batch.apply(args=["vid", "run-1", 2]).get()
+    assert ref["cached"] and len(model.batches) == 4
+
+    result = video_tasks.finalize_pattern_analysis.apply(args=[[], "vid", "run-1"]).get()
+    segments = result["template"]["segments"]
+    assert len(segments) == 60
+    assert segments[25]["visual"]["subject"] == "[Frame at 5000ms]"
+    assert redis.values == {} and redis.hashes == {} and not redis.sets
+    assert not list((storage.root / "analysis" / "vid" / "run-1").glob("*.frames"))
+
+
+def test_entry_task_fans_out_and_returns_template(staged):
+    _redis, _storage, model = staged
+
+    result = video_tasks.analyze_video_patterns.apply(args=["vid", "video.mp4"]).get()
+
+    assert result["status"] == "completed"
+    assert len(result["template"]["segments"]) == 60
+    assert sorted(model.batches) == [0, 5000, 10000]
+
+
+def test_identical_media_is_served_from_template_cache(staged, monkeypatch, tmp_path):
+    redis, _storage, model = staged
+    monkeypatch.setattr(settings, "ANALYSIS_CACHE_ENABLED", True)
+    monkeypatch.setattr(analysis_cache, "get_redis_client", lambda: redis)
+    original = tmp_path / "original.mp4"
+    duplicate = tmp_path / "duplicate.mp4"
+    original.write_bytes(b"identical media")
+    duplicate.write_bytes(b"identical media")
+
+    first = video_tasks.analyze_video_patterns.apply(args=["vid-1", str(original)]).get()
+    calls = len(model.batches)
+    second = video_tasks.analyze_video_patterns.apply(args=["vid-2", str(duplicate)]).get()
+
+    assert len(model.batches) == calls
+    assert second["template"]["video_id"] == "vid-2"
+    assert second["template"]["segments"] == first["template"]["segments"]
+
+
+def test_degraded_templates_are_not_cached(staged, monkeypatch, tmp_path):
+    redis, _storage, model = staged
+    monkeypatch.setattr(settings, "ANALYSIS_CACHE_ENABLED", True)
+    monkeypatch.setattr(analysis_cache, "get_redis_client", lambda: redis)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"media")
+
+    model.fail_summary = True
+    degraded = video_tasks.analyze_video_patterns.apply(args=["vid-1", str(video)]).get()
+    assert degraded["template"]["summary"]["hook_description"] == "Analysis failed - default hook"
+    assert len(model.batches) == 3
+
+    model.fail_summary = False
+    recovered = video_tasks.analyze_video_patterns.apply(args=["vid-1", str(video)]).get()
+    assert len(model.batches) == 6  # analyzed again rather than served from cache
+    assert recovered["template"]["summary"]["hook_description"] == "Opens on a question"
+
+
+def test_placeholder_batches_mark_checkpoint_incomplete(staged):
+    _redis, _storage, model = staged
+    checkpoint = AnalysisCheckpoint("vid", "run-2")
+    video_tasks._extract_for_analysis("vid", "video.mp4", checkpoint)
+
+    model.fail_once = {0}
+    final_attempt = video_tasks.analyze_pattern_batch.max_retries
+    video_tasks.analyze_pattern_batch.apply(args=["vid", "run-2", 1], retries=final_attempt).get()
+    video_tasks.analyze_pattern_batch.apply(args=["vid", "run-2", 2]).get()
+
+    assert checkpoint.incomplete_batches() == [1]
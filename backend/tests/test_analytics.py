@@ -0,0 +1,158 @@
+"""
+Analytics endpoint tests.
+"""
+
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.analytics import _trend_statement
+from app.models.analytics import AnalyticsDailyRollup
+from app.models.post import Post, PostStatus
+from app.models.social_account import SocialAccount
+from app.models.video import Video
+from app.services.analytics_rollups import rebuild_rollups, record_post_metrics
+
+
+@pytest.fixture
+def published(db, test_user):
+    """Publish posts for the test user: (day, platform, views, likes)."""
+
+    accounts = {}
+
+    def publish(*posts):
+        created = []
+        for published_at, platform, views, likes in posts:
+            if platform not in accounts:
+                accounts[platform] = SocialAccount(
+                    user_id=test_user.id, platform=platform, platform_user_id=platform, access_token_encrypted="x"
+                )
+                db.add(accounts[platform])
+                db.flush()
+            video = Video(id=uuid4(), user_id=test_user.id, filename="v.mp4", storage_path="videos/v.mp4")
+            post = Post(
+                video_id=video.id, social_account_id=accounts[platform].id, platform=platform,
+                status=PostStatus.PUBLISHED, published_at=published_at,
+            )
+            db.add_all([video, post])
+            db.flush()
+            record_post_metrics(db, post, {"views": views, "likes": likes, "comments": 1}, user_id=test_user.id)
+            created.append(post)
+        db.commit()
+        return created
+
+    return publish
+
+
+def test_daily_trends_fill_gaps(client, auth_headers, published):
+    published(
+        (datetime(2026, 3, 2, 9), "tiktok", 100, 10),
+        (datetime(2026, 3, 2, 18), "instagram", 50, 5),
+        (datetime(2026, 3, 4, 12), "tiktok", 300, 30),
+    )
+
+    response = client.get(
+        "/api/v1/analytics/trends",
+        params={"start_date": "2026-03-01", "end_date": "2026-03-05"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    points = [(p["date"], p["views"], p["engagement"]) for p in response.json()["data"]]
+    assert points == [
+        ("2026-03-01", 0, 0),
+        ("2026-03-02", 150, 17),
+        ("2026-03-03", 0, 0),
+        ("2026-03-04", 300, 31),
+        ("2026-03-05", 0, 0),
+    ]
+
+
+def test_weekly_and_monthly_trends_with_platform_filter(client, auth_headers, published):
+    published(
+        (datetime(2026, 3, 2, 9), "tiktok", 100, 10),  # Monday
+        (datetime(2026, 3, 8, 9), "tiktok", 200, 20),  # Sunday, same week
+        (datetime(2026, 3, 9, 9), "instagram", 400, 40),
+        (datetime(2026, 4, 1, 9), "tiktok", 800, 80),
+    )
+
+    weekly = client.get(
+        "/api/v1/analytics/trends",
+        params={"start_date": "2026-03-02", "end_date": "2026-03-15", "granularity": "week", "platform": "tiktok"},
+        headers=auth_headers,
+    ).json()["data"]
+    monthly = client.get(
+        "/api/v1/analytics/trends",
+        params={"start_date": "2026-02-15", "end_date": "2026-04-30", "granularity": "month"},
+        headers=auth_headers,
+    ).json()["data"]
+
+    assert [(p["date"], p["views"]) for p in weekly] == [("2026-03-02", 300), ("2026-03-09", 0)]
+    assert [(p["date"], p["views"]) for p in monthly] == [("2026-02-01", 0), ("2026-03-01", 700), ("2026-04-01", 800)]
+
+
+def test_trends_reject_unknown_granularity(client, auth_headers):
+    response = client.get("/api/v1/analytics/trends", params={"granularity": "hour"}, headers=auth_headers)
+
+    assert response.status_code == 422
+
+
+def test_postgres_trends_are_one_gap_filled_query():
+    sql = str(
+        _trend_statement(uuid4(), date(2025, 1, 1), date(2025, 12, 31), "week", "tiktok").compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert sql.count("SELECT") == 2  # buckets LEFT JOIN one grouped subquery
+    assert "generate_series" in sql and "LEFT OUTER JOIN" in sql
+    assert "GROUP BY date_trunc" in sql and "analytics_daily_rollups.platform" in sql
+    assert "posts" not in sql  # served from rollups only
+
+
+def test_rollups_apply_deltas_and_match_rebuild(db, test_user, published):
+    first, second = published(
+        (datetime(2026, 3, 2, 9), "tiktok", 100, 10),
+        (datetime(2026, 3, 2, 18), "tiktok", 50, 5),
+    )
+    # Same video on the same day: both posts land in one rollup row
+    second.video_id = first.video_id
+    db.commit()
+    rebuild_rollups(db)
+
+    record_post_metrics(db, first, {"views": 1000, "likes": 90, "comments": 3})
+    db.commit()
+    incremental = [
+        (r.platform, r.day, r.posts, r.views, r.likes, r.comments) for r in db.query(AnalyticsDailyRollup).all()
+    ]
+    rebuild_rollups(db)
+    rebuilt = [
+        (r.platform, r.day, r.posts, r.views, r.likes, r.comments) for r in db.query(AnalyticsDailyRollup).all()
+    ]
+
+    assert incremental == rebuilt == [("tiktok", date(2026, 3, 2), 2, 1050, 95, 4)]
+
+
+def test_dashboard_and_top_performers_read_rollups(client, auth_headers, published):
+    published(
+        (datetime(2026, 3, 2, 9), "tiktok", 1000, 100),
+        (datetime(2026, 3, 3, 9), "instagram", 500, 20),
+        (datetime(2026, 1, 3, 9), "tiktok", 9000, 900),  # outside the dashboard period
+    )
+
+    dashboard = client.get(
+        "/api/v1/analytics/dashboard",
+        params={"start_date": "2026-03-01", "end_date": "2026-03-31"},
+        headers=auth_headers,
+    ).json()
+    top = client.get("/api/v1/analytics/top-performers", params={"limit": 2}, headers=auth_headers).json()
+
+    assert dashboard["total_views"] == 1500
+    assert dashboard["total_engagement"] == 100 + 1 + 20 + 1
+    assert dashboard["platform_breakdown"]["tiktok"]["views"] == 1000
+    assert dashboard["platform_breakdown"]["instagram"]["engagement_rate"] == pytest.approx(21 / 500 * 100)
+    assert [v["views"] for v in dashboard["top_performing_videos"]] == [9000, 1000, 500]
+    assert [(item["platform"], item["views"]) for item in top["items"]] == [("tiktok", 9000), ("tiktok", 1000)]
+    assert top["items"][0]["engagement_rate"] == pytest.approx(901 / 9000 * 100)
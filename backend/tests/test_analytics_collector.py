@@ -0,0 +1,157 @@
+"""
+Batched analytics collection tests against a local mock platform server.
+"""
+
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func
+
+from app.models.analytics import Analytics, AnalyticsDailyRollup, PostMetricsPoint
+from app.models.post import Post, PostStatus
+from app.models.social_account import SocialAccount
+from app.models.video import Video
+from app.services.analytics_collector import collect_published_analytics
+from app.utils.encryption import encrypt_token
+
+
+def _views(platform_post_id):
+    return int(platform_post_id.rsplit("-", 1)[1]) * 10
+
+
+class _PlatformHandler(BaseHTTPRequestHandler):
+    """TikTok video/query, YouTube videos.list and Instagram insights, served locally."""
+
+    server_version = "MockPlatform/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/youtube/videos":
+            ids = query["id"][0].split(",")
+            self.server.calls.append(("youtube", len(ids), self.headers.get("Authorization")))
+            items = [
+                {"id": i, "statistics": {"viewCount": str(_views(i)), "likeCount": "5", "commentCount": "1"}}
+                for i in ids
+                if not i.startswith("deleted")
+            ]
+            return self._reply(200, {"items": items})
+        if url.path.startswith("/instagram/") and url.path.endswith("/insights"):
+            media_id = url.path.split("/")[2]
+            self.server.calls.append(("instagram", 1, query["access_token"][0]))
+            names = query["metric"][0].split(",")
+            values = {"views": _views(media_id), "likes": 3, "saved": 2}
+            return self._reply(200, {"data": [{"name": n, "values": [{"value": values.get(n, 0)}]} for n in names]})
+        return self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if url.path == "/tiktok/video/query/":
+            ids = body["filters"]["video_ids"]
+            self.server.calls.append(("tiktok", len(ids), self.headers.get("Authorization")))
+            if self.server.throttle_next:
+                self.server.throttle_next = False
+                return self._reply(429, {"error": {"code": "rate_limit_exceeded"}}, {"Retry-After": "0"})
+            videos = [{"id": i, "view_count": _views(i), "like_count": 7, "share_count": 1} for i in ids]
+            return self._reply(200, {"data": {"videos": videos}, "error": {"code": "ok"}})
+        return self._reply(404, {"error": "not found"})
+
+
+@pytest.fixture
+def platform_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PlatformHandler)
+    server.calls = []
+    server.throttle_next = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    root = f"http://127.0.0.1:{server.server_address[1]}"
+    server.base_urls = {platform: f"{root}/{platform}" for platform in ("tiktok", "youtube", "instagram")}
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _publish(db, user, platform, platform_post_ids, token="token"):
+    account = SocialAccount(
+        user_id=user.id, platform=platform, platform_user_id=f"{platform}-user",
+        access_token_encrypted=encrypt_token(f"{token}-{platform}"),
+    )
+    db.add(account)
+    db.flush()
+    for platform_post_id in platform_post_ids:
+        video = Video(id=uuid4(), user_id=user.id, filename="v.mp4", storage_path="videos/v.mp4")
+        db.add_all(
+            [
+                video,
+                Post(
+                    video_id=video.id, social_account_id=account.id, platform=platform,
+                    platform_post_id=platform_post_id, status=PostStatus.PUBLISHED,
+                    published_at=datetime(2026, 3, 2, 9),
+                ),
+            ]
+        )
+    db.commit()
+    return account
+
+
+def test_collects_in_platform_batches_and_bulk_writes(db, test_user, platform_server):
+    _publish(db, test_user, "youtube", [f"yt-{i}" for i in range(1, 61)] + ["deleted-1"])
+    _publish(db, test_user, "tiktok", [f"tt-{i}" for i in range(1, 26)])
+    _publish(db, test_user, "instagram", [f"ig-{i}" for i in range(1, 4)])
+    platform_server.throttle_next = True
+
+    stats = collect_published_analytics(db, base_urls=platform_server.base_urls, page_size=500, concurrency=4)
+
+    assert (stats["posts"], stats["collected"], stats["failed"], stats["batches"]) == (89, 88, 1, 1)
+    calls = sorted((platform, size) for platform, size, _auth in platform_server.calls)
+    assert calls == sorted(
+        [("youtube", 50), ("youtube", 11), ("tiktok", 20), ("tiktok", 20), ("tiktok", 5), ("instagram", 1),
+         ("instagram", 1), ("instagram", 1)]
+    )  # one TikTok chunk was throttled once and retried
+    assert {auth for platform, _size, auth in platform_server.calls if platform == "tiktok"} == {"Bearer token-tiktok"}
+
+    by_platform_post = dict(db.query(Post.platform_post_id, Analytics.views).join(Analytics).all())
+    assert by_platform_post["yt-60"] == 600 and by_platform_post["tt-25"] == 250 and by_platform_post["ig-3"] == 30
+    assert "deleted-1" not in by_platform_post
+    assert db.query(PostMetricsPoint).count() == 88
+    tiktok = db.query(func.sum(AnalyticsDailyRollup.posts), func.sum(AnalyticsDailyRollup.views)).filter(
+        AnalyticsDailyRollup.platform == "tiktok"
+    ).one()
+    assert tuple(tiktok) == (25, sum(range(1, 26)) * 10)
+    assert all(account.last_sync for account in db.query(SocialAccount).all())
+
+
+def test_pages_and_failures_are_isolated(db, test_user, platform_server):
+    _publish(db, test_user, "tiktok", [f"tt-{i}" for i in range(1, 8)])
+    broken = _publish(db, test_user, "youtube", ["yt-1", "yt-2"])
+    broken.access_token_encrypted = "not-a-token"
+    db.commit()
+
+    stats = collect_published_analytics(db, base_urls=platform_server.base_urls, page_size=3)
+    again = collect_published_analytics(db, base_urls=platform_server.base_urls, page_size=3)
+
+    assert (stats["posts"], stats["collected"], stats["failed"], stats["batches"]) == (9, 7, 2, 3)
+    assert again["collected"] == 7
+    assert all(platform == "tiktok" for platform, _size, _auth in platform_server.calls)
+    # Re-collecting within the hour overwrites the snapshot and adds no rollup delta
+    assert db.query(PostMetricsPoint).count() == 7
+    assert db.query(func.sum(AnalyticsDailyRollup.views)).scalar() == sum(range(1, 8)) * 10
@@ -0,0 +1,98 @@
+"""
+Local audio feature extraction tests.
+"""
+
+import wave
+
+import numpy as np
+
+from app.schemas.pattern import AudioType
+from app.services.audio_features import analyze_wav, onset_envelope, segment_features
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+
+RATE = 16000
+
+
+def _write_wav(path, signal):
+    samples = (np.clip(signal, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(RATE)
+        handle.writeframes(samples.tobytes())
+
+
+def _clicks(seconds, bpm):
+    """Decaying noise bursts on a fixed beat grid."""
+    rng = np.random.default_rng(0)
+    signal = np.zeros(int(seconds * RATE), dtype=np.float32)
+    burst = rng.uniform(-0.8, 0.8, 800) * np.exp(-np.arange(800) / 150)
+    for start in np.arange(0, seconds, 60.0 / bpm):
+        index = int(start * RATE)
+        signal[index : index + 800] += burst[: signal.size - index]
+    return signal
+
+
+def test_silence_tone_and_centroid_per_segment(tmp_path):
+    t = np.arange(RATE) / RATE
+    signal = np.concatenate([np.zeros(RATE), 0.5 * np.sin(2 * np.pi * 440 * t)])
+    path = tmp_path / "audio.wav"
+    _write_wav(path, signal)
+
+    segments = analyze_wav(str(path), 200)
+
+    assert len(segments) == 10
+    assert all(s["silence"] and s["volume"] == 0 for s in segments[:5])
+    tone = segments[6]
+    assert not tone["silence"]
+    assert abs(tone["rms"] - 0.5 / np.sqrt(2)) < 0.01
+    assert 0.75 < tone["volume"] <= 1.0
+    assert abs(tone["centroid_hz"] - 440) < 60
+    # A 440Hz sine crosses zero 880 times a second.
+    assert abs(tone["zcr"] - 880 / RATE) < 0.005
+
+
+def test_click_track_tempo_and_beat_grid():
+    features = segment_features(_clicks(8, 120) * 32767, RATE, 100, silence_db=-45)
+
+    assert features["tempo_bpm"] is not None
+    assert abs(features["tempo_bpm"] - 120) < 4
+    assert features["tempo_confidence"] > 0.3
+    beat_segments = np.flatnonzero(features["beat"])
+    # 120 BPM = a beat every 500ms = every 5th 100ms segment.
+    assert len(beat_segments) in (15, 16, 17)
+    assert set(np.diff(beat_segments)) <= {4, 5, 6}
+    assert set(np.flatnonzero(features["onset"] > 0.5)) & set(beat_segments)
+
+
+def test_onset_envelope_is_continuous_across_fft_chunks():
+    signal = _clicks(4, 100)
+
+    whole = onset_envelope(signal, chunk_frames=10_000)
+    chunked = onset_envelope(signal, chunk_frames=7)
+
+    assert whole.dtype == np.float32 and whole.size == chunked.size
+    np.testing.assert_allclose(chunked, whole, rtol=1e-5, atol=1e-5)
+
+def test_local_features_override_model_audio_guesses():
+    service = PatternService("test-key", model=object(), rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+    analysis = {
+        "timestamp_ms": 0,
+        "visual": {"scene_type": "wide-shot"},
+        "audio_inference": {"likely_type": "music", "music_present": True, "speech_present": False},
+    }
+
+    loud = service._convert_to_hybrid_segment(
+        analysis, 200, audio_features={"volume": 0.9, "silence": False, "tempo_bpm": 120, "beat_drop": True}
+    )
+    quiet = service._convert_to_hybrid_segment(
+        analysis, 200, timestamp_ms=200, audio_features={"volume": 0.0, "silence": True, "tempo_bpm": 120}
+    )
+
+    assert loud.audio.volume_level == 0.9
+    assert loud.audio.music_bpm == 120 and loud.audio.music_energy == 0.9
+    assert loud.audio.beat_drop
+    assert quiet.audio.type == AudioType.SILENCE
+    assert quiet.audio.silence and not quiet.audio.music_present
+    assert quiet.audio.music_bpm is None
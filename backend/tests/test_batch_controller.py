@@ -0,0 +1,127 @@
+"""
+Adaptive frame batch sizing tests.
+"""
+
+import asyncio
+import json
+
+from app.services.batch_controller import BatchController, BatchMetrics
+from app.services.frame_pipeline import AnalysisFrame
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+
+
+def _frames(count, size=10):
+    return [AnalysisFrame(timestamp_ms=i * 200, jpeg=b"x" * size, width=2, height=2) for i in range(count)]
+
+
+def test_batches_close_on_frames_bytes_and_output_budget():
+    by_bytes = BatchController(initial_size=10, max_size=10, max_bytes=35)
+    assert [len(b) for b in by_bytes.batches(_frames(7))] == [3, 3, 1]
+
+    by_tokens = BatchController(initial_size=10, max_size=10, max_output_tokens=1000, tokens_per_frame=200)
+    assert [len(b) for b in by_tokens.batches(_frames(10))] == [4, 4, 2]
+
+    fixed = BatchController.fixed(3)
+    assert [len(b) for b in fixed.batches(_frames(7, size=10_000))] == [3, 3, 1]
+
+
+def test_feedback_shrinks_on_truncation_and_slowness_and_grows_when_fast():
+    controller = BatchController(initial_size=20, min_size=4, max_size=40, target_latency_s=10)
+
+    controller.record(BatchMetrics(1, 20, 0, 2.0, "ok"))
+    assert controller.size == 25
+    controller.record(BatchMetrics(2, 25, 0, 30.0, "ok"))
+    assert controller.size == 18
+    controller.record(BatchMetrics(3, 18, 0, 5.0, "truncated", frames_answered=9, output_chars=36_000))
+    assert controller.size == 9
+    assert controller.tokens_per_frame > 250
+    controller.record(BatchMetrics(4, 3, 0, 1.0, "ok"))  # short tail batch: no growth
+    assert controller.size == 9
+
+    summary = controller.summary()
+    assert summary["model_calls"] == 4
+    assert summary["calls_by_status"] == {"ok": 3, "truncated": 1}
+
+
+class TruncatingModel:
+    """Answers at most `capacity` frames per call, cutting the JSON off mid-object like MAX_TOKENS does."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.calls = []
+
+    def generate_content(self, parts, generation_config=None):
+        stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+        self.calls.append(len(stamps))
+        items = [json.dumps({"visual": {"subject": s}, "description": s}) for s in stamps]
+        text = "[" + ", ".join(items[: self.capacity])
+        text += ', {"visual": {"subj' if len(stamps) > self.capacity else "]"
+
+        class Candidate:
+            finish_reason = "MAX_TOKENS" if len(stamps) > self.capacity else "STOP"
+
+        class Response:
+            candidates = [Candidate()]
+
+        Response.text = text
+        return Response()
+
+
+def test_truncated_output_keeps_answered_frames_and_requests_the_rest():
+    model = TruncatingModel(capacity=4)
+    service = PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+    controller = BatchController(initial_size=10, min_size=2, max_size=10)
+
+    results = asyncio.run(
+        service.analyze_frames_batch(_frames(20), total_frames=20, max_concurrency=1, controller=controller)
+    )
+
+    assert [r["description"] for r in results] == [f"[Frame at {i * 200}ms]" for i in range(20)]
+    assert all("placeholder" not in r["description"] for r in results)
+    assert controller.size < 10
+    assert controller.summary()["calls_by_status"]["truncated"] >= 1
+    # No frame is sent twice after being answered.
+    assert sum(model.calls) - 20 == sum(m.frames - m.frames_answered for m in controller.metrics if m.status != "ok")
+
+
+def test_unparseable_output_splits_batch_before_placeholders():
+    class Model:
+        def generate_content(self, parts, generation_config=None):
+            stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+
+            class Response:
+                text = "not json" if len(stamps) > 1 else json.dumps([{"description": stamps[0]}])
+
+            return Response()
+
+    service = PatternService("test-key", model=Model(), rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+
+    results = asyncio.run(service.analyze_frames_batch(_frames(4), batch_size=4))
+
+    assert [r["description"] for r in results] == [f"[Frame at {i * 200}ms]" for i in range(4)]
+
+
+def test_complete_array_with_trailing_prose_is_not_re_requested():
+    class Model:
+        def __init__(self):
+            self.calls = []
+
+        def generate_content(self, parts, generation_config=None):
+            stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+            self.calls.append(len(stamps))
+
+            class Response:
+                text = json.dumps([{"description": s} for s in stamps]) + "\nLet me know if you need more detail."
+
+            return Response()
+
+    model = Model()
+    service = PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+    controller = BatchController.fixed(3)
+
+    results = asyncio.run(service.analyze_frames_batch(_frames(3), batch_size=3, controller=controller))
+
+    assert [r["description"] for r in results] == [f"[Frame at {i * 200}ms]" for i in range(3)]
+    assert model.calls == [3]
+    assert controller.summary()["calls_by_status"] == {"ok": 1}
@@ -0,0 +1,92 @@
+"""
+Perceptual-hash frame deduplication tests.
+"""
+
+import json
+
+import numpy as np
+
+from app.services.frame_dedup import FrameDeduplicator, dhash, hamming
+from app.services.frame_pipeline import AnalysisFrame
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+
+
+def _gradient(width=64, height=36, flip=False):
+    ramp = np.linspace(0, 255, width, dtype=np.float32)
+    if flip:
+        ramp = ramp[::-1]
+    frame = np.repeat(np.tile(ramp, (height, 1))[:, :, None], 3, axis=2)
+    return frame.astype(np.uint8)
+
+
+def test_dhash_is_stable_under_noise_and_separates_different_frames():
+    rng = np.random.default_rng(0)
+    base = _gradient()
+    noisy = np.clip(base.astype(int) + rng.integers(-3, 4, base.shape), 0, 255).astype(np.uint8)
+
+    assert hamming(dhash(base), dhash(noisy)) <= 4
+    assert hamming(dhash(base), dhash(_gradient(flip=True))) > 32
+
+
+def test_deduplicator_collapses_runs_and_resamples_long_ones():
+    dedup = FrameDeduplicator(threshold=4, max_run_ms=600)
+    a, b = _gradient(), _gradient(flip=True)
+    sequence = [a, a, a, a, b, b]
+
+    kept = [ts for ts, px in zip(range(0, 1200, 200), sequence) if not dedup.is_duplicate(ts, px)]
+
+    # Run of `a` is re-sampled at 600ms (max run), `b` starts a new run at 800ms.
+    assert kept == [0, 600, 800]
+    assert dedup.duplicates == {200: 0, 400: 0, 1000: 800}
+    dedup.record_kept_bytes(3000)
+    stats = dedup.stats(batch_size=2)
+    assert stats["frames_deduplicated"] == 3
+    assert stats["model_calls_saved"] == 1
+    assert stats["bytes_saved"] == 3000
+    # Adaptive batching: savings follow the batches actually formed, not the default size
+    assert dedup.stats(batch_size=25, batches=3)["model_calls_saved"] == 3
+
+
+def test_duplicate_timestamps_inherit_representative_analysis():
+    class FakeModel:
+        def generate_content(self, parts, generation_config=None):
+            stamps = [p for p in parts if isinstance(p, str) and p.startswith("[Frame at")]
+
+            class Response:
+                text = json.dumps(
+                    [
+                        {
+                            "visual": {"scene_type": "talking-head", "transition_in": "fade-in"},
+                            "description": stamp,
+                        }
+                        for stamp in stamps
+                    ]
+                )
+
+            return Response()
+
+    dedup = FrameDeduplicator()
+    dedup.frames_seen, dedup.frames_kept = 4, 2
+    dedup.duplicates = {200: 0, 400: 0}
+    frames = [
+        AnalysisFrame(timestamp_ms=0, jpeg=b"a", width=2, height=2),
+        AnalysisFrame(timestamp_ms=600, jpeg=b"b", width=2, height=2),
+    ]
+    service = PatternService("test-key", model=FakeModel(), rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+
+    template, _complete = service.analyze_video_with_template(
+        video_id="v1",
+        frames=frames,
+        audio_path="",
+        audio_segments=[],
+        video_info={"duration": 0.8},
+        dedup=dedup,
+    )
+
+    segments = template["segments"]
+    assert [s["timestamp_ms"] for s in segments] == [0, 200, 400, 600]
+    assert segments[1]["description"] == "[Frame at 0ms]"
+    assert segments[1]["visual"]["transition_in"] is None
+    assert segments[0]["visual"]["transition_in"] == "fade-in"
+    assert template["analysis_stats"]["frames_deduplicated"] == 2
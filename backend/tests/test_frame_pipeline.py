@@ -0,0 +1,158 @@
+"""
+In-memory frame pipeline tests (ffmpeg replaced by a raw-frame generator).
+"""
+
+import asyncio
+import io
+import subprocess
+import sys
+import time
+
+from PIL import Image
+
+import app.services.frame_pipeline as frame_pipeline
+from app.services.frame_dedup import FrameDeduplicator
+from app.services.frame_pipeline import AnalysisFrame, iter_batches, iter_frames, prefetch, target_size
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+from app.services.visual_features import VisualAnalyzer
+
+
+def _fake_ffmpeg(monkeypatch, width, height, frames):
+    real_popen = subprocess.Popen
+    captured = {}
+    script = (
+        "import sys\n"
+        f"for i in range({frames}):\n"
+        f"    sys.stdout.buffer.write(bytes([i * 10 % 256]) * {width * height * 3})\n"
+    )
+
+    def fake_popen(cmd, **kwargs):
+        captured["cmd"] = cmd
+        return real_popen([sys.executable, "-c", script], **kwargs)
+
+    monkeypatch.setattr(frame_pipeline, "probe_display_size", lambda _path: (width * 4, height * 4))
+    monkeypatch.setattr(frame_pipeline.subprocess, "Popen", fake_popen)
+    return captured
+
+
+def test_target_size_downscales_longest_side_to_even_dims():
+    assert target_size(1920, 1080, 768) == (768, 432)
+    assert target_size(1080, 1920, 768) == (432, 768)
+    assert target_size(320, 240, 768) == (320, 240)
+    assert target_size(0, 0, 768) == (0, 0)
+
+
+def test_iter_frames_streams_jpegs_with_timestamps(monkeypatch):
+    captured = _fake_ffmpeg(monkeypatch, 32, 18, frames=4)
+
+    frames = list(iter_frames("video.mp4", fps=5.0, max_frames=10, max_side=32, quality=70))
+
+    assert [f.timestamp_ms for f in frames] == [0, 200, 400, 600]
+    assert "fps=5.0,scale=32:18:flags=area" in captured["cmd"]
+    image = Image.open(io.BytesIO(frames[1].jpeg))
+    assert image.format == "JPEG"
+    assert image.size == (32, 18)
+    assert frames[0].pixels is None
+
+
+def test_iter_frames_respects_max_frames(monkeypatch):
+    _fake_ffmpeg(monkeypatch, 16, 16, frames=8)
+
+    frames = list(iter_frames("video.mp4", fps=5.0, max_frames=3, max_side=16, keep_pixels=True))
+
+    assert len(frames) == 3
+    assert frames[2].pixels.shape == (16, 16, 3)
+
+
+def test_iter_frames_skips_duplicates_before_encoding(monkeypatch):
+    # Every fake frame is a flat colour, so all hash identically.
+    _fake_ffmpeg(monkeypatch, 16, 16, frames=6)
+    dedup = FrameDeduplicator(threshold=4, max_run_ms=10_000)
+
+    frames = list(iter_frames("video.mp4", fps=5.0, max_frames=10, max_side=16, dedup=dedup))
+
+    assert [f.timestamp_ms for f in frames] == [0]
+    assert dedup.duplicates == {200: 0, 400: 0, 600: 0, 800: 0, 1000: 0}
+    assert dedup.bytes_kept == len(frames[0].jpeg)
+
+
+def test_iter_frames_measures_visuals_of_skipped_frames(monkeypatch):
+    _fake_ffmpeg(monkeypatch, 16, 16, frames=4)
+    dedup = FrameDeduplicator(threshold=4, max_run_ms=10_000)
+    visual = VisualAnalyzer(color_count=1)
+
+    frames = list(iter_frames("video.mp4", fps=5.0, max_frames=10, max_side=16, dedup=dedup, visual=visual))
+
+    features = visual.features()
+    assert len(frames) == 1
+    assert sorted(features) == [0, 200, 400, 600]
+    assert features[600]["dominant_colors"] == ["#1e1e1e"]
+
+
+def test_iter_batches_groups_stream():
+    batches = list(iter_batches(iter(range(7)), 3))
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_prefetch_reads_ahead_by_bounded_depth_and_stops_on_close():
+    produced = []
+    closed = []
+
+    def source():
+        try:
+            for i in range(100):
+                produced.append(i)
+                yield i
+        finally:
+            closed.append(True)
+
+    stream = prefetch(source(), depth=2)
+    assert next(stream) == 0
+    time.sleep(0.1)
+    # One item consumed, two queued and at most one more waiting on the full queue.
+    assert len(produced) <= 4
+    stream.close()
+    assert closed == [True]
+
+
+def test_prefetch_propagates_producer_errors():
+    def source():
+        yield 1
+        raise RuntimeError("ffmpeg died")
+
+    stream = prefetch(source(), depth=2)
+    assert next(stream) == 1
+    try:
+        next(stream)
+    except RuntimeError as exc:
+        assert "ffmpeg died" in str(exc)
+    else:
+        raise AssertionError("producer error was swallowed")
+
+
+def test_analyze_frames_batch_sends_in_memory_jpegs():
+    class FakeResponse:
+        def __init__(self, count):
+            self.text = "[" + ",".join(['{"description": "ok"}'] * count) + "]"
+
+    class FakeModel:
+        def __init__(self):
+            self.calls = []
+
+        def generate_content(self, parts, generation_config=None):
+            images = [part for part in parts if isinstance(part, dict)]
+            self.calls.append(images)
+            return FakeResponse(len(images))
+
+    service = PatternService("test-key", model=FakeModel(), rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+    frames = (
+        AnalysisFrame(timestamp_ms=i * 200, jpeg=b"\xff\xd8jpeg%d" % i, width=2, height=2)
+        for i in range(5)
+    )
+
+    results = asyncio.run(service.analyze_frames_batch(frames, batch_size=2, total_frames=5))
+
+    assert [len(call) for call in service._model.calls] == [2, 2, 1]
+    assert service._model.calls[0][1] == {"mime_type": "image/jpeg", "data": b"\xff\xd8jpeg1"}
+    assert [r["timestamp_ms"] for r in results] == [0, 200, 400, 600, 800]
@@ -0,0 +1,76 @@
+"""
+Post metrics history (time-series) tests.
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models.analytics import PostMetricsPoint
+from app.models.post import Post, PostStatus
+from app.models.social_account import SocialAccount
+from app.models.video import Video
+from app.services.analytics_rollups import record_metrics_batch
+from app.services.metrics_history import MetricsPoint, downsample_history, post_history, record_points
+
+
+def _posts(db, user, count):
+    account = SocialAccount(user_id=user.id, platform="tiktok", platform_user_id="tt", access_token_encrypted="x")
+    db.add(account)
+    db.flush()
+    posts = []
+    for _ in range(count):
+        video = Video(id=uuid4(), user_id=user.id, filename="v.mp4", storage_path="videos/v.mp4")
+        post = Post(
+            video_id=video.id, social_account_id=account.id, platform="tiktok",
+            status=PostStatus.PUBLISHED, published_at=datetime(2026, 3, 1, 9),
+        )
+        db.add_all([video, post])
+        posts.append(post)
+    db.commit()
+    return posts
+
+
+def test_batch_recording_appends_one_point_per_post_per_hour(db, test_user):
+    first, second = _posts(db, test_user, 2)
+
+    record_metrics_batch(
+        db, [(first, {"views": 10}, None), (second, {"views": 20}, test_user.id)], collected_at=datetime(2026, 3, 2, 9, 5)
+    )
+    record_metrics_batch(db, [(first, {"views": 15, "likes": 2}, None)], collected_at=datetime(2026, 3, 2, 9, 40))
+    record_metrics_batch(db, [(first, {"views": 30}, None)], collected_at=datetime(2026, 3, 2, 10, 1))
+    db.commit()
+
+    history = [(p.collected_at, p.views, p.likes) for p in post_history(db, first.id)]
+    assert history == [(datetime(2026, 3, 2, 9), 15, 2), (datetime(2026, 3, 2, 10), 30, 0)]
+    assert [p.views for p in post_history(db, second.id)] == [20]
+    assert first.analytics.views == 30
+
+
+def test_downsampling_keeps_last_point_of_each_old_day(db, test_user):
+    (post,) = _posts(db, test_user, 1)
+    now = datetime(2026, 3, 20, 12)
+    old_day, recent_day = datetime(2026, 3, 1), datetime(2026, 3, 19)
+    record_points(
+        db,
+        [MetricsPoint(post.id, old_day + timedelta(hours=hour), {"views": hour * 10}) for hour in range(24)]
+        + [MetricsPoint(post.id, recent_day + timedelta(hours=hour), {"views": 500 + hour}) for hour in range(3)],
+    )
+    db.commit()
+
+    stats = downsample_history(db, now=now, hourly_days=7)
+
+    assert stats == {"daily_points": 1, "hourly_points_removed": 23}
+    history = [(p.collected_at, p.resolution, p.views) for p in post_history(db, post.id)]
+    assert history[0] == (datetime(2026, 3, 1, 23), "day", 230)
+    assert [resolution for _at, resolution, _views in history[1:]] == ["hour"] * 3
+    assert downsample_history(db, now=now, hourly_days=7) == {"daily_points": 0, "hourly_points_removed": 0}
+
+
+def test_history_table_is_range_partitioned_on_postgres():
+    ddl = str(CreateTable(PostMetricsPoint.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PARTITION BY RANGE (collected_at)" in ddl
+    assert "PRIMARY KEY (post_id, collected_at)" in ddl
@@ -0,0 +1,39 @@
+"""
+Mezzanine normalization tests.
+"""
+
+from app.services import mezzanine
+
+
+def test_select_cfr_rate_snaps_variable_rates_to_ladder():
+    ladder = [24.0, 25.0, 30.0, 50.0, 60.0]
+    assert mezzanine.select_cfr_rate(29.87, ladder) == 30.0
+    assert mezzanine.select_cfr_rate(23.976, ladder) == 24.0
+    assert mezzanine.select_cfr_rate(59.94, ladder) == 60.0
+    assert mezzanine.select_cfr_rate(0, ladder) == 30.0
+    assert mezzanine.select_cfr_rate(None, ladder) == 30.0
+
+
+def test_build_profile_records_fixed_gop_and_audio_layout():
+    profile = mezzanine.build_profile(29.6)
+    assert profile["fps"] == 30.0
+    assert profile["pix_fmt"] == "yuv420p"
+    assert profile["gop_frames"] == mezzanine.gop_frames(30.0)
+    assert profile["audio_sample_rate"] == 44100
+    assert profile["audio_channels"] == 2
+    assert mezzanine.is_normalized({"mezzanine": profile})
+    assert not mezzanine.is_normalized({"thumbnail_storage_path": "thumbnails/x.jpg"})
+
+
+def test_build_command_adds_silent_track_when_source_has_no_audio():
+    profile = mezzanine.build_profile(30)
+    cmd = mezzanine.build_command("in.mov", "out.mp4", profile, has_audio=False)
+    assert "anullsrc=channel_layout=stereo:sample_rate=44100" in cmd
+    assert cmd[cmd.index("-vf") + 1] == "fps=30"
+    assert "1:a" in cmd
+    assert "-shortest" in cmd
+    assert cmd[cmd.index("-g") + 1] == str(profile["gop_frames"])
+
+    with_audio = mezzanine.build_command("in.mov", "out.mp4", profile, has_audio=True)
+    assert "0:a:0" in with_audio
+    assert "-shortest" not in with_audio
@@ -0,0 +1,75 @@
+"""
+Model client tests: synthesized and replayed responses drive PatternService offline.
+"""
+
+import asyncio
+import json
+import random
+
+from app.services.frame_pipeline import AnalysisFrame
+from app.services.model_client import (
+    LatencyModel,
+    ModelResponse,
+    RecordingModelClient,
+    ReplayModelClient,
+    finish_reason_of,
+    fingerprint,
+)
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+
+
+def _frames(count):
+    return [AnalysisFrame(timestamp_ms=i * 200, jpeg=b"jpeg%d" % i, width=2, height=2) for i in range(count)]
+
+
+def _service(model):
+    return PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+
+
+def test_synthesized_responses_run_analysis_and_summary():
+    model = ReplayModelClient()
+    service = _service(model)
+
+    results = asyncio.run(service.analyze_frames_batch(_frames(12), batch_size=5))
+    template, complete = asyncio.run(service.assemble_template("vid", results, [], {"duration": 2.4}))
+
+    assert [r["timestamp_ms"] for r in results] == [i * 200 for i in range(12)]
+    assert all("placeholder" not in r["description"] for r in results)
+    assert complete and template["summary"]["content_structure"].startswith("Synthetic")
+    assert model.stats["calls"] == 4 and model.stats["images"] == 12 and model.stats["synthesized"] == 4
+
+
+def test_recorded_responses_replay_by_fingerprint(tmp_path):
+    recording = tmp_path / "calls.jsonl"
+
+    class Live:
+        def generate_content(self, content, generation_config=None):
+            return ModelResponse(json.dumps({"recorded": fingerprint(content)[:8]}), "MAX_TOKENS")
+
+    recorder = RecordingModelClient(Live(), str(recording))
+    recorder.generate_content(["prompt", {"mime_type": "image/jpeg", "data": b"a"}])
+
+    replay = ReplayModelClient(recording_path=str(recording), synthesize=False)
+    response = replay.generate_content(["prompt", {"mime_type": "image/jpeg", "data": b"a"}])
+    assert json.loads(response.text)["recorded"]
+    assert finish_reason_of(response) == "MAX_TOKENS"
+    assert replay.stats["replayed"] == 1
+
+    try:
+        replay.generate_content(["prompt", {"mime_type": "image/jpeg", "data": b"b"}])
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("unrecorded request should not be synthesized")
+
+
+def test_latency_model_is_lognormal_around_median_plus_image_cost():
+    latency = LatencyModel(median_ms=1000, sigma=0.5, per_image_ms=10)
+    rng = random.Random(3)
+
+    samples = sorted(latency.sample(20, rng) for _ in range(2001))
+
+    assert 1.1 < samples[1000] < 1.3  # median 1s + 20 images * 10ms
+    assert samples[0] > 0.2 and samples[-1] > 2.5
+    assert LatencyModel().sample(5, rng) == 0.0
@@ -0,0 +1,141 @@
+"""
+Concurrent Gemini batch dispatch with a local fake model client.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.frame_pipeline import AnalysisFrame
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import LocalTokenBucket, ModelRateLimiter
+
+
+class ResourceExhausted(Exception):
+    """Mimics google.api_core.exceptions.ResourceExhausted (HTTP 429)."""
+
+
+class FakeModel:
+    """Gemini-style client: echoes one result per image, optionally throttling first calls."""
+
+    def __init__(self, delay=0.05, throttle_first=0):
+        self.delay = delay
+        self.throttle_first = throttle_first
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, parts, generation_config=None):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if call <= self.throttle_first:
+                raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+            time.sleep(self.delay)
+            stamps = [part for part in parts if isinstance(part, str) and part.startswith("[Frame at")]
+
+            class Response:
+                text = json.dumps([{"description": stamp} for stamp in stamps])
+
+            return Response()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _frames(count):
+    return [AnalysisFrame(timestamp_ms=i * 200, jpeg=b"jpeg", width=2, height=2) for i in range(count)]
+
+
+def _service(model):
+    return PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+
+
+def test_batches_run_concurrently_within_limit_and_stay_ordered():
+    model = FakeModel(delay=0.05)
+    service = _service(model)
+
+    results = asyncio.run(service.analyze_frames_batch(iter(_frames(40)), batch_size=5, max_concurrency=3))
+
+    assert model.calls == 8
+    assert model.max_in_flight == 3
+    assert [r["timestamp_ms"] for r in results] == [i * 200 for i in range(40)]
+    assert results[7]["description"] == "[Frame at 1400ms]"
+
+
+def test_frame_decoding_overlaps_model_calls():
+    model = FakeModel(delay=0.1)
+    service = _service(model)
+    decoded = []
+    decoded_during_first_call = []
+    original = model.generate_content
+
+    def slow_frames():
+        for frame in _frames(12):
+            time.sleep(0.01)
+            decoded.append(frame.timestamp_ms)
+            yield frame
+
+    def generate_content(parts, generation_config=None):
+        response = original(parts, generation_config)
+        if not decoded_during_first_call:
+            decoded_during_first_call.append(len(decoded))
+        return response
+
+    model.generate_content = generate_content
+    results = asyncio.run(
+        service.analyze_frames_batch(slow_frames(), batch_size=4, max_concurrency=1, prefetch_batches=1)
+    )
+
+    assert len(results) == 12
+    # While batch 1 was with the model, the producer decoded batch 2 (and waited on batch 3).
+    assert decoded_during_first_call[0] >= 8
+
+
+def test_throttled_calls_back_off_and_retry(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_RETRY_BASE_SECONDS", 0.01)
+    model = FakeModel(delay=0, throttle_first=2)
+    service = _service(model)
+
+    results = asyncio.run(service.analyze_frames_batch(_frames(3), batch_size=3, max_concurrency=1))
+
+    assert model.calls == 3
+    assert results[0]["description"] == "[Frame at 0ms]"
+
+
+def test_non_throttle_errors_yield_placeholders():
+    class BrokenModel:
+        def generate_content(self, parts, generation_config=None):
+            raise ValueError("bad request")
+
+    service = _service(BrokenModel())
+    results = asyncio.run(service.analyze_frames_batch(_frames(4), batch_size=2))
+
+    assert [r["description"] for r in results] == ["API call failed - placeholder"] * 4
+
+
+def test_local_token_bucket_reports_wait_time():
+    bucket = LocalTokenBucket(per_minute=60, capacity=2)
+
+    assert bucket.take(1) == 0.0
+    assert bucket.take(1) == 0.0
+    assert bucket.take(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_rate_limiter_falls_back_to_local_bucket_without_redis():
+    class DownRedis:
+        def register_script(self, _script):
+            raise ConnectionError("redis down")
+
+    limiter = ModelRateLimiter("test", rpm=600, tpm=0, redis_client=DownRedis())
+
+    waited = asyncio.run(limiter.acquire(100))
+    assert waited == 0.0
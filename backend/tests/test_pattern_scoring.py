@@ -0,0 +1,116 @@
+"""
+Batch pattern scoring tests.
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.models.analytics import Analytics
+from app.models.pattern import Pattern
+from app.models.post import Post, PostStatus
+from app.models.social_account import SocialAccount
+from app.models.user import User
+from app.models.video import Video
+from app.services.pattern_scoring import compute_video_scores, rescore_patterns
+
+
+def test_scores_rank_engagement_and_decay_with_age():
+    # Four videos, one post each, same user and platform.
+    codes = np.arange(4)
+    same = np.zeros(4, dtype=int)
+    views = np.array([10_000, 10_000, 10_000, 10_000])
+    engagements = np.array([100, 300, 900, 900])
+    age_days = np.array([1.0, 1.0, 1.0, 720.0])
+
+    scores = compute_video_scores(codes, same, same, age_days, views, engagements, half_life_days=90, prior_weight=5)
+
+    assert scores[0] < scores[1] < 50 < scores[2]
+    assert 50 < scores[3] < scores[2]  # same performance, but old evidence is shrunk toward 50
+    assert ((scores >= 0) & (scores <= 100)).all()
+
+
+def test_posts_without_views_stay_neutral():
+    scores = compute_video_scores(
+        np.array([0, 1]), np.zeros(2, dtype=int), np.zeros(2, dtype=int),
+        np.zeros(2), np.array([0, 5000]), np.array([0, 50]),
+    )
+
+    assert scores[0] == pytest.approx(50.0)
+
+
+def test_rescore_updates_every_pattern_of_each_video(db, test_user):
+    account = SocialAccount(
+        user_id=test_user.id, platform="tiktok", platform_user_id="tt", access_token_encrypted="x"
+    )
+    db.add(account)
+    db.commit()
+    now = datetime.utcnow()
+    videos = []
+    for likes in (50, 400, 2000):
+        video = Video(id=uuid4(), user_id=test_user.id, filename="v.mp4", storage_path="videos/v.mp4")
+        post = Post(
+            video_id=video.id, social_account_id=account.id, platform="tiktok",
+            status=PostStatus.PUBLISHED, published_at=now - timedelta(days=2),
+        )
+        db.add_all([video, post])
+        db.flush()
+        db.add(Analytics(post_id=post.id, views=20_000, likes=likes, comments=10, shares=5, saves=0))
+        db.add_all([Pattern(video_id=video.id, type=t, score=0.0, data={}) for t in ("hook_timing", "pacing")])
+        videos.append(video)
+    unposted = Video(id=uuid4(), user_id=test_user.id, filename="u.mp4", storage_path="videos/u.mp4")
+    db.add_all([unposted, Pattern(video_id=unposted.id, type="hook_timing", score=42.0, data={})])
+    db.commit()
+
+    stats = rescore_patterns(db)
+
+    assert (stats["posts"], stats["videos_scored"], stats["patterns_updated"]) == (3, 3, 6)
+    db.expire_all()
+    by_video = [{p.score for p in db.query(Pattern).filter(Pattern.video_id == v.id)} for v in videos]
+    assert all(len(scores) == 1 for scores in by_video)
+    low, mid, high = (scores.pop() for scores in by_video)
+    assert low < mid < high
+    assert db.query(Pattern).filter(Pattern.video_id == unposted.id).one().score == 42.0
+
+
+def test_rescoring_one_user_keeps_the_platform_wide_scale(db, test_user):
+    other = User(id=uuid4(), supabase_user_id=uuid4(), email="big@example.com", name="Big", is_active=True)
+    db.add(other)
+    db.flush()
+    now = datetime.utcnow()
+    for owner, views in ((test_user, 1_000), (other, 100_000)):
+        account = SocialAccount(
+            user_id=owner.id, platform="tiktok", platform_user_id=str(owner.id), access_token_encrypted="x"
+        )
+        db.add(account)
+        db.flush()
+        for likes in (10, 30, 60):
+            video = Video(id=uuid4(), user_id=owner.id, filename="v.mp4", storage_path="videos/v.mp4")
+            post = Post(
+                video_id=video.id, social_account_id=account.id, platform="tiktok",
+                status=PostStatus.PUBLISHED, published_at=now - timedelta(days=1),
+            )
+            db.add_all([video, post])
+            db.flush()
+            db.add_all(
+                [
+                    Analytics(post_id=post.id, views=views, likes=likes * views // 1000),
+                    Pattern(video_id=video.id, type="pacing", score=0.0, data={}),
+                ]
+            )
+    db.commit()
+
+    def scores():
+        db.expire_all()
+        rows = db.query(Video.user_id, Pattern.score).join(Pattern, Pattern.video_id == Video.id).all()
+        return sorted(score for user_id, score in rows if user_id == test_user.id)
+
+    rescore_patterns(db)
+    nightly = scores()
+    stats = rescore_patterns(db, user_ids=[test_user.id])
+
+    assert stats["videos_scored"] == 3
+    assert scores() == pytest.approx(nightly)
+    assert nightly[1] < 50  # small account sits below the platform average
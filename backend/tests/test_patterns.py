@@ -42,3 +42,38 @@ def test_get_pattern_insights_empty(client, auth_headers):
     data = response.json()
     assert data["total_patterns"] == 0
     assert data["average_score"] == 0.0
+
+
+def test_get_pattern_insights_aggregates_in_database(client, db, test_user, auth_headers):
+    """Counts, averages and top patterns per type come from grouped/ranked queries."""
+    from uuid import uuid4
+
+    from app.models.pattern import Pattern
+    from app.models.user import User
+    from app.models.video import Video
+
+    other = User(id=uuid4(), supabase_user_id=uuid4(), email="other@example.com", name="Other", is_active=True)
+    mine = Video(id=uuid4(), user_id=test_user.id, filename="a.mp4", storage_path="videos/a.mp4")
+    theirs = Video(id=uuid4(), user_id=other.id, filename="b.mp4", storage_path="videos/b.mp4")
+    db.add_all([other, mine, theirs])
+    db.commit()
+    hook_scores = [10.0, 50.0, 90.0, 70.0, 30.0]
+    cut_scores = [60.0, 80.0]
+    for score in hook_scores:
+        db.add(Pattern(video_id=mine.id, type="hook_timing", score=score, data={"score": score}))
+    for score in cut_scores:
+        db.add(Pattern(video_id=mine.id, type="cut_frequency", score=score, data={"score": score}))
+    db.add(Pattern(video_id=theirs.id, type="hook_timing", score=100.0, data={}))
+    db.commit()
+
+    response = client.get("/api/v1/patterns/insights", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_patterns"] == 7
+    assert data["average_score"] == pytest.approx(sum(hook_scores + cut_scores) / 7)
+    hooks, cuts = data["by_type"]
+    assert (hooks["type"], hooks["count"], hooks["average_score"]) == ("hook_timing", 5, 50.0)
+    assert [p["score"] for p in hooks["top_patterns"]] == [90.0, 70.0, 50.0]
+    assert [p["data"]["score"] for p in cuts["top_patterns"]] == [80.0, 60.0]
+    assert [p["score"] for p in data["top_performing"]] == [90.0, 80.0, 70.0, 60.0, 50.0, 30.0, 10.0]
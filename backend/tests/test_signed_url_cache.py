@@ -0,0 +1,97 @@
+"""
+Signed URL cache and bulk signing tests.
+"""
+
+import json
+import time
+
+from app.services.signed_url_cache import SignedUrlCache
+from app.services.storage_service import SupabaseStorageService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        return []
+
+
+class FakeBucket:
+    def __init__(self):
+        self.sign_calls = []
+
+    def create_signed_urls(self, paths, expires_in):
+        self.sign_calls.append(list(paths))
+        return [
+            {"path": path, "signedURL": f"https://signed.example.com/{path}?ttl={expires_in}", "error": None}
+            for path in paths
+        ]
+
+
+def _storage(cache):
+    service = SupabaseStorageService.__new__(SupabaseStorageService)
+    service.bucket = "videos"
+    service.private = True
+    service.signed_ttl = 3600
+    service.url_cache = cache
+    bucket = FakeBucket()
+    service._bucket_client = lambda: bucket
+    return service, bucket
+
+
+def test_cache_serves_local_then_shares_through_redis():
+    redis = FakeRedis()
+    first = SignedUrlCache("videos", refresh_margin=60, redis_client=redis)
+    first.put_many({"videos/a.mp4": "https://signed/a"}, expires_in=3600)
+
+    assert first.get_many(["videos/a.mp4", "videos/b.mp4"]) == {"videos/a.mp4": "https://signed/a"}
+
+    # A second worker process starts cold but finds the URL in Redis.
+    second = SignedUrlCache("videos", refresh_margin=60, redis_client=redis)
+    assert second.get_many(["videos/a.mp4"]) == {"videos/a.mp4": "https://signed/a"}
+    assert second.stats()["redis_hits"] == 1
+    assert first.stats()["misses"] == 1
+
+
+def test_cache_drops_urls_inside_refresh_margin():
+    redis = FakeRedis()
+    cache = SignedUrlCache("videos", refresh_margin=120, redis_client=redis)
+    cache.put_many({"videos/a.mp4": "https://signed/a"}, expires_in=100)
+
+    assert cache.get_many(["videos/a.mp4"]) == {}
+    # TTL shorter than the margin is never written to Redis.
+    assert redis.values == {}
+
+    redis.values["signed_url:videos:videos/b.mp4"] = json.dumps(
+        {"url": "https://signed/b", "expires_at": time.time() + 30}
+    )
+    assert cache.get_many(["videos/b.mp4"]) == {}
+
+
+def test_build_public_urls_signs_misses_in_one_call():
+    cache = SignedUrlCache("videos", refresh_margin=60, use_redis=False)
+    storage, bucket = _storage(cache)
+
+    urls = storage.build_public_urls(["videos/a.mp4", "thumbnails/a.jpg", "videos/a.mp4"])
+    assert bucket.sign_calls == [["videos/a.mp4", "thumbnails/a.jpg"]]
+    assert urls["thumbnails/a.jpg"].startswith("https://signed.example.com/thumbnails/a.jpg")
+
+    again = storage.build_public_urls(["videos/a.mp4", "thumbnails/a.jpg", "videos/b.mp4"])
+    assert bucket.sign_calls[-1] == ["videos/b.mp4"]
+    assert again["videos/a.mp4"] == urls["videos/a.mp4"]
+
+    assert storage.build_public_url("videos/b.mp4") == again["videos/b.mp4"]
+    assert len(bucket.sign_calls) == 2
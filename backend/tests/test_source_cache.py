@@ -0,0 +1,105 @@
+"""
+Source cache tests.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.source_cache import SourceCache
+
+
+def _writer(payload: bytes, calls: list, delay: float = 0.0):
+    def fill(dest):
+        calls.append(dest)
+        if delay:
+            time.sleep(delay)
+        dest.write_bytes(payload)
+
+    return fill
+
+
+def test_fetch_downloads_once_and_reuses_entry(tmp_path):
+    cache = SourceCache(str(tmp_path), max_bytes=1024)
+    calls: list = []
+
+    first = cache.fetch("videos/u/a.mp4", "etag-1", 4, _writer(b"abcd", calls))
+    second = cache.fetch("videos/u/a.mp4", "etag-1", 4, _writer(b"abcd", calls))
+
+    assert first == second
+    assert first.read_bytes() == b"abcd"
+    assert first.suffix == ".mp4"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes_downloaded"] == 4
+    assert stats["hit_rate"] == 0.5
+
+
+def test_fetch_keys_on_etag(tmp_path):
+    cache = SourceCache(str(tmp_path), max_bytes=1024)
+    calls: list = []
+
+    old = cache.fetch("videos/u/a.mp4", "etag-1", 3, _writer(b"old", calls))
+    new = cache.fetch("videos/u/a.mp4", "etag-2", 3, _writer(b"new", calls))
+
+    assert old != new
+    assert new.read_bytes() == b"new"
+    assert len(calls) == 2
+
+
+def test_concurrent_fetches_are_coalesced(tmp_path):
+    cache = SourceCache(str(tmp_path), max_bytes=1024)
+    calls: list = []
+    results: list = []
+
+    def worker():
+        results.append(cache.fetch("videos/u/a.mp4", "e", 4, _writer(b"abcd", calls, delay=0.05)))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 4
+
+
+def test_evicts_least_recently_used_under_budget(tmp_path):
+    cache = SourceCache(str(tmp_path), max_bytes=10, pin_seconds=0)
+    calls: list = []
+
+    a = cache.fetch("a.mp4", "e", 4, _writer(b"aaaa", calls))
+    b = cache.fetch("b.mp4", "e", 4, _writer(b"bbbb", calls))
+    os.utime(a, (time.time() - 100, time.time() - 100))
+    os.utime(b, (time.time() - 50, time.time() - 50))
+    cache.fetch("a.mp4", "e", 4, _writer(b"aaaa", calls))  # hit refreshes a
+    c = cache.fetch("c.mp4", "e", 4, _writer(b"cccc", calls))
+
+    assert a.exists()
+    assert not b.exists()
+    assert c.exists()
+    assert cache.stats()["evictions"] == 1
+
+
+def test_failed_fill_leaves_no_entry(tmp_path):
+    cache = SourceCache(str(tmp_path), max_bytes=1024)
+
+    def broken(dest):
+        dest.write_bytes(b"ab")
+        raise RuntimeError("network down")
+
+    with pytest.raises(RuntimeError, match="network down"):
+        cache.fetch("a.mp4", "e", 4, broken)
+
+    entry = cache.entry_path(cache.make_key("a.mp4", "e", 4), "a.mp4")
+    assert not entry.exists()
+    assert not list(entry.parent.glob(f"{entry.name}*"))
+    assert not [p for p in tmp_path.rglob("*") if p.is_file()]
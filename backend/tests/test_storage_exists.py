@@ -0,0 +1,101 @@
+"""
+Supabase existence checks: HEAD lookups, short-TTL cache and batching.
+"""
+
+import threading
+
+import httpx
+
+from app.services.storage_service import SupabaseStorageService
+
+
+def _storage(present, calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        name = request.url.path.split("/storage/v1/object/videos/", 1)[1]
+        if name in present:
+            return httpx.Response(200, headers={"content-length": "10", "etag": '"abc"'})
+        return httpx.Response(400, json={"error": "not_found"})
+
+    service = SupabaseStorageService.__new__(SupabaseStorageService)
+    service.bucket = "videos"
+    service.supabase_url = "https://project.supabase.co"
+    service.url_cache = None
+    service.exists_ttl = 30.0
+    service._exists_cache = {}
+    service._exists_lock = threading.Lock()
+    service._http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_exists_uses_head_and_caches_result():
+    calls = []
+    storage = _storage({"videos/u1/a.mp4"}, calls)
+
+    assert storage.exists("videos/u1/a.mp4") is True
+    assert storage.exists("videos/u1/a.mp4") is True
+    assert storage.exists("videos/u1/missing.mp4") is False
+    assert calls == [
+        ("HEAD", "/storage/v1/object/videos/videos/u1/a.mp4"),
+        ("HEAD", "/storage/v1/object/videos/videos/u1/missing.mp4"),
+    ]
+
+
+def test_exists_many_checks_each_object_once():
+    calls = []
+    storage = _storage({"videos/u1/a.mp4", "videos/u1/b.mp4"}, calls)
+
+    result = storage.exists_many(["videos/u1/a.mp4", "videos/u1/b.mp4", "videos/u1/c.mp4", "../escape"])
+
+    assert result == {
+        "videos/u1/a.mp4": True,
+        "videos/u1/b.mp4": True,
+        "videos/u1/c.mp4": False,
+        "../escape": False,
+    }
+    assert len(calls) == 3
+    assert all(method == "HEAD" for method, _path in calls)
+
+
+class _FakeBucket:
+    """Stands in for the supabase-py bucket client: upload/remove succeed and are recorded."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def upload(self, path, content, file_options=None):
+        self.calls.append(("upload", path))
+        return {"Key": path}
+
+    def remove(self, paths):
+        self.calls.extend(("remove", path) for path in paths)
+        return [{"name": path} for path in paths]
+
+
+class _FakeSupabase:
+    def __init__(self, calls):
+        self.storage = self
+        self.bucket = _FakeBucket(calls)
+
+    def from_(self, name):
+        return self.bucket
+
+
+def test_writes_and_deletes_update_cached_existence():
+    calls = []
+    storage = _storage(set(), calls)
+    storage.client = _FakeSupabase(calls)
+
+    assert storage.exists("videos/u1/new.mp4") is False
+    storage.save_bytes("videos/u1/new.mp4", b"video", "video/mp4")
+    assert storage.exists("videos/u1/new.mp4") is True
+
+    storage.delete("videos/u1/new.mp4")
+    assert storage.exists("videos/u1/new.mp4") is False
+
+    # One HEAD before the upload; the write and delete answer the later checks.
+    assert calls == [
+        ("HEAD", "/storage/v1/object/videos/videos/u1/new.mp4"),
+        ("upload", "videos/u1/new.mp4"),
+        ("remove", "videos/u1/new.mp4"),
+    ]
@@ -0,0 +1,95 @@
+"""
+Columnar template segment storage tests.
+"""
+
+import json
+from uuid import uuid4
+
+from app.models.pattern import VideoTemplate
+from app.models.video import Video
+from app.schemas.pattern import AudioSegment, HybridSegment, SceneType, VisualSegment
+from app.services.template_codec import SegmentColumns, decode_segments, encode_segments
+
+
+def _segments(count):
+    segments = []
+    for i in range(count):
+        cut = i % 10 == 0
+        segments.append(
+            HybridSegment(
+                timestamp_ms=i * 200,
+                timestamp_end_ms=i * 200 + 200,
+                visual=VisualSegment(
+                    scene_type=SceneType.CLOSE_UP if i % 20 < 10 else SceneType.WIDE_SHOT,
+                    subject="host",
+                    transition_in="cut" if cut else None,
+                    dominant_colors=["#ff0000", "#00ff00"] if cut else ["#ff0000"],
+                    brightness=0.5 if i % 3 else None,
+                    motion=(i % 100) / 100,
+                ),
+                audio=AudioSegment(type="speech", volume_level=0.25, music_present=i % 2 == 0, speech_present=True),
+                description=f"host explains step {i // 25}",
+                is_key_moment=cut,
+                key_moment_type="transition" if cut else None,
+            ).model_dump(mode="json")
+        )
+    return segments
+
+
+def test_round_trip_is_lossless():
+    segments = _segments(120)
+    segments[5]["visual"]["lens"] = "wide"  # keys outside the schema survive
+    segments[6]["speaker"] = "guest"
+    del segments[7]["audio"]["music_bpm"]  # and so do missing keys
+
+    assert decode_segments(encode_segments(segments)) == segments
+    assert decode_segments(encode_segments([])) == []
+
+
+def test_blob_is_much_smaller_than_json():
+    segments = _segments(1500)
+
+    assert len(encode_segments(segments)) * 10 < len(json.dumps(segments))
+
+
+def test_columns_and_row_lookup():
+    segments = _segments(300)
+    columns = SegmentColumns(encode_segments(segments))
+
+    assert len(columns) == 300
+    assert columns.timestamps[:3].tolist() == [0, 200, 400]
+    assert columns.column("visual.brightness")[:3] == [None, 0.5, 0.5]
+    assert columns.index_at(1050) == 5
+    assert columns.index_at(60_000) is None
+    assert columns.segment(137) == segments[137]
+    assert columns.rows([3, 250]) == [segments[3], segments[250]]
+
+
+def test_video_template_reads_segments_lazily(db, test_user):
+    video = Video(id=uuid4(), user_id=test_user.id, filename="a.mp4", storage_path="videos/a.mp4")
+    db.add(video)
+    db.commit()
+    segments = _segments(50)
+    template = {"video_id": str(video.id), "duration_seconds": 10.0, "segments": segments, "summary": {"pacing": "fast"}}
+    db.add(VideoTemplate.from_hybrid_template(template))
+    db.commit()
+    db.expunge_all()
+
+    stored = db.query(VideoTemplate).one()
+    assert "segments" not in stored.template_data
+    assert stored.total_segments == 50
+    assert stored.get_summary() == {"pacing": "fast"}
+    assert "segments_blob" not in stored.__dict__  # deferred until segments are read
+
+    assert stored.get_segment_at(1010) == segments[5]
+    assert [s["timestamp_ms"] for s in stored.get_key_moments()] == [0, 2000, 4000, 6000, 8000]
+    assert stored.get_segments() == segments
+
+
+def test_json_templates_still_readable():
+    segments = _segments(5)
+    template = VideoTemplate.from_hybrid_template({"segments": segments, "summary": {}}, columnar=False)
+
+    assert template.segments_blob is None
+    assert template.get_segments() == segments
+    assert template.get_segment_at(450) == segments[2]
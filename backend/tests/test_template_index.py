@@ -0,0 +1,156 @@
+"""
+Template feature vector and similarity search tests.
+"""
+
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.models.pattern import VideoTemplate
+from app.models.user import User
+from app.models.video import Video
+from app.services.template_index import FEATURE_DIM, TemplateIndex, get_template_index_registry, template_features
+
+
+def _summary(pacing="fast", cuts=12, tags=("talking-head", "tutorial"), music=80.0):
+    return {
+        "pacing": pacing,
+        "total_cuts": cuts,
+        "average_shot_duration_ms": 2500,
+        "hook_duration_ms": 2000,
+        "music_coverage_percent": music,
+        "speech_coverage_percent": 90.0,
+        "text_overlay_count": 4,
+        "style_tags": list(tags),
+    }
+
+
+def _template(video_id, scenes, **summary):
+    segments = [
+        {"timestamp_ms": i * 200, "timestamp_end_ms": i * 200 + 200, "visual": {"scene_type": scene}}
+        for i, scene in enumerate(scenes)
+    ]
+    return VideoTemplate.from_hybrid_template(
+        {"video_id": str(video_id), "duration_seconds": len(scenes) * 0.2, "segments": segments, "summary": _summary(**summary)}
+    )
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    get_template_index_registry().clear()
+    yield
+    get_template_index_registry().clear()
+
+
+def test_features_rank_similar_templates_higher():
+    base = template_features(_summary(), ["talking-head"] * 40 + ["close-up"] * 10, 10.0)
+    near = template_features(_summary(cuts=10), ["talking-head"] * 35 + ["close-up"] * 15, 10.0)
+    far = template_features(
+        _summary(pacing="very-slow", cuts=1, tags=("cinematic",), music=0.0), ["aerial"] * 50, 10.0
+    )
+
+    assert base.shape == (FEATURE_DIM,)
+    assert float(np.linalg.norm(base)) == pytest.approx(1.0, abs=1e-5)
+    assert float(base @ near) > 0.95 > float(base @ far)
+
+
+def test_exact_search_matches_brute_force_and_excludes():
+    rng = np.random.default_rng(3)
+    vectors = rng.random((500, FEATURE_DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = TemplateIndex(list(range(500)), vectors)
+    query = vectors[42]
+
+    results = index.search(query, k=5, exclude=[42])
+
+    expected = [i for i in np.argsort(-(vectors @ query)).tolist() if i != 42][:5]
+    assert [key for key, _score in results] == expected
+    assert [score for _key, score in results] == sorted((score for _key, score in results), reverse=True)
+
+
+def test_approximate_search_finds_most_true_neighbours():
+    rng = np.random.default_rng(5)
+    centers = rng.normal(size=(40, FEATURE_DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, 40, 4000)] + 0.1 * rng.normal(size=(4000, FEATURE_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = TemplateIndex(list(range(4000)), vectors)
+
+    recall = []
+    for position in range(0, 4000, 200):
+        exact = {key for key, _score in index.search(vectors[position], k=10)}
+        approx = {key for key, _score in index.search(vectors[position], k=10, approximate=True, nprobe=4)}
+        recall.append(len(exact & approx) / 10)
+
+    assert np.mean(recall) >= 0.9
+
+
+
+def test_approximate_search_probes_more_lists_when_exclusions_empty_them():
+    rng = np.random.default_rng(7)
+    vectors = rng.random((400, FEATURE_DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = TemplateIndex(list(range(400)), vectors)
+    index.build_lists(lists=20)
+    nearest = int(np.argmax(index._centroids @ vectors[0]))
+    closest_list = set(index._lists[nearest].tolist())
+
+    results = index.search(vectors[0], k=10, exclude=closest_list, approximate=True, nprobe=1)
+
+    assert len(results) == 10
+    assert not closest_list & {key for key, _score in results}
+    everything = index.search(vectors[0], k=400, exclude=[0], approximate=True, nprobe=1)
+    assert len(everything) == 399
+
+def test_similar_endpoint_ranks_user_templates(client, db, test_user, auth_headers):
+    other_user = User(id=uuid4(), supabase_user_id=uuid4(), email="other@example.com", name="Other", is_active=True)
+    db.add(other_user)
+    videos = {}
+    for name, owner in [("query", test_user), ("near", test_user), ("far", test_user), ("foreign", other_user)]:
+        videos[name] = Video(id=uuid4(), user_id=owner.id, filename=f"{name}.mp4", storage_path=f"videos/{name}.mp4")
+        db.add(videos[name])
+    db.commit()
+    talking = ["talking-head"] * 40 + ["close-up"] * 10
+    db.add_all(
+        [
+            _template(videos["query"].id, talking),
+            _template(videos["near"].id, talking[5:] + ["close-up"] * 5, cuts=10),
+            _template(videos["far"].id, ["aerial"] * 50, pacing="very-slow", cuts=1, tags=("cinematic",), music=0.0),
+            _template(videos["foreign"].id, talking),
+        ]
+    )
+    db.commit()
+
+    response = client.get(f"/api/v1/patterns/similar/{videos['query'].id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["video_id"] for item in items] == [str(videos["near"].id), str(videos["far"].id)]
+    assert items[0]["similarity"] > items[1]["similarity"]
+    assert items[0]["pacing"] == "fast"
+
+    approximate = client.get(
+        f"/api/v1/patterns/similar/{videos['query'].id}", params={"approximate": True, "limit": 1}, headers=auth_headers
+    )
+    assert [item["video_id"] for item in approximate.json()["items"]] == [str(videos["near"].id)]
+
+    missing = client.get(f"/api/v1/patterns/similar/{videos['foreign'].id}", headers=auth_headers)
+    assert missing.status_code == 404
+
+
+def test_stale_feature_vectors_are_backfilled(db, test_user):
+    video = Video(id=uuid4(), user_id=test_user.id, filename="a.mp4", storage_path="videos/a.mp4")
+    db.add(video)
+    db.commit()
+    template = _template(video.id, ["close-up"] * 20)
+    template.feature_vector = None
+    template.feature_version = None
+    db.add(template)
+    db.commit()
+
+    index, videos = get_template_index_registry().get(db, test_user.id)
+
+    assert len(index) == 1 and videos[template.id] == video.id
+    db.refresh(template)
+    assert template.feature_vector is not None and template.feature_version is not None
+    assert get_template_index_registry().get(db, test_user.id)[0] is index
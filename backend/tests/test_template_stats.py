@@ -0,0 +1,104 @@
+"""
+Local template statistics and hierarchical summary tests.
+"""
+
+import asyncio
+import json
+
+from app.core.config import settings
+from app.schemas.pattern import AudioSegment, HybridSegment, PacingType, SceneType, VisualSegment
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+from app.services.template_stats import describe_segments, palette, segment_statistics
+
+
+def _segment(ts, transition=None, text=None, color="#ff0000", music=False, description="host talks"):
+    return HybridSegment(
+        timestamp_ms=ts,
+        timestamp_end_ms=ts + 200,
+        visual=VisualSegment(
+            scene_type=SceneType.CLOSE_UP,
+            subject="host",
+            transition_in=transition,
+            text_overlay=text,
+            dominant_colors=[color],
+        ),
+        audio=AudioSegment(type="speech", volume_level=0.5, music_present=music, speech_present=True),
+        description=description,
+    )
+
+
+def test_statistics_cover_every_segment():
+    segments = [_segment(i * 200, music=i < 5) for i in range(20)]
+    segments[10] = _segment(2000, transition="cut", text="Wait for it")
+    segments[11] = _segment(2200, text="Wait for it")
+    segments[15] = _segment(3000, transition="cut", text="Wait for it")
+
+    stats = segment_statistics(segments, total_duration_ms=4000)
+
+    assert stats["total_cuts"] == 2
+    assert stats["shot_starts_ms"] == [0, 2000, 3000]
+    assert stats["average_shot_duration_ms"] == 1333
+    assert stats["pacing"] == PacingType.FAST
+    assert stats["music_coverage_percent"] == 25.0
+    assert stats["speech_coverage_percent"] == 100.0
+    assert stats["text_overlay_count"] == 2
+
+
+def test_palette_merges_near_colors_and_ranks_by_weight():
+    segments = [_segment(0, color="#ff0000"), _segment(200, color="#fe0101"), _segment(400, color="#0000ff")]
+
+    assert palette(segments, count=2) == ["#fe0000", "#0000ff"]
+
+
+def test_describe_segments_collapses_runs():
+    segments = [_segment(i * 200) for i in range(5)] + [_segment(1000, transition="cut", description="product shot")]
+
+    assert describe_segments(segments) == [
+        "0.0-0.8s | close-up | host | host talks",
+        "1.0s | close-up | host | after cut | product shot",
+    ]
+
+
+class RecordingModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+
+        class Response:
+            text = json.dumps({
+                "summary": "window summary",
+                "key_moments": [{"timestamp_ms": 0, "type": "hook", "description": "opening"}],
+                "style_tags": ["talking-head"],
+                "hook_duration_ms": 1500,
+                "hook_description": "direct address",
+                "content_structure": "intro then demo",
+            })
+
+        return Response()
+
+
+def test_long_video_summary_is_hierarchical_and_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_WINDOW_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "SUMMARY_REDUCE_FANIN", 4)
+    model = RecordingModel()
+    service = PatternService("test-key", model=model, rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+    # 10 minutes at 200ms, each segment distinct so nothing collapses.
+    segments = [
+        _segment(i * 200, transition="cut" if i % 50 == 0 and i else None, description=f"beat {i}")
+        for i in range(3000)
+    ]
+
+    summary = asyncio.run(service.generate_summary(segments, {"duration": 600}))
+
+    window_prompts = [p for p in model.prompts if "Log:" in p]
+    assert len(window_prompts) == 60 + 15 + 4  # 60 windows, reduced 4 at a time until <= 4 remain
+    assert any("590.0s to" in p for p in window_prompts)
+    final = model.prompts[-1]
+    assert final.count("window summary") == 4
+    assert max(len(p) for p in model.prompts) < 20_000
+    assert summary.total_cuts == 59
+    assert summary.hook_duration_ms == 1500
+    assert summary.content_structure == "intro then demo"
@@ -51,6 +51,23 @@ def test_render_video_segment_includes_crop_filter(monkeypatch, tmp_path):
     assert "crop=" in vf_value
 
 
+def test_render_video_segment_matches_blank_segment_stream_layout(monkeypatch, tmp_path):
+    renderer = TimelineRenderer(_DummyStorage(), temp_root=str(tmp_path))
+    captured = []
+
+    monkeypatch.setattr(timeline_renderer, "_has_audio_stream", lambda _path: True)
+    monkeypatch.setattr(timeline_renderer, "_ffprobe_info", lambda _path: {"width": 1920, "height": 1080})
+    monkeypatch.setattr(renderer, "_run", captured.append)
+
+    settings = {"width": 1080, "height": 1920, "fps": 30, "bitrate": "4M"}
+    renderer._render_video_segment({"duration": 2}, "input.mp4", settings, str(tmp_path / "clip.mp4"))
+    renderer._render_blank_segment(1.0, settings, str(tmp_path / "gap.mp4"))
+
+    clip_cmd, blank_cmd = captured
+    for flag in ("-ar", "-ac", "-g", "-pix_fmt", "-video_track_timescale"):
+        assert clip_cmd[clip_cmd.index(flag) + 1] == blank_cmd[blank_cmd.index(flag) + 1]
+
+
 def test_shape_overlay_image_generation(tmp_path):
     renderer = TimelineRenderer(_DummyStorage(), temp_root=str(tmp_path))
     shape_types = ["square", "circle", "outline", "arrow"]
@@ -98,6 +98,40 @@ def test_stream_video_requires_auth_when_not_debug(client):
     assert response.status_code == 401
 
 
+def test_analyze_video_trusts_confirmed_storage_record(client, auth_headers, test_user, db, monkeypatch):
+    """Supabase analysis should skip the storage lookup for objects we already confirmed."""
+    video = Video(
+        id=uuid4(),
+        user_id=test_user.id,
+        filename="demo.mp4",
+        original_filename="demo.mp4",
+        storage_path=f"videos/{test_user.supabase_user_id}/demo.mp4",
+        status=VideoStatus.UPLOADED,
+        video_metadata={"storage_confirmed": True},
+    )
+    db.add(video)
+    db.commit()
+
+    def fail_exists(_path):
+        raise AssertionError("storage.exists should not be called for confirmed objects")
+
+    class FakeTask:
+        id = "task-1"
+
+    monkeypatch.setattr(videos_endpoint.storage, "exists", fail_exists)
+    monkeypatch.setattr(videos_endpoint, "_queue_task", lambda *_args, **_kwargs: FakeTask())
+
+    previous_storage_backend = settings.STORAGE_BACKEND
+    settings.STORAGE_BACKEND = "supabase"
+    try:
+        response = client.post(f"/api/v1/videos/{video.id}/analyze", headers=auth_headers)
+    finally:
+        settings.STORAGE_BACKEND = previous_storage_backend
+
+    assert response.status_code == 200
+    assert response.json()["task_id"] == "task-1"
+
+
 def test_stream_video_get_forwards_range_header(client, auth_headers, test_user, db, monkeypatch):
     """GET /videos/{id}/stream should forward range headers to remote stream fetch."""
     video = Video(
@@ -316,6 +350,46 @@ def test_media_urls_respects_include_flags(client, auth_headers, test_user, db):
     assert "thumbnail_url" in item
 
 
+def test_media_urls_resolves_all_paths_in_one_batch(client, auth_headers, test_user, db, monkeypatch):
+    """Batch media-url endpoint should resolve every requested path with a single storage call."""
+    videos = []
+    for index in range(3):
+        video = Video(
+            id=uuid4(),
+            user_id=test_user.id,
+            filename=f"clip{index}.mp4",
+            original_filename=f"clip{index}.mp4",
+            storage_path=f"videos/{test_user.supabase_user_id}/clip{index}.mp4",
+            status=VideoStatus.UPLOADED,
+            video_metadata={"thumbnail_storage_path": f"thumbnails/{test_user.supabase_user_id}/clip{index}.jpg"},
+        )
+        db.add(video)
+        videos.append(video)
+    db.commit()
+
+    calls = []
+
+    def fake_build_public_urls(storage_paths, _request=None):
+        paths = list(storage_paths)
+        calls.append(paths)
+        return {path: f"https://cdn.example.com/{path}" for path in paths}
+
+    monkeypatch.setattr(videos_endpoint.storage, "build_public_urls", fake_build_public_urls)
+
+    response = client.post(
+        "/api/v1/videos/media-urls",
+        json={"video_ids": [str(v.id) for v in videos], "include_video": True, "include_thumbnail": True},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert len(calls) == 1
+    assert len(calls[0]) == 6
+    items = response.json()["items"]
+    assert items[0]["video_url"] == f"https://cdn.example.com/{videos[0].storage_path}"
+    assert items[2]["thumbnail_url"].endswith("clip2.jpg")
+
+
 def test_media_urls_rejects_invalid_id(client, auth_headers):
     """Batch media-url endpoint should fail fast on invalid UUIDs."""
     response = client.post(
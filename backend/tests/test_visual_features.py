@@ -0,0 +1,71 @@
+"""
+Local visual pre-analysis tests.
+"""
+
+import numpy as np
+
+from app.schemas.pattern import TransitionType
+from app.services.pattern_service import PatternService
+from app.services.rate_limiter import ModelRateLimiter
+from app.services.visual_features import VisualAnalyzer, dominant_colors
+
+
+def _solid(rgb, width=128, height=72):
+    return np.full((height, width, 3), rgb, dtype=np.uint8)
+
+
+def _service():
+    return PatternService("test-key", model=object(), rate_limiter=ModelRateLimiter("test", rpm=0, tpm=0))
+
+
+def test_dominant_colors_orders_clusters_by_area():
+    frame = _solid((200, 30, 30))
+    frame[:, :32] = (20, 40, 220)
+
+    assert dominant_colors(frame, k=2) == ["#c81e1e", "#1428dc"]
+
+
+def test_analyzer_measures_brightness_motion_cuts_and_fades():
+    rng = np.random.default_rng(1)
+    shot_a = rng.integers(90, 110, (72, 128, 3), dtype=np.uint8)
+    shot_b = rng.integers(200, 230, (72, 128, 3), dtype=np.uint8)
+    sequence = [shot_a] * 6 + [shot_b] * 6 + [_solid((0, 0, 0))] * 2 + [shot_a] * 3
+    analyzer = VisualAnalyzer(color_count=2)
+    for index, pixels in enumerate(sequence):
+        analyzer.observe(index * 200, pixels)
+
+    features = analyzer.features()
+
+    assert abs(features[0]["brightness"] - 100 / 255) < 0.02
+    assert features[1200]["transition_in"] == "cut"
+    assert features[1200]["motion"] > 0.3
+    assert features[1400]["motion"] == 0
+    assert features[2400]["transition_in"] == "fade-out"
+    assert features[2800]["transition_in"] == "fade-in"
+    assert [ts for ts, f in features.items() if f["transition_in"]] == [1200, 2400, 2800]
+
+
+def test_measured_visuals_replace_model_fields_and_shrink_prompt():
+    service = _service()
+    analysis = {
+        "timestamp_ms": 400,
+        "visual": {"scene_type": "close-up", "subject": "host", "transition_in": "wipe", "brightness": 0.9},
+    }
+
+    segment = service._convert_to_hybrid_segment(
+        analysis,
+        200,
+        visual_features={"brightness": 0.25, "dominant_colors": ["#112233"], "motion": 0.4, "transition_in": "cut"},
+    )
+
+    assert segment.visual.subject == "host"
+    assert segment.visual.brightness == 0.25
+    assert segment.visual.dominant_colors == ["#112233"]
+    assert segment.visual.motion == 0.4
+    assert segment.visual.transition_in == TransitionType.CUT
+
+    full = service._build_segment_analysis_prompt(0, 10)
+    semantic = service._build_segment_analysis_prompt(0, 10, measured_visuals=True)
+    for field in ("dominant_colors", "brightness", "transition_in"):
+        assert field in full and field not in semantic
+    assert len(semantic) < len(full)